@@ -1,9 +1,9 @@
 # ================================================================
 # Script: Codigo_conjunto.py
 # Autor: 
-- Angela Rico: Análisis de demografía básica.  
-- Ángela Tatiana Orjuela: Análisis de estructura familiar.  
-- Karen Juliana Suárez Cruz: Calidad de datos  
+#   - Angela Rico: Análisis de demografía básica.  
+#   - Ángela Tatiana Orjuela: Análisis de estructura familiar.  
+#   - Karen Juliana Suárez Cruz: Calidad de datos  
 # Descripción: 
 #   Este script realiza un proceso completo de calidad y depuración 
 #   sobre la base de datos de la Fuerza Aérea Colombiana (FAC).
@@ -36,52 +36,295 @@
 # ================================================================
 
 # ================== 0. IMPORTACIÓN DE LIBRERÍAS ==================
-import pandas as pd
-import numpy as np
-import unicodedata
+import argparse
+import contextlib
+import cProfile
+import functools
+import glob
+import hashlib
+import html
+import importlib
+import inspect
+import itertools
+import json
+import os
 import re
+import time
+import traceback
+import tracemalloc
+import unicodedata
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict, is_dataclass
+from string import Template
+
+import numpy as np
+import pandas as pd
+
+# scikit-learn se importa solo en la etapa de imputación (paso 7), que es la única que lo usa
+
+# ================== 0B. PERFILADO DE ETAPAS ==================
+
+def forma_de(obj):
+    """Forma de un DataFrame, arreglo o matriz dispersa; longitud de listas y diccionarios; None si no aplica."""
+    forma = getattr(obj, 'shape', None)
+    if forma is not None:
+        return [int(n) for n in forma]
+    if isinstance(obj, tuple) and obj and getattr(obj[0], 'shape', None) is not None:
+        return forma_de(obj[0])   # p. ej. (tabla, niveles)
+    if isinstance(obj, (list, tuple, dict)):
+        return [len(obj)]
+    return None
+
+def _datos_entrada(argumentos):
+    """Primer argumento con forma (o el DataFrame `df` de un objeto, p. ej. self)."""
+    for argumento in argumentos:
+        if isinstance(argumento, str):
+            continue
+        for candidato in (argumento, getattr(argumento, 'df', None)):
+            if forma_de(candidato) is not None:
+                return candidato
+    return None
+
+class PerfiladorEtapas:
+    """
+    Tiempo de reloj, tiempo de CPU, pico de memoria (tracemalloc) y formas de
+    entrada/salida de cada etapa, como context manager o como decorador.
+
+    Mientras está inactivo no mide nada: cada etapa cuesta una comprobación.
+    Las etapas pueden anidarse; el pico de una etapa es lo máximo que creció la
+    memoria mientras estuvo abierta (incluidas sus etapas internas) respecto de
+    la que había al entrar. Opcionalmente, las etapas de primer nivel corren
+    bajo cProfile y sus estadísticas se vuelcan a un archivo .prof.
+    """
+
+    def __init__(self):
+        self.activo = False
+        self.memoria = False
+        self.etapas = []
+        self.fecha = None
+        self._pila = []
+        self._perfil = None
+        self._inicio = time.perf_counter()
+        self._tracemalloc_propio = False
+
+    def activar(self, memoria: bool = True, cprofile: bool = False) -> 'PerfiladorEtapas':
+        """
+        Empieza una corrida nueva (descarta las etapas registradas)
+
+        Args:
+            memoria (bool): Medir picos de memoria con tracemalloc (hace más lenta la ejecución)
+            cprofile (bool): Ejecutar las etapas de primer nivel bajo cProfile
+        """
+        self.activo = True
+        self.memoria = memoria
+        self.etapas = []
+        self.fecha = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self._inicio = time.perf_counter()
+        if memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracemalloc_propio = True
+        if cprofile:
+            self._perfil = cProfile.Profile()
+        return self
+
+    def desactivar(self):
+        """Deja de medir; las etapas registradas se conservan"""
+        if self._tracemalloc_propio:
+            tracemalloc.stop()
+            self._tracemalloc_propio = False
+        self.activo = False
+
+    @contextlib.contextmanager
+    def etapa(self, nombre: str, entrada=None):
+        """
+        Mide el bloque como una etapa; el registro entregado admite registro['salida'] = objeto
+
+        Args:
+            nombre (str): Nombre de la etapa en la traza
+            entrada: Datos de entrada (se guarda solo su forma)
+        """
+        if not self.activo:
+            yield {}
+            return
+
+        registro = {'etapa': nombre, 'padre': self._pila[-1]['registro']['etapa'] if self._pila else None,
+                    'nivel': len(self._pila), 'proceso': os.getpid(),
+                    'inicio_s': time.perf_counter() - self._inicio,
+                    'entrada': forma_de(entrada), 'salida': None}
+        marco = {'registro': registro, 'pico_internas': 0}
+        self.etapas.append(registro)
+        if self.memoria:
+            marco['base'], marco['pico_previo'] = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        if self._perfil is not None and not self._pila:
+            self._perfil.enable()
+        self._pila.append(marco)
+        reloj, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield registro
+        except BaseException as e:
+            registro['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            registro['tiempo_s'] = time.perf_counter() - reloj
+            registro['cpu_s'] = time.process_time() - cpu
+            self._pila.pop()
+            if self._perfil is not None and not self._pila:
+                self._perfil.disable()
+            if self.memoria:
+                # reset_peak() borró el pico de la etapa externa: se le devuelve por el marco
+                pico = max(tracemalloc.get_traced_memory()[1], marco['pico_internas'])
+                registro['pico_memoria_mb'] = (pico - marco['base']) / 2 ** 20
+                if self._pila:
+                    externa = self._pila[-1]
+                    externa['pico_internas'] = max(externa['pico_internas'], marco['pico_previo'], pico)
+            registro['salida'] = forma_de(registro['salida'])
+
+    def perfilar(self, nombre: str = None):
+        """
+        Decorador: cada llamada es una etapa con la forma del primer argumento con datos
+        y la del resultado
+
+        Args:
+            nombre (str): Nombre de la etapa (por defecto, el de la función); admite
+                campos con los argumentos, p. ej. 'chi_cuadrado {var1}×{var2}'
+        """
+        def decorador(funcion):
+            etiqueta = nombre or funcion.__qualname__
+            firma = inspect.signature(funcion) if '{' in etiqueta else None
+
+            @functools.wraps(funcion)
+            def envoltura(*args, **kwargs):
+                if not self.activo:
+                    return funcion(*args, **kwargs)
+                nombre_etapa = etiqueta
+                if firma is not None:
+                    argumentos = firma.bind(*args, **kwargs)
+                    argumentos.apply_defaults()
+                    nombre_etapa = etiqueta.format(**argumentos.arguments)
+                with self.etapa(nombre_etapa, _datos_entrada(args)) as registro:
+                    resultado = funcion(*args, **kwargs)
+                    registro['salida'] = resultado
+                return resultado
+            return envoltura
+        return decorador
+
+    def incorporar(self, registro: dict):
+        """Agrega una etapa medida en otro proceso (p. ej. un gráfico dibujado en el pool)"""
+        if self.activo and registro:
+            self.etapas.append(registro)
+
+    def tabla(self) -> pd.DataFrame:
+        """Etapas en orden de inicio"""
+        return pd.DataFrame(self.etapas).sort_values('inicio_s', kind='mergesort') if self.etapas else pd.DataFrame()
+
+    def imprimir(self, top: int = 15):
+        """Etapas más lentas de la corrida"""
+        tabla = self.tabla()
+        if tabla.empty:
+            return
+        print(f"\nPERFIL DE LA CORRIDA ({len(tabla)} etapas medidas):")
+        for _, r in tabla.sort_values('tiempo_s', ascending=False, kind='mergesort').head(top).iterrows():
+            memoria = f", pico {r['pico_memoria_mb']:.1f} MB" if pd.notna(r.get('pico_memoria_mb')) else ""
+            print(f"   - {r['etapa']}: {r['tiempo_s']:.3f} s (CPU {r['cpu_s']:.3f} s{memoria}), "
+                  f"entrada {r['entrada']} → salida {r['salida']}")
+
+    def guardar(self, traza: str = None, cprofile: str = None) -> list:
+        """
+        Escribe la traza JSON de la corrida y, si se activó cProfile, el volcado .prof
+
+        Args:
+            traza (str): Archivo JSON con una entrada por etapa
+            cprofile (str): Archivo de estadísticas de cProfile (pstats/snakeviz)
+        """
+        archivos = []
+        if traza:
+            with open(traza, 'w', encoding='utf-8') as f:
+                json.dump({'fecha': self.fecha, 'memoria': self.memoria,
+                           'etapas': sorted(self.etapas, key=lambda r: r['inicio_s'])},
+                          f, ensure_ascii=False, indent=2, default=str)
+            archivos.append(traza)
+        if cprofile and self._perfil is not None:
+            self._perfil.dump_stats(cprofile)
+            archivos.append(cprofile)
+        return archivos
+
+# Perfilador de la corrida; inactivo hasta PERFILADOR.activar() (ver --traza/--cprofile en la CLI)
+PERFILADOR = PerfiladorEtapas()
+
+# ================== 0C. EJECUCIÓN EN PROCESOS ==================
+def ejecutar_en_procesos(funcion, trabajos, max_workers: int = None, inicializador=None) -> list:
+    """
+    Aplica `funcion` a cada tupla de argumentos de `trabajos` en un ProcessPoolExecutor
+
+    Usa el método de arranque por defecto de la plataforma, así que `funcion`
+    debe estar definida a nivel de módulo y sus argumentos deben poder
+    serializarse. Los resultados vuelven en el orden de los trabajos.
 
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
-from sklearn.experimental import enable_iterative_imputer  # habilita IterativeImputer
-from sklearn.impute import IterativeImputer, KNNImputer
+    Args:
+        funcion: Función a ejecutar en cada proceso
+        trabajos: Tuplas de argumentos posicionales, una por llamada
+        max_workers (int): Número de procesos (None = núcleos disponibles)
+        inicializador: Función que configura cada proceso al arrancar (opcional)
+    """
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=inicializador) as ejecutor:
+        futuros = [ejecutor.submit(funcion, *argumentos) for argumentos in trabajos]
+        return [futuro.result() for futuro in futuros]
 
 # ================== 1. CARGA DE DATOS ==================
-# Se lee la base de datos desde Excel
-df = pd.read_excel('datos/JEFAB_2024.xlsx')
+ARCHIVO_CRUDO = 'datos/JEFAB_2024.xlsx'
+ARCHIVO_LIMPIO = 'datos/JEFAB_2024_limpio.xlsx'
+ARCHIVO_CORREGIDO = 'datos/JEFAB_2024_corregido.xlsx'
+
+
+def archivo_al_dia(archivo: str, *fuentes) -> bool:
+    """True si `archivo` existe y no es más antiguo que ninguna de las `fuentes` existentes"""
+    if not archivo or not os.path.exists(archivo):
+        return False
+    modificado = os.path.getmtime(archivo)
+    return all(modificado >= os.path.getmtime(f) for f in fuentes if f and os.path.exists(f))
 
-# Se imprime información básica del dataset
-print(f"\n=== INFORMACIÓN GENERAL ===")
-print(f"Filas: {df.shape[0]} | Columnas: {df.shape[1]}")
+@PERFILADOR.perfilar('carga_cruda')
+def cargar_datos_crudos(ruta: str = ARCHIVO_CRUDO) -> pd.DataFrame:
+    """Lee la base de datos original desde Excel."""
+    df = pd.read_excel(ruta)
+
+    # Se imprime información básica del dataset
+    print(f"\n=== INFORMACIÓN GENERAL ===")
+    print(f"Filas: {df.shape[0]} | Columnas: {df.shape[1]}")
+    return df
 
 # ================== 2. ANÁLISIS INICIAL ==================
-# ---- Datos faltantes ----
-print("=== ANÁLISIS DE DATOS FALTANTES ===")
-missing_data = df.isnull().sum()                    # Conteo de valores nulos
-missing_percent = (missing_data / len(df)) * 100    # Porcentaje de nulos
-missing_info = pd.DataFrame({                       # DataFrame resumen
-    'Columna': missing_data.index,
-    'Datos_Faltantes': missing_data.values,
-    'Porcentaje': missing_percent.values
-}).sort_values('Datos_Faltantes', ascending=False)
-print("Top 10 columnas con más datos faltantes:")
-print(missing_info.head(10))
-
-# ---- Registros duplicados ----
-print(f"\n=== ANÁLISIS DE DUPLICADOS ===")
-print(f"Registros duplicados: {df.duplicated().sum()}")
-
-# ---- Tipos de datos ----
-print(f"\n=== TIPOS DE DATOS ===")
-print(df.dtypes.value_counts())
-
-# ---- Problemas de encoding en nombres de columnas ----
-print(f"\n=== COLUMNAS CON CARACTERES ESPECIALES ===")
-problematic_columns = [col for col in df.columns if 'Ã' in col or 'â' in col]
-print(f"Columnas con encoding problemático: {len(problematic_columns)}")
-for col in problematic_columns[:5]:   # Se listan solo las primeras 5
-    print(f" - {col}")
+@PERFILADOR.perfilar('analisis_inicial')
+def analisis_inicial(df: pd.DataFrame):
+    """Reporta faltantes, duplicados, tipos de datos y columnas con encoding defectuoso."""
+    # ---- Datos faltantes ----
+    print("=== ANÁLISIS DE DATOS FALTANTES ===")
+    missing_data = df.isnull().sum()                    # Conteo de valores nulos
+    missing_percent = (missing_data / len(df)) * 100    # Porcentaje de nulos
+    missing_info = pd.DataFrame({                       # DataFrame resumen
+        'Columna': missing_data.index,
+        'Datos_Faltantes': missing_data.values,
+        'Porcentaje': missing_percent.values
+    }).sort_values('Datos_Faltantes', ascending=False)
+    print("Top 10 columnas con más datos faltantes:")
+    print(missing_info.head(10))
+
+    # ---- Registros duplicados ----
+    print(f"\n=== ANÁLISIS DE DUPLICADOS ===")
+    print(f"Registros duplicados: {df.duplicated().sum()}")
+
+    # ---- Tipos de datos ----
+    print(f"\n=== TIPOS DE DATOS ===")
+    print(df.dtypes.value_counts())
+
+    # ---- Problemas de encoding en nombres de columnas ----
+    print(f"\n=== COLUMNAS CON CARACTERES ESPECIALES ===")
+    problematic_columns = [col for col in df.columns if 'Ã' in col or 'â' in col]
+    print(f"Columnas con encoding problemático: {len(problematic_columns)}")
+    for col in problematic_columns[:5]:   # Se listan solo las primeras 5
+        print(f" - {col}")
 
 # ================== 3. FUNCIONES DE LIMPIEZA ==================
 # Diccionario de reemplazos para corregir errores comunes de codificación
@@ -136,134 +379,166 @@ for canon, variantes in map_categorias.items():
     for v in variantes:
         canon_map[normalizar_texto(v)] = canon
 
-# ================== 4. AGRUPAMIENTO DE VARIANTES ==================
-# Se agrupan valores equivalentes en columnas de texto
-text_cols = df.select_dtypes(include=['object']).columns
-agrupamientos = {}
-for col in text_cols:
-    valores = df[col].dropna().astype(str).unique()
-    agrupados = {}
-    for val in valores:
-        norm = normalizar_texto(val)
-        canon = canon_map.get(norm, val)   # Si existe, lo reemplaza por su categoría
-        agrupados.setdefault(canon, []).append(val)
-    # Solo se reportan agrupamientos con más de una variante
-    agrupamientos[col] = {k: v for k, v in agrupados.items() if len(v) > 1}
-
-# Reporte de agrupamientos detectados
-print("\n=== AGRUPAMIENTO DE VARIANTES (Singular/Plural/Género) ===")
-for col, grupos in agrupamientos.items():
-    if grupos:
-        print(f"\nColumna: {col}")
-        for canon, variantes in grupos.items():
-            print(f"  → {canon}: {variantes}")
-
-# ================== 5. CREAR DATASET CORREGIDO ==================
-df_corregido = df.copy()
-
-for col in text_cols:
-    # Normalización básica
-    df_corregido[col] = df_corregido[col].astype(str).apply(lambda x: normalizar_texto(x) if x != 'nan' else np.nan)
-    # Limpieza de separadores en listas (ej: "madre ; padre")
-    df_corregido[col] = df_corregido[col].str.replace(r'\s*;\s*', ';', regex=True)
-    # Reemplazo por categorías canónicas
-    df_corregido[col] = df_corregido[col].apply(
-        lambda x: canon_map.get(x, x) if isinstance(x, str) else x
-    )
+def canonizar_valor(x):
+    """Reemplaza una celda completa por su categoría canónica (las listas 'a;b' se separan en MatrizIntegrantes)."""
+    return canon_map.get(x, x) if isinstance(x, str) else x
+
+# ================== 4-5. LIMPIEZA DEL DATASET ==================
+@PERFILADOR.perfilar('limpieza')
+def limpiar_datos(df: pd.DataFrame) -> pd.DataFrame:
+    """Etapa de limpieza: análisis inicial, agrupamiento de variantes y normalización de texto."""
+    analisis_inicial(df)
+
+    # ================== 4. AGRUPAMIENTO DE VARIANTES ==================
+    # Se agrupan valores equivalentes en columnas de texto
+    text_cols = df.select_dtypes(include=['object']).columns
+    agrupamientos = {}
+    for col in text_cols:
+        valores = df[col].dropna().astype(str).unique()
+        agrupados = {}
+        for val in valores:
+            norm = normalizar_texto(val)
+            canon = canon_map.get(norm, val)   # Si existe, lo reemplaza por su categoría
+            agrupados.setdefault(canon, []).append(val)
+        # Solo se reportan agrupamientos con más de una variante
+        agrupamientos[col] = {k: v for k, v in agrupados.items() if len(v) > 1}
+
+    # Reporte de agrupamientos detectados
+    print("\n=== AGRUPAMIENTO DE VARIANTES (Singular/Plural/Género) ===")
+    for col, grupos in agrupamientos.items():
+        if grupos:
+            print(f"\nColumna: {col}")
+            for canon, variantes in grupos.items():
+                print(f"  → {canon}: {variantes}")
+
+    # ================== 5. CREAR DATASET CORREGIDO ==================
+    df_corregido = df.copy()
+
+    with PERFILADOR.etapa('normalizar_texto', df) as etapa:
+        for col in text_cols:
+            # Normalización básica
+            df_corregido[col] = df_corregido[col].astype(str).apply(lambda x: normalizar_texto(x) if x != 'nan' else np.nan)
+            # Limpieza de separadores en listas (ej: "madre ; padre")
+            df_corregido[col] = df_corregido[col].str.replace(r'\s*;\s*', ';', regex=True)
+            # Reemplazo por categorías canónicas
+            df_corregido[col] = df_corregido[col].apply(canonizar_valor)
+        etapa['salida'] = df_corregido
+
+    return df_corregido
+
+# ================== 5B. LISTAS DE INTEGRANTES DEL HOGAR ==================
+# Preguntas del cuestionario que se responden con listas de integrantes ("madre;padre")
+COLUMNAS_INTEGRANTES = ('VIVE_CON',)
+
+def detectar_columnas_lista(df: pd.DataFrame, separador: str = ';', min_fraccion: float = 0.05) -> list:
+    """Columnas de texto donde al menos `min_fraccion` de las respuestas son listas."""
+    columnas = []
+    for col in df.select_dtypes(include=['object', 'string']).columns:
+        frecuencias = df[col].dropna().astype(str).value_counts()
+        if frecuencias.empty:
+            continue
+        es_lista = frecuencias.index.str.contains(separador, regex=False)
+        if frecuencias[es_lista].sum() / frecuencias.sum() >= min_fraccion:
+            columnas.append(col)
+    return columnas
+
+class MatrizIntegrantes:
+    """
+    Codificación multi-hot dispersa de una columna de listas ("madre;padre").
+
+    Las respuestas distintas se separan y canonizan una sola vez (matriz
+    `unicas`, una fila por respuesta distinta); la matriz por persona es una
+    indexación de filas de esa matriz. Frecuencias y co-ocurrencias salen de un
+    único producto disperso Uᵀ·diag(w)·U, con w = veces que aparece cada
+    respuesta, así que el costo depende del número de respuestas distintas.
+    """
+
+    def __init__(self, unicas, codigos: np.ndarray, integrantes: list, index=None, nombre: str = None):
+        """
+        Args:
+            unicas: Matriz CSR (respuestas distintas + 1 fila vacía para faltantes) × integrantes
+            codigos (np.ndarray): Fila de `unicas` de cada respuesta (-1 = faltante)
+            integrantes (list): Nombres canónicos de las columnas
+            index: Índice de las filas originales
+            nombre (str): Columna de origen
+        """
+        self.unicas = unicas
+        self.codigos = codigos
+        self.integrantes = integrantes
+        self.index = index
+        self.nombre = nombre
+
+    @classmethod
+    def desde_serie(cls, serie: pd.Series, separador: str = ';', mapa: dict = None) -> 'MatrizIntegrantes':
+        """
+        Separa y canoniza la columna una vez por respuesta distinta
+
+        Args:
+            serie (pd.Series): Respuestas (texto con elementos separados por `separador`)
+            separador (str): Separador de elementos
+            mapa (dict): Variante normalizada -> integrante canónico (por defecto canon_map)
+        """
+        from scipy import sparse
+
+        mapa = canon_map if mapa is None else mapa
+        codigos, respuestas = pd.factorize(serie)
+        orden = {canon: i for i, canon in enumerate(map_categorias)}
+        integrantes, columnas_fila, filas = {}, [], []
+        for fila, respuesta in enumerate(respuestas):
+            for token in str(respuesta).split(separador):
+                token = normalizar_texto(token)
+                if not token:
+                    continue
+                canon = mapa.get(token, token)
+                columnas_fila.append(integrantes.setdefault(canon, len(integrantes)))
+                filas.append(fila)
+
+        # Canónicos en el orden de map_categorias; otros integrantes después, alfabéticamente
+        nombres = sorted(integrantes, key=lambda c: (orden.get(c, len(orden)), c))
+        reordenar = np.empty(len(integrantes), dtype=np.int64)
+        reordenar[[integrantes[c] for c in nombres]] = np.arange(len(nombres))
+
+        n_respuestas = len(respuestas)
+        unicas = sparse.csr_matrix(
+            (np.ones(len(filas), dtype=np.int32), (np.asarray(filas, dtype=np.int64),
+                                                   reordenar[np.asarray(columnas_fila, dtype=np.int64)])),
+            shape=(n_respuestas + 1, len(nombres)))
+        unicas.data[:] = 1   # multi-hot: un integrante repetido en la misma respuesta cuenta una vez
+        codigos = np.where(codigos < 0, n_respuestas, codigos)
+        return cls(unicas, codigos, nombres, serie.index, serie.name)
+
+    @property
+    def matriz(self):
+        """Matriz dispersa personas × integrantes"""
+        return self.unicas[self.codigos]
+
+    def _pesos(self) -> np.ndarray:
+        return np.bincount(self.codigos, minlength=self.unicas.shape[0])
+
+    def coocurrencia(self) -> pd.DataFrame:
+        """Personas que mencionan a la vez cada par de integrantes (diagonal = frecuencias)"""
+        from scipy import sparse
+
+        producto = self.unicas.T @ sparse.diags(self._pesos(), dtype=np.int64) @ self.unicas
+        return pd.DataFrame(producto.toarray(), index=self.integrantes, columns=self.integrantes)
+
+    def frecuencias(self) -> pd.Series:
+        """Personas que mencionan cada integrante, de mayor a menor"""
+        conteos = np.asarray(self.unicas.T @ self._pesos()).ravel()
+        return pd.Series(conteos, index=self.integrantes, name=self.nombre).sort_values(ascending=False, kind='stable')
+
+    def tamanos(self) -> pd.Series:
+        """Número de integrantes distintos mencionados por persona (NaN = sin respuesta)"""
+        por_respuesta = np.diff(self.unicas.indptr).astype(float)
+        por_respuesta[-1] = np.nan
+        return pd.Series(por_respuesta[self.codigos], index=self.index, name=self.nombre)
+
+    def a_dataframe(self, prefijo: str = None) -> pd.DataFrame:
+        """Columnas indicadoras (dispersas) por integrante, alineadas con las filas originales"""
+        prefijo = f"{self.nombre}_" if prefijo is None and self.nombre else (prefijo or '')
+        return pd.DataFrame.sparse.from_spmatrix(self.matriz, index=self.index,
+                                                 columns=[f"{prefijo}{c}" for c in self.integrantes])
 
-# ================== 6. DEPURACIÓN CON IMPUTACIÓN LÓGICA ==================
-# --- Relación HIJOS vs NUMERO_HIJOS ---
-if 'HIJOS' in df_corregido.columns and 'NUMERO_HIJOS' in df_corregido.columns:
-    cambios = ((df_corregido['HIJOS'] == "no") & (df_corregido['NUMERO_HIJOS'].isna())).sum()
-    print(f"\n=== IMPUTACIÓN LÓGICA: HIJOS vs NUMERO_HIJOS ===")
-    print(f"Registros a corregir: {cambios}")
-    # Se imputan 0 hijos cuando la persona dijo explícitamente que no tiene
-    df_corregido.loc[
-        (df_corregido['HIJOS'] == "no") & (df_corregido['NUMERO_HIJOS'].isna()), 
-        'NUMERO_HIJOS'
-    ] = 0
-    print(f"Corrección aplicada.")
-
-# --- Relación HIJOS vs HIJOS_EN_HOGAR ---
-if 'HIJOS' in df_corregido.columns and 'HIJOS_EN_HOGAR' in df_corregido.columns:
-    cambios = ((df_corregido['HIJOS'] == "no") & (df_corregido['HIJOS_EN_HOGAR'].isna())).sum()
-    print(f"\n=== IMPUTACIÓN LÓGICA: HIJOS vs HIJOS_EN_HOGAR ===")
-    print(f"Registros a corregir: {cambios}")
-    df_corregido.loc[
-        (df_corregido['HIJOS'] == "no") & (df_corregido['HIJOS_EN_HOGAR'].isna()), 
-        'HIJOS_EN_HOGAR'
-    ] = 0
-    print("Corrección aplicada.")
-
-# --- Relación MADRE_VIVE vs EDAD_MADRE ---
-if 'MADRE_VIVE' in df_corregido.columns:
-    cambios_madre = ((df_corregido['MADRE_VIVE'] == "no") & (df_corregido['EDAD_MADRE'].isna())).sum()
-    df_corregido.loc[(df_corregido['MADRE_VIVE'] == "no") & (df_corregido['EDAD_MADRE'].isna()), 'EDAD_MADRE'] = 0
-    print(f"\n=== IMPUTACIÓN LÓGICA: MADRE_VIVE vs EDAD_MADRE ===")
-    print(f"Registros corregidos: {cambios_madre}")
-
-    cambios_rango_madre = ((df_corregido['MADRE_VIVE'] == "no") & (df_corregido['EDAD_RANGO_MADRE'].isna())).sum()
-    df_corregido.loc[(df_corregido['MADRE_VIVE'] == "no") & (df_corregido['EDAD_RANGO_MADRE'].isna()), 'EDAD_RANGO_MADRE'] = 0
-    print(f"Registros corregidos en rango madre: {cambios_rango_madre}")
-
-# --- Relación PADRE_VIVE vs EDAD_PADRE ---
-if 'PADRE_VIVE' in df_corregido.columns:
-    cambios_padre = ((df_corregido['PADRE_VIVE'] == "no") & (df_corregido['EDAD_PADRE'].isna())).sum()
-    df_corregido.loc[(df_corregido['PADRE_VIVE'] == "no") & (df_corregido['EDAD_PADRE'].isna()), 'EDAD_PADRE'] = 0
-    print(f"\n=== IMPUTACIÓN LÓGICA: PADRE_VIVE vs EDAD_PADRE ===")
-    print(f"Registros corregidos: {cambios_padre}")
-
-    cambios_rango_padre = ((df_corregido['PADRE_VIVE'] == "no") & (df_corregido['EDAD_RANGO_PADRE'].isna())).sum()
-    df_corregido.loc[(df_corregido['PADRE_VIVE'] == "no") & (df_corregido['EDAD_RANGO_PADRE'].isna()), 'EDAD_RANGO_PADRE'] = 0
-    print(f"Registros corregidos en rango padre: {cambios_rango_padre}")
-
-# ============================================================
-# PASO 7: Imputación avanzada de variables
-# ============================================================
-
-from sklearn.experimental import enable_iterative_imputer
-from sklearn.impute import IterativeImputer
-import matplotlib.pyplot as plt
-
-# --- 7A. Preparamos columnas numéricas ---
-num_cols = df_corregido.select_dtypes(include=["int64", "float64"]).columns
-df_temp = df_corregido[num_cols].copy()
-
-# --- 7B. Convertir ceros en NaN SOLO si el padre/madre está vivo ---
-mask_padre_vivo = df_corregido["PADRE_VIVE"] == 1
-mask_madre_vivo = df_corregido["MADRE_VIVE"] == 1
-
-for col in ["EDAD_PADRE", "EDAD_RANGO_PADRE"]:
-    if col in df_temp.columns:
-        df_temp.loc[mask_padre_vivo & (df_temp[col] == 0), col] = np.nan
-
-for col in ["EDAD_MADRE", "EDAD_RANGO_MADRE"]:
-    if col in df_temp.columns:
-        df_temp.loc[mask_madre_vivo & (df_temp[col] == 0), col] = np.nan
-
-# --- 7C. Aplicamos MICE ---
-imputer = IterativeImputer(max_iter=10, random_state=42)
-df_imputado = imputer.fit_transform(df_temp)
-
-# Convertimos a DataFrame para mantener nombres y control
-df_imputado = pd.DataFrame(df_imputado, columns=num_cols, index=df_temp.index)
-
-# --- 🚨 7Cbis: Evitar negativos en TODAS las columnas numéricas ---
-df_imputado = df_imputado.clip(lower=0)
-
-# Redondear a enteros
-df_imputado = np.round(df_imputado).astype(int)
-
-# Reemplazamos en la base corregida
-df_corregido[num_cols] = df_imputado
-
-# --- 7D. Restaurar ceros para padres/madres fallecidos ---
-df_corregido.loc[df_corregido["PADRE_VIVE"] == 0, ["EDAD_PADRE", "EDAD_RANGO_PADRE"]] = 0
-df_corregido.loc[df_corregido["MADRE_VIVE"] == 0, ["EDAD_MADRE", "EDAD_RANGO_MADRE"]] = 0
-
-print("\n>>> Imputación MICE aplicada en todas las variables numéricas. Negativos truncados a 0. Cerros preservados en fallecidos.")
-
-# --- 7E. Reconstrucción de rangos después de imputación con MICE ---
 # --- Función para asignar rangos ---
 def edad_a_rango(edad):
     if pd.isna(edad) or edad == 0:
@@ -289,28 +564,147 @@ def edad_a_rango(edad):
     else:
         return "Otro"
 
-# --- Asignar rangos para madres vivas ---
-df_corregido.loc[df_corregido["MADRE_VIVE"] == 1, "EDAD_RANGO_MADRE"] = (
-    df_corregido.loc[df_corregido["MADRE_VIVE"] == 1, "EDAD_MADRE"].apply(edad_a_rango)
-)
+# --- Tabla edad -> rango (las edades son enteros pequeños: se evalúa una vez por edad) ---
+EDAD_MAXIMA_RANGO = 120
+tabla_rangos = np.array([edad_a_rango(e) for e in range(EDAD_MAXIMA_RANGO + 1)], dtype=object)
+
+def edades_a_rango(edades: pd.Series) -> pd.Series:
+    """Versión vectorizada de edad_a_rango mediante la tabla de rangos."""
+    indices = edades.fillna(0).round().clip(0, EDAD_MAXIMA_RANGO).astype(int)
+    return pd.Series(tabla_rangos[indices.to_numpy()], index=edades.index)
+
+# ================== 6-7. IMPUTACIÓN ==================
+@PERFILADOR.perfilar('imputacion')
+def imputar_datos(df_corregido: pd.DataFrame) -> pd.DataFrame:
+    """Etapa de imputación: imputación lógica, MICE y reconstrucción de rangos de edad."""
+    df_corregido = df_corregido.copy()
+
+    # ================== 6. DEPURACIÓN CON IMPUTACIÓN LÓGICA ==================
+    with PERFILADOR.etapa('imputacion_logica', df_corregido):
+        # --- Relación HIJOS vs NUMERO_HIJOS ---
+        if 'HIJOS' in df_corregido.columns and 'NUMERO_HIJOS' in df_corregido.columns:
+            cambios = ((df_corregido['HIJOS'] == "no") & (df_corregido['NUMERO_HIJOS'].isna())).sum()
+            print(f"\n=== IMPUTACIÓN LÓGICA: HIJOS vs NUMERO_HIJOS ===")
+            print(f"Registros a corregir: {cambios}")
+            # Se imputan 0 hijos cuando la persona dijo explícitamente que no tiene
+            df_corregido.loc[
+                (df_corregido['HIJOS'] == "no") & (df_corregido['NUMERO_HIJOS'].isna()), 
+                'NUMERO_HIJOS'
+            ] = 0
+            print(f"Corrección aplicada.")
+
+        # --- Relación HIJOS vs HIJOS_EN_HOGAR ---
+        if 'HIJOS' in df_corregido.columns and 'HIJOS_EN_HOGAR' in df_corregido.columns:
+            cambios = ((df_corregido['HIJOS'] == "no") & (df_corregido['HIJOS_EN_HOGAR'].isna())).sum()
+            print(f"\n=== IMPUTACIÓN LÓGICA: HIJOS vs HIJOS_EN_HOGAR ===")
+            print(f"Registros a corregir: {cambios}")
+            df_corregido.loc[
+                (df_corregido['HIJOS'] == "no") & (df_corregido['HIJOS_EN_HOGAR'].isna()), 
+                'HIJOS_EN_HOGAR'
+            ] = 0
+            print("Corrección aplicada.")
+
+        # --- Relación MADRE_VIVE vs EDAD_MADRE ---
+        if 'MADRE_VIVE' in df_corregido.columns:
+            cambios_madre = ((df_corregido['MADRE_VIVE'] == "no") & (df_corregido['EDAD_MADRE'].isna())).sum()
+            df_corregido.loc[(df_corregido['MADRE_VIVE'] == "no") & (df_corregido['EDAD_MADRE'].isna()), 'EDAD_MADRE'] = 0
+            print(f"\n=== IMPUTACIÓN LÓGICA: MADRE_VIVE vs EDAD_MADRE ===")
+            print(f"Registros corregidos: {cambios_madre}")
+
+            cambios_rango_madre = ((df_corregido['MADRE_VIVE'] == "no") & (df_corregido['EDAD_RANGO_MADRE'].isna())).sum()
+            df_corregido.loc[(df_corregido['MADRE_VIVE'] == "no") & (df_corregido['EDAD_RANGO_MADRE'].isna()), 'EDAD_RANGO_MADRE'] = 0
+            print(f"Registros corregidos en rango madre: {cambios_rango_madre}")
+
+        # --- Relación PADRE_VIVE vs EDAD_PADRE ---
+        if 'PADRE_VIVE' in df_corregido.columns:
+            cambios_padre = ((df_corregido['PADRE_VIVE'] == "no") & (df_corregido['EDAD_PADRE'].isna())).sum()
+            df_corregido.loc[(df_corregido['PADRE_VIVE'] == "no") & (df_corregido['EDAD_PADRE'].isna()), 'EDAD_PADRE'] = 0
+            print(f"\n=== IMPUTACIÓN LÓGICA: PADRE_VIVE vs EDAD_PADRE ===")
+            print(f"Registros corregidos: {cambios_padre}")
+
+            cambios_rango_padre = ((df_corregido['PADRE_VIVE'] == "no") & (df_corregido['EDAD_RANGO_PADRE'].isna())).sum()
+            df_corregido.loc[(df_corregido['PADRE_VIVE'] == "no") & (df_corregido['EDAD_RANGO_PADRE'].isna()), 'EDAD_RANGO_PADRE'] = 0
+            print(f"Registros corregidos en rango padre: {cambios_rango_padre}")
+
+    # ============================================================
+    # PASO 7: Imputación avanzada de variables
+    # ============================================================
+
+    # Importación diferida: solo esta etapa necesita scikit-learn
+    from sklearn.experimental import enable_iterative_imputer  # habilita IterativeImputer
+    from sklearn.impute import IterativeImputer
+
+    # --- 7A. Preparamos columnas numéricas ---
+    num_cols = df_corregido.select_dtypes(include=["int64", "float64"]).columns
+    df_temp = df_corregido[num_cols].copy()
+
+    # --- 7B. Convertir ceros en NaN SOLO si el padre/madre está vivo ---
+    mask_padre_vivo = df_corregido["PADRE_VIVE"] == 1
+    mask_madre_vivo = df_corregido["MADRE_VIVE"] == 1
+
+    for col in ["EDAD_PADRE", "EDAD_RANGO_PADRE"]:
+        if col in df_temp.columns:
+            df_temp.loc[mask_padre_vivo & (df_temp[col] == 0), col] = np.nan
+
+    for col in ["EDAD_MADRE", "EDAD_RANGO_MADRE"]:
+        if col in df_temp.columns:
+            df_temp.loc[mask_madre_vivo & (df_temp[col] == 0), col] = np.nan
+
+    # --- 7C. Aplicamos MICE ---
+    with PERFILADOR.etapa('mice', df_temp) as etapa:
+        imputer = IterativeImputer(max_iter=10, random_state=42)
+        df_imputado = imputer.fit_transform(df_temp)
+        etapa['salida'] = df_imputado
+
+    # Convertimos a DataFrame para mantener nombres y control
+    df_imputado = pd.DataFrame(df_imputado, columns=num_cols, index=df_temp.index)
+
+    # --- 🚨 7Cbis: Evitar negativos en TODAS las columnas numéricas ---
+    df_imputado = df_imputado.clip(lower=0)
+
+    # Redondear a enteros
+    df_imputado = np.round(df_imputado).astype(int)
+
+    # Reemplazamos en la base corregida
+    df_corregido[num_cols] = df_imputado
+
+    # --- 7D. Restaurar ceros para padres/madres fallecidos ---
+    df_corregido.loc[df_corregido["PADRE_VIVE"] == 0, ["EDAD_PADRE", "EDAD_RANGO_PADRE"]] = 0
+    df_corregido.loc[df_corregido["MADRE_VIVE"] == 0, ["EDAD_MADRE", "EDAD_RANGO_MADRE"]] = 0
+
+    print("\n>>> Imputación MICE aplicada en todas las variables numéricas. Negativos truncados a 0. Cerros preservados en fallecidos.")
+
+    # --- 7E. Reconstrucción de rangos después de imputación con MICE ---
+    # --- Asignar rangos para madres vivas ---
+    df_corregido.loc[df_corregido["MADRE_VIVE"] == 1, "EDAD_RANGO_MADRE"] = edades_a_rango(
+        df_corregido.loc[df_corregido["MADRE_VIVE"] == 1, "EDAD_MADRE"]
+    )
 
-# --- Asignar rangos para padres vivos ---
-df_corregido.loc[df_corregido["PADRE_VIVE"] == 1, "EDAD_RANGO_PADRE"] = (
-    df_corregido.loc[df_corregido["PADRE_VIVE"] == 1, "EDAD_PADRE"].apply(edad_a_rango)
-)
+    # --- Asignar rangos para padres vivos ---
+    df_corregido.loc[df_corregido["PADRE_VIVE"] == 1, "EDAD_RANGO_PADRE"] = edades_a_rango(
+        df_corregido.loc[df_corregido["PADRE_VIVE"] == 1, "EDAD_PADRE"]
+    )
+
+    # --- Asegurar ceros en fallecidos ---
+    df_corregido.loc[df_corregido["MADRE_VIVE"] == 0, ["EDAD_MADRE","EDAD_RANGO_MADRE"]] = 0
+    df_corregido.loc[df_corregido["PADRE_VIVE"] == 0, ["EDAD_PADRE","EDAD_RANGO_PADRE"]] = 0
 
-# --- Asegurar ceros en fallecidos ---
-df_corregido.loc[df_corregido["MADRE_VIVE"] == 0, ["EDAD_MADRE","EDAD_RANGO_MADRE"]] = 0
-df_corregido.loc[df_corregido["PADRE_VIVE"] == 0, ["EDAD_PADRE","EDAD_RANGO_PADRE"]] = 0
 
 
+    print("\n>>> Reconstrucción de rangos de edad realizada correctamente.")
 
-print("\n>>> Reconstrucción de rangos de edad realizada correctamente.")
+    return df_corregido
 
 
 #  ================== 8. GUARDAR RESULTADO ==================
-df_corregido.to_excel("datos/JEFAB_2024_corregido.xlsx", index=False)
-print("\n>>> Dataset corregido guardado como 'datos/JEFAB_2024_corregido.xlsx'")
+@PERFILADOR.perfilar('guardado')
+def guardar_datos_corregidos(df_corregido: pd.DataFrame, ruta: str = ARCHIVO_CORREGIDO):
+    """Exporta el dataset corregido a Excel."""
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    df_corregido.to_excel(ruta, index=False)
+    print(f"\n>>> Dataset corregido guardado como '{ruta}'")
 
 # ==============================================================
 # ANALISIS DEMOGRÁFICO
@@ -322,26 +716,62 @@ print("\n>>> Dataset corregido guardado como 'datos/JEFAB_2024_corregido.xlsx'")
 
 
 # ==============================================================
-# IMPORTACIONES Y CONFIGURACIÓN
+# CONFIGURACIÓN
 # ==============================================================
 
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
-from scipy.stats import chi2_contingency
-import warnings
 warnings.filterwarnings('ignore', category=FutureWarning)
 
-# Configuración de estilo para gráficos
-sns.set_theme(style="whitegrid")
-plt.rcParams.update({
+
+class _ModuloPerezoso:
+    """
+    Sustituto de un módulo pesado que lo importa en el primer acceso a un atributo.
+
+    Así, las etapas que no grafican ni hacen pruebas (limpieza, reportes) no
+    pagan el tiempo de importar matplotlib, seaborn o scipy.
+    """
+
+    def __init__(self, nombre: str, al_cargar=None):
+        self._nombre = nombre
+        self._modulo = None
+        self._al_cargar = al_cargar
+
+    def _cargar(self):
+        if self._modulo is None:
+            self._modulo = importlib.import_module(self._nombre)
+            if self._al_cargar is not None:
+                self._al_cargar()
+        return self._modulo
+
+    def __getattr__(self, atributo):
+        return getattr(self._cargar(), atributo)
+
+    def __repr__(self):
+        estado = 'cargado' if self._modulo is not None else 'sin cargar'
+        return f"<módulo diferido {self._nombre} ({estado})>"
+
+
+# Configuración de estilo para gráficos (se aplica al cargar matplotlib o seaborn)
+ESTILO_GRAFICOS = {
     "axes.titlesize": 16,
     "axes.titleweight": "bold",
     "axes.labelsize": 12,
     "figure.dpi": 100
-})
+}
+_estilo_aplicado = False
+
+def _configurar_estilo_graficos():
+    """Aplica el tema de seaborn y ESTILO_GRAFICOS una sola vez"""
+    global _estilo_aplicado
+    if _estilo_aplicado:
+        return
+    _estilo_aplicado = True
+    sns.set_theme(style="whitegrid")
+    plt.rcParams.update(ESTILO_GRAFICOS)
+
+
+plt = _ModuloPerezoso('matplotlib.pyplot', al_cargar=_configurar_estilo_graficos)
+sns = _ModuloPerezoso('seaborn', al_cargar=_configurar_estilo_graficos)
+stats = _ModuloPerezoso('scipy.stats')
 
 # ==============================================================
 # CONSTANTES Y CONFIGURACIÓN
@@ -378,10 +808,47 @@ SUBOF_LABELS = {
 
 # Grupos etarios estándar
 GRUPOS_ETARIOS = ['18-25', '26-35', '36-45', '46-55', '56+']
+BINS_ETARIOS = [0, 25, 35, 45, 55, np.inf]
 
 # Archivo de datos
 ARCHIVO_DATOS = '../JEFAB_2024_corregido.xlsx'
 
+# Columnas que usa el análisis demográfico (se proyectan al leer el archivo)
+COLUMNAS_DEMOGRAFICAS = ('SEXO', 'GENERO', 'CATEGORIA', 'GRADO', 'ESTADO_CIVIL', 'NIVEL_EDUCATIVO', 'UNIDAD', 'EDAD2')
+
+# ==============================================================
+# MÓDULO: PROYECCIÓN DE COLUMNAS AL LEER
+# ==============================================================
+
+def leer_columnas(archivo: str, columnas=None, **kwargs) -> pd.DataFrame:
+    """
+    Lee solo las columnas pedidas de un archivo Parquet, CSV o Excel
+
+    La proyección se delega al lector (`columns=` en Parquet, `usecols` en CSV
+    y Excel), así que las columnas que no se piden no se convierten ni ocupan
+    memoria. Las columnas pedidas que no están en el archivo se omiten: cada
+    etapa ya comprueba cuáles tiene disponibles.
+
+    Args:
+        archivo (str): Ruta del archivo
+        columnas: Columnas a leer (None = todas)
+        **kwargs: Parámetros adicionales del lector de pandas
+    """
+    extension = archivo.lower().rsplit('.', 1)[-1]
+    if columnas is not None:
+        columnas = list(dict.fromkeys(columnas))
+    if extension == 'parquet':
+        if columnas is not None:
+            import pyarrow.parquet as pq
+            presentes = set(pq.read_schema(archivo).names)
+            columnas = [c for c in columnas if c in presentes]
+        return pd.read_parquet(archivo, columns=columnas, **kwargs)
+
+    usecols = None if columnas is None else set(columnas).__contains__
+    if extension == 'csv':
+        return pd.read_csv(archivo, usecols=usecols, **kwargs)
+    return pd.read_excel(archivo, usecols=usecols, **kwargs)
+
 # ==============================================================
 # CLASE PRINCIPAL: ANALIZADOR DEMOGRÁFICO
 # ==============================================================
@@ -391,51 +858,79 @@ class AnalizadorDemograficoFAC:
     Clase principal para realizar análisis demográfico del personal FAC
     """
     
-    def __init__(self, archivo_path: str = ARCHIVO_DATOS):
+    def __init__(self, archivo_path: str = ARCHIVO_DATOS, columnas=COLUMNAS_DEMOGRAFICAS):
         """
         Inicializa el analizador con los datos
         
         Args:
-            archivo_path (str): Ruta al archivo Excel con los datos
+            archivo_path (str): Ruta al archivo con los datos (Excel, CSV o Parquet)
+            columnas: Columnas a leer (None = todas)
         """
         self.archivo_path = archivo_path
+        self.columnas = columnas
         self.df = None
         self.resultados = {}
+        self.suficientes = None
+    
+    @property
+    def histograma_edades(self) -> 'HistogramaEdades':
+        """Edades por sexo y categoría (base de pirámides y cuantiles), tomadas de los estadísticos"""
+        return self.suficientes.histogramas.get('EDAD2') if self.suficientes is not None else None
         
+    @PERFILADOR.perfilar('carga')
     def cargar_datos(self):
-        """Carga y preprocesa los datos desde Excel"""
+        """Carga (solo las columnas del análisis) y preprocesa los datos"""
         print("Cargando datos del archivo...")
         try:
-            self.df = pd.read_excel(self.archivo_path)
+            self.df = leer_columnas(self.archivo_path, self.columnas)
             print(f"Archivo cargado exitosamente: {self.df.shape[0]:,} registros, {self.df.shape[1]} columnas")
             self._preprocesar_datos()
         except Exception as e:
             print(f"Error al cargar el archivo: {e}")
             raise
             
+    @PERFILADOR.perfilar('preprocesamiento')
     def _preprocesar_datos(self):
         """Limpia y normaliza los datos"""
         print("Preprocesando datos...")
         
+        self._preparar(self.df)
+        
+        # Conteos, tablas de contingencia e histogramas de edad por sexo y categoría en una
+        # sola pasada; los comparten la información general, los gráficos y AnalisisEstadisticoFAC
+        self.suficientes = EstadisticosSuficientes.desde_df(self.df)
+        
+        print("Preprocesamiento completado")
+    
+    def preparar_lote(self, df_lote: pd.DataFrame) -> pd.DataFrame:
+        """
+        Aplica el mismo preprocesamiento a un lote de filas nuevas o corregidas
+        
+        Args:
+            df_lote (pd.DataFrame): Filas con el esquema del archivo original
+        """
+        return self._preparar(df_lote.copy())
+    
+    def _preparar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Limpieza, columnas normalizadas, EDAD2 numérica y grupos etarios (en el lugar)"""
         # Limpiar espacios en variables categóricas
         categoricas = ['SEXO', 'CATEGORIA', 'GRADO', 'ESTADO_CIVIL', 'NIVEL_EDUCATIVO', 'UNIDAD']
         for col in categoricas:
-            if col in self.df.columns and pd.api.types.is_object_dtype(self.df[col]):
-                self.df[col] = self.df[col].astype(str).str.strip()
+            if col in df.columns and pd.api.types.is_object_dtype(df[col]):
+                df[col] = df[col].astype(str).str.strip()
         
         # Crear versiones normalizadas
-        self._crear_columnas_normalizadas()
+        self._crear_columnas_normalizadas(df)
         
         # Asegurar que EDAD2 sea numérico
-        if 'EDAD2' in self.df.columns:
-            self.df['EDAD2'] = pd.to_numeric(self.df['EDAD2'], errors='coerce')
+        if 'EDAD2' in df.columns:
+            df['EDAD2'] = pd.to_numeric(df['EDAD2'], errors='coerce')
             
         # Crear grupos etarios
-        self._crear_grupos_etarios()
-        
-        print("Preprocesamiento completado")
+        self._crear_grupos_etarios(df)
+        return df
         
-    def _crear_columnas_normalizadas(self):
+    def _crear_columnas_normalizadas(self, df: pd.DataFrame):
         """Crea versiones normalizadas de las columnas para análisis consistente"""
         normalizaciones = {
             'SEXO': 'SEXO_UP',
@@ -446,11 +941,11 @@ class AnalizadorDemograficoFAC:
         }
         
         for col_orig, col_norm in normalizaciones.items():
-            if col_orig in self.df.columns:
+            if col_orig in df.columns:
                 if col_norm.endswith('_UP'):
-                    self.df[col_norm] = self._normalizar_upper(self.df[col_orig])
+                    df[col_norm] = self._normalizar_upper(df[col_orig])
                 else:
-                    self.df[col_norm] = self._normalizar_lower(self.df[col_orig])
+                    df[col_norm] = self._normalizar_lower(df[col_orig])
     
     def _normalizar_upper(self, serie: pd.Series) -> pd.Series:
         """Normaliza serie a mayúsculas sin acentos"""
@@ -470,13 +965,13 @@ class AnalizadorDemograficoFAC:
                 .str.lower()
                 .str.strip())
     
-    def _crear_grupos_etarios(self):
+    def _crear_grupos_etarios(self, df: pd.DataFrame):
         """Crea grupos etarios estándar"""
-        if 'EDAD2' in self.df.columns:
+        if 'EDAD2' in df.columns:
 
-            self.df['GRUPO_ETARIO'] = pd.cut(
-                self.df['EDAD2'],
-                bins=[0, 25, 35, 45, 55, np.inf],
+            df['GRUPO_ETARIO'] = pd.cut(
+                df['EDAD2'],
+                bins=BINS_ETARIOS,
                 labels=GRUPOS_ETARIOS,
                 right=True, 
                 include_lowest=True
@@ -492,20 +987,851 @@ class AnalizadorDemograficoFAC:
         print(f"Total de columnas: {len(self.df.columns)}")
         
         # Estadísticas básicas de edad
-        if 'EDAD2' in self.df.columns:
-            edad_stats = self.df['EDAD2'].describe()
+        if self.histograma_edades is not None:
+            edad = self.histograma_edades.total()
             print(f"\nEstadísticas de edad:")
-            print(f"   - Promedio: {edad_stats['mean']:.1f} años")
-            print(f"   - Mediana: {edad_stats['50%']:.1f} años")
-            print(f"   - Rango: {edad_stats['min']:.0f} - {edad_stats['max']:.0f} años")
+            print(f"   - Promedio: {edad.media():.1f} años")
+            print(f"   - Mediana: {edad.mediana():.1f} años")
+            print(f"   - Rango: {edad.minimo():.0f} - {edad.maximo():.0f} años")
         
         # Distribución por categoría
-        if 'CATEGORIA_UP' in self.df.columns:
+        if 'CATEGORIA_UP' in self.suficientes.conteos:
             print(f"\nDistribución por categoría:")
-            for cat, count in self.df['CATEGORIA_UP'].value_counts().items():
+            for cat, count in self.suficientes.conteos['CATEGORIA_UP'].sort_values(ascending=False).items():
                 pct = (count / len(self.df)) * 100
                 print(f"   - {cat}: {count:,} ({pct:.1f}%)")
 
+# ==============================================================
+# MÓDULO: HISTOGRAMA DE VALORES ENTEROS
+# ==============================================================
+
+class HistogramaEnteros:
+    """
+    Histograma exacto de valores enteros no negativos (p. ej. edades en años).
+    Permite medianas y cuantiles exactos sin conservar las filas.
+    """
+
+    def __init__(self, conteos=None):
+        self.conteos = np.zeros(0, dtype=np.int64) if conteos is None else np.asarray(conteos, dtype=np.int64)
+
+    @property
+    def n(self) -> int:
+        return int(self.conteos.sum())
+
+    def actualizar(self, valores):
+        """Incorpora un bloque de valores; se redondean al entero más cercano"""
+        x = np.asarray(valores, dtype=float)
+        x = x[np.isfinite(x)]
+        if x.size == 0:
+            return self
+        x = np.rint(x).astype(np.int64)
+        if x.min() < 0:
+            raise ValueError("HistogramaEnteros solo admite valores no negativos")
+        return self._sumar(np.bincount(x))
+
+    def fusionar(self, otro: 'HistogramaEnteros'):
+        """Suma los conteos de otro histograma"""
+        return self._sumar(otro.conteos)
+
+    def _sumar(self, conteos: np.ndarray):
+        if len(conteos) > len(self.conteos):
+            self.conteos = np.pad(self.conteos, (0, len(conteos) - len(self.conteos)))
+        self.conteos[:len(conteos)] += conteos
+        return self
+
+    def cuantil(self, q) -> float:
+        """Cuantil con interpolación lineal (mismo criterio que pandas.quantile)"""
+        n = self.n
+        if n == 0:
+            return np.nan
+        acumulado = np.cumsum(self.conteos)
+        posicion = (n - 1) * np.asarray(q, dtype=float)
+        inferior = np.floor(posicion).astype(np.int64)
+        superior = np.minimum(inferior + 1, n - 1)
+        v_inf = np.searchsorted(acumulado, inferior, side='right')
+        v_sup = np.searchsorted(acumulado, superior, side='right')
+        resultado = v_inf + (posicion - inferior) * (v_sup - v_inf)
+        return float(resultado) if np.ndim(resultado) == 0 else resultado.astype(float)
+
+    def mediana(self) -> float:
+        return self.cuantil(0.5)
+
+    def minimo(self) -> float:
+        presentes = np.flatnonzero(self.conteos)
+        return float(presentes[0]) if presentes.size else np.nan
+
+    def maximo(self) -> float:
+        presentes = np.flatnonzero(self.conteos)
+        return float(presentes[-1]) if presentes.size else np.nan
+
+    def media(self) -> float:
+        n = self.n
+        return float(self.conteos @ np.arange(len(self.conteos)) / n) if n else np.nan
+
+    def varianza(self, ddof: int = 1) -> float:
+        n = self.n
+        if n <= ddof:
+            return np.nan
+        valores = np.arange(len(self.conteos))
+        return float(self.conteos @ (valores - self.media()) ** 2 / (n - ddof))
+
+    def contar(self, desde=None, hasta=None) -> int:
+        """Cuenta valores en el intervalo [desde, hasta)"""
+        desde = 0 if desde is None else max(int(np.ceil(desde)), 0)
+        hasta = len(self.conteos) if hasta is None else int(np.ceil(hasta))
+        return int(self.conteos[desde:hasta].sum())
+
+# ==============================================================
+# MÓDULO: HISTOGRAMAS DE EDAD POR ESTRATO
+# ==============================================================
+
+class HistogramaEdades:
+    """
+    Conteos de edad (enteros) por estrato: una matriz estratos × edades
+    construida con un único np.bincount. Medianas, cuantiles, grupos etarios,
+    pirámides y entradas para KDE se derivan de la matriz, por lo que su costo
+    depende del rango de edades (≈100) y no del tamaño de la población.
+    """
+
+    def __init__(self, conteos: np.ndarray, estratos: pd.Index):
+        self.conteos = np.asarray(conteos, dtype=np.int64)
+        self.estratos = estratos
+
+    @classmethod
+    def desde_df(cls, df: pd.DataFrame, col_edad: str = 'EDAD2', estratos=None):
+        """
+        Construye el histograma desde un DataFrame
+
+        Args:
+            df (pd.DataFrame): Datos
+            col_edad (str): Columna de edad (EDAD2, EDAD_MADRE, EDAD_PADRE...)
+            estratos: Columnas que definen los estratos (None = un solo estrato)
+        """
+        edad = pd.to_numeric(df[col_edad], errors='coerce').to_numpy(dtype=float)
+        validos = np.isfinite(edad) & (edad >= 0)
+        edad = np.rint(edad[validos]).astype(np.int64)
+        ancho = int(edad.max()) + 1 if edad.size else 1
+
+        estratos = [c for c in (estratos or []) if c in df.columns]
+        if estratos:
+            claves = df.loc[validos, estratos]
+            codigos, niveles = pd.factorize(pd.MultiIndex.from_frame(claves) if len(estratos) > 1
+                                            else claves[estratos[0]], sort=True, use_na_sentinel=False)
+            niveles = (niveles.set_names(estratos) if isinstance(niveles, pd.MultiIndex)
+                       else pd.Index(niveles, name=estratos[0]))
+        else:
+            codigos = np.zeros(edad.size, dtype=np.int64)
+            niveles = pd.Index(['TOTAL'])
+
+        conteos = np.bincount(codigos * ancho + edad, minlength=len(niveles) * ancho)
+        return cls(conteos.reshape(len(niveles), ancho), niveles)
+
+    @property
+    def edades(self) -> np.ndarray:
+        return np.arange(self.conteos.shape[1])
+
+    @property
+    def n(self) -> np.ndarray:
+        return self.conteos.sum(axis=1)
+
+    def total(self) -> HistogramaEnteros:
+        """Histograma de todos los estratos juntos"""
+        return HistogramaEnteros(self.conteos.sum(axis=0))
+
+    def estrato(self, clave) -> HistogramaEnteros:
+        """Histograma de un estrato"""
+        return HistogramaEnteros(self.conteos[self.estratos.get_loc(clave)])
+
+    def marginal(self, columnas) -> 'HistogramaEdades':
+        """Suma sobre los estratos que no están en `columnas`"""
+        columnas = [columnas] if isinstance(columnas, str) else list(columnas)
+        tabla = pd.DataFrame(self.conteos, index=self.estratos).groupby(level=columnas, dropna=False).sum()
+        return HistogramaEdades(tabla.to_numpy(), tabla.index)
+
+    def fusionar(self, otro: 'HistogramaEdades', signo: int = 1) -> 'HistogramaEdades':
+        """Suma (signo=1) o resta (signo=-1) otro histograma, p. ej. un lote de filas"""
+        ancho = max(self.conteos.shape[1], otro.conteos.shape[1])
+        a = pd.DataFrame(np.pad(self.conteos, ((0, 0), (0, ancho - self.conteos.shape[1]))), index=self.estratos)
+        b = pd.DataFrame(np.pad(otro.conteos, ((0, 0), (0, ancho - otro.conteos.shape[1]))), index=otro.estratos)
+        tabla = a.add(signo * b, fill_value=0)
+        if (tabla.to_numpy() < 0).any():
+            raise ValueError("Se eliminaron más registros de los que contiene el histograma")
+        return HistogramaEdades(tabla.to_numpy(), tabla.index)
+
+    def cuantiles(self, q) -> pd.DataFrame:
+        """Cuantiles por estrato (interpolación lineal, igual que pandas.quantile)"""
+        q = np.atleast_1d(np.asarray(q, dtype=float))
+        acumulado = np.cumsum(self.conteos, axis=1)
+        n = acumulado[:, -1]
+        posicion = (n[:, None] - 1) * q[None, :]
+        inferior = np.floor(posicion)
+        superior = np.minimum(inferior + 1, n[:, None] - 1)
+        # Índice de edad de cada estadístico de orden (equivale a searchsorted side='right')
+        v_inf = (acumulado[:, None, :] <= inferior[:, :, None]).sum(axis=2)
+        v_sup = (acumulado[:, None, :] <= superior[:, :, None]).sum(axis=2)
+        valores = v_inf + (posicion - inferior) * (v_sup - v_inf)
+        valores[n == 0] = np.nan
+        return pd.DataFrame(valores, index=self.estratos, columns=q)
+
+    def medianas(self) -> pd.Series:
+        return self.cuantiles(0.5)[0.5]
+
+    def medias(self) -> pd.Series:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.Series(self.conteos @ self.edades / self.n, index=self.estratos)
+
+    def agrupar(self, bins, etiquetas=None, right: bool = True, include_lowest: bool = True) -> pd.DataFrame:
+        """
+        Conteos por intervalos de edad (mismo criterio que pd.cut) sin recorrer las filas
+
+        Args:
+            bins: Límites de los intervalos
+            etiquetas: Etiquetas de los intervalos (None = intervalos de pandas)
+        """
+        grupo_edad = pd.cut(self.edades, bins=bins, labels=etiquetas, right=right,
+                            include_lowest=include_lowest)
+        codigos = grupo_edad.codes
+        categorias = grupo_edad.categories
+        pertenencia = np.zeros((len(self.edades), len(categorias)), dtype=np.int64)
+        dentro = codigos >= 0
+        pertenencia[np.flatnonzero(dentro), codigos[dentro]] = 1
+        return pd.DataFrame(self.conteos @ pertenencia, index=self.estratos, columns=categorias)
+
+    def valores_y_pesos(self, clave=None):
+        """Edades presentes y su frecuencia, para histogramas/KDE ponderados"""
+        conteos = self.conteos.sum(axis=0) if clave is None else self.conteos[self.estratos.get_loc(clave)]
+        presentes = np.flatnonzero(conteos)
+        return presentes, conteos[presentes]
+
+# ==============================================================
+# MÓDULO: MOTOR DE DIFERENCIAS ENTRE SUBGRUPOS
+# ==============================================================
+
+METODOS_CORRECCION = ('bonferroni', 'holm', 'bh')
+
+def ajustar_p_valores(p_valores, metodo: str = 'holm') -> np.ndarray:
+    """
+    Ajusta un vector de valores p por comparaciones múltiples
+
+    Args:
+        p_valores: Valores p sin ajustar (se ignoran los NaN)
+        metodo (str): 'bonferroni', 'holm' o 'bh' (Benjamini-Hochberg)
+    """
+    if metodo not in METODOS_CORRECCION:
+        raise ValueError(f"Método de corrección no soportado: {metodo}")
+
+    p = np.asarray(p_valores, dtype=float)
+    ajustados = np.full(p.shape, np.nan)
+    validos = np.isfinite(p)
+    m = int(validos.sum())
+    if m == 0:
+        return ajustados
+
+    p_val = p[validos]
+    if metodo == 'bonferroni':
+        ajustados[validos] = np.minimum(p_val * m, 1.0)
+        return ajustados
+
+    orden = np.argsort(p_val, kind='mergesort')
+    p_orden = p_val[orden]
+    if metodo == 'holm':
+        ajuste = np.maximum.accumulate(p_orden * (m - np.arange(m)))
+    else:
+        ajuste = np.minimum.accumulate((p_orden * m / np.arange(1, m + 1))[::-1])[::-1]
+
+    resultado = np.empty(m)
+    resultado[orden] = np.minimum(ajuste, 1.0)
+    ajustados[validos] = resultado
+    return ajustados
+
+
+class MotorDiferenciasSubgrupos:
+    """
+    Compara variables numéricas entre los niveles de variables de agrupación.
+
+    Para cada par (variable × grupo) elige la prueba según normalidad y tamaño
+    de los grupos: t de Welch o ANOVA si todos los grupos son aptos para una
+    prueba paramétrica, Mann-Whitney U o Kruskal-Wallis en caso contrario.
+    Los estadísticos se obtienen de sumas, varianzas centradas y sumas de
+    rangos por grupo calculadas con un único groupby por variable de agrupación.
+    Las varianzas no se derivan de la suma de cuadrados (Σx² - n·x̄²), que pierde
+    toda la precisión cuando la media es grande frente a la dispersión.
+    """
+
+    def __init__(self, df: pd.DataFrame = None, alpha: float = 0.05, n_min_grupo: int = 2,
+                 n_clt: int = None, metodo_correccion: str = None):
+        """
+        Args:
+            df (pd.DataFrame): Datos a analizar (opcional si se usan histogramas)
+            alpha (float): Nivel de significancia para normalidad y decisiones
+            n_min_grupo (int): Tamaño mínimo para incluir un grupo en la prueba
+            n_clt (int): Tamaño a partir del cual un grupo se considera apto para
+                pruebas paramétricas sin verificar normalidad (teorema central del límite);
+                None = Shapiro-Wilk en todos los grupos
+            metodo_correccion (str): 'bonferroni', 'holm' o 'bh' para corregir la grilla;
+                None = sin corrección propia (los valores p van a un RegistroPruebas)
+        """
+        if metodo_correccion is not None and metodo_correccion not in METODOS_CORRECCION:
+            raise ValueError(f"Método de corrección no soportado: {metodo_correccion}")
+        self.df = df
+        self.alpha = alpha
+        self.n_min_grupo = max(int(n_min_grupo), 2)
+        self.n_clt = n_clt
+        self.metodo_correccion = metodo_correccion
+
+    def evaluar(self, variable: str, grupo: str):
+        """Evalúa una sola variable numérica contra una variable de agrupación"""
+        return self.evaluar_grilla([variable], [grupo]).get(f"{variable}×{grupo}")
+
+    def evaluar_grilla(self, variables, grupos, histogramas: dict = None) -> dict:
+        """
+        Evalúa todas las combinaciones variable × grupo y, si hay metodo_correccion,
+        corrige los valores p de la grilla (p_ajustado y significancia)
+
+        Args:
+            variables: Columnas numéricas a comparar
+            grupos: Columnas de agrupación
+            histogramas (dict): {variable: HistogramaEdades} cuyos estratos incluyen
+                los grupos; esas variables se evalúan desde los conteos sin recorrer filas
+
+        Returns:
+            dict: Resultados por clave "variable×grupo" (None si no hay datos suficientes)
+        """
+        histogramas = histogramas or {}
+        columnas = set(self.df.columns) if self.df is not None else set()
+        resultados = {}
+        for grupo in grupos:
+            desde_histograma = [v for v in variables
+                                if v in histogramas and grupo in histogramas[v].estratos.names]
+            desde_df = [v for v in variables if v not in desde_histograma and v in columnas]
+            if desde_df and grupo in columnas:
+                resultados.update(self._evaluar_grupo(desde_df, grupo))
+            for variable in desde_histograma:
+                resultados[f"{variable}×{grupo}"] = self._evaluar_histograma(
+                    histogramas[variable].marginal(grupo), variable, grupo)
+
+        # Corrección por comparaciones múltiples sobre toda la grilla
+        if self.metodo_correccion is None:
+            return resultados
+        claves = [k for k, r in resultados.items() if r is not None]
+        p_ajustados = ajustar_p_valores([resultados[k]['p_val'] for k in claves],
+                                        self.metodo_correccion)
+        for clave, p_adj in zip(claves, p_ajustados):
+            resultados[clave]['p_ajustado'] = p_adj
+            resultados[clave]['significancia'] = self._interpretar_significancia(p_adj)
+        return resultados
+
+    def _evaluar_grupo(self, variables, grupo: str) -> dict:
+        """Calcula los estadísticos de todas las variables para un mismo agrupamiento"""
+        codigos, niveles = pd.factorize(self.df[grupo], sort=True)
+        validos = codigos >= 0
+        datos = self.df.loc[validos, variables].apply(pd.to_numeric, errors='coerce')
+        datos.index = codigos[validos]
+
+        # Un solo pase agrupado: conteos, sumas, varianzas, medianas y rangos
+        agrupado = datos.groupby(level=0)
+        n = agrupado.count()
+        sumas = agrupado.sum()
+        varianzas = agrupado.var()
+        medianas = agrupado.median()
+        suma_rangos = datos.rank(method='average').groupby(level=0).sum()
+
+        resultados = {}
+        for variable in variables:
+            clave = f"{variable}×{grupo}"
+            n_g = n[variable]
+            incluidos = n_g[n_g >= self.n_min_grupo].index
+            if len(incluidos) < 2:
+                print(f"   {clave}: no hay datos suficientes para comparar grupos")
+                resultados[clave] = None
+                continue
+
+            resumen = pd.DataFrame({
+                'n': n_g.loc[incluidos].astype(float),
+                'suma': sumas.loc[incluidos, variable],
+                'varianza': varianzas.loc[incluidos, variable],
+                'mediana': medianas.loc[incluidos, variable],
+            })
+            resumen.index = niveles[incluidos]
+            serie = datos[variable]
+
+            def muestra(nivel, serie=serie):
+                return serie.loc[niveles.get_loc(nivel)].dropna().to_numpy()
+
+            def rangos(serie=serie, n_g=n_g, incluidos=incluidos, variable=variable):
+                # Los rangos se recalculan solo si se excluyeron grupos pequeños
+                if len(incluidos) < n_g.gt(0).sum():
+                    sub = serie[serie.index.isin(incluidos)]
+                    r_sum = sub.rank(method='average').groupby(level=0).sum().loc[incluidos]
+                    return r_sum.values, sub.value_counts().values
+                return suma_rangos.loc[incluidos, variable].values, serie.value_counts().values
+
+            resultados[clave] = self._resultado(variable, grupo, resumen, muestra, rangos)
+        return resultados
+
+    def _evaluar_histograma(self, histograma: HistogramaEdades, variable: str, grupo: str):
+        """Misma evaluación que _evaluar_grupo, a partir de conteos por valor entero"""
+        clave = f"{variable}×{grupo}"
+        edades = histograma.edades.astype(float)
+        n = histograma.n
+        incluidos = np.flatnonzero(n >= self.n_min_grupo)
+        if len(incluidos) < 2:
+            print(f"   {clave}: no hay datos suficientes para comparar grupos")
+            return None
+
+        conteos = histograma.conteos[incluidos]
+        n_incluidos = n[incluidos].astype(float)
+        sumas = conteos @ edades
+        # Desvíos respecto de la media de cada grupo antes de elevar al cuadrado
+        desvios = edades[None, :] - (sumas / n_incluidos)[:, None]
+        resumen = pd.DataFrame({
+            'n': n_incluidos,
+            'suma': sumas,
+            'varianza': (conteos * desvios ** 2).sum(axis=1) / (n_incluidos - 1),
+            'mediana': histograma.medianas().to_numpy()[incluidos],
+        }, index=histograma.estratos[incluidos])
+
+        def muestra(nivel):
+            return np.repeat(edades, histograma.conteos[histograma.estratos.get_loc(nivel)])
+
+        def rangos():
+            # Rango promedio de cada valor entero (empates) y suma por grupo
+            global_ = conteos.sum(axis=0)
+            rango_medio = np.cumsum(global_) - (global_ - 1) / 2
+            return conteos @ rango_medio, global_[global_ > 0]
+
+        return self._resultado(variable, grupo, resumen, muestra, rangos)
+
+    def _resultado(self, variable: str, grupo: str, resumen: pd.DataFrame, muestra, rangos) -> dict:
+        """
+        Elige y ejecuta la prueba a partir del resumen por grupo
+
+        Args:
+            resumen (pd.DataFrame): n, suma, varianza (ddof=1) y mediana por grupo incluido
+            muestra: Función nivel -> valores del grupo (solo se usa en grupos pequeños)
+            rangos: Función () -> (suma de rangos por grupo, tamaños de los empates)
+        """
+        normalidad = self._evaluar_normalidad(resumen['n'], muestra)
+        parametrica = all(p is None or p >= self.alpha for p in normalidad.values()) \
+            and all(resumen['n'] >= 3)
+
+        if parametrica:
+            prueba = self._prueba_parametrica(resumen)
+        else:
+            suma_rangos, empates = rangos()
+            prueba = self._prueba_no_parametrica(resumen, np.asarray(suma_rangos, dtype=float), empates)
+
+        medias = resumen['suma'] / resumen['n']
+        return {
+            'variable': variable,
+            'grupo': grupo,
+            'prueba': prueba['prueba'],
+            'parametrica': parametrica,
+            'estadistico': prueba['estadistico'],
+            'p_val': prueba['p_val'],
+            'n_grupos': len(resumen),
+            'n': int(resumen['n'].sum()),
+            'medias': medias.to_dict(),
+            'medianas': resumen['mediana'].to_dict(),
+            'normalidad': normalidad,
+        }
+
+    def _evaluar_normalidad(self, n_por_grupo: pd.Series, muestra) -> dict:
+        """Shapiro-Wilk por grupo; con n_clt, los grupos de ese tamaño o más se asumen aptos"""
+        normalidad = {}
+        for nivel, n in n_por_grupo.items():
+            if self.n_clt is not None and n >= self.n_clt:
+                normalidad[nivel] = None
+                continue
+            valores = muestra(nivel)
+            if len(valores) >= 3 and np.unique(valores).size > 1:
+                normalidad[nivel] = stats.shapiro(valores).pvalue
+            else:
+                normalidad[nivel] = 0.0
+        return normalidad
+
+    def _prueba_parametrica(self, resumen: pd.DataFrame) -> dict:
+        """t de Welch (2 grupos) o ANOVA de una vía (k grupos) desde estadísticos suficientes"""
+        n = resumen['n'].values
+        medias = resumen['suma'].values / n
+        varianzas = resumen['varianza'].values
+        ss_dentro = varianzas * (n - 1)
+
+        if len(n) == 2:
+            se2 = varianzas / n
+            t_stat = (medias[0] - medias[1]) / np.sqrt(se2.sum())
+            gl = se2.sum() ** 2 / (se2 ** 2 / (n - 1)).sum()
+            p_val = 2 * stats.t.sf(abs(t_stat), gl)
+            return {'prueba': 't de Welch', 'estadistico': t_stat, 'p_val': p_val}
+
+        n_total = n.sum()
+        k = len(n)
+        media_global = resumen['suma'].sum() / n_total
+        ss_entre = (n * (medias - media_global) ** 2).sum()
+        f_stat = (ss_entre / (k - 1)) / (ss_dentro.sum() / (n_total - k))
+        p_val = stats.f.sf(f_stat, k - 1, n_total - k)
+        return {'prueba': 'ANOVA', 'estadistico': f_stat, 'p_val': p_val}
+
+    def _prueba_no_parametrica(self, resumen: pd.DataFrame, suma_rangos, empates) -> dict:
+        """Mann-Whitney U (2 grupos) o Kruskal-Wallis (k grupos) desde sumas de rangos"""
+        n = resumen['n'].values
+        n_total = n.sum()
+        correccion_empates = (empates.astype(float) ** 3 - empates).sum()
+
+        if len(n) == 2:
+            u1 = suma_rangos[0] - n[0] * (n[0] + 1) / 2
+            u = max(u1, n[0] * n[1] - u1)
+            mu = n[0] * n[1] / 2
+            sigma = np.sqrt(n[0] * n[1] / 12 *
+                            ((n_total + 1) - correccion_empates / (n_total * (n_total - 1))))
+            p_val = 1.0 if sigma == 0 else min(2 * stats.norm.sf((u - mu - 0.5) / sigma), 1.0)
+            return {'prueba': 'Mann-Whitney U', 'estadistico': u1, 'p_val': p_val}
+
+        h = 12 / (n_total * (n_total + 1)) * (suma_rangos ** 2 / n).sum() - 3 * (n_total + 1)
+        divisor = 1 - correccion_empates / (n_total ** 3 - n_total)
+        h = h / divisor if divisor > 0 else np.nan
+        p_val = stats.chi2.sf(h, len(n) - 1)
+        return {'prueba': 'Kruskal-Wallis', 'estadistico': h, 'p_val': p_val}
+
+    def _interpretar_significancia(self, p_val: float) -> str:
+        """Interpreta el valor p (ajustado)"""
+        return interpretar_significancia(p_val)
+
+# ==============================================================
+# MÓDULO: PRUEBAS POST-HOC
+# ==============================================================
+
+class PruebasPostHoc:
+    """
+    Comparaciones por pares entre los niveles de una variable de agrupación.
+
+    Reemplaza a scikit_posthocs para Dunn, Conover y Games-Howell. Los datos se
+    ordenan y se rankean una sola vez al construir el objeto; cada matriz se
+    obtiene por broadcasting de los estadísticos por grupo (k × k).
+    """
+
+    # Alias aceptados para compatibilidad con los nombres de statsmodels
+    ALIAS_CORRECCION = {'fdr_bh': 'bh'}
+
+    def __init__(self, df: pd.DataFrame, val_col: str, group_col: str):
+        """
+        Args:
+            df (pd.DataFrame): Datos a analizar
+            val_col (str): Columna numérica a comparar
+            group_col (str): Columna con los grupos
+        """
+        datos = df[[val_col, group_col]].dropna()
+        valores = pd.to_numeric(datos[val_col], errors='coerce')
+        datos = datos[valores.notna()]
+        valores = valores[valores.notna()].to_numpy(dtype=float)
+
+        codigos, niveles = pd.factorize(datos[group_col], sort=True)
+        k = len(niveles)
+        rangos = stats.rankdata(valores)
+
+        self.niveles = niveles
+        self.n_total = len(valores)
+        self.n = np.bincount(codigos, minlength=k).astype(float)
+        self.medias = np.bincount(codigos, weights=valores, minlength=k) / self.n
+        # Desvíos centrados en la media de cada grupo (sin Σx² - n·x̄²)
+        ss = np.bincount(codigos, weights=(valores - self.medias[codigos]) ** 2, minlength=k)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.varianzas = ss / (self.n - 1)
+        self.suma_rangos = np.bincount(codigos, weights=rangos, minlength=k)
+        self.rango_medio = self.suma_rangos / self.n
+        self.suma_rangos2 = float((rangos ** 2).sum())
+
+        _, empates = np.unique(valores, return_counts=True)
+        self.suma_empates = float((empates.astype(float) ** 3 - empates).sum())
+
+    def dunn(self, p_adjust: str = None) -> pd.DataFrame:
+        """Prueba de Dunn con corrección de empates (Glantz, 2012)"""
+        n = self.n_total
+        correccion = self.suma_empates / (12.0 * (n - 1))
+        diff = np.abs(self.rango_medio[:, None] - self.rango_medio[None, :])
+        b = 1.0 / self.n[:, None] + 1.0 / self.n[None, :]
+        z = diff / np.sqrt((n * (n + 1.0) / 12.0 - correccion) * b)
+        return self._matriz(2.0 * stats.norm.sf(z), p_adjust)
+
+    def conover(self, p_adjust: str = None) -> pd.DataFrame:
+        """Prueba de Conover-Iman sobre los rangos globales"""
+        n = self.n_total
+        k = len(self.niveles)
+        c = min(1.0, 1.0 - self.suma_empates / (n ** 3 - n))
+        h = 12.0 / (n * (n + 1.0)) * np.sum(self.suma_rangos ** 2 / self.n) - 3.0 * (n + 1.0)
+        h_cor = h / c
+        if c == 1:
+            s2 = n * (n + 1.0) / 12.0
+        else:
+            s2 = (self.suma_rangos2 - n * (n + 1.0) ** 2 / 4.0) / (n - 1.0)
+
+        diff = np.abs(self.rango_medio[:, None] - self.rango_medio[None, :])
+        b = 1.0 / self.n[:, None] + 1.0 / self.n[None, :]
+        d = (n - 1.0 - h_cor) / (n - k)
+        t = diff / np.sqrt(s2 * b * d)
+        return self._matriz(2.0 * stats.t.sf(t, df=n - k), p_adjust)
+
+    def games_howell(self, p_adjust: str = None) -> pd.DataFrame:
+        """Prueba de Games-Howell (varianzas y tamaños distintos)"""
+        k = len(self.niveles)
+        se2 = self.varianzas / self.n
+        a = se2[:, None] + se2[None, :]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            q = np.abs(self.medias[:, None] - self.medias[None, :]) / np.sqrt(a) * np.sqrt(2.0)
+            gl = a ** 2 / ((se2 ** 2 / (self.n - 1))[:, None] + (se2 ** 2 / (self.n - 1))[None, :])
+        i, j = np.triu_indices(k, 1)
+        p = np.ones((k, k))
+        p[i, j] = stats.studentized_range.sf(q[i, j], k, gl[i, j])
+        return self._matriz(p, p_adjust)
+
+    def _matriz(self, p: np.ndarray, p_adjust: str = None) -> pd.DataFrame:
+        """Ajusta el triángulo superior, lo refleja y fija la diagonal en 1"""
+        k = len(self.niveles)
+        i, j = np.triu_indices(k, 1)
+        superior = p[i, j]
+        if p_adjust:
+            metodo = self.ALIAS_CORRECCION.get(p_adjust, p_adjust)
+            superior = ajustar_p_valores(superior, metodo)
+
+        matriz = np.ones((k, k))
+        matriz[i, j] = superior
+        matriz[j, i] = superior
+        return pd.DataFrame(matriz, index=self.niveles, columns=self.niveles)
+
+# ==============================================================
+# MÓDULO: REGISTRO DE PRUEBAS (COMPARACIONES MÚLTIPLES)
+# ==============================================================
+
+def interpretar_significancia(p_val: float, alpha: float = 0.05) -> str:
+    """Etiqueta de un valor p (o q); 'Muy significativa' por debajo de alpha/5"""
+    if p_val is None or not np.isfinite(p_val):
+        return "No evaluable"
+    if p_val < alpha / 5:
+        return "Muy significativa"
+    elif p_val < alpha:
+        return "Significativa"
+    else:
+        return "No significativa"
+
+
+class RegistroPruebas:
+    """
+    Registro de los valores p de todas las pruebas de una corrida.
+
+    Cada prueba (Chi-cuadrado, Fisher, t, ANOVA, Kruskal-Wallis, Dunn, CMH...)
+    se registra con una clave (familia, etiqueta); registrar de nuevo la misma
+    clave la reemplaza, de modo que recalcular tras actualizar() no duplica
+    pruebas. La corrección (Benjamini–Hochberg u Holm) se aplica en un solo paso
+    vectorizado sobre todo el registro y se repite solo si este cambió.
+    """
+
+    def __init__(self, metodo: str = 'bh', alpha: float = 0.05):
+        """
+        Args:
+            metodo (str): 'bh' (q-valores de Benjamini–Hochberg), 'holm' o 'bonferroni'
+            alpha (float): Nivel para las etiquetas de significancia
+        """
+        if metodo not in METODOS_CORRECCION:
+            raise ValueError(f"Método de corrección no soportado: {metodo}")
+        self.metodo = metodo
+        self.alpha = alpha
+        self._posiciones = {}
+        self._pruebas = []
+        self._p = []
+        self._q = None
+
+    def __len__(self) -> int:
+        return len(self._p)
+
+    def registrar(self, familia: str, etiqueta: str, p_val: float, prueba: str = None,
+                  estadistico: float = None) -> tuple:
+        """
+        Agrega (o reemplaza) el valor p de una prueba
+
+        Args:
+            familia (str): Origen de la prueba ('asociaciones', 'diferencias', 'familiar'...)
+            etiqueta (str): Identificador de la prueba dentro de la familia (p. ej. 'SEXO×CATEGORIA')
+            p_val (float): Valor p sin ajustar
+            prueba (str): Nombre de la prueba
+            estadistico (float): Valor del estadístico
+        """
+        clave = (familia, etiqueta)
+        fila = {'familia': familia, 'etiqueta': etiqueta, 'prueba': prueba,
+                'estadistico': np.nan if estadistico is None else float(estadistico)}
+        p_val = np.nan if p_val is None else float(p_val)
+        if clave in self._posiciones:
+            posicion = self._posiciones[clave]
+            self._pruebas[posicion], self._p[posicion] = fila, p_val
+        else:
+            self._posiciones[clave] = len(self._p)
+            self._pruebas.append(fila)
+            self._p.append(p_val)
+        self._q = None
+        return clave
+
+    def registrar_lote(self, familia: str, etiquetas, p_valores, prueba: str = None, estadisticos=None) -> list:
+        """Registra varias pruebas de una misma familia (p. ej. los pares de una prueba de Dunn)"""
+        estadisticos = [None] * len(etiquetas) if estadisticos is None else estadisticos
+        return [self.registrar(familia, etiqueta, p, prueba, estadistico)
+                for etiqueta, p, estadistico in zip(etiquetas, p_valores, estadisticos)]
+
+    def q_valores(self) -> np.ndarray:
+        """Valores ajustados de todo el registro, en orden de registro"""
+        if self._q is None:
+            self._q = ajustar_p_valores(self._p, self.metodo)
+        return self._q
+
+    def q_valor(self, familia: str, etiqueta: str) -> float:
+        """Valor ajustado de una prueba (NaN si no está registrada)"""
+        posicion = self._posiciones.get((familia, etiqueta))
+        return np.nan if posicion is None else float(self.q_valores()[posicion])
+
+    def significancia(self, familia: str, etiqueta: str) -> str:
+        return interpretar_significancia(self.q_valor(familia, etiqueta), self.alpha)
+
+    def tabla(self) -> pd.DataFrame:
+        """Una fila por prueba con p, valor ajustado (q_val) y significancia ajustada"""
+        tabla = pd.DataFrame(self._pruebas, columns=['familia', 'etiqueta', 'prueba', 'estadistico'])
+        tabla['p_val'] = np.asarray(self._p, dtype=float)
+        tabla['q_val'] = self.q_valores()
+        tabla['significancia'] = [interpretar_significancia(q, self.alpha) for q in tabla['q_val']]
+        return tabla
+
+    def imprimir(self, familias=None):
+        """Resumen de la corrección global y pruebas que siguen siendo significativas"""
+        tabla = self.tabla()
+        if familias is not None:
+            tabla = tabla[tabla['familia'].isin(familias)]
+        nombres = {'bh': 'Benjamini–Hochberg', 'holm': 'Holm', 'bonferroni': 'Bonferroni'}
+        print(f"\nCONTROL DE COMPARACIONES MÚLTIPLES ({nombres[self.metodo]}, {len(self)} pruebas registradas):")
+        sin_ajuste = int((tabla['p_val'] < self.alpha).sum())
+        significativas = tabla[tabla['q_val'] < self.alpha].sort_values('q_val', kind='mergesort')
+        print(f"   - p < {self.alpha} sin ajustar: {sin_ajuste}; tras el ajuste: {len(significativas)}")
+        for _, r in significativas.iterrows():
+            print(f"   - [{r['familia']}] {r['etiqueta']} ({r['prueba']}): "
+                  f"p = {r['p_val']:.4f}, q = {r['q_val']:.4f} ({r['significancia']})")
+
+# ==============================================================
+# MÓDULO: ESTADÍSTICOS SUFICIENTES (ACTUALIZACIÓN INCREMENTAL)
+# ==============================================================
+
+# Pares de variables para las pruebas de asociación
+PARES_ASOCIACION = [
+    ('SEXO_UP', 'CATEGORIA_UP'),
+    ('GRUPO_ETARIO', 'CATEGORIA_UP'),
+    ('ESTADO_CIVIL_UP', 'SEXO_UP'),
+    ('NIVEL_EDU_LOW', 'CATEGORIA_UP')
+]
+
+# Variables de agrupación para las diferencias de edad
+GRUPOS_DIFERENCIAS = ('SEXO_UP', 'CATEGORIA_UP')
+
+
+class EstadisticosSuficientes:
+    """
+    Estadísticos suficientes y fusionables de los análisis demográficos:
+    conteos por variable, tablas de contingencia de los pares de asociación e
+    histogramas de edad por estrato. Agregar o eliminar un lote de filas
+    actualiza todo en tiempo proporcional al tamaño del lote.
+    """
+
+    def __init__(self, pares=PARES_ASOCIACION, estratos=GRUPOS_DIFERENCIAS, variables_edad=('EDAD2',),
+                 conteos_conjuntos=(('GRADO', 'GRADO_LOW'),)):
+        """
+        Args:
+            pares: Pares de variables categóricas para tablas de contingencia
+            estratos: Variables de agrupación de los histogramas de edad
+            variables_edad: Variables enteras para las que se guardan histogramas
+            conteos_conjuntos: Grupos de columnas con conteos conjuntos (clave = tupla de columnas)
+        """
+        self.pares = list(pares)
+        self.estratos = list(estratos)
+        self.variables_edad = list(variables_edad)
+        self.conteos_conjuntos = [tuple(columnas) for columnas in conteos_conjuntos]
+        self.n_filas = 0
+        self.conteos = {}
+        self.tablas = {}
+        self.histogramas = {}
+
+    @classmethod
+    def desde_df(cls, df: pd.DataFrame, **kwargs) -> 'EstadisticosSuficientes':
+        return cls(**kwargs).agregar(df)
+
+    def agregar(self, df: pd.DataFrame) -> 'EstadisticosSuficientes':
+        """Incorpora un lote de filas"""
+        return self._aplicar(df, 1)
+
+    def eliminar(self, df: pd.DataFrame) -> 'EstadisticosSuficientes':
+        """Descuenta un lote de filas (deben haberse agregado antes)"""
+        return self._aplicar(df, -1)
+
+    def _aplicar(self, df: pd.DataFrame, signo: int):
+        if df is None or df.empty:
+            return self
+        self.n_filas += signo * len(df)
+
+        variables = {v for par in self.pares for v in par} | set(self.estratos)
+        for var in variables & set(df.columns):
+            conteo = df[var].value_counts()
+            self.conteos[var] = self._sumar(self.conteos.get(var), conteo, signo)
+
+        for columnas in self.conteos_conjuntos:
+            if set(columnas).issubset(df.columns):
+                conteo = df.value_counts(list(columnas))
+                self.conteos[columnas] = self._sumar(self.conteos.get(columnas), conteo, signo)
+
+        for var1, var2 in self.pares:
+            if {var1, var2}.issubset(df.columns):
+                tabla = pd.crosstab(df[var1], df[var2])
+                self.tablas[(var1, var2)] = self._sumar(self.tablas.get((var1, var2)), tabla, signo)
+
+        estratos = [e for e in self.estratos if e in df.columns]
+        for var in self.variables_edad:
+            if var in df.columns:
+                self._sumar_histograma(var, HistogramaEdades.desde_df(df, var, estratos), signo)
+        return self
+
+    def fusionar(self, otro: 'EstadisticosSuficientes', signo: int = 1) -> 'EstadisticosSuficientes':
+        """
+        Suma (signo=1) o resta (signo=-1) los estadísticos de otro lote, p. ej. los
+        de otro archivo: el resultado es el mismo que si se hubieran agregado sus filas
+
+        Args:
+            otro (EstadisticosSuficientes): Estadísticos con las mismas variables
+            signo (int): 1 para sumar, -1 para restar
+        """
+        self.n_filas += signo * otro.n_filas
+        for clave, conteo in otro.conteos.items():
+            self.conteos[clave] = self._sumar(self.conteos.get(clave), conteo, signo)
+        for par, tabla in otro.tablas.items():
+            self.tablas[par] = self._sumar(self.tablas.get(par), tabla, signo)
+        for var, histograma in otro.histogramas.items():
+            self._sumar_histograma(var, histograma, signo)
+        return self
+
+    def _sumar_histograma(self, var: str, lote: HistogramaEdades, signo: int):
+        actual = self.histogramas.get(var)
+        if actual is None:
+            if signo < 0:
+                raise ValueError("No se pueden eliminar registros de un histograma vacío")
+            self.histogramas[var] = lote
+        else:
+            self.histogramas[var] = actual.fusionar(lote, signo)
+
+    @staticmethod
+    def _sumar(actual, delta, signo: int):
+        """Suma o resta conteos (Series o DataFrame) y quita categorías que quedan en cero"""
+        if actual is None:
+            if signo < 0:
+                raise ValueError("No se pueden eliminar registros de conteos vacíos")
+            return delta.astype(np.int64)
+        resultado = actual.add(signo * delta, fill_value=0).astype(np.int64)
+        if (resultado.to_numpy() < 0).any():
+            raise ValueError("Se eliminaron más registros de los que se habían agregado")
+        if isinstance(resultado, pd.DataFrame):
+            return resultado.loc[resultado.ne(0).any(axis=1), resultado.ne(0).any(axis=0)]
+        return resultado[resultado != 0]
+
 # ==============================================================
 # MÓDULO: ANÁLISIS ESTADÍSTICO DEMOGRÁFICO
 # ==============================================================
@@ -515,39 +1841,160 @@ class AnalisisEstadisticoFAC:
     Módulo especializado en análisis estadísticos demográficos
     """
     
-    def __init__(self, df: pd.DataFrame):
-        self.df = df
+    def __init__(self, df: pd.DataFrame, suficientes: EstadisticosSuficientes = None,
+                 registro: RegistroPruebas = None):
+        """
+        Args:
+            df (pd.DataFrame): Datos preprocesados (None si solo se dispone de los estadísticos,
+                p. ej. los fusionados de varios archivos)
+            suficientes (EstadisticosSuficientes): Estadísticos ya calculados (opcional)
+            registro (RegistroPruebas): Registro de valores p compartido por la corrida (opcional)
+        """
+        self._df = df
+        self._propio = False       # df es del llamador hasta la primera edición (se copia una vez)
+        self._agregadas = []       # lotes agregados aún no consolidados en df
+        self._eliminadas = set()   # etiquetas eliminadas aún no quitadas de df
+        self._siguiente = None     # primera etiqueta libre para filas nuevas
         self.resultados = {}
+        self.suficientes = suficientes if suficientes is not None else EstadisticosSuficientes.desde_df(df)
+        self.registro = registro if registro is not None else RegistroPruebas()
+        self._parametros_diferencias = {}
     
+    @property
+    def df(self) -> pd.DataFrame:
+        """Datos actuales; los lotes pendientes de actualizar() se consolidan al consultarlos"""
+        if self._agregadas or self._eliminadas:
+            base = self._df.drop(index=list(self._eliminadas)) if self._eliminadas else self._df
+            self._df = pd.concat([base] + self._agregadas) if self._agregadas else base
+            self._agregadas, self._eliminadas = [], set()
+            self._propio = True
+        return self._df
+    
+    @df.setter
+    def df(self, df: pd.DataFrame):
+        self._df = df
+        self._propio = False
+        self._agregadas, self._eliminadas = [], set()
+        self._siguiente = None
+    
+    def _columnas(self) -> set:
+        return set(self._df.columns) if self._df is not None else set()
+    
+    def _validar_etiquetas(self, etiquetas, argumento: str) -> pd.Index:
+        """Etiquetas existentes (y no eliminadas) de df; KeyError con las que no lo son"""
+        etiquetas = pd.Index(etiquetas)
+        if etiquetas.has_duplicates:
+            raise ValueError(f"{argumento}: etiquetas repetidas {list(etiquetas[etiquetas.duplicated()][:10])}")
+        if self._df is None:
+            raise KeyError(f"{argumento}: el análisis no tiene filas (solo estadísticos suficientes)")
+        # get_indexer usa la tabla hash del índice, que pandas construye una vez: O(lote)
+        if self._agregadas and (self._df.index.get_indexer(etiquetas) < 0).any():
+            self.df  # la etiqueta puede estar en un lote pendiente: se consolida
+        faltantes = etiquetas[(self._df.index.get_indexer(etiquetas) < 0) | etiquetas.isin(self._eliminadas)]
+        if len(faltantes):
+            raise KeyError(f"{argumento}: etiquetas que no están en los datos: {list(faltantes[:10])}")
+        return etiquetas
+    
+    def _etiquetas_nuevas(self, n: int) -> pd.RangeIndex:
+        """Etiquetas enteras que no colisionan con ninguna fila actual ni eliminada"""
+        if self._siguiente is None:
+            indice = self._df.index if self._df is not None else pd.Index([])
+            enteras = pd.api.types.is_integer_dtype(indice.dtype) and len(indice)
+            self._siguiente = int(indice.max()) + 1 if enteras else len(indice)
+        etiquetas = pd.RangeIndex(self._siguiente, self._siguiente + n)
+        self._siguiente += n
+        return etiquetas
+    
+    def actualizar(self, agregar: pd.DataFrame = None, editar: pd.DataFrame = None, eliminar=None):
+        """
+        Actualiza los resultados con un lote de cambios, sin recalcular sobre todo el dataset.
+        El costo es proporcional al lote: los agregados y eliminados se acumulan y
+        se consolidan en `df` solo cuando se consulta.
+        
+        Las columnas derivadas (SEXO_UP, GRUPO_ETARIO...) se recalculan aquí con
+        AnalizadorDemograficoFAC.preparar_lote, así que basta con dar las columnas de
+        origen: editar solo EDAD2 también actualiza GRUPO_ETARIO.
+        
+        Args:
+            agregar (pd.DataFrame): Filas nuevas. Su índice se ignora: reciben etiquetas
+                nuevas, así que un lote leído de archivo (0, 1, ...) no pisa filas.
+            editar (pd.DataFrame): Columnas corregidas, con las etiquetas de las filas
+                existentes que reemplazan; el resto de las columnas se conserva
+            eliminar: Etiquetas de las filas a eliminar
+        """
+        preparador = AnalizadorDemograficoFAC(None)
+        if editar is not None and len(editar):
+            etiquetas = self._validar_etiquetas(editar.index, 'editar')
+            desconocidas = editar.columns.difference(self._df.columns)
+            if len(desconocidas):
+                raise KeyError(f"editar: columnas que no están en los datos: {list(desconocidas)}")
+            if not self._propio:
+                self._df = self._df.copy()
+                self._propio = True
+            anteriores = self._df.loc[etiquetas]
+            nuevas = anteriores.copy()
+            nuevas.loc[:, editar.columns] = editar.loc[etiquetas]
+            nuevas = preparador.preparar_lote(nuevas)
+            self.suficientes.eliminar(anteriores)
+            self.suficientes.agregar(nuevas)
+            columnas = nuevas.columns.intersection(self._df.columns)
+            self._df.loc[etiquetas, columnas] = nuevas[columnas]
+        
+        if eliminar is not None and len(eliminar):
+            etiquetas = self._validar_etiquetas(eliminar, 'eliminar')
+            self.suficientes.eliminar(self._df.loc[etiquetas])
+            self._eliminadas.update(etiquetas)
+        
+        if agregar is not None and len(agregar):
+            agregar = preparador.preparar_lote(agregar).set_axis(self._etiquetas_nuevas(len(agregar)))
+            self.suficientes.agregar(agregar)
+            if self._df is not None:
+                self._agregadas.append(agregar)
+        
+        # Los análisis ya ejecutados se recalculan desde los estadísticos suficientes
+        if 'indices' in self.resultados:
+            self.calcular_indices_demograficos()
+        if 'estructura_etaria' in self.resultados:
+            self.analizar_estructura_etaria()
+        if 'asociaciones' in self.resultados:
+            self.analizar_asociaciones_demograficas()
+        if 'diferencias_subgrupos' in self.resultados:
+            self.analizar_diferencias_subgrupos(**self._parametros_diferencias)
+        return self.resultados
+    
+    @PERFILADOR.perfilar('indices_demograficos')
     def calcular_indices_demograficos(self):
         """Calcula índices demográficos especializados"""
         print("\nCALCULANDO ÍNDICES DEMOGRÁFICOS...")
         
         # Índice de masculinidad
-        hombres = (self.df['SEXO_UP'] == 'HOMBRE').sum() if 'SEXO_UP' in self.df else 0
-        mujeres = (self.df['SEXO_UP'] == 'MUJER').sum() if 'SEXO_UP' in self.df else 0
+        sexo = self.suficientes.conteos.get('SEXO_UP', pd.Series(dtype=np.int64))
+        hombres = sexo.get('HOMBRE', 0)
+        mujeres = sexo.get('MUJER', 0)
         indice_masculinidad = np.nan if mujeres == 0 else (hombres/mujeres)*100
         
-        # Índice de dependencia demográfica
-        if 'EDAD2' in self.df.columns:
-            edad = self.df['EDAD2'].dropna()
-            jovenes = (edad < 30).sum()
-            adultos_mayores = (edad >= 50).sum()
-            poblacion_activa = ((edad >= 30) & (edad < 50)).sum()
+        # Índice de dependencia demográfica (desde el histograma de edades)
+        histograma_edad = self.suficientes.histogramas.get('EDAD2')
+        if histograma_edad is not None:
+            histograma = histograma_edad.total()
+            jovenes = histograma.contar(hasta=30)
+            adultos_mayores = histograma.contar(desde=50)
+            poblacion_activa = histograma.contar(desde=30, hasta=50)
             indice_dependencia = np.nan if poblacion_activa == 0 else ((jovenes + adultos_mayores)/poblacion_activa)*100
             
             # Coeficiente de variación etaria
+            media = histograma.media()
             cv_edad = np.nan
-            if len(edad) > 1 and float(edad.mean()) != 0.0:
-                cv_edad = (edad.std(ddof=1) / edad.mean()) * 100
+            if histograma.n > 1 and media != 0.0:
+                cv_edad = (np.sqrt(histograma.varianza(ddof=1)) / media) * 100
         else:
             indice_dependencia = np.nan
             cv_edad = np.nan
         
         # Mediana de edad por categoría
         edad_mediana_categoria = pd.Series(dtype=float)
-        if 'CATEGORIA_UP' in self.df.columns and 'EDAD2' in self.df.columns:
-            edad_mediana_categoria = self.df.groupby('CATEGORIA_UP', dropna=False)['EDAD2'].median()
+        if histograma_edad is not None and 'CATEGORIA_UP' in histograma_edad.estratos.names:
+            edad_mediana_categoria = histograma_edad.marginal('CATEGORIA_UP').medianas()
         
         # Almacenar resultados
         self.resultados['indices'] = {
@@ -562,14 +2009,16 @@ class AnalisisEstadisticoFAC:
         self._imprimir_indices()
         return self.resultados['indices']
     
+    @PERFILADOR.perfilar('estructura_etaria')
     def analizar_estructura_etaria(self):
         """Analiza la estructura etaria de la población"""
-        if 'GRUPO_ETARIO' not in self.df.columns:
+        histograma_edad = self.suficientes.histogramas.get('EDAD2')
+        if histograma_edad is None:
             print("No se pueden analizar grupos etarios - columna no disponible")
             return None, None
             
-        distribucion_etaria = self.df['GRUPO_ETARIO'].value_counts().reindex(GRUPOS_ETARIOS, fill_value=0)
-        porcentajes_etaria = (distribucion_etaria / len(self.df) * 100).round(1)
+        distribucion_etaria = histograma_edad.agrupar(BINS_ETARIOS, GRUPOS_ETARIOS).sum()
+        porcentajes_etaria = (distribucion_etaria / self.suficientes.n_filas * 100).round(1)
         
         grupo_modal = distribucion_etaria.idxmax() if distribucion_etaria.sum() > 0 else np.nan
         
@@ -590,23 +2039,18 @@ class AnalisisEstadisticoFAC:
         
         return distribucion_etaria, grupo_modal
     
+    @PERFILADOR.perfilar('asociaciones')
     def analizar_asociaciones_demograficas(self):
         """Analiza asociaciones entre variables demográficas usando Chi-cuadrado"""
         print(f"\nANÁLISIS DE ASOCIACIONES DEMOGRÁFICAS:")
         
         # Pares de variables para analizar
         asociaciones = []
-        variables_disponibles = set(self.df.columns)
-        
-        pares_interes = [
-            ('SEXO_UP', 'CATEGORIA_UP'),
-            ('GRUPO_ETARIO', 'CATEGORIA_UP'),
-            ('ESTADO_CIVIL_UP', 'SEXO_UP'),
-            ('NIVEL_EDU_LOW', 'CATEGORIA_UP')
-        ]
+        variables_disponibles = self._columnas()
         
-        # Filtrar solo pares con ambas variables disponibles
-        asociaciones = [(v1, v2) for v1, v2 in pares_interes if v1 in variables_disponibles and v2 in variables_disponibles]
+        # Filtrar solo pares con ambas variables disponibles (o con su tabla ya acumulada)
+        asociaciones = [(v1, v2) for v1, v2 in PARES_ASOCIACION
+                        if (v1, v2) in self.suficientes.tablas or {v1, v2} <= variables_disponibles]
         
         resultados_asociaciones = {}
         
@@ -618,23 +2062,27 @@ class AnalisisEstadisticoFAC:
         self.resultados['asociaciones'] = resultados_asociaciones
         return resultados_asociaciones
     
+    @PERFILADOR.perfilar('chi_cuadrado {var1}×{var2}')
     def _test_chi_cuadrado(self, var1: str, var2: str):
         """Ejecuta test de Chi-cuadrado entre dos variables"""
-        tabla = pd.crosstab(self.df[var1], self.df[var2])
+        tabla = self.suficientes.tablas.get((var1, var2))
+        if tabla is None:
+            tabla = pd.crosstab(self.df[var1], self.df[var2])
         
         if tabla.size == 0 or tabla.shape[0] < 2 or tabla.shape[1] < 2:
             return None
             
-        chi2, p_val, dof, expected = chi2_contingency(tabla)
+        chi2, p_val, dof, expected = stats.chi2_contingency(tabla)
         n = tabla.values.sum()
         cramer_v = np.sqrt(chi2 / (n * (min(tabla.shape) - 1)))
         
-        # Interpretación
+        # Interpretación (sin ajustar; la corrección global queda en el registro)
         significancia = self._interpretar_significancia(p_val)
         fuerza_asociacion = self._interpretar_cramer_v(cramer_v)
+        self.registro.registrar('asociaciones', f"{var1}×{var2}", p_val, 'Chi-cuadrado', chi2)
         
         print(f"    {var1} × {var2}:")
-        print(f"      Chi² = {chi2:.2f}, p = {p_val:.4f} ({significancia})")
+        print(f"      Chi² = {chi2:.2f}, p = {p_val:.4f} ({significancia} sin ajustar)")
         print(f"      V de Cramér = {cramer_v:.3f} (Asociación {fuerza_asociacion})")
         
         return {
@@ -645,78 +2093,50 @@ class AnalisisEstadisticoFAC:
             'fuerza': fuerza_asociacion
         }
     
-    def analizar_diferencias_subgrupos(self):
-        """Analiza diferencias de edad entre subgrupos"""
+    @PERFILADOR.perfilar('diferencias_subgrupos')
+    def analizar_diferencias_subgrupos(self, variables=('EDAD2',), grupos=('SEXO_UP', 'CATEGORIA_UP')):
+        """
+        Analiza diferencias de variables numéricas entre subgrupos. La corrección por
+        comparaciones múltiples es la del registro de pruebas (valor q).
+
+        Args:
+            variables: Columnas numéricas a comparar (por defecto EDAD2)
+            grupos: Columnas de agrupación (por defecto sexo y categoría)
+        """
         print(f"\nDIFERENCIAS DE EDAD POR SUBGRUPOS:")
         
-        resultados = {}
-        
-        # Test t para diferencias por sexo
-        if {'SEXO_UP', 'EDAD2'}.issubset(self.df.columns):
-            resultado_t = self._test_t_sexo()
-            resultados['test_t_sexo'] = resultado_t
+        self._parametros_diferencias = {'variables': variables, 'grupos': grupos}
+        # Las variables con histograma por grupo no necesitan las filas (ni consolidar df)
+        histogramas = self.suficientes.histogramas
+        desde_filas = any(v not in histogramas or not set(grupos) <= set(histogramas[v].estratos.names)
+                          for v in variables)
+        motor = MotorDiferenciasSubgrupos(self.df if desde_filas else None)
+        resultados = motor.evaluar_grilla(variables, grupos, self.suficientes.histogramas)
         
-        # ANOVA por categoría
-        if {'CATEGORIA_UP', 'EDAD2'}.issubset(self.df.columns):
-            resultado_anova = self._test_anova_categoria()
-            resultados['anova_categoria'] = resultado_anova
+        # Se registra toda la grilla antes de imprimir, para que los q incluyan estas pruebas
+        evaluadas = {clave: resultado for clave, resultado in resultados.items() if resultado}
+        for clave, resultado in evaluadas.items():
+            self.registro.registrar('diferencias', clave, resultado['p_val'], resultado['prueba'],
+                                    resultado['estadistico'])
+        for clave, resultado in evaluadas.items():
+            self._imprimir_diferencia(clave, resultado)
         
         self.resultados['diferencias_subgrupos'] = resultados
         return resultados
     
-    def _test_t_sexo(self):
-        """Test t de Student para diferencias de edad entre sexos"""
-        edad_h = self.df.loc[self.df['SEXO_UP'] == 'HOMBRE', 'EDAD2'].dropna()
-        edad_m = self.df.loc[self.df['SEXO_UP'] == 'MUJER', 'EDAD2'].dropna()
-        
-        if len(edad_h) <= 1 or len(edad_m) <= 1:
-            print("   No hay datos suficientes para test t")
-            return None
-        
-        t_stat, p_val = stats.ttest_ind(edad_h, edad_m, equal_var=False, nan_policy='omit')
-        diferencia_media = edad_h.mean() - edad_m.mean()
-        
-        significancia = self._interpretar_significancia(p_val)
-        
-        print(f"    Diferencia H-M en edad promedio: {diferencia_media:.1f} años")
-        print(f"    Test t: t = {t_stat:.3f}, p = {p_val:.4f} ({significancia})")
-        
-        return {
-            't_stat': t_stat,
-            'p_val': p_val,
-            'diferencia_media': diferencia_media,
-            'significancia': significancia
-        }
-    
-    def _test_anova_categoria(self):
-        """ANOVA para diferencias de edad entre categorías"""
-        grupos = [g.dropna() for _, g in self.df.groupby('CATEGORIA_UP')['EDAD2']]
-        grupos = [g for g in grupos if len(g) > 1]
-        
-        if len(grupos) < 2:
-            print("   No hay datos suficientes para ANOVA")
-            return None
-        
-        f_stat, p_val = stats.f_oneway(*grupos)
-        significancia = self._interpretar_significancia(p_val)
-        
-        print(f"   Variación de edad entre categorías:")
-        print(f"   ANOVA: F = {f_stat:.3f}, p = {p_val:.4f} ({significancia})")
-        
-        return {
-            'f_stat': f_stat,
-            'p_val': p_val,
-            'significancia': significancia
-        }
+    def _imprimir_diferencia(self, clave: str, resultado: dict):
+        """Imprime el resultado de una comparación entre subgrupos"""
+        print(f"    {clave} ({resultado['n_grupos']} grupos, n = {resultado['n']:,}):")
+        if resultado['n_grupos'] == 2:
+            (g1, m1), (g2, m2) = resultado['medias'].items()
+            print(f"      Diferencia {g1}-{g2} en promedio: {m1 - m2:.1f}")
+        print(f"      {resultado['prueba']}: estadístico = {resultado['estadistico']:.3f}, "
+              f"p = {resultado['p_val']:.4f}, q = {self.registro.q_valor('diferencias', clave):.4f} "
+              f"({self.registro.significancia('diferencias', clave)})")
     
     def _interpretar_significancia(self, p_val: float) -> str:
         """Interpreta el valor p"""
-        if p_val < 0.01:
-            return "Muy significativa"
-        elif p_val < 0.05:
-            return "Significativa"
-        else:
-            return "No significativa"
+        return interpretar_significancia(p_val)
     
     def _interpretar_cramer_v(self, cramer_v: float) -> str:
         """Interpreta el valor de V de Cramér"""
@@ -748,6 +2168,1799 @@ class AnalisisEstadisticoFAC:
         except:
             return default
 
+    def exportar_resultados(self, directorio: str, formatos=('json', 'parquet')) -> 'ResultadosFAC':
+        """
+        Exporta los resultados calculados hasta ahora (ver ResultadosFAC.exportar)
+
+        Args:
+            directorio (str): Carpeta de salida
+            formatos: 'json' y/o 'parquet'
+        """
+        modelo = ResultadosFAC.desde_analisis(self)
+        modelo.exportar(directorio, formatos)
+        return modelo
+
+# ==============================================================
+# MÓDULO: MODELO DE RESULTADOS (EXPORTACIÓN JSON/PARQUET)
+# ==============================================================
+
+VERSION_RESULTADOS = 4
+
+
+def _nativo(valor):
+    """Convierte escalares numpy a tipos de Python; NaN e infinitos pasan a None"""
+    if valor is None:
+        return None
+    if isinstance(valor, (bool, np.bool_)):
+        return bool(valor)
+    if isinstance(valor, (int, np.integer)):
+        return int(valor)
+    if isinstance(valor, (float, np.floating)):
+        return float(valor) if np.isfinite(valor) else None
+    if isinstance(valor, dict):
+        return {str(k): _nativo(v) for k, v in valor.items()}
+    if isinstance(valor, pd.Series):
+        return {str(k): _nativo(v) for k, v in valor.items()}
+    return valor
+
+
+# Tipos de columna de las tablas Parquet según la anotación de cada campo
+_TIPOS_PARQUET = {str: 'object', float: 'float64', int: 'Int64', bool: 'boolean'}
+
+
+def _tabla_tipada(filas: list, campos: dict) -> pd.DataFrame:
+    """DataFrame con columnas tipadas según `campos` (nombre -> tipo), aunque esté vacío"""
+    return pd.DataFrame(filas, columns=list(campos)).astype(
+        {nombre: _TIPOS_PARQUET[tipo] for nombre, tipo in campos.items()})
+
+
+@dataclass
+class PerfilPoblacional:
+    """Perfil general de la población (tamaño, edades y distribuciones básicas)"""
+    total: int = 0
+    edad_media: float = None
+    edad_mediana: float = None
+    edad_minima: float = None
+    edad_maxima: float = None
+    rango_edad_modal: str = None
+    categorias: dict = field(default_factory=dict)
+    sexo: dict = field(default_factory=dict)
+    grado_frecuente: str = None
+    grado_frecuente_n: int = None
+
+    @classmethod
+    def desde_suficientes(cls, suficientes: EstadisticosSuficientes) -> 'PerfilPoblacional':
+        """Construye el perfil desde conteos e histogramas, sin recorrer el DataFrame"""
+        perfil = cls(total=int(suficientes.n_filas))
+        for atributo, variable in (('categorias', 'CATEGORIA_UP'), ('sexo', 'SEXO_UP')):
+            conteo = suficientes.conteos.get(variable)
+            if conteo is not None:
+                setattr(perfil, atributo, _nativo(conteo.sort_values(ascending=False, kind='stable')))
+
+        histograma_edad = suficientes.histogramas.get('EDAD2')
+        if histograma_edad is not None and histograma_edad.total().n > 0:
+            histograma = histograma_edad.total()
+            perfil.edad_media = _nativo(histograma.media())
+            perfil.edad_mediana = _nativo(histograma.mediana())
+            perfil.edad_minima = _nativo(histograma.cuantil(0))
+            perfil.edad_maxima = _nativo(histograma.cuantil(1))
+            # Rangos de 5 años para un análisis más granular
+            rangos = histograma_edad.agrupar(range(18, 70, 5), right=True, include_lowest=False).sum()
+            if rangos.sum() > 0:
+                perfil.rango_edad_modal = str(rangos.idxmax())
+
+        grados = suficientes.conteos.get(('GRADO', 'GRADO_LOW'))
+        if grados is not None:
+            # Excluir 'no responde'; en empates gana el menor, como Series.mode()
+            respondidos = grados[grados.index.get_level_values('GRADO_LOW') != 'no responde']
+            por_grado = respondidos.groupby(level='GRADO').sum()
+            if len(por_grado):
+                grado = por_grado.index[por_grado.to_numpy().argmax()]
+                perfil.grado_frecuente = str(grado)
+                perfil.grado_frecuente_n = int(por_grado[grado])
+        return perfil
+
+
+@dataclass
+class IndicesDemograficos:
+    """Índices de calcular_indices_demograficos (None = no calculable)"""
+    indice_masculinidad: float = None
+    indice_dependencia: float = None
+    cv_edad: float = None
+    edad_mediana_oficial: float = None
+    edad_mediana_suboficial: float = None
+    edad_mediana_civil: float = None
+
+
+@dataclass
+class EstructuraEtaria:
+    """Distribución por grupo etario de analizar_estructura_etaria"""
+    distribucion: dict = field(default_factory=dict)
+    porcentajes: dict = field(default_factory=dict)
+    grupo_modal: str = None
+
+
+@dataclass
+class ResultadoAsociacion:
+    """Prueba Chi-cuadrado entre dos variables categóricas"""
+    var1: str
+    var2: str
+    chi2: float
+    p_val: float
+    cramer_v: float
+    significancia: str
+    fuerza: str
+    q_val: float = None  # valor ajustado por la corrección global del registro
+
+
+@dataclass
+class ResultadoDiferencia:
+    """Comparación de una variable numérica entre los niveles de un grupo"""
+    variable: str
+    grupo: str
+    prueba: str
+    parametrica: bool
+    estadistico: float
+    p_val: float
+    significancia: str
+    n_grupos: int
+    n: int
+    medias: dict = field(default_factory=dict)
+    medianas: dict = field(default_factory=dict)
+    normalidad: dict = field(default_factory=dict)  # nivel -> p de Shapiro-Wilk (None = n grande)
+    q_val: float = None  # valor ajustado por la corrección global del registro
+
+
+@dataclass
+class ResultadoPrueba:
+    """Una prueba del registro global con su valor p y su valor ajustado"""
+    familia: str
+    etiqueta: str
+    prueba: str
+    estadistico: float
+    p_val: float
+    q_val: float
+    significancia: str
+
+
+@dataclass
+class ResultadosFAC:
+    """
+    Resultados tipados de AnalisisEstadisticoFAC, listos para tableros.
+
+    Se exportan en una llamada a JSON (un documento con todo) y a Parquet (una
+    tabla plana por sección), de modo que los consumidores cargan índices y
+    tablas de asociación ya calculados en lugar de repetir el análisis.
+    """
+    n_filas: int
+    poblacion: PerfilPoblacional = None
+    indices: IndicesDemograficos = None
+    estructura_etaria: EstructuraEtaria = None
+    asociaciones: list = field(default_factory=list)
+    diferencias: list = field(default_factory=list)
+    pruebas: list = field(default_factory=list)
+    correccion: str = None
+    version: int = VERSION_RESULTADOS
+
+    ARCHIVO_JSON = 'resultados.json'
+
+    @classmethod
+    def desde_analisis(cls, estadistico: AnalisisEstadisticoFAC) -> 'ResultadosFAC':
+        """Construye el modelo desde el diccionario `resultados` del análisis"""
+        resultados = estadistico.resultados
+        registro = estadistico.registro
+        modelo = cls(n_filas=int(estadistico.suficientes.n_filas),
+                     poblacion=PerfilPoblacional.desde_suficientes(estadistico.suficientes),
+                     correccion=registro.metodo)
+
+        if 'indices' in resultados:
+            modelo.indices = IndicesDemograficos(**_nativo(resultados['indices']))
+
+        etaria = resultados.get('estructura_etaria')
+        if etaria:
+            modelo.estructura_etaria = EstructuraEtaria(
+                distribucion=_nativo(etaria['distribucion']),
+                porcentajes=_nativo(etaria['porcentajes']),
+                grupo_modal=None if pd.isna(etaria['grupo_modal']) else str(etaria['grupo_modal']))
+
+        for par, r in resultados.get('asociaciones', {}).items():
+            var1, var2 = par.split('×', 1)
+            modelo.asociaciones.append(ResultadoAsociacion(
+                var1=var1, var2=var2, chi2=_nativo(r['chi2']), p_val=_nativo(r['p_val']),
+                cramer_v=_nativo(r['cramer_v']), significancia=registro.significancia('asociaciones', par),
+                fuerza=r['fuerza'], q_val=_nativo(registro.q_valor('asociaciones', par))))
+
+        for clave, r in resultados.get('diferencias_subgrupos', {}).items():
+            if not r:
+                continue
+            modelo.diferencias.append(ResultadoDiferencia(
+                variable=r['variable'], grupo=r['grupo'], prueba=r['prueba'],
+                parametrica=bool(r['parametrica']), estadistico=_nativo(r['estadistico']),
+                p_val=_nativo(r['p_val']),
+                significancia=registro.significancia('diferencias', clave), n_grupos=int(r['n_grupos']),
+                n=int(r['n']), medias=_nativo(r['medias']), medianas=_nativo(r['medianas']),
+                normalidad=_nativo(r['normalidad']), q_val=_nativo(registro.q_valor('diferencias', clave))))
+
+        for fila in registro.tabla().to_dict('records'):
+            modelo.pruebas.append(ResultadoPrueba(**{c: _nativo(v) for c, v in fila.items()}))
+        return modelo
+
+    @classmethod
+    def desde_dict(cls, datos: dict) -> 'ResultadosFAC':
+        """Reconstruye el modelo desde a_dict() (o desde el JSON exportado)"""
+        poblacion = datos.get('poblacion')
+        indices = datos.get('indices')
+        etaria = datos.get('estructura_etaria')
+        return cls(
+            n_filas=datos['n_filas'],
+            poblacion=PerfilPoblacional(**poblacion) if poblacion else None,
+            indices=IndicesDemograficos(**indices) if indices else None,
+            estructura_etaria=EstructuraEtaria(**etaria) if etaria else None,
+            asociaciones=[ResultadoAsociacion(**r) for r in datos.get('asociaciones', [])],
+            # Hasta la versión 3 las diferencias traían además un p_ajustado local
+            diferencias=[ResultadoDiferencia(**{c: v for c, v in r.items() if c != 'p_ajustado'})
+                         for r in datos.get('diferencias', [])],
+            pruebas=[ResultadoPrueba(**r) for r in datos.get('pruebas', [])],
+            correccion=datos.get('correccion'),
+            version=datos.get('version', VERSION_RESULTADOS))
+
+    def a_dict(self) -> dict:
+        return asdict(self)
+
+    # ---------------- JSON ----------------
+
+    def guardar_json(self, ruta: str):
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(self.a_dict(), f, ensure_ascii=False, indent=2, allow_nan=False)
+
+    @classmethod
+    def cargar_json(cls, ruta: str) -> 'ResultadosFAC':
+        with open(ruta, encoding='utf-8') as f:
+            return cls.desde_dict(json.load(f))
+
+    # ---------------- Parquet ----------------
+
+    def tablas(self) -> dict:
+        """Secciones del modelo como DataFrames planos (una fila por resultado)"""
+        tablas = {}
+        if self.poblacion is not None:
+            campos = {c: t for c, t in PerfilPoblacional.__annotations__.items() if t is not dict}
+            tablas['poblacion'] = _tabla_tipada([{c: getattr(self.poblacion, c) for c in campos}], campos)
+            tablas['poblacion_conteos'] = _tabla_tipada(
+                [{'variable': variable, 'nivel': nivel, 'n': n}
+                 for variable in ('categorias', 'sexo')
+                 for nivel, n in getattr(self.poblacion, variable).items()],
+                {'variable': str, 'nivel': str, 'n': int})
+        if self.indices is not None:
+            tablas['indices'] = pd.DataFrame([asdict(self.indices)]).astype(float)
+        if self.estructura_etaria is not None:
+            etaria = self.estructura_etaria
+            tablas['estructura_etaria'] = pd.DataFrame({
+                'grupo': list(etaria.distribucion),
+                'personas': pd.array(list(etaria.distribucion.values()), dtype='Int64'),
+                'porcentaje': [etaria.porcentajes.get(g) for g in etaria.distribucion],
+                'modal': [g == etaria.grupo_modal for g in etaria.distribucion],
+            })
+        tablas['asociaciones'] = _tabla_tipada(
+            [asdict(r) for r in self.asociaciones], ResultadoAsociacion.__annotations__)
+
+        campos = {c: t for c, t in ResultadoDiferencia.__annotations__.items() if t is not dict}
+        tablas['diferencias'] = _tabla_tipada(
+            [{c: getattr(r, c) for c in campos} for r in self.diferencias], campos)
+        # Medias y medianas por nivel en formato largo
+        tablas['diferencias_niveles'] = _tabla_tipada(
+            [{'variable': r.variable, 'grupo': r.grupo, 'nivel': nivel, 'media': media,
+              'mediana': r.medianas.get(nivel), 'p_normalidad': r.normalidad.get(nivel)}
+             for r in self.diferencias for nivel, media in r.medias.items()],
+            {'variable': str, 'grupo': str, 'nivel': str, 'media': float, 'mediana': float,
+             'p_normalidad': float})
+        tablas['pruebas'] = _tabla_tipada([asdict(r) for r in self.pruebas], ResultadoPrueba.__annotations__)
+        return tablas
+
+    def guardar_parquet(self, directorio: str) -> list:
+        """Escribe una tabla Parquet por sección en `directorio` (requiere pyarrow)"""
+        os.makedirs(directorio, exist_ok=True)
+        archivos = []
+        for nombre, tabla in self.tablas().items():
+            archivo = os.path.join(directorio, f'{nombre}.parquet')
+            tabla.to_parquet(archivo, index=False)
+            archivos.append(archivo)
+        return archivos
+
+    @staticmethod
+    def leer_tablas_parquet(directorio: str) -> dict:
+        """Carga las tablas escritas por guardar_parquet"""
+        return {archivo[:-len('.parquet')]: pd.read_parquet(os.path.join(directorio, archivo))
+                for archivo in sorted(os.listdir(directorio)) if archivo.endswith('.parquet')}
+
+    def exportar(self, directorio: str, formatos=('json', 'parquet')) -> list:
+        """
+        Exporta el modelo en una llamada
+
+        Args:
+            directorio (str): Carpeta de salida (se crea si no existe)
+            formatos: 'json' (resultados.json) y/o 'parquet' (una tabla por sección)
+        """
+        desconocidos = set(formatos) - {'json', 'parquet'}
+        if desconocidos:
+            raise ValueError(f"Formatos no soportados: {', '.join(sorted(desconocidos))}")
+        os.makedirs(directorio, exist_ok=True)
+        archivos = []
+        if 'json' in formatos:
+            archivos.append(os.path.join(directorio, self.ARCHIVO_JSON))
+            self.guardar_json(archivos[-1])
+        if 'parquet' in formatos:
+            archivos.extend(self.guardar_parquet(directorio))
+        print(f"Resultados exportados en '{directorio}' ({len(archivos)} archivos)")
+        return archivos
+
+# ==============================================================
+# MÓDULO: PRUEBAS ESTRATIFICADAS (CMH Y LOG-LINEALES)
+# ==============================================================
+
+# Pares de variables familiares y estratos de posible confusión
+PARES_FAMILIARES = [
+    ('HIJOS', 'RELACION_PAREJA_ESTABLE'),
+    ('HIJOS', 'VIVIENDA_PROPIA'),
+    ('HIJOS', 'HABITA_VIVIENDA_FAMILIAR'),
+    ('HABITA_VIVIENDA_FAMILIAR', 'MALTRATO_INTRAFAMILIAR'),
+]
+ESTRATOS_CONFUSION = (('CATEGORIA',), ('SEXO',), ('CATEGORIA', 'SEXO'))
+
+
+def ajustar_ipf(observada: np.ndarray, margenes, lote: int = 0, tol: float = 1e-8, max_iter: int = 200):
+    """
+    Ajusta un modelo log-lineal jerárquico por ajuste proporcional iterativo (IPF)
+
+    Cada paso escala la tabla ajustada completa por el cociente entre un margen
+    observado y el ajustado (operaciones de numpy con broadcasting, sin recorrer
+    celdas). Los primeros `lote` ejes son tablas independientes apiladas, que se
+    ajustan a la vez.
+
+    Args:
+        observada (np.ndarray): Conteos, forma (lote..., d1, ..., dk)
+        margenes: Clase generadora: tuplas de ejes de la tabla (0 = primer eje tras el lote)
+        lote (int): Número de ejes iniciales de lote
+        tol (float): Tolerancia sobre la diferencia máxima entre márgenes
+        max_iter (int): Máximo de ciclos
+    """
+    observada = np.asarray(observada, dtype=float)
+    dimensiones = observada.ndim - lote
+    objetivos = []
+    for margen in margenes:
+        ejes = tuple(lote + e for e in range(dimensiones) if e not in margen)
+        objetivos.append((ejes, observada.sum(axis=ejes, keepdims=True)))
+
+    ajustada = np.ones_like(observada)
+    for iteracion in range(1, max_iter + 1):
+        for ejes, objetivo in objetivos:
+            actual = ajustada.sum(axis=ejes, keepdims=True)
+            ajustada *= np.divide(objetivo, actual, out=np.zeros_like(actual), where=actual > 0)
+        desvio = max(np.abs(ajustada.sum(axis=ejes, keepdims=True) - objetivo).max()
+                     for ejes, objetivo in objetivos)
+        if desvio < tol:
+            break
+    return ajustada, iteracion
+
+
+def _devianza(observada: np.ndarray, ajustada: np.ndarray, lote: int = 0) -> np.ndarray:
+    """G² = 2 Σ obs·log(obs/ajustada) por tabla del lote"""
+    positivos = observada > 0
+    razon = np.divide(observada, ajustada, out=np.ones_like(ajustada), where=positivos)
+    terminos = np.where(positivos, observada * np.log(razon), 0.0)
+    return 2 * terminos.sum(axis=tuple(range(lote, observada.ndim)))
+
+
+def _gl_loglineal(niveles, margenes) -> int:
+    """Grados de libertad de un modelo jerárquico: celdas menos parámetros de su clausura"""
+    terminos = {frozenset(sub) for margen in margenes
+                for r in range(len(margen) + 1) for sub in itertools.combinations(margen, r)}
+    parametros = sum(int(np.prod([niveles[e] - 1 for e in termino])) for termino in terminos)
+    return int(np.prod(niveles)) - parametros
+
+
+def prueba_cmh(tablas: np.ndarray, correccion: bool = True) -> dict:
+    """
+    Cochran–Mantel–Haenszel sobre K tablas R×C (forma R, C, K), vectorizado sobre estratos
+
+    Para R×C usa el estadístico general de asociación, con (R-1)(C-1) gl; en
+    2×2 coincide con el CMH clásico (con corrección de continuidad opcional).
+    Se omiten estratos con menos de 2 observaciones.
+    """
+    t = np.asarray(tablas, dtype=float)
+    n = t.sum(axis=(0, 1))
+    t, n = t[:, :, n > 1], n[n > 1]
+    R, C, K = t.shape
+    if K == 0 or R < 2 or C < 2:
+        return {'estadistico': np.nan, 'gl': 0, 'p_val': np.nan, 'k': K}
+
+    filas = t.sum(axis=1)      # (R, K)
+    columnas = t.sum(axis=0)   # (C, K)
+    esperada = filas[:, None, :] * columnas[None, :, :] / n
+    g = (t - esperada)[:R - 1, :C - 1].sum(axis=2).ravel()
+
+    # Covarianza hipergeométrica por estrato: (n·diag(r) − r rᵀ) ⊗ (n·diag(c) − c cᵀ) / (n²(n−1))
+    a_filas = np.einsum('k,ik,ij->kij', n, filas, np.eye(R)) - np.einsum('ik,jk->kij', filas, filas)
+    a_columnas = np.einsum('k,ik,ij->kij', n, columnas, np.eye(C)) - np.einsum('ik,jk->kij', columnas, columnas)
+    a_filas = a_filas[:, :R - 1, :R - 1] / (n ** 2 * (n - 1))[:, None, None]
+    v = np.einsum('kab,kcd->acbd', a_filas, a_columnas[:, :C - 1, :C - 1])
+    v = v.reshape((R - 1) * (C - 1), (R - 1) * (C - 1))
+
+    gl = (R - 1) * (C - 1)
+    if gl == 1:
+        desvio = abs(g[0]) - 0.5 if correccion else abs(g[0])
+        estadistico = max(desvio, 0.0) ** 2 / v[0, 0] if v[0, 0] > 0 else np.nan
+    else:
+        estadistico = float(g @ np.linalg.pinv(v) @ g)
+    return {'estadistico': estadistico, 'gl': gl, 'p_val': stats.chi2.sf(estadistico, gl), 'k': K}
+
+
+def odds_ratios_estratificados(tablas: np.ndarray) -> dict:
+    """
+    OR cruda, OR común de Mantel–Haenszel y Breslow–Day (homogeneidad) para K tablas 2×2
+
+    Args:
+        tablas (np.ndarray): Conteos de forma (2, 2, K)
+    """
+    t = np.asarray(tablas, dtype=float)
+    a, b, c, d = t[0, 0], t[0, 1], t[1, 0], t[1, 1]
+    n = t.sum(axis=(0, 1))
+    crudo = a.sum() * d.sum() / (b.sum() * c.sum()) if b.sum() * c.sum() > 0 else np.nan
+    peso = np.divide(1.0, n, out=np.zeros_like(n), where=n > 1)
+    numerador, denominador = (a * d * peso).sum(), (b * c * peso).sum()
+    psi = numerador / denominador if denominador > 0 else np.nan
+    resultado = {'or_crudo': crudo, 'or_mh': psi, 'breslow_day': np.nan, 'gl_bd': 0, 'p_bd': np.nan}
+
+    # Breslow–Day: solo estratos con los cuatro márgenes positivos
+    n1, m1 = a + b, a + c
+    validos = (n1 > 0) & (m1 > 0) & (n1 < n) & (m1 < n)
+    if not np.isfinite(psi) or psi <= 0 or validos.sum() < 2:
+        return resultado
+    a, n, n1, m1 = a[validos], n[validos], n1[validos], m1[validos]
+    d0 = n - n1 - m1
+    # E[a] bajo OR común psi: raíz de (1−psi)x² + (d0 + psi(n1+m1))x − psi·n1·m1 = 0 dentro del soporte
+    coef_a, coef_b, coef_c = 1 - psi, d0 + psi * (n1 + m1), -psi * n1 * m1
+    if abs(coef_a) < 1e-12:
+        esperado = -coef_c / coef_b
+    else:
+        raiz = np.sqrt(np.maximum(coef_b ** 2 - 4 * coef_a * coef_c, 0))
+        r1, r2 = (-coef_b + raiz) / (2 * coef_a), (-coef_b - raiz) / (2 * coef_a)
+        inferior, superior = np.maximum(0, m1 - (n - n1)), np.minimum(n1, m1)
+        esperado = np.where((r1 >= inferior - 1e-9) & (r1 <= superior + 1e-9), r1, r2)
+    varianza = 1 / (1 / esperado + 1 / (n1 - esperado) + 1 / (m1 - esperado) + 1 / (d0 + esperado))
+    estadistico = float(((a - esperado) ** 2 / varianza).sum())
+    gl = int(validos.sum()) - 1
+    resultado.update(breslow_day=estadistico, gl_bd=gl, p_bd=stats.chi2.sf(estadistico, gl))
+    return resultado
+
+
+class PruebasEstratificadas:
+    """
+    Pruebas de asociación controlando por estratos (CATEGORIA, SEXO, ...).
+
+    Cada columna se codifica una sola vez a enteros y cada tabla k-dimensional
+    sale de un único bincount sobre esos códigos (y queda en caché). La grilla
+    pares × estratos se evalúa por lotes: CMH y Breslow–Day vectorizados sobre
+    los estratos combinados, y los modelos log-lineales ajustados con IPF sobre
+    la tabla completa (X, Y, S1, ..., Sm), apilando las tablas de igual forma.
+    """
+
+    def __init__(self, df: pd.DataFrame, correccion: bool = True):
+        """
+        Args:
+            df (pd.DataFrame): Datos (se usan las columnas de los pares y los estratos)
+            correccion (bool): Corrección de continuidad en el CMH 2×2
+        """
+        self.df = df
+        self.correccion = correccion
+        self._codigos = {}
+        self._tablas = {}
+
+    def _codificar(self, columna: str):
+        """Códigos enteros (−1 = faltante) y niveles ordenados de una columna (memoizados)"""
+        if columna not in self._codigos:
+            codigos, niveles = pd.factorize(self.df[columna], sort=True)
+            self._codigos[columna] = (codigos, list(niveles))
+        return self._codigos[columna]
+
+    def tabla(self, columnas) -> tuple:
+        """Tabla de conteos de k dimensiones y sus niveles (filas con faltantes se excluyen)"""
+        columnas = tuple(columnas)
+        if columnas not in self._tablas:
+            codificadas = [self._codificar(c) for c in columnas]
+            dimensiones = tuple(len(niveles) for _, niveles in codificadas)
+            validos = np.logical_and.reduce([codigos >= 0 for codigos, _ in codificadas])
+            indice = np.ravel_multi_index([codigos[validos] for codigos, _ in codificadas], dimensiones)
+            conteos = np.bincount(indice, minlength=int(np.prod(dimensiones))).reshape(dimensiones)
+            self._tablas[columnas] = (conteos, [niveles for _, niveles in codificadas])
+        return self._tablas[columnas]
+
+    def _tabla_plegada(self, fila: str, columna: str, estratos) -> np.ndarray:
+        """Tabla (R, C, K) para CMH: los estratos se combinan en un eje y se omiten combinaciones vacías"""
+        conteos, _ = self.tabla((fila, columna) + tuple(estratos))
+        plegada = conteos.reshape(conteos.shape[0], conteos.shape[1], -1)
+        return plegada[:, :, plegada.sum(axis=(0, 1)) > 0]
+
+    @staticmethod
+    def _modelos_loglineales(estratos) -> dict:
+        """Clases generadoras sobre los ejes (X, Y, S1, ..., Sm); S = todos los estratos juntos"""
+        s = tuple(range(2, 2 + len(estratos)))
+        modelos = {'ind_cond': ((0,) + s, (1,) + s), 'homogenea': ((0, 1), (0,) + s, (1,) + s)}
+        if len(estratos) > 1:
+            # La asociación XY varía con un solo estrato y es constante en los demás
+            for j, estrato in enumerate(estratos):
+                modelos[f'xy_{estrato}'] = ((0, 1, 2 + j), (0,) + s, (1,) + s)
+        return modelos
+
+    def evaluar(self, fila: str, columna: str, estratos=('CATEGORIA',)) -> dict:
+        """Evalúa un par controlando por un conjunto de estratos"""
+        grilla = self.evaluar_grilla([(fila, columna)], [tuple(estratos)])
+        return grilla.iloc[0].to_dict() if len(grilla) else {}
+
+    def evaluar_grilla(self, pares=PARES_FAMILIARES, conjuntos_estratos=ESTRATOS_CONFUSION) -> pd.DataFrame:
+        """
+        CMH, OR de Mantel–Haenszel, Breslow–Day y modelos log-lineales para cada par × estratos
+
+        Modelos log-lineales sobre la tabla (X, Y, S1, ..., Sm) sin plegar, con
+        S = S1...Sm: independencia condicional [XS][YS], asociación homogénea
+        [XY][XS][YS] y, con dos o más estratos, [XYSj][XS][YS] (la asociación XY
+        varía solo con Sj). Las combinaciones de estratos vacías se descuentan de
+        los grados de libertad; los ceros muestrales dentro de un estrato no.
+        """
+        columnas_df = set(self.df.columns)
+        trabajos = [(fila, columna, tuple(estratos)) for fila, columna in pares for estratos in conjuntos_estratos
+                    if {fila, columna, *estratos}.issubset(columnas_df)]
+
+        filas_resultado = []
+        for fila, columna, estratos in trabajos:
+            tabla = self._tabla_plegada(fila, columna, estratos)
+            resultado = {'fila': fila, 'columna': columna, 'estratos': '×'.join(estratos),
+                         'n': int(tabla.sum()), 'k_estratos': tabla.shape[2]}
+            cmh = prueba_cmh(tabla, self.correccion)
+            resultado.update(cmh=cmh['estadistico'], gl_cmh=cmh['gl'], p_cmh=cmh['p_val'])
+            if tabla.shape[:2] == (2, 2):
+                resultado.update(odds_ratios_estratificados(tabla))
+            filas_resultado.append(resultado)
+
+        # Log-lineales: un ajuste IPF por grupo de tablas completas con la misma forma y estratos
+        por_forma = {}
+        for i, (fila, columna, estratos) in enumerate(trabajos):
+            completa, _ = self.tabla((fila, columna) + estratos)
+            por_forma.setdefault((completa.shape, estratos), []).append(i)
+        for (forma, estratos), indices in por_forma.items():
+            lote = np.stack([self.tabla((trabajos[i][0], trabajos[i][1]) + estratos)[0]
+                             for i in indices]).astype(float)
+            # Cada combinación de estratos vacía quita (R-1)(C-1) grados de libertad
+            vacias = (lote.reshape(len(indices), forma[0] * forma[1], -1).sum(axis=1) == 0).sum(axis=1)
+            for nombre, margenes in self._modelos_loglineales(estratos).items():
+                ajustada, _ = ajustar_ipf(lote, margenes, lote=1)
+                g2 = _devianza(lote, ajustada, lote=1)
+                gl_completo = _gl_loglineal(forma, margenes)
+                for i, valor, n_vacias in zip(indices, g2, vacias):
+                    gl = gl_completo - int(n_vacias) * (forma[0] - 1) * (forma[1] - 1)
+                    filas_resultado[i].update({f'g2_{nombre}': valor, f'gl_{nombre}': gl,
+                                               f'p_{nombre}': stats.chi2.sf(valor, gl) if gl > 0 else np.nan})
+        return pd.DataFrame(filas_resultado)
+
+# ==============================================================
+# MÓDULO: CRIBADO DE FACTORES DE RIESGO (MALTRATO INTRAFAMILIAR)
+# ==============================================================
+
+def odds_ratios_univariados(casos_expuestos, expuestos, casos, total, confianza: float = 0.95) -> dict:
+    """
+    OR de Wald de muchas tablas 2×2 a la vez (nivel vs resto de la columna)
+
+    Args:
+        casos_expuestos: Casos con el nivel (a)
+        expuestos: Personas con el nivel (a + b)
+        casos: Casos con la columna informada (a + c)
+        total: Personas con la columna informada (a + b + c + d)
+        confianza (float): Nivel del intervalo de confianza
+
+    Las tablas con alguna celda en cero reciben la corrección de Haldane–Anscombe (+0.5).
+    """
+    a = np.asarray(casos_expuestos, dtype=float)
+    b = np.asarray(expuestos, dtype=float) - a
+    c = np.asarray(casos, dtype=float) - a
+    d = np.asarray(total, dtype=float) - a - b - c
+    celdas = np.stack([a, b, c, d])
+    celdas = celdas + 0.5 * (celdas == 0).any(axis=0)
+
+    log_or = np.log(celdas[0] * celdas[3] / (celdas[1] * celdas[2]))
+    ee = np.sqrt((1.0 / celdas).sum(axis=0))
+    z = stats.norm.ppf(0.5 + confianza / 2)
+    return {'or': np.exp(log_or), 'ic_inf': np.exp(log_or - z * ee), 'ic_sup': np.exp(log_or + z * ee),
+            'log_or': log_or, 'ee_log_or': ee, 'p_val': 2 * stats.norm.sf(np.abs(log_or / ee))}
+
+
+def _codificar_candidato(serie: pd.Series, max_niveles: int, bins_numericos: int):
+    """Códigos enteros (−1 = faltante) y etiquetas de niveles; None si la columna no sirve como candidata"""
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie) \
+            and serie.nunique() > max_niveles:
+        serie = pd.qcut(serie, bins_numericos, duplicates='drop')
+        serie = serie.cat.rename_categories([f"{i.left:.4g}–{i.right:.4g}" for i in serie.cat.categories])
+    elif serie.dtype == object:
+        serie = serie.where(serie.isna(), serie.astype(str))
+    codigos, niveles = pd.factorize(serie, sort=True)
+    if not 2 <= len(niveles) <= max_niveles:
+        return None
+    return codigos, [str(nivel) for nivel in niveles]
+
+
+def _cribar_bloque(bloque: pd.DataFrame, y: np.ndarray, max_niveles: int = 30, min_frecuencia: int = 5,
+                   bins_numericos: int = 5, confianza: float = 0.95):
+    """
+    Codifica un bloque de columnas a one-hot disperso y calcula los OR de todos sus niveles
+
+    Returns:
+        tuple: (matriz CSR filas × niveles o None, DataFrame con una fila por nivel)
+    """
+    from scipy import sparse
+
+    filas, columnas, niveles, informados, casos = [], [], [], [], []
+    for columna in bloque.columns:
+        codificada = _codificar_candidato(bloque[columna], max_niveles, bins_numericos)
+        if codificada is None:
+            continue
+        codigos, etiquetas = codificada
+        validos = np.flatnonzero(codigos >= 0)
+        conteos = np.bincount(codigos[validos], minlength=len(etiquetas))
+        # Niveles poco frecuentes o que cubren toda la columna no aportan contraste
+        conservar = (conteos >= min_frecuencia) & (conteos < len(validos))
+        if not conservar.any():
+            continue
+        destino = np.full(len(etiquetas), -1, dtype=np.int64)
+        destino[conservar] = len(niveles) + np.arange(int(conservar.sum()))
+        indice = destino[codigos[validos]]
+        filas.append(validos[indice >= 0])
+        columnas.append(indice[indice >= 0])
+        niveles.extend((columna, etiquetas[k]) for k in np.flatnonzero(conservar))
+        informados.extend([len(validos)] * int(conservar.sum()))
+        casos.extend([y[validos].sum()] * int(conservar.sum()))
+
+    if not niveles:
+        return None, pd.DataFrame()
+
+    filas = np.concatenate(filas)
+    matriz = sparse.csr_matrix((np.ones(len(filas)), (filas, np.concatenate(columnas))),
+                               shape=(len(y), len(niveles)))
+    # Un solo producto disperso: casos expuestos y expuestos de todos los niveles
+    producto = matriz.T @ np.column_stack([y, np.ones_like(y)])
+    tabla = pd.DataFrame(niveles, columns=['columna', 'nivel'])
+    tabla['casos_expuestos'] = producto[:, 0].astype(np.int64)
+    tabla['expuestos'] = producto[:, 1].astype(np.int64)
+    tabla['casos'] = np.asarray(casos, dtype=np.int64)
+    tabla['n'] = np.asarray(informados, dtype=np.int64)
+    for clave, valores in odds_ratios_univariados(tabla['casos_expuestos'], tabla['expuestos'], tabla['casos'],
+                                                  tabla['n'], confianza).items():
+        tabla[clave] = valores
+    return matriz, tabla
+
+
+class CribadoFactoresRiesgo:
+    """
+    Cribado de posibles factores de riesgo de un desenlace binario (por defecto
+    MALTRATO_INTRAFAMILIAR) entre todas las columnas del cuestionario.
+
+    Cada columna candidata se codifica a one-hot disperso (las numéricas con
+    muchos valores, por cuantiles). Los OR univariados de todos los niveles de
+    un bloque de columnas salen de un único producto Xᵀ·[y, 1], y los bloques se
+    procesan en un ProcessPoolExecutor. Sobre el diseño completo se recorre una
+    ruta de regresión logística L1 con arranque en caliente: cada valor de C
+    parte de los coeficientes del anterior, y el C en que un nivel entra al
+    modelo sirve como criterio de orden ajustado por los demás niveles.
+    """
+
+    def __init__(self, df: pd.DataFrame, desenlace: str = 'MALTRATO_INTRAFAMILIAR', positivo='si',
+                 negativo='no', excluir=(), max_niveles: int = 30, min_frecuencia: int = 5,
+                 bins_numericos: int = 5, confianza: float = 0.95, tamano_bloque: int = 25,
+                 paralelo: bool = True, max_workers: int = None):
+        """
+        Args:
+            df (pd.DataFrame): Dataset corregido
+            desenlace (str): Columna del desenlace
+            positivo: Valor que indica el desenlace presente
+            negativo: Valor que indica el desenlace ausente (None = cualquier otro valor informado)
+            excluir: Columnas que no se consideran candidatas
+            max_niveles (int): Columnas categóricas con más niveles se descartan (identificadores, texto libre)
+            min_frecuencia (int): Personas mínimas para que un nivel entre al diseño
+            bins_numericos (int): Cuantiles para columnas numéricas con más de `max_niveles` valores
+            confianza (float): Nivel de los intervalos de confianza de los OR
+            tamano_bloque (int): Columnas por bloque de cribado
+            paralelo (bool): Si es False, los bloques se procesan en este proceso
+            max_workers (int): Número de procesos (None = núcleos disponibles)
+        """
+        respuesta = df[desenlace]
+        informada = respuesta.notna() if negativo is None else respuesta.eq(negativo)
+        validas = (respuesta.eq(positivo) | informada).to_numpy()
+        excluir = set(excluir) | {desenlace}
+        self.desenlace = desenlace
+        self.datos = df.loc[validas, [c for c in df.columns if c not in excluir]]
+        self.y = respuesta[validas].eq(positivo).to_numpy(dtype=float)
+        self.max_niveles = max_niveles
+        self.min_frecuencia = min_frecuencia
+        self.bins_numericos = bins_numericos
+        self.confianza = confianza
+        self.tamano_bloque = tamano_bloque
+        self.paralelo = paralelo
+        self.max_workers = max_workers
+        self.diseno = None
+        self._univariado = None
+        self._ruta = None
+        self.convergencia = None
+
+    def bloques(self) -> list:
+        """Columnas candidatas agrupadas en bloques de `tamano_bloque`"""
+        columnas = list(self.datos.columns)
+        return [columnas[i:i + self.tamano_bloque] for i in range(0, len(columnas), self.tamano_bloque)]
+
+    def cribar(self) -> pd.DataFrame:
+        """
+        OR univariados (nivel vs resto) de todos los niveles candidatos (memoizados)
+
+        Returns:
+            pd.DataFrame: Un nivel por fila, ordenado por valor p; q_val = Benjamini–Hochberg
+        """
+        if self._univariado is None:
+            from scipy import sparse
+
+            parametros = (self.y, self.max_niveles, self.min_frecuencia, self.bins_numericos, self.confianza)
+            bloques = self.bloques()
+            if not self.paralelo or len(bloques) <= 1:
+                resultados = [_cribar_bloque(self.datos[bloque], *parametros) for bloque in bloques]
+            else:
+                resultados = ejecutar_en_procesos(_cribar_bloque, [(self.datos[bloque], *parametros)
+                                                                   for bloque in bloques], self.max_workers)
+
+            matrices = [matriz for matriz, _ in resultados if matriz is not None]
+            tablas = [tabla for matriz, tabla in resultados if matriz is not None]
+            if not matrices:
+                raise ValueError(f"No hay columnas candidatas para cribar '{self.desenlace}'")
+            self.diseno = sparse.hstack(matrices, format='csr')
+            univariado = pd.concat(tablas, ignore_index=True)
+            univariado['q_val'] = ajustar_p_valores(univariado['p_val'], metodo='bh')
+            self._univariado = univariado
+        orden = np.lexsort((-self._univariado['log_or'].abs().to_numpy(), self._univariado['p_val'].to_numpy()))
+        return self._univariado.iloc[orden].reset_index(drop=True)
+
+    def ruta_penalizada(self, n_valores: int = 20, razon: float = 1e3, max_iter: int = 1000) -> pd.DataFrame:
+        """
+        Ruta de regresión logística L1 con arranque en caliente (memoizada)
+
+        La ruta empieza en el C más pequeño con todos los coeficientes en cero,
+        C₀ = 1 / max|Xᵀ(y − ȳ)|, y crece geométricamente hasta C₀·razon.
+
+        Args:
+            n_valores (int): Número de valores de C
+            razon (float): Cociente entre el último y el primer C
+            max_iter (int): Iteraciones máximas de cada ajuste
+
+        Returns:
+            pd.DataFrame: Coeficientes (una fila por C, una columna por nivel); si el
+                ajuste de un C no converge, queda anotado en `convergencia`
+        """
+        clave = (n_valores, razon, max_iter)
+        if self._ruta is None or self._ruta[0] != clave:
+            import sklearn
+            from packaging.version import Version
+            from sklearn.exceptions import ConvergenceWarning
+            from sklearn.linear_model import LogisticRegression
+
+            self.cribar()
+            gradiente = np.abs(self.diseno.T @ (self.y - self.y.mean()))
+            valores_c = np.logspace(0, np.log10(razon), n_valores) / gradiente.max()
+
+            # scikit-learn 1.8 reemplaza penalty='l1' por l1_ratio=1
+            if Version(sklearn.__version__) >= Version('1.8'):
+                penalizacion = {'l1_ratio': 1.0}
+            else:
+                penalizacion = {'penalty': 'l1'}
+            modelo = LogisticRegression(solver='saga', warm_start=True, max_iter=max_iter, **penalizacion)
+            coeficientes, convergio = [], []
+            for c in valores_c:
+                modelo.set_params(C=c)
+                with warnings.catch_warnings(record=True) as avisos:
+                    warnings.simplefilter('always', ConvergenceWarning)
+                    modelo.fit(self.diseno, self.y)
+                coeficientes.append(modelo.coef_.ravel().copy())
+                convergio.append(not any(issubclass(a.category, ConvergenceWarning) for a in avisos))
+                for aviso in avisos:
+                    if not issubclass(aviso.category, ConvergenceWarning):
+                        warnings.warn_explicit(aviso.message, aviso.category, aviso.filename, aviso.lineno)
+
+            indice = pd.Index(valores_c, name='C')
+            self.convergencia = pd.Series(convergio, index=indice, name='convergio')
+            if not all(convergio):
+                warnings.warn(f"La ruta L1 no convergió en {convergio.count(False)} de {len(convergio)} "
+                              f"valores de C (max_iter = {max_iter})", ConvergenceWarning, stacklevel=2)
+
+            etiquetas = (self._univariado['columna'] + '=' + self._univariado['nivel']).tolist()
+            ruta = pd.DataFrame(coeficientes, index=indice, columns=etiquetas)
+            self._ruta = (clave, ruta)
+        return self._ruta[1]
+
+    def ranking(self, penalizada: bool = True, top: int = None) -> pd.DataFrame:
+        """
+        Orden de las columnas candidatas por asociación con el desenlace
+
+        Por columna: su nivel más asociado (menor p), su OR e IC, el q-valor mínimo
+        y, si `penalizada`, el primer C de la ruta L1 en que alguno de sus niveles
+        tiene coeficiente distinto de cero (NaN = nunca entra). Con `penalizada`
+        se ordena por ese C de entrada (el valor p desempata y las columnas que
+        nunca entran van al final); sin ella, por valor p.
+        """
+        univariado = self.cribar()
+        principal = univariado.drop_duplicates('columna').set_index('columna')
+        ranking = principal[['nivel', 'or', 'ic_inf', 'ic_sup', 'p_val', 'q_val', 'n']].copy()
+        ranking['niveles'] = univariado.groupby('columna').size()
+        orden = ['p_val', 'q_val']
+        if penalizada:
+            ruta = self.ruta_penalizada()
+            activos = (ruta.to_numpy() != 0)
+            primera = np.where(activos.any(axis=0), activos.argmax(axis=0), -1)
+            entrada = pd.Series(np.where(primera >= 0, ruta.index.to_numpy()[primera], np.nan),
+                                index=self._univariado['columna'].to_numpy())
+            ranking['c_entrada'] = entrada.groupby(level=0).min()
+            ranking['coef_final'] = pd.Series(ruta.iloc[-1].to_numpy(), index=entrada.index).abs() \
+                .groupby(level=0).max()
+            orden = ['c_entrada', 'p_val']
+        ranking = ranking.sort_values(orden, kind='mergesort')
+        return ranking if top is None else ranking.head(top)
+
+# ==============================================================
+# MÓDULO: ANÁLISIS FAMILIAR
+# ==============================================================
+
+class AnalisisFamiliarFAC:
+    """
+    Análisis de estructura familiar con caché de tablas y pruebas.
+
+    Cada conteo y cada tabla de contingencia se calcula una sola vez sobre el
+    DataFrame; porcentajes, totales, pruebas (Chi-cuadrado, Fisher, diferencias
+    de edad) y gráficos se sirven desde esa caché. Cada valor p se anota en el
+    registro de pruebas, que aplica la corrección global al final.
+    """
+
+    def __init__(self, df: pd.DataFrame, unificar_estado_civil: bool = True, directorio_graficos: str = None,
+                 registro: RegistroPruebas = None):
+        """
+        Args:
+            df (pd.DataFrame): Dataset corregido
+            unificar_estado_civil (bool): Agrupar divorciado y separado en una categoría
+            directorio_graficos (str): Carpeta donde guardar los gráficos (None = mostrarlos)
+            registro (RegistroPruebas): Registro de valores p compartido por la corrida (opcional)
+        """
+        self.df = df.copy()
+        if unificar_estado_civil and 'ESTADO_CIVIL' in self.df.columns:
+            self.df['ESTADO_CIVIL'] = self.df['ESTADO_CIVIL'].replace({
+                "divorciado": "divorciado/separado",
+                "separado": "divorciado/separado"
+            })
+        self.directorio_graficos = directorio_graficos
+        self.figuras = GestorFiguras()
+        self._conteos = {}
+        self._tablas = {}
+        self._pruebas = {}
+        self._estratificadas = None
+        self.registro = registro if registro is not None else RegistroPruebas()
+
+    # Columnas que usa cada sección, en el orden de ejecución; None = todas (el
+    # cribado de factores de riesgo recorre el cuestionario completo)
+    COLUMNAS_SECCIONES = {
+        'estado_civil': ('ESTADO_CIVIL',),
+        'hijos_convivencia': ('HIJOS', 'HABITA_VIVIENDA_FAMILIAR'),
+        'vivienda_propia': ('HIJOS', 'VIVIENDA_PROPIA'),
+        'categoria': ('ESTADO_CIVIL', 'CATEGORIA'),
+        'edad_estado_civil': ('ESTADO_CIVIL', 'EDAD2'),
+        'maltrato': ('HABITA_VIVIENDA_FAMILIAR', 'MALTRATO_INTRAFAMILIAR', 'CATEGORIA'),
+        'pareja_estable': ('HIJOS', 'RELACION_PAREJA_ESTABLE'),
+        'padres': ('HIJOS', 'MADRE_VIVE', 'PADRE_VIVE'),
+        'integrantes_hogar': COLUMNAS_INTEGRANTES,
+        'confusion': tuple(c for par in PARES_FAMILIARES for c in par)
+                     + tuple(c for estratos in ESTRATOS_CONFUSION for c in estratos),
+        'factores_riesgo': None,
+        'comparaciones_multiples': (),
+    }
+    # Secciones que solo se ejecutan si se piden (el cribado lee las 231 columnas)
+    SECCIONES_OPCIONALES = ('factores_riesgo',)
+
+    @classmethod
+    def _secciones(cls, secciones=None) -> tuple:
+        if secciones is None:
+            return tuple(s for s in cls.COLUMNAS_SECCIONES if s not in cls.SECCIONES_OPCIONALES)
+        secciones = tuple(secciones)
+        desconocidas = [s for s in secciones if s not in cls.COLUMNAS_SECCIONES]
+        if desconocidas:
+            raise ValueError(f"Sección desconocida: {', '.join(desconocidas)} "
+                             f"(opciones: {', '.join(cls.COLUMNAS_SECCIONES)})")
+        return secciones
+
+    @classmethod
+    def columnas_requeridas(cls, secciones=None):
+        """
+        Columnas que necesitan las secciones pedidas (None = todas las del archivo)
+
+        Args:
+            secciones: Claves de COLUMNAS_SECCIONES (None = las de la corrida por defecto)
+        """
+        columnas = {}
+        for seccion in cls._secciones(secciones):
+            if cls.COLUMNAS_SECCIONES[seccion] is None:
+                return None
+            columnas.update(dict.fromkeys(cls.COLUMNAS_SECCIONES[seccion]))
+        return list(columnas)
+
+    @classmethod
+    def desde_archivo(cls, archivo_path: str = ARCHIVO_CORREGIDO, secciones=None, **kwargs) -> 'AnalisisFamiliarFAC':
+        """Lee solo las columnas de las secciones que se van a ejecutar (ver COLUMNAS_SECCIONES)"""
+        return cls(leer_columnas(archivo_path, cls.columnas_requeridas(secciones)), **kwargs)
+
+    # ---------------- Caché de tablas ----------------
+
+    def _disponibles(self, *columnas) -> bool:
+        faltantes = [c for c in columnas if c not in self.df.columns]
+        if faltantes:
+            print(f"No se puede analizar {' × '.join(columnas)} - columna no disponible: {', '.join(faltantes)}")
+        return not faltantes
+
+    def conteos(self, variable: str) -> pd.Series:
+        """Frecuencias de una variable (memoizadas)"""
+        if variable not in self._conteos:
+            self._conteos[variable] = self.df[variable].value_counts()
+        return self._conteos[variable]
+
+    def porcentajes(self, variable: str) -> pd.Series:
+        conteos = self.conteos(variable)
+        return conteos / conteos.sum() * 100
+
+    def tabla(self, fila: str, columna: str) -> pd.DataFrame:
+        """Tabla de contingencia fila × columna (memoizada)"""
+        clave = (fila, columna)
+        if clave not in self._tablas:
+            self._tablas[clave] = pd.crosstab(self.df[fila], self.df[columna])
+        return self._tablas[clave]
+
+    def tabla_porcentual(self, fila: str, columna: str) -> pd.DataFrame:
+        """Porcentajes por fila (equivale a crosstab(normalize='index') * 100)"""
+        tabla = self.tabla(fila, columna)
+        return tabla.div(tabla.sum(axis=1), axis=0) * 100
+
+    def tabla_con_totales(self, fila: str, columna: str) -> pd.DataFrame:
+        """Tabla con totales por fila y columna (equivale a crosstab(margins=True))"""
+        tabla = self.tabla(fila, columna)
+        totales = tabla.copy()
+        totales['All'] = tabla.sum(axis=1)
+        totales.loc['All'] = totales.sum(axis=0)
+        totales.columns.name = tabla.columns.name
+        return totales
+
+    def integrantes(self, columna: str) -> MatrizIntegrantes:
+        """Multi-hot disperso de una columna de listas de integrantes (memoizado)"""
+        clave = ('integrantes', columna)
+        if clave not in self._tablas:
+            self._tablas[clave] = MatrizIntegrantes.desde_serie(self.df[columna])
+        return self._tablas[clave]
+
+    def medias_edad(self, grupo: str = 'ESTADO_CIVIL', variable: str = 'EDAD2') -> pd.Series:
+        clave = ('medias', grupo, variable)
+        if clave not in self._tablas:
+            self._tablas[clave] = self.df.groupby(grupo)[variable].mean()
+        return self._tablas[clave]
+
+    # ---------------- Caché de pruebas ----------------
+
+    @PERFILADOR.perfilar('chi_cuadrado {fila}×{columna}')
+    def chi_cuadrado(self, fila: str, columna: str) -> dict:
+        """Chi-cuadrado de independencia sobre la tabla en caché (memoizado)"""
+        clave = ('chi2', fila, columna)
+        if clave not in self._pruebas:
+            chi2, p_val, dof, _ = stats.chi2_contingency(self.tabla(fila, columna))
+            self._pruebas[clave] = {'chi2': chi2, 'p_val': p_val, 'dof': dof,
+                                    'registro': self.registro.registrar('familiar', f"{fila}×{columna}",
+                                                                        p_val, 'Chi-cuadrado', chi2)}
+        return self._pruebas[clave]
+
+    @PERFILADOR.perfilar('fisher {fila}×{columna}')
+    def fisher(self, fila: str, columna: str) -> dict:
+        """Test exacto de Fisher (tablas 2×2) sobre la tabla en caché (memoizado)"""
+        clave = ('fisher', fila, columna)
+        if clave not in self._pruebas:
+            odds_ratio, p_val = stats.fisher_exact(self.tabla(fila, columna))
+            self._pruebas[clave] = {'odds_ratio': odds_ratio, 'p_val': p_val,
+                                    'registro': self.registro.registrar('familiar', f"{fila}×{columna}",
+                                                                        p_val, 'Fisher', odds_ratio)}
+        return self._pruebas[clave]
+
+    @PERFILADOR.perfilar('diferencias_edad {variable}×{grupo}')
+    def diferencias_edad(self, grupo: str = 'ESTADO_CIVIL', variable: str = 'EDAD2') -> dict:
+        """Normalidad y ANOVA/Kruskal-Wallis con el motor de subgrupos (memoizado; None si no es evaluable)"""
+        clave = ('diferencias', grupo, variable)
+        if clave not in self._pruebas:
+            motor = MotorDiferenciasSubgrupos(self.df)
+            resultado = motor.evaluar(variable, grupo)
+            self._pruebas[clave] = resultado
+            if resultado is None:
+                # Menos de dos grupos con el tamaño mínimo: no hay prueba que registrar
+                return None
+            resultado['n_clt'] = motor.n_clt
+            self.registro.registrar('familiar', f"{variable}×{grupo}", resultado['p_val'], resultado['prueba'],
+                                    resultado['estadistico'])
+        return self._pruebas[clave]
+
+    @PERFILADOR.perfilar('dunn {variable}×{grupo}')
+    def posthoc_dunn(self, grupo: str = 'ESTADO_CIVIL', variable: str = 'EDAD2',
+                     p_adjust: str = 'bonferroni') -> pd.DataFrame:
+        clave = ('dunn', grupo, variable, p_adjust)
+        if clave not in self._pruebas:
+            posthoc = PruebasPostHoc(self.df, val_col=variable, group_col=grupo)
+            # Al registro van los pares sin ajustar; la corrección es la global
+            crudos = posthoc.dunn()
+            i, j = np.triu_indices(len(posthoc.niveles), 1)
+            self.registro.registrar_lote('familiar', [f"{variable}×{grupo}: {posthoc.niveles[a]} vs {posthoc.niveles[b]}"
+                                                      for a, b in zip(i, j)],
+                                         crudos.to_numpy()[i, j], 'Dunn')
+            self._pruebas[clave] = posthoc.dunn(p_adjust=p_adjust)
+        return self._pruebas[clave]
+
+    @PERFILADOR.perfilar('pruebas_estratificadas')
+    def pruebas_estratificadas(self, pares=PARES_FAMILIARES, conjuntos_estratos=ESTRATOS_CONFUSION) -> pd.DataFrame:
+        """CMH, Breslow–Day y log-lineales por CATEGORIA/SEXO (memoizados)"""
+        clave = ('estratificadas', tuple(pares), tuple(conjuntos_estratos))
+        if clave not in self._pruebas:
+            if self._estratificadas is None:
+                self._estratificadas = PruebasEstratificadas(self.df)
+            grilla = self._estratificadas.evaluar_grilla(pares, conjuntos_estratos)
+            if not grilla.empty:
+                self.registro.registrar_lote(
+                    'familiar', (grilla['fila'] + '×' + grilla['columna'] + ' | ' + grilla['estratos']).tolist(),
+                    grilla['p_cmh'], 'CMH', grilla['cmh'])
+            self._pruebas[clave] = grilla
+        return self._pruebas[clave]
+
+    @PERFILADOR.perfilar('factores_riesgo {desenlace}')
+    def factores_riesgo(self, desenlace: str = 'MALTRATO_INTRAFAMILIAR', penalizada: bool = True) -> pd.DataFrame:
+        """Columnas ordenadas por asociación con el desenlace: OR univariados y ruta L1 (memoizado)"""
+        clave = ('factores_riesgo', desenlace, penalizada)
+        if clave not in self._pruebas:
+            self._pruebas[clave] = CribadoFactoresRiesgo(self.df, desenlace).ranking(penalizada=penalizada)
+        return self._pruebas[clave]
+
+    def _imprimir_asociacion(self, resultado: dict, etiqueta: str, nombre_a: str, nombre_b: str):
+        # q sobre las pruebas registradas hasta aquí; el resumen final está en analizar_comparaciones_multiples
+        q_val = self.registro.q_valor(*resultado['registro'])
+        if 'chi2' in resultado:
+            print(f"\nChi-cuadrado {etiqueta}: chi2 = {round(resultado['chi2'], 2)} p = {round(resultado['p_val'], 4)}"
+                  f" q = {round(q_val, 4)}")
+        else:
+            print(f"Test exacto de Fisher p = {round(resultado['p_val'], 4)} q = {round(q_val, 4)}")
+        if q_val < self.registro.alpha:
+            print(f" Existe asociación significativa entre {nombre_a} y {nombre_b} "
+                  f"({self.registro.significancia(*resultado['registro'])})")
+        else:
+            print(" No se encontró asociación significativa")
+
+    # ---------------- Gráficos ----------------
+
+    def _graficar_tabla(self, datos, archivo: str, titulo: str, xlabel: str, ylabel: str,
+                        leyenda: str = None, rotacion: int = 0, figsize=(8, 5), leyenda_fuera: bool = False):
+        """Barras de una tabla en caché; se guarda en directorio_graficos o se muestra"""
+        fig, ax = plt.subplots(figsize=figsize)
+        datos.plot(kind='bar', ax=ax, legend=leyenda is not None)
+        ax.set_title(titulo)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        plt.setp(ax.get_xticklabels(), rotation=rotacion)
+        if leyenda is not None:
+            if leyenda_fuera:
+                ax.legend(title=leyenda, bbox_to_anchor=(1.05, 1), loc='upper left')
+            else:
+                ax.legend(title=leyenda)
+        fig.tight_layout()
+        self._cerrar_grafico(archivo)
+
+    def _cerrar_grafico(self, archivo: str):
+        if self.directorio_graficos:
+            os.makedirs(self.directorio_graficos, exist_ok=True)
+            self.figuras.guardar(os.path.join(self.directorio_graficos, archivo), bbox_inches='tight')
+        else:
+            self.figuras.mostrar()
+
+    # ---------------- Secciones del análisis ----------------
+
+    def analizar_estado_civil(self):
+        """Distribución del estado civil"""
+        if not self._disponibles('ESTADO_CIVIL'):
+            return
+        print("=== ANÁLISIS ESTADO CIVIL ===")
+        print(self.conteos('ESTADO_CIVIL'))
+        self._graficar_tabla(self.conteos('ESTADO_CIVIL'), 'familiar_estado_civil.png',
+                             'Distribución del Estado Civil', 'Estado Civil', 'Cantidad',
+                             rotacion=45, figsize=(10, 6))
+        print(self.porcentajes('ESTADO_CIVIL'))
+
+    def analizar_hijos_convivencia(self):
+        """Hijos, convivencia familiar y su asociación"""
+        if not self._disponibles('HIJOS', 'HABITA_VIVIENDA_FAMILIAR'):
+            return
+        print("\n=== ANÁLISIS DE HIJOS ===")
+        print(f"Personal con hijos: {self.conteos('HIJOS')}")
+        print("\n=== ANÁLISIS DE CONVIVENCIA ===")
+        print(f"Habita con familia: {self.conteos('HABITA_VIVIENDA_FAMILIAR')}")
+
+        print("\n=== HIJOS vs CONVIVENCIA FAMILIAR ===")
+        print(self.tabla('HIJOS', 'HABITA_VIVIENDA_FAMILIAR'))
+        self._imprimir_asociacion(self.chi_cuadrado('HIJOS', 'HABITA_VIVIENDA_FAMILIAR'),
+                                  "Hijos vs Convivencia", "Hijos", "Convivencia Familiar")
+
+    def analizar_vivienda_propia(self):
+        """Hijos vs vivienda propia"""
+        if not self._disponibles('HIJOS', 'VIVIENDA_PROPIA'):
+            return
+        print("=== TABLA HIJOS vs VIVIENDA PROPIA ===")
+        print(self.tabla('HIJOS', 'VIVIENDA_PROPIA'))
+        print("\n=== TABLA PORCENTUAL HIJOS vs VIVIENDA PROPIA ===")
+        print(self.tabla_porcentual('HIJOS', 'VIVIENDA_PROPIA').round(2))
+        self._imprimir_asociacion(self.chi_cuadrado('HIJOS', 'VIVIENDA_PROPIA'),
+                                  "Hijos vs Vivienda Propia", "Hijos", "Vivienda Propia")
+        self._graficar_tabla(self.tabla_porcentual('HIJOS', 'VIVIENDA_PROPIA'), 'familiar_hijos_vivienda.png',
+                             "Relación entre Hijos y Vivienda Propia", "Tiene Hijos", "Porcentaje (%)",
+                             leyenda="Vivienda Propia", figsize=(8, 6), leyenda_fuera=True)
+
+    def analizar_categoria(self):
+        """Estado civil vs categoría"""
+        if not self._disponibles('ESTADO_CIVIL', 'CATEGORIA'):
+            return
+        print("\n=== CRUCE ESTADO CIVIL vs CATEGORIA ===")
+        print("\nFrecuencias absolutas:")
+        print(self.tabla('ESTADO_CIVIL', 'CATEGORIA'))
+        print("\nPorcentajes (% por fila):")
+        print(self.tabla_porcentual('ESTADO_CIVIL', 'CATEGORIA').round(2))
+        self._graficar_tabla(self.tabla_porcentual('ESTADO_CIVIL', 'CATEGORIA'), 'familiar_estado_civil_categoria.png',
+                             "Distribución de Categoría por Estado Civil", "Estado Civil", "Porcentaje (%)",
+                             leyenda="Categoría", rotacion=45, figsize=(10, 6), leyenda_fuera=True)
+        self._imprimir_asociacion(self.chi_cuadrado('ESTADO_CIVIL', 'CATEGORIA'),
+                                  "Estado Civil vs Categoría", "Estado Civil", "Categoría")
+
+    def analizar_edad_estado_civil(self):
+        """Edad por estado civil: medias, normalidad, ANOVA/Kruskal-Wallis y Dunn"""
+        if not self._disponibles('ESTADO_CIVIL', 'EDAD2'):
+            return
+        print("\n=== ESTADO CIVIL vs EDAD ===")
+        print(self.medias_edad())
+
+        resultado = self.diferencias_edad()
+        if resultado is None:
+            print("\nEDAD2×ESTADO_CIVIL: no evaluable (menos de dos grupos con datos suficientes)")
+        else:
+            print("\n=== PRUEBA DE NORMALIDAD (Shapiro-Wilk) ===")
+            for estado, p in resultado['normalidad'].items():
+                if p is None:
+                    print(f"{estado}: n >= {resultado['n_clt']}, se asume aproximación normal")
+                elif p < 0.05:
+                    print(f"{estado}: p = {round(p,4)}")
+                    print(" No hay normalidad")
+                else:
+                    print(f"{estado}: p = {round(p,4)}")
+                    print("Normalidad aceptada")
+            print(resultado['prueba'], "=", round(resultado['estadistico'], 2), "p =", round(resultado['p_val'], 4))
+
+            # Prueba de Dunn (módulo post-hoc propio, sin scikit-posthocs)
+            print(self.posthoc_dunn())
+
+        self._graficar_tabla(self.medias_edad(), 'familiar_edad_media_estado_civil.png',
+                             "Edad promedio según Estado Civil", "Estado Civil", "Edad promedio", rotacion=45)
+
+        fig, ax = plt.subplots(figsize=(10, 6))
+        self.df.boxplot(column="EDAD2", by="ESTADO_CIVIL", grid=False, ax=ax)
+        ax.set_title("Distribución de la edad según Estado Civil")
+        fig.suptitle("")  # elimina título extra de pandas
+        ax.set_xlabel("Estado Civil")
+        ax.set_ylabel("Edad")
+        plt.setp(ax.get_xticklabels(), rotation=45)
+        self._cerrar_grafico('familiar_edad_estado_civil_caja.png')
+
+    def analizar_maltrato(self):
+        """Convivencia y categoría vs maltrato intrafamiliar"""
+        if not self._disponibles('HABITA_VIVIENDA_FAMILIAR', 'MALTRATO_INTRAFAMILIAR'):
+            return
+        print("\n=== Cruce HABITA_VIVIENDA_FAMILIAR vs MALTRATO_INTRAFAMILIAR ===")
+        print(self.tabla_con_totales('HABITA_VIVIENDA_FAMILIAR', 'MALTRATO_INTRAFAMILIAR'))
+        self._graficar_tabla(self.tabla('HABITA_VIVIENDA_FAMILIAR', 'MALTRATO_INTRAFAMILIAR'),
+                             'familiar_convivencia_maltrato.png',
+                             "Relación entre Habitar Vivienda Familiar y Maltrato Intrafamiliar",
+                             "Habita Vivienda Familiar", "Número de Personas", leyenda="Maltrato Intrafamiliar")
+
+        if not self._disponibles('CATEGORIA', 'MALTRATO_INTRAFAMILIAR'):
+            return
+        self._graficar_tabla(self.tabla('CATEGORIA', 'MALTRATO_INTRAFAMILIAR'), 'familiar_categoria_maltrato.png',
+                             "Relación entre Categoría y Maltrato Intrafamiliar", "Categoría",
+                             "Número de Personas", leyenda="Maltrato Intrafamiliar")
+        print("Porcentajes por categoría:")
+        print(self.tabla_porcentual('CATEGORIA', 'MALTRATO_INTRAFAMILIAR').round(1))
+
+    def analizar_pareja_estable(self):
+        """Hijos vs relación de pareja estable (Fisher exacto)"""
+        if not self._disponibles('HIJOS', 'RELACION_PAREJA_ESTABLE'):
+            return
+        print("\n=== Cruce HIJOS vs RELACION_PAREJA_ESTABLE ===")
+        print(self.tabla_con_totales('HIJOS', 'RELACION_PAREJA_ESTABLE'))
+        if self.tabla('HIJOS', 'RELACION_PAREJA_ESTABLE').shape == (2, 2):
+            self._imprimir_asociacion(self.fisher('HIJOS', 'RELACION_PAREJA_ESTABLE'),
+                                      "Hijos vs Relación de Pareja Estable", "Hijos", "Relación de Pareja Estable")
+        else:
+            print("Test exacto de Fisher no aplicable: la tabla no es 2×2")
+        self._graficar_tabla(self.tabla('HIJOS', 'RELACION_PAREJA_ESTABLE'), 'familiar_hijos_pareja.png',
+                             "Relación entre Hijos y Tener Pareja Estable", "¿Tiene Hijos?",
+                             "Número de Personas", leyenda="Pareja Estable")
+
+    def analizar_padres(self):
+        """Hijos vs si la madre o el padre viven"""
+        if not self._disponibles('HIJOS', 'MADRE_VIVE', 'PADRE_VIVE'):
+            return
+        print("\n=== Cruce HIJOS vs MADRE_VIVE ===")
+        print(self.tabla_con_totales('HIJOS', 'MADRE_VIVE'))
+        print("\n=== Cruce HIJOS vs PADRE_VIVE ===")
+        print(self.tabla_con_totales('HIJOS', 'PADRE_VIVE'))
+
+        cruce = pd.concat({"Madre Vive": self.tabla('HIJOS', 'MADRE_VIVE'),
+                           "Padre Vive": self.tabla('HIJOS', 'PADRE_VIVE')}, axis=1)
+        self._graficar_tabla(cruce, 'familiar_hijos_padres.png', "Relación entre Hijos y si Madre o Padre Vive",
+                             "¿Tiene Hijos?", "Número de Personas", leyenda="", figsize=(9, 6))
+
+    def analizar_integrantes_hogar(self):
+        """Frecuencia y co-ocurrencia de integrantes en las columnas de listas (madre;padre;...)"""
+        columnas = [c for c in COLUMNAS_INTEGRANTES if c in self.df.columns]
+        if not columnas:
+            detectadas = detectar_columnas_lista(self.df)
+            print(f"\nNo se encontraron las columnas de integrantes {list(COLUMNAS_INTEGRANTES)}"
+                  + (f"; columnas con listas entre las cargadas: {detectadas}" if detectadas else ""))
+        for columna in columnas:
+            matriz = self.integrantes(columna)
+            print(f"\n=== INTEGRANTES DEL HOGAR: {columna} ===")
+            print(matriz.frecuencias())
+            print(f"Integrantes mencionados por persona (promedio): {matriz.tamanos().mean():.2f}")
+            print("\nCo-ocurrencia (personas que mencionan ambos):")
+            print(matriz.coocurrencia())
+
+    def analizar_confusion(self):
+        """Asociaciones familiares controlando por categoría y sexo"""
+        grilla = self.pruebas_estratificadas()
+        if grilla.empty:
+            print("No se pueden estratificar las asociaciones - columnas no disponibles")
+            return
+        print("\n=== ASOCIACIONES ESTRATIFICADAS (CATEGORIA / SEXO) ===")
+        for _, r in grilla.iterrows():
+            print(f"{r['fila']} × {r['columna']} | estratos: {r['estratos']} ({r['k_estratos']})")
+            linea = f"   CMH = {r['cmh']:.2f} (gl = {r['gl_cmh']}), p = {r['p_cmh']:.4f}"
+            if pd.notna(r.get('or_mh')):
+                linea += f"; OR cruda = {r['or_crudo']:.2f}, OR MH = {r['or_mh']:.2f}"
+            print(linea)
+            if pd.notna(r.get('p_bd')):
+                print(f"   Breslow–Day (homogeneidad de OR): p = {r['p_bd']:.4f}")
+            print(f"   Log-lineal sin interacción de 3 vías: G² = {r['g2_homogenea']:.2f} "
+                  f"(gl = {r['gl_homogenea']}), p = {r['p_homogenea']:.4f}")
+            for estrato in r['estratos'].split('×'):
+                if pd.notna(r.get(f'g2_xy_{estrato}')):
+                    print(f"   Log-lineal con asociación variable según {estrato}: "
+                          f"G² = {r[f'g2_xy_{estrato}']:.2f} (gl = {int(r[f'gl_xy_{estrato}'])}), "
+                          f"p = {r[f'p_xy_{estrato}']:.4f}")
+
+    def analizar_factores_riesgo(self, top: int = 15):
+        """Posibles factores de riesgo de maltrato intrafamiliar entre todas las columnas"""
+        if not self._disponibles('MALTRATO_INTRAFAMILIAR'):
+            return
+        ranking = self.factores_riesgo()
+        print(f"\n=== FACTORES ASOCIADOS A MALTRATO_INTRAFAMILIAR ({len(ranking)} columnas cribadas) ===")
+        for columna, r in ranking.head(top).iterrows():
+            entrada = f"; entra a la ruta L1 en C = {r['c_entrada']:.3g}" if pd.notna(r.get('c_entrada')) else ""
+            print(f"{columna} = {r['nivel']}: OR = {r['or']:.2f} "
+                  f"(IC95% {r['ic_inf']:.2f}–{r['ic_sup']:.2f}), p = {r['p_val']:.4f}, q = {r['q_val']:.4f}{entrada}")
+
+    def analizar_comparaciones_multiples(self):
+        """Corrección global sobre todas las pruebas de la corrida"""
+        self.registro.imprimir()
+
+    def ejecutar(self, secciones=None):
+        """
+        Ejecuta las secciones en el orden del análisis original
+
+        Args:
+            secciones: Claves de COLUMNAS_SECCIONES a ejecutar (None = todas salvo
+                SECCIONES_OPCIONALES, como el cribado de factores de riesgo)
+        """
+        for seccion in self._secciones(secciones):
+            getattr(self, f'analizar_{seccion}')()
+        self.figuras.cerrar()
+        return self
+
+# ==============================================================
+# MÓDULO: CICLO DE VIDA DE FIGURAS
+# ==============================================================
+
+class GestorFiguras:
+    """
+    Garantiza que las figuras de matplotlib se cierren después de guardarlas o mostrarlas.
+
+    Se usa como context manager (al salir se cierran todas las figuras abiertas
+    dentro del bloque) o directamente con guardar()/mostrar()/cerrar() en los
+    scripts. Lleva el pico de figuras abiertas y una estimación del pico de
+    memoria de sus lienzos (ancho × alto × 4 bytes RGBA al dpi de guardado) y
+    emite una advertencia cuando hay más de `max_abiertas` figuras abiertas.
+    """
+
+    def __init__(self, max_abiertas: int = 5, dpi: int = 300, verbose: bool = False):
+        """
+        Args:
+            max_abiertas (int): Figuras abiertas a partir de las cuales se advierte
+            dpi (int): Resolución de guardado usada para estimar la memoria
+            verbose (bool): Imprimir un resumen al cerrar
+        """
+        self.max_abiertas = max_abiertas
+        self.dpi = dpi
+        self.verbose = verbose
+        self.archivos = []
+        self.pico_abiertas = 0
+        self.pico_memoria = 0
+        self._previas = set(plt.get_fignums())
+
+    def __enter__(self):
+        self._previas = set(plt.get_fignums())
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self.cerrar()
+        return False
+
+    @property
+    def pico_memoria_mb(self) -> float:
+        return self.pico_memoria / 2 ** 20
+
+    def _propias(self) -> list:
+        """Números de las figuras abiertas después de crear el gestor"""
+        return [n for n in plt.get_fignums() if n not in self._previas]
+
+    def medir(self):
+        """Actualiza los picos con las figuras abiertas en este momento (sin cambiar la figura actual)"""
+        numeros = plt.get_fignums()
+        if not numeros:
+            return
+        # plt.figure(numero) activa cada figura; al final se reactiva la que era la actual
+        actual = plt.gcf()
+        abiertas = [plt.figure(numero) for numero in numeros]
+        plt.figure(actual.number)
+        memoria = 0
+        for figura in abiertas:
+            ancho, alto = figura.get_size_inches() * max(figura.dpi, self.dpi)
+            memoria += int(ancho) * int(alto) * 4
+        self.pico_abiertas = max(self.pico_abiertas, len(abiertas))
+        self.pico_memoria = max(self.pico_memoria, memoria)
+        if len(abiertas) > self.max_abiertas:
+            warnings.warn(f"Hay {len(abiertas)} figuras abiertas (máximo {self.max_abiertas}); "
+                          f"≈{memoria / 2 ** 20:.0f} MB en lienzos sin liberar", RuntimeWarning, stacklevel=3)
+
+    def guardar(self, archivo, figura=None, **kwargs):
+        """Guarda la figura (por defecto la actual) y la cierra; `archivo` puede ser un PdfPages"""
+        figura = figura if figura is not None else plt.gcf()
+        self.medir()
+        if hasattr(archivo, 'savefig'):
+            archivo.savefig(figura, **kwargs)
+        else:
+            figura.savefig(archivo, **kwargs)
+        plt.close(figura)
+        self.archivos.append(archivo)
+        return archivo
+
+    def mostrar(self):
+        """Muestra las figuras pendientes (sin efecto con backends no interactivos) y las cierra"""
+        self.medir()
+        plt.show()
+        for numero in self._propias():
+            plt.close(numero)
+
+    def cerrar(self):
+        """Cierra todas las figuras abiertas desde que se creó el gestor"""
+        self.medir()
+        for numero in self._propias():
+            plt.close(numero)
+        if self.verbose:
+            print(f"Figuras: {len(self.archivos)} guardadas, pico de {self.pico_abiertas} abiertas "
+                  f"(≈{self.pico_memoria_mb:.1f} MB)")
+
+# ==============================================================
+# MÓDULO: PLANIFICADOR DE GRÁFICOS EN PARALELO
+# ==============================================================
+
+def _inicializar_trabajador_graficos():
+    """Configura cada proceso de dibujo: backend sin pantalla y estilo del proyecto"""
+    import matplotlib
+    matplotlib.use('Agg')
+    sns.set_theme(style="whitegrid")
+    plt.rcParams.update(ESTILO_GRAFICOS)
+
+
+def _ejecutar_trabajo_grafico(funcion, datos, archivo: str, guardado: dict = None, max_abiertas: int = 5):
+    """Dibuja y guarda un gráfico; devuelve el archivo, la memoria pico de sus figuras y su etapa perfilada"""
+    guardado = guardado if guardado is not None else {'dpi': 300, 'bbox_inches': 'tight'}
+    with PERFILADOR.etapa(f"grafico {os.path.basename(archivo)}", datos) as etapa, \
+            GestorFiguras(max_abiertas=max_abiertas, dpi=guardado.get('dpi', 100)) as gestor:
+        funcion(datos)
+        gestor.guardar(archivo, **guardado)
+    return archivo, gestor.pico_memoria, etapa
+
+
+class PlanificadorGraficos:
+    """
+    Ejecuta trabajos de dibujo (archivo, función, datos) en un ProcessPoolExecutor.
+
+    Cada trabajo recibe solo la tabla agregada que necesita, de modo que a los
+    procesos no se envía el DataFrame completo. Los archivos se devuelven en el
+    mismo orden en que se entregaron los trabajos.
+    """
+
+    def __init__(self, paralelo: bool = True, max_workers: int = None, max_abiertas: int = 5,
+                 guardado: dict = None):
+        """
+        Args:
+            paralelo (bool): Si es False, los trabajos se dibujan en este proceso
+            max_workers (int): Número de procesos (None = núcleos disponibles)
+            max_abiertas (int): Figuras abiertas por proceso a partir de las cuales se advierte
+            guardado (dict): Parámetros de savefig (dpi, bbox_inches...)
+        """
+        self.paralelo = paralelo
+        self.max_workers = max_workers
+        self.max_abiertas = max_abiertas
+        self.guardado = guardado
+        self.pico_memoria = 0
+
+    def ejecutar(self, trabajos) -> list:
+        """
+        Args:
+            trabajos: Lista de tuplas (archivo, función, datos); se ignoran los None
+
+        Returns:
+            list: Archivos creados, en el orden de los trabajos
+        """
+        trabajos = [t for t in trabajos if t is not None]
+        if not trabajos:
+            return []
+
+        if not self.paralelo or len(trabajos) == 1:
+            resultados = [_ejecutar_trabajo_grafico(funcion, datos, archivo, self.guardado, self.max_abiertas)
+                          for archivo, funcion, datos in trabajos]
+            resultados = [(archivo, pico) for archivo, pico, _ in resultados]
+        else:
+            argumentos = [(funcion, datos, archivo, self.guardado, self.max_abiertas)
+                          for archivo, funcion, datos in trabajos]
+            resultados = []
+            for archivo, pico, etapa in ejecutar_en_procesos(_ejecutar_trabajo_grafico, argumentos, self.max_workers,
+                                                             _inicializar_trabajador_graficos):
+                # Las etapas medidas en los procesos hijos se agregan a la traza de esta corrida
+                PERFILADOR.incorporar(etapa)
+                resultados.append((archivo, pico))
+
+        self.pico_memoria = max([self.pico_memoria] + [pico for _, pico in resultados])
+        return [archivo for archivo, _ in resultados]
+
+# ==============================================================
+# MÓDULO: CACHÉ DE GRÁFICOS
+# ==============================================================
+
+# Cambiar cuando se modifique cualquier función _dibujar_* para invalidar la caché
+VERSION_GRAFICOS = 1
+
+# Perfiles de salida de los gráficos: formato del archivo y parámetros de savefig
+PERFILES_SALIDA = {
+    'borrador': {'formato': 'png', 'dpi': 100, 'bbox_inches': 'tight'},
+    'publicacion': {'formato': 'png', 'dpi': 300, 'bbox_inches': 'tight'},
+    'vectorial': {'formato': 'svg', 'bbox_inches': 'tight'},
+    'vectorial_pdf': {'formato': 'pdf', 'bbox_inches': 'tight'},
+}
+PERFIL_POR_DEFECTO = 'borrador'
+
+
+def obtener_perfil(perfil: str) -> dict:
+    """Devuelve una copia del perfil de salida indicado"""
+    if perfil not in PERFILES_SALIDA:
+        raise ValueError(f"Perfil de salida no soportado: {perfil} "
+                         f"(opciones: {', '.join(PERFILES_SALIDA)})")
+    return dict(PERFILES_SALIDA[perfil])
+
+# Parámetros de matplotlib que no afectan la imagen generada
+_RC_IGNORADOS = {'backend', 'backend_fallback', 'interactive', 'figure.max_open_warning'}
+
+
+def _actualizar_huella(h, obj):
+    """Agrega a un hash el contenido de tablas, arreglos y contenedores de forma determinista"""
+    if isinstance(obj, (pd.Series, pd.DataFrame)):
+        h.update(repr((type(obj).__name__, getattr(obj, 'name', None),
+                       list(getattr(obj, 'columns', [])), list(obj.index.names))).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(repr((obj.dtype.str, obj.shape)).encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        for clave in sorted(obj, key=repr):
+            h.update(repr(clave).encode())
+            _actualizar_huella(h, obj[clave])
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"{type(obj).__name__}{len(obj)}".encode())
+        for elemento in obj:
+            _actualizar_huella(h, elemento)
+    elif callable(obj):
+        # Funciones de dibujo/panel: por nombre (su repr incluye la dirección de memoria)
+        h.update(f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', repr(type(obj)))}".encode())
+    else:
+        h.update(repr(obj).encode())
+
+
+def huella_estilo() -> dict:
+    """Parámetros de estilo vigentes (sns.set_theme y ESTILO_GRAFICOS se reflejan en rcParams)"""
+    return {clave: repr(valor) for clave, valor in plt.rcParams.items() if clave not in _RC_IGNORADOS}
+
+
+class CacheGraficos:
+    """
+    Evita redibujar gráficos cuyo contenido no cambió.
+
+    La clave de cada gráfico es un hash de su tabla agregada, los parámetros de
+    guardado, el estilo de matplotlib/seaborn y la versión de la función de
+    dibujo. Las claves se guardan en un manifiesto JSON junto a los archivos; un
+    gráfico se omite si su archivo existe y la clave registrada coincide.
+    """
+
+    def __init__(self, manifiesto: str = '.cache_graficos.json'):
+        """
+        Args:
+            manifiesto (str): Ruta del archivo JSON con las claves de los gráficos
+        """
+        self.manifiesto = manifiesto
+        self.claves = {}
+        if os.path.exists(manifiesto):
+            try:
+                with open(manifiesto, encoding='utf-8') as f:
+                    self.claves = json.load(f)
+            except (OSError, ValueError):
+                self.claves = {}
+
+    @staticmethod
+    def clave(funcion, datos, parametros: dict = None, estilo: dict = None) -> str:
+        """Hash del gráfico: función y versión, datos agregados, parámetros y estilo"""
+        h = hashlib.sha256()
+        _actualizar_huella(h, (VERSION_GRAFICOS, funcion.__module__, funcion.__name__))
+        _actualizar_huella(h, datos)
+        _actualizar_huella(h, parametros or {})
+        _actualizar_huella(h, estilo if estilo is not None else huella_estilo())
+        return h.hexdigest()
+
+    def vigente(self, archivo: str, clave: str) -> bool:
+        """True si el archivo existe y fue generado con la misma clave"""
+        return self.claves.get(archivo) == clave and os.path.exists(archivo)
+
+    def registrar(self, archivo: str, clave: str):
+        self.claves[archivo] = clave
+
+    def guardar(self):
+        """Escribe el manifiesto de claves"""
+        with open(self.manifiesto, 'w', encoding='utf-8') as f:
+            json.dump(self.claves, f, indent=2, sort_keys=True)
+
+# ==============================================================
+# MÓDULO: DATOS AGREGADOS PARA GRÁFICOS
+# ==============================================================
+
+def _tabla_conteos(codigos: dict, niveles: dict, columnas) -> pd.Series:
+    """
+    Conteos de las combinaciones presentes de `columnas` a partir de códigos enteros
+
+    Args:
+        codigos (dict): {columna: códigos de pd.factorize (-1 = faltante)}
+        niveles (dict): {columna: niveles de pd.factorize}
+        columnas: Columnas a cruzar
+
+    Returns:
+        pd.Series: Conteo por combinación (índice simple o MultiIndex), en orden de aparición
+    """
+    forma = tuple(len(niveles[c]) for c in columnas)
+    if 0 in forma:
+        return pd.Series(dtype=np.int64, name='conteo')
+
+    validos = np.logical_and.reduce([codigos[c] >= 0 for c in columnas])
+    plano = np.ravel_multi_index([codigos[c][validos] for c in columnas], forma)
+    conteos = np.bincount(plano, minlength=int(np.prod(forma)))
+    presentes = np.flatnonzero(conteos)
+    posiciones = np.unravel_index(presentes, forma)
+
+    if len(columnas) == 1:
+        indice = pd.Index(niveles[columnas[0]].take(posiciones[0]), name=columnas[0])
+    else:
+        indice = pd.MultiIndex.from_arrays([niveles[c].take(p) for c, p in zip(columnas, posiciones)],
+                                           names=list(columnas))
+    return pd.Series(conteos[presentes], index=indice, name='conteo')
+
+
+class DatosGraficosFAC:
+    """
+    Tablas pequeñas que alimentan todos los gráficos demográficos.
+
+    Se construyen en una sola pasada: cada columna se factoriza una vez y todas
+    las tablas de conteo (barras, heatmaps, jerarquías) y los histogramas de
+    edad se obtienen con np.bincount sobre los códigos. Los gráficos reciben
+    solo estas tablas, nunca el DataFrame completo.
+
+    Con `faceta` (p. ej. UNIDAD) se calculan además, con los mismos códigos,
+    las tablas por cada valor de la faceta; vista() devuelve las de un valor.
+    """
+
+    # Tabla -> columnas que cruza
+    TABLAS = {
+        'categoria': ('CATEGORIA',),
+        'grado': ('GRADO', 'GRADO_LOW'),
+        'estado_civil': ('ESTADO_CIVIL',),
+        'nivel_educativo': ('NIVEL_EDUCATIVO',),
+        'sexo_categoria': ('SEXO_UP', 'CATEGORIA_UP'),
+        'educacion_categoria': ('NIVEL_EDU_LOW', 'CATEGORIA_UP'),
+        'jerarquia': ('CATEGORIA_UP', 'GRADO_LOW', 'SEXO_UP'),
+    }
+
+    def __init__(self, n_filas: int, tablas: dict, histograma_edades: HistogramaEdades = None,
+                 edades_categoria: HistogramaEdades = None, faceta: str = None,
+                 n_faceta: pd.Series = None, tablas_faceta: dict = None,
+                 histograma_faceta: HistogramaEdades = None, edades_categoria_faceta: HistogramaEdades = None):
+        """
+        Args:
+            n_filas (int): Registros de la población (denominador de porcentajes)
+            tablas (dict): {nombre: pd.Series de conteos}; faltan las que no aplican
+            histograma_edades (HistogramaEdades): Edades con estrato SEXO_UP
+            edades_categoria (HistogramaEdades): Edades por CATEGORIA, en orden de aparición
+            faceta (str): Columna de la faceta (None = sin facetas)
+            n_faceta (pd.Series): Registros por valor de la faceta
+            tablas_faceta (dict): Las mismas tablas con la faceta como primer nivel
+            histograma_faceta (HistogramaEdades): Edades por faceta × SEXO_UP
+            edades_categoria_faceta (HistogramaEdades): Edades por faceta × CATEGORIA
+        """
+        self.n_filas = n_filas
+        self.tablas = tablas
+        self.histograma_edades = histograma_edades
+        self.edades_categoria = edades_categoria
+        self.faceta = faceta
+        self.n_faceta = n_faceta
+        self.tablas_faceta = tablas_faceta or {}
+        self.histograma_faceta = histograma_faceta
+        self.edades_categoria_faceta = edades_categoria_faceta
+
+    @classmethod
+    def desde_df(cls, df: pd.DataFrame, histograma_edades: HistogramaEdades = None,
+                 faceta: str = None) -> 'DatosGraficosFAC':
+        """
+        Calcula todas las tablas de los gráficos recorriendo el DataFrame una vez
+
+        Args:
+            df (pd.DataFrame): Datos preprocesados (con columnas normalizadas)
+            histograma_edades (HistogramaEdades): Histograma ya calculado que incluya
+                el estrato SEXO_UP (se reutiliza en lugar de recalcularlo)
+            faceta (str): Columna por cuyos valores se calculan también las tablas (p. ej. UNIDAD)
+        """
+        faceta = faceta if faceta in df.columns else None
+        columnas = sorted({c for cols in cls.TABLAS.values() for c in cols if c in df.columns} |
+                          ({faceta} if faceta else set()))
+        codigos, niveles = {}, {}
+        for col in columnas:
+            codigos[col], niveles[col] = pd.factorize(df[col])
+
+        tablas = {nombre: _tabla_conteos(codigos, niveles, cols)
+                  for nombre, cols in cls.TABLAS.items() if set(cols).issubset(codigos)}
+        facetas = {}
+        if faceta:
+            facetas['n_faceta'] = _tabla_conteos(codigos, niveles, (faceta,))
+            facetas['tablas_faceta'] = {nombre: _tabla_conteos(codigos, niveles, (faceta,) + cols)
+                                        for nombre, cols in cls.TABLAS.items() if set(cols).issubset(codigos)}
+
+        edades_categoria = None
+        if 'EDAD2' in df.columns:
+            edad = pd.to_numeric(df['EDAD2'], errors='coerce').to_numpy(dtype=float)
+            validos = np.isfinite(edad) & (edad >= 0)
+            edad_int = np.rint(np.where(validos, edad, 0)).astype(np.int64)
+            ancho = int(edad_int.max()) + 1 if validos.any() else 1
+
+            if histograma_edades is None or 'SEXO_UP' not in histograma_edades.estratos.names:
+                histograma_edades = cls._histograma(edad_int, validos, ancho, codigos, niveles, ['SEXO_UP'])
+            if 'CATEGORIA' in codigos:
+                edades_categoria = cls._histograma(edad_int, validos, ancho, codigos, niveles, ['CATEGORIA'])
+            if faceta:
+                facetas['histograma_faceta'] = cls._histograma(edad_int, validos, ancho, codigos, niveles,
+                                                               [faceta, 'SEXO_UP'])
+                facetas['edades_categoria_faceta'] = cls._histograma(edad_int, validos, ancho, codigos,
+                                                                     niveles, [faceta, 'CATEGORIA'])
+
+        return cls(len(df), tablas, histograma_edades, edades_categoria, faceta=faceta, **facetas)
+
+    @staticmethod
+    def _histograma(edad, validos, ancho, codigos, niveles, columnas) -> HistogramaEdades:
+        """Histograma de edad por `columnas` reutilizando sus códigos ya factorizados"""
+        columnas = [c for c in columnas if c in codigos]
+        if not columnas:
+            conteos = np.bincount(edad[validos], minlength=ancho)
+            return HistogramaEdades(conteos.reshape(1, ancho), pd.Index(['TOTAL']))
+        forma = tuple(len(niveles[c]) for c in columnas)
+        usar = validos & np.logical_and.reduce([codigos[c] >= 0 for c in columnas])
+        plano = np.ravel_multi_index([codigos[c][usar] for c in columnas], forma) if usar.any() else \
+            np.zeros(0, dtype=np.int64)
+        conteos = np.bincount(plano * ancho + edad[usar], minlength=int(np.prod(forma)) * ancho)
+        conteos = conteos.reshape(-1, ancho)
+        if len(columnas) == 1:
+            return HistogramaEdades(conteos, pd.Index(niveles[columnas[0]], name=columnas[0]))
+        # Con varias columnas solo se conservan las combinaciones presentes
+        presentes = np.flatnonzero(conteos.sum(axis=1))
+        posiciones = np.unravel_index(presentes, forma)
+        estratos = pd.MultiIndex.from_arrays([niveles[c].take(p) for c, p in zip(columnas, posiciones)],
+                                             names=columnas)
+        return HistogramaEdades(conteos[presentes], estratos)
+
+    def valores_faceta(self, n_min: int = 1) -> list:
+        """Valores de la faceta con al menos `n_min` registros, en orden alfabético"""
+        if self.n_faceta is None:
+            return []
+        return sorted(self.n_faceta[self.n_faceta >= n_min].index, key=str)
+
+    def vista(self, valor) -> 'DatosGraficosFAC':
+        """Tablas de un valor de la faceta, con la misma forma que las de la población"""
+        if self.faceta is None:
+            raise ValueError("Los datos no se calcularon con faceta")
+
+        def cortar(tabla):
+            if valor in tabla.index.get_level_values(self.faceta):
+                return tabla.xs(valor, level=self.faceta)
+            return tabla.iloc[:0].droplevel(self.faceta)
+
+        def cortar_histograma(histograma):
+            if histograma is None:
+                return None
+            filas = np.asarray(histograma.estratos.get_level_values(self.faceta) == valor)
+            return HistogramaEdades(histograma.conteos[filas], histograma.estratos[filas].droplevel(self.faceta))
+
+        return DatosGraficosFAC(int(self.n_faceta.get(valor, 0)),
+                                {nombre: cortar(t) for nombre, t in self.tablas_faceta.items()},
+                                cortar_histograma(self.histograma_faceta),
+                                cortar_histograma(self.edades_categoria_faceta))
+
+    def conteos(self, nombre: str) -> pd.Series:
+        """Conteos univariados ordenados de mayor a menor (como value_counts)"""
+        tabla = self.tablas.get(nombre)
+        if tabla is None:
+            return None
+        return tabla.sort_values(ascending=False, kind='stable')
+
+    def tabla_cruzada(self, nombre: str) -> pd.DataFrame:
+        """Tabla de contingencia de dos columnas (como pd.crosstab)"""
+        tabla = self.tablas.get(nombre)
+        if tabla is None:
+            return None
+        return tabla.unstack(fill_value=0).sort_index().sort_index(axis=1)
+
+    def estadisticas_caja(self, whis: float = 1.5) -> list:
+        """Estadísticas de boxplot de edad por CATEGORIA calculadas desde el histograma"""
+        if self.edades_categoria is None:
+            return []
+        hist = self.edades_categoria
+        cuartiles = hist.cuantiles([0.25, 0.5, 0.75]).to_numpy()
+        medias = hist.medias().to_numpy()
+        cajas = []
+        for i, categoria in enumerate(hist.estratos):
+            presentes = np.flatnonzero(hist.conteos[i])
+            if presentes.size == 0:
+                continue
+            q1, mediana, q3 = cuartiles[i]
+            iqr = q3 - q1
+            arriba = presentes[presentes <= q3 + whis * iqr]
+            abajo = presentes[presentes >= q1 - whis * iqr]
+            cajas.append({
+                'label': categoria, 'mean': medias[i], 'med': mediana, 'q1': q1, 'q3': q3, 'iqr': iqr,
+                'whishi': max(arriba.max(), q3) if arriba.size else q3,
+                'whislo': min(abajo.min(), q1) if abajo.size else q1,
+                'fliers': [],
+            })
+        return cajas
+
 # ==============================================================
 # MÓDULO: GENERADOR DE GRÁFICOS
 # ==============================================================
@@ -755,30 +3968,50 @@ class AnalisisEstadisticoFAC:
 class GeneradorGraficosFAC:
     """
     Módulo especializado en generación de gráficos demográficos
+
+    Trabaja sobre DatosGraficosFAC: cada método _grafico_* toma la tabla que
+    necesita y devuelve un trabajo (archivo, función de dibujo, datos) que el
+    planificador ejecuta.
     """
     
-    def __init__(self, df: pd.DataFrame):
-        self.df = df
+    def __init__(self, datos, histograma_edades: HistogramaEdades = None,
+                 paralelo: bool = True, max_workers: int = None, usar_cache: bool = True,
+                 perfil: str = PERFIL_POR_DEFECTO, salida: str = ''):
+        """
+        Args:
+            datos: DatosGraficosFAC, o un DataFrame del que se calculan (no se conserva)
+            histograma_edades (HistogramaEdades): Histograma a reutilizar si `datos` es un DataFrame
+            paralelo (bool): Dibujar en procesos separados
+            max_workers (int): Número de procesos (None = núcleos disponibles)
+            usar_cache (bool): Omitir los gráficos cuyo archivo ya corresponde a los mismos datos y estilo
+            perfil (str): 'borrador' (PNG 100 dpi), 'publicacion' (PNG 300 dpi),
+                'vectorial' (SVG) o 'vectorial_pdf' (PDF)
+            salida (str): Carpeta de salida ('' = directorio actual)
+        """
+        if isinstance(datos, pd.DataFrame):
+            datos = DatosGraficosFAC.desde_df(datos, histograma_edades)
+        self.datos = datos
         self.figuras_creadas = []
+        self.figuras_reutilizadas = []
+        self.perfil = perfil
+        self.guardado = obtener_perfil(perfil)
+        self.formato = self.guardado.pop('formato')
+        self.planificador = PlanificadorGraficos(paralelo=paralelo, max_workers=max_workers,
+                                                 guardado=self.guardado)
+        self.salida = salida
+        self.cache = CacheGraficos(os.path.join(salida, '.cache_graficos.json')) if usar_cache else None
     
     def generar_graficos_univariados(self):
         """Genera gráficos de análisis univariado"""
         print("\nGENERANDO GRÁFICOS UNIVARIADOS...")
         
-        # 1. Distribución de edad
-        self._grafico_edad_distribucion()
-        
-        # 2. Distribución por categoría
-        self._grafico_categoria_barras()
-        
-        # 3. Distribución por grado
-        self._grafico_grado_barras()
-        
-        # 4. Estado civil
-        self._grafico_estado_civil()
-        
-        # 5. Nivel educativo
-        self._grafico_nivel_educativo()
+        self._ejecutar([
+            self._grafico_edad_distribucion(),   # 1. Distribución de edad
+            self._grafico_categoria_barras(),    # 2. Distribución por categoría
+            self._grafico_grado_barras(),        # 3. Distribución por grado
+            self._grafico_estado_civil(),        # 4. Estado civil
+            self._grafico_nivel_educativo(),     # 5. Nivel educativo
+        ])
         
         print(f"{len(self.figuras_creadas)} gráficos univariados generados")
     
@@ -786,17 +4019,12 @@ class GeneradorGraficosFAC:
         """Genera gráficos de análisis bivariado"""
         print("\nGENERANDO GRÁFICOS BIVARIADOS...")
         
-        # 1. Pirámide etaria
-        self._grafico_piramide_etaria()
-        
-        # 2. Edad por categoría
-        self._grafico_edad_categoria()
-        
-        # 3. Sexo por categoría
-        self._grafico_sexo_categoria()
-        
-        # 4. Nivel educativo por categoría
-        self._grafico_educacion_categoria()
+        self._ejecutar([
+            self._grafico_piramide_etaria(),     # 1. Pirámide etaria
+            self._grafico_edad_categoria(),      # 2. Edad por categoría
+            self._grafico_sexo_categoria(),      # 3. Sexo por categoría
+            self._grafico_educacion_categoria(), # 4. Nivel educativo por categoría
+        ])
         
         print(f"Gráficos bivariados generados")
     
@@ -804,251 +4032,228 @@ class GeneradorGraficosFAC:
         """Genera gráficos específicos por jerarquía militar"""
         print("\nGENERANDO GRÁFICOS JERÁRQUICOS...")
         
-        # Gráficos para oficiales
-        self._graficos_oficiales()
-        
-        # Gráficos para suboficiales
-        self._graficos_suboficiales()
+        self._ejecutar([
+            self._graficos_oficiales(),          # Gráficos para oficiales
+            self._graficos_suboficiales(),       # Gráficos para suboficiales
+        ])
         
         print("Gráficos jerárquicos generados")
     
+    def generar_todos(self):
+        """Genera los tres grupos de gráficos en un solo lote de trabajos"""
+        print(f"\nGENERANDO GRÁFICOS (perfil {self.perfil})...")
+        self._ejecutar(self._trabajos_todos())
+        print(f"{len(self.figuras_creadas)} gráficos generados "
+              f"(pico de memoria de figuras ≈{self.planificador.pico_memoria / 2 ** 20:.1f} MB)")
+    
+    def generar_paquete_pdf(self, archivo: str = 'graficos_FAC_2024.pdf') -> str:
+        """
+        Escribe todos los gráficos en un único PDF de varias páginas
+
+        Las páginas se dibujan en este proceso (PdfPages no se comparte entre
+        procesos); el paquete se omite si ningún gráfico cambió desde la última vez.
+
+        Args:
+            archivo (str): Ruta del PDF de salida
+        """
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        archivo = os.path.join(self.salida, archivo)
+        if self.salida:
+            os.makedirs(self.salida, exist_ok=True)
+        print(f"\nGENERANDO PAQUETE PDF: {archivo}")
+        trabajos = [t for t in self._trabajos_todos() if t is not None]
+        guardado = {k: v for k, v in self.guardado.items() if k != 'dpi'}
+        clave = None
+        if self.cache is not None:
+            estilo = huella_estilo()
+            clave = CacheGraficos.clave(PdfPages, [CacheGraficos.clave(funcion, datos, guardado, estilo)
+                                                   for _, funcion, datos in trabajos])
+            if self.cache.vigente(archivo, clave):
+                print("   Paquete sin cambios, reutilizado desde la caché")
+                return archivo
+
+        with PdfPages(archivo) as pdf, GestorFiguras(dpi=self.guardado.get('dpi', 100)) as gestor:
+            for _, funcion, datos in trabajos:
+                funcion(datos)
+                gestor.guardar(pdf, **guardado)
+        if clave is not None:
+            self.cache.registrar(archivo, clave)
+            self.cache.guardar()
+        print(f"   {len(trabajos)} páginas escritas")
+        return archivo
+    
+    def _trabajos_todos(self) -> list:
+        """Trabajos de los tres grupos de gráficos, en el orden de presentación"""
+        return [
+            self._grafico_edad_distribucion(),
+            self._grafico_categoria_barras(),
+            self._grafico_grado_barras(),
+            self._grafico_estado_civil(),
+            self._grafico_nivel_educativo(),
+            self._grafico_piramide_etaria(),
+            self._grafico_edad_categoria(),
+            self._grafico_sexo_categoria(),
+            self._grafico_educacion_categoria(),
+            self._graficos_oficiales(),
+            self._graficos_suboficiales(),
+        ]
+    
+    def _ejecutar(self, trabajos):
+        """Ejecuta los trabajos no vigentes en caché y registra los archivos en orden determinista"""
+        # El nombre de archivo de cada trabajo toma la carpeta y la extensión del perfil de salida
+        trabajos = [(os.path.join(self.salida, f"{os.path.splitext(t[0])[0]}.{self.formato}"),) + t[1:]
+                    for t in trabajos if t is not None]
+        if self.salida:
+            os.makedirs(self.salida, exist_ok=True)
+        if self.cache is None:
+            self.figuras_creadas.extend(self.planificador.ejecutar(trabajos))
+            return
+
+        estilo = huella_estilo()
+        claves = [CacheGraficos.clave(funcion, datos, self.guardado, estilo)
+                  for _, funcion, datos in trabajos]
+        pendientes = [t for t, clave in zip(trabajos, claves) if not self.cache.vigente(t[0], clave)]
+        self.planificador.ejecutar(pendientes)
+
+        for (archivo, _, _), clave in zip(trabajos, claves):
+            if self.cache.vigente(archivo, clave):
+                self.figuras_reutilizadas.append(archivo)
+            self.cache.registrar(archivo, clave)
+            self.figuras_creadas.append(archivo)
+        self.cache.guardar()
+        if len(pendientes) < len(trabajos):
+            print(f"   {len(trabajos) - len(pendientes)} gráficos sin cambios reutilizados desde la caché")
+    
     def _grafico_edad_distribucion(self):
         """Histograma de distribución de edad"""
-        if 'EDAD2' not in self.df.columns:
-            return
+        histograma = self.datos.histograma_edades
+        if histograma is None or histograma.n.sum() == 0:
+            return None
             
-        plt.figure(figsize=(12, 6))
-        edad_clean = self.df['EDAD2'].dropna()
-        
-        sns.histplot(edad_clean, bins=25, kde=True, alpha=0.7)
-        plt.title('Distribución de Edad del Personal FAC', fontsize=16, fontweight='bold')
-        plt.xlabel('Edad (años)')
-        plt.ylabel('Frecuencia')
-        
-        # Agregar estadísticas
-        media = edad_clean.mean()
-        mediana = edad_clean.median()
-        plt.axvline(media, color='red', linestyle='--', alpha=0.7, label=f'Media: {media:.1f}')
-        plt.axvline(mediana, color='orange', linestyle='--', alpha=0.7, label=f'Mediana: {mediana:.1f}')
-        plt.legend()
-        
-        plt.tight_layout()
-        plt.savefig('01_distribucion_edad.png', dpi=300, bbox_inches='tight')
-        self.figuras_creadas.append('01_distribucion_edad.png')
+        edades, pesos = histograma.valores_y_pesos()
+        datos = {
+            'edades': edades,
+            'pesos': pesos,
+            'media': (edades * pesos).sum() / pesos.sum(),
+            'mediana': histograma.total().mediana(),
+        }
+        return ('01_distribucion_edad.png', _dibujar_edad_distribucion, datos)
+    
+    def _grafico_barras(self, tabla, archivo, **estilo):
+        """Trabajo de barras horizontales para una tabla de conteos univariada"""
+        conteos = self.datos.conteos(tabla)
+        if conteos is None or conteos.empty:
+            return None
+        return (archivo, _dibujar_barras_conteo, dict(conteos=conteos, **estilo))
     
     def _grafico_categoria_barras(self):
         """Gráfico de barras por categoría"""
-        if 'CATEGORIA' not in self.df.columns:
-            return
-            
-        plt.figure(figsize=(10, 6))
-        orden_cat = self.df['CATEGORIA'].value_counts().index.tolist()
-        
-        ax = sns.countplot(y='CATEGORIA', data=self.df, order=orden_cat, color='steelblue')
-        self._agregar_valores_barras(ax, orientacion="horizontal")
-        
-        plt.title('Distribución por Categoría Militar')
-        plt.xlabel('Cantidad')
-        plt.ylabel('Categoría')
-        
-        plt.tight_layout()
-        plt.savefig('02_distribucion_categoria.png', dpi=300, bbox_inches='tight')
-        self.figuras_creadas.append('02_distribucion_categoria.png')
+        return self._grafico_barras('categoria', '02_distribucion_categoria.png',
+                                    figsize=(10, 6), color='steelblue',
+                                    titulo='Distribución por Categoría Militar', ylabel='Categoría')
     
     def _grafico_grado_barras(self):
         """Gráfico de barras por grado (excluyendo 'no responde')"""
-        if not {'GRADO', 'GRADO_LOW'}.issubset(self.df.columns):
-            return
-            
-        df_grado = self.df[self.df['GRADO_LOW'] != "no responde"].copy()
-        if df_grado.empty:
-            return
+        tabla = self.datos.tablas.get('grado')
+        if tabla is None:
+            return None
             
-        plt.figure(figsize=(12, 10))
-        orden_grado = df_grado['GRADO'].value_counts().index.tolist()
-        
-        ax = sns.countplot(y='GRADO', data=df_grado, order=orden_grado, color='darkgreen')
-        self._agregar_valores_barras(ax, orientacion="horizontal")
-        
-        plt.title('Distribución por Grado Militar')
-        plt.xlabel('Cantidad')
-        plt.ylabel('Grado')
-        
-        plt.tight_layout()
-        plt.savefig('03_distribucion_grado.png', dpi=300, bbox_inches='tight')
-        self.figuras_creadas.append('03_distribucion_grado.png')
+        respondido = tabla.index.get_level_values('GRADO_LOW') != "no responde"
+        conteos = (tabla[respondido].groupby(level='GRADO', sort=False).sum()
+                   .sort_values(ascending=False, kind='stable'))
+        if conteos.empty:
+            return None
+        datos = {
+            'conteos': conteos,
+            'figsize': (12, 10), 'color': 'darkgreen',
+            'titulo': 'Distribución por Grado Militar', 'ylabel': 'Grado',
+        }
+        return ('03_distribucion_grado.png', _dibujar_barras_conteo, datos)
     
     def _grafico_estado_civil(self):
         """Gráfico de barras por estado civil"""
-        if 'ESTADO_CIVIL' not in self.df.columns:
-            return
-            
-        plt.figure(figsize=(10, 6))
-        orden_ec = self.df['ESTADO_CIVIL'].value_counts().index.tolist()
-        
-        ax = sns.countplot(y='ESTADO_CIVIL', data=self.df, order=orden_ec, color='coral')
-        self._agregar_valores_barras(ax, orientacion="horizontal")
-        
-        plt.title('Distribución por Estado Civil')
-        plt.xlabel('Cantidad')
-        plt.ylabel('Estado Civil')
-        
-        plt.tight_layout()
-        plt.savefig('04_distribucion_estado_civil.png', dpi=300, bbox_inches='tight')
-        self.figuras_creadas.append('04_distribucion_estado_civil.png')
+        return self._grafico_barras('estado_civil', '04_distribucion_estado_civil.png',
+                                    figsize=(10, 6), color='coral',
+                                    titulo='Distribución por Estado Civil', ylabel='Estado Civil')
     
     def _grafico_nivel_educativo(self):
         """Gráfico de barras por nivel educativo"""
-        if 'NIVEL_EDUCATIVO' not in self.df.columns:
-            return
-            
-        plt.figure(figsize=(12, 8))
-        orden_ne = self.df['NIVEL_EDUCATIVO'].value_counts().index.tolist()
-        
-        ax = sns.countplot(y='NIVEL_EDUCATIVO', data=self.df, order=orden_ne, color='purple')
-        self._agregar_valores_barras(ax, orientacion="horizontal")
-        
-        plt.title('Distribución por Nivel Educativo')
-        plt.xlabel('Cantidad')
-        plt.ylabel('Nivel Educativo')
-        
-        plt.tight_layout()
-        plt.savefig('05_distribucion_nivel_educativo.png', dpi=300, bbox_inches='tight')
-        self.figuras_creadas.append('05_distribucion_nivel_educativo.png')
+        return self._grafico_barras('nivel_educativo', '05_distribucion_nivel_educativo.png',
+                                    figsize=(12, 8), color='purple',
+                                    titulo='Distribución por Nivel Educativo', ylabel='Nivel Educativo')
     
     def _grafico_piramide_etaria(self):
         """Crea pirámide etaria por sexo y grupos etarios"""
-        if not {'GRUPO_ETARIO', 'SEXO_UP'}.issubset(self.df.columns):
-            return
-            
-        plt.figure(figsize=(12, 8))
+        histograma = self.datos.histograma_edades
+        if histograma is None or 'SEXO_UP' not in histograma.estratos.names:
+            return None
         
-        # Crear tabla cruzada
-        tabla = self.df.groupby(['GRUPO_ETARIO', 'SEXO_UP'], observed=False).size().unstack(fill_value=0)
-        tabla = tabla.reindex(index=GRUPOS_ETARIOS, fill_value=0)
-        tabla_pct = (tabla.div(len(self.df)) * 100)
+        # Crear tabla cruzada desde el histograma de edades por sexo
+        tabla = histograma.marginal('SEXO_UP').agrupar(BINS_ETARIOS, GRUPOS_ETARIOS).T
+        tabla_pct = (tabla.div(self.datos.n_filas) * 100)
         
         # Obtener datos por sexo
         hombres = tabla_pct['HOMBRE'] if 'HOMBRE' in tabla_pct.columns else pd.Series(0, index=GRUPOS_ETARIOS)
         mujeres = tabla_pct['MUJER'] if 'MUJER' in tabla_pct.columns else pd.Series(0, index=GRUPOS_ETARIOS)
-        
-        # Crear pirámide
-        y_pos = np.arange(len(GRUPOS_ETARIOS))
-        plt.barh(y_pos, -hombres.values, align='center', alpha=0.8, label='Hombres', color='steelblue')
-        plt.barh(y_pos, mujeres.values, align='center', alpha=0.8, label='Mujeres', color='pink')
-        
-        plt.yticks(y_pos, GRUPOS_ETARIOS)
-        plt.xlabel('Porcentaje de población (%)')
-        plt.ylabel('Grupos etarios')
-        plt.title('Pirámide Etaria del Personal FAC 2024', fontsize=16, fontweight='bold')
-        plt.legend()
-        plt.axvline(0, color='black', linewidth=0.8)
-        
-        # Convertir etiquetas negativas a positivas para mejor lectura
-        ax = plt.gca()
-        ticks = ax.get_xticks()
-        ax.set_xticks(ticks)
-        ax.set_xticklabels([f'{abs(x):.1f}' for x in ticks])
-        
-        plt.tight_layout()
-        plt.savefig('06_piramide_etaria.png', dpi=300, bbox_inches='tight')
-        self.figuras_creadas.append('06_piramide_etaria.png')
+        return ('06_piramide_etaria.png', _dibujar_piramide_etaria, {'hombres': hombres, 'mujeres': mujeres})
     
     def _grafico_edad_categoria(self):
         """Boxplot de edad por categoría"""
-        if not {'CATEGORIA', 'EDAD2'}.issubset(self.df.columns):
-            return
-            
-        plt.figure(figsize=(10, 7))
-        sns.boxplot(x='CATEGORIA', y='EDAD2', data=self.df, color='lightblue', showfliers=False)
-        plt.title('Distribución de Edad por Categoría Militar', fontsize=16, fontweight='bold')
-        plt.xlabel('Categoría')
-        plt.ylabel('Edad (años)')
-        plt.xticks(rotation=45)
-        
-        plt.tight_layout()
-        plt.savefig('07_edad_por_categoria.png', dpi=300, bbox_inches='tight')
-        self.figuras_creadas.append('07_edad_por_categoria.png')
+        # Solo se envían las estadísticas de cada caja (cuartiles y bigotes)
+        cajas = self.datos.estadisticas_caja()
+        if not cajas:
+            return None
+        return ('07_edad_por_categoria.png', _dibujar_edad_categoria, cajas)
+    
+    def _grafico_heatmap(self, tabla_nombre, archivo, **estilo):
+        """Trabajo de heatmap con el porcentaje de cada fila dentro de la categoría"""
+        tabla = self.datos.tabla_cruzada(tabla_nombre)
+        if tabla is None or tabla.empty:
+            return None
+        tabla_pct = (tabla / tabla.sum(axis=0)).fillna(0) * 100
+        return (archivo, _dibujar_heatmap_categoria, dict(tabla_pct=tabla_pct, **estilo))
     
     def _grafico_sexo_categoria(self):
         """Heatmap de sexo por categoría"""
-        if not {'SEXO_UP', 'CATEGORIA_UP'}.issubset(self.df.columns):
-            return
-            
-        plt.figure(figsize=(10, 6))
-        tabla = pd.crosstab(self.df['SEXO_UP'], self.df['CATEGORIA_UP'])
-        tabla_pct = (tabla / tabla.sum(axis=0)).fillna(0) * 100
-        
-        sns.heatmap(tabla_pct.round(1), annot=True, fmt='.1f', cmap='Blues',
-                   linewidths=0.5, cbar_kws={'label': '% dentro de categoría'})
-        plt.title('Distribución de Sexo por Categoría (%)', fontsize=16, fontweight='bold')
-        plt.xlabel('Categoría')
-        plt.ylabel('Sexo')
-        
-        plt.tight_layout()
-        plt.savefig('08_sexo_por_categoria.png', dpi=300, bbox_inches='tight')
-        self.figuras_creadas.append('08_sexo_por_categoria.png')
+        return self._grafico_heatmap('sexo_categoria', '08_sexo_por_categoria.png',
+                                     figsize=(10, 6), cmap='Blues',
+                                     titulo='Distribución de Sexo por Categoría (%)', ylabel='Sexo',
+                                     rotar_x=False)
     
     def _grafico_educacion_categoria(self):
         """Heatmap de nivel educativo por categoría"""
-        if not {'NIVEL_EDU_LOW', 'CATEGORIA_UP'}.issubset(self.df.columns):
-            return
-            
-        plt.figure(figsize=(12, 8))
-        tabla = pd.crosstab(self.df['NIVEL_EDU_LOW'], self.df['CATEGORIA_UP'])
-        tabla_pct = (tabla / tabla.sum(axis=0)).fillna(0) * 100
-        
-        sns.heatmap(tabla_pct.round(1), annot=True, fmt='.1f', cmap='Greens',
-                   linewidths=0.5, cbar_kws={'label': '% dentro de categoría'})
-        plt.title('Distribución de Nivel Educativo por Categoría (%)', fontsize=16, fontweight='bold')
-        plt.xlabel('Categoría')
-        plt.ylabel('Nivel Educativo')
-        plt.xticks(rotation=45)
-        plt.yticks(rotation=0)
-        
-        plt.tight_layout()
-        plt.savefig('09_educacion_por_categoria.png', dpi=300, bbox_inches='tight')
-        self.figuras_creadas.append('09_educacion_por_categoria.png')
+        return self._grafico_heatmap('educacion_categoria', '09_educacion_por_categoria.png',
+                                     figsize=(12, 8), cmap='Greens',
+                                     titulo='Distribución de Nivel Educativo por Categoría (%)',
+                                     ylabel='Nivel Educativo', rotar_x=True)
     
     def _graficos_oficiales(self):
         """Genera gráficos específicos para oficiales"""
-        if not self._tiene_datos_jerarquicos('OFICIAL', OFICIALES_ORDER_LOW):
-            return
-            
-        df_oficiales = self.df[(self.df['CATEGORIA_UP'] == 'OFICIAL') & 
-                              (self.df['GRADO_LOW'].isin(OFICIALES_ORDER_LOW))].copy()
-        
-        # Solo gráfico de distribución por grado
-        self._grafico_distribucion_grado(df_oficiales, OFICIALES_ORDER_LOW, OFICIALES_LABELS, 
-                                        'oficiales', 'Oficiales')
+        return self._grafico_distribucion_grado('OFICIAL', OFICIALES_ORDER_LOW, OFICIALES_LABELS,
+                                               'oficiales', 'Oficiales')
     
     def _graficos_suboficiales(self):
         """Genera gráficos específicos para suboficiales"""
-        if not self._tiene_datos_jerarquicos('SUBOFICIAL', SUBOF_ORDER_LOW):
-            return
-            
-        df_suboficiales = self.df[(self.df['CATEGORIA_UP'] == 'SUBOFICIAL') & 
-                                 (self.df['GRADO_LOW'].isin(SUBOF_ORDER_LOW))].copy()
-        
-        # Solo gráfico de distribución por grado
-        self._grafico_distribucion_grado(df_suboficiales, SUBOF_ORDER_LOW, SUBOF_LABELS,
-                                        'suboficiales', 'Suboficiales')
+        return self._grafico_distribucion_grado('SUBOFICIAL', SUBOF_ORDER_LOW, SUBOF_LABELS,
+                                               'suboficiales', 'Suboficiales')
     
-    def _grafico_distribucion_grado(self, df_sub, order_low, labels_map, categoria, titulo_cat):
+    def _grafico_distribucion_grado(self, categoria_up, order_low, labels_map, categoria, titulo_cat):
         """Crea gráfico de barras bivariado por grado y sexo"""
-        if df_sub.empty or not {'GRADO_LOW', 'SEXO_UP'}.issubset(df_sub.columns):
-            return
+        conteos = self._conteos_jerarquicos(categoria_up, order_low)
+        if conteos is None or conteos.empty:
+            return None
             
-        orden_jerarquico = self._construir_orden_jerarquico(df_sub, order_low)
+        orden_jerarquico = self._construir_orden_jerarquico(conteos, order_low)
         if not orden_jerarquico:
-            return
+            return None
         
-        # Crear tabla cruzada de grado por sexo
-        tabla = pd.crosstab(df_sub['GRADO_LOW'], df_sub['SEXO_UP'])
+        # Tabla de grado por sexo
+        tabla = conteos.unstack(fill_value=0).sort_index(axis=1)
         tabla = tabla.loc[[g for g in orden_jerarquico if g in tabla.index]]
         
         if tabla.empty or tabla.sum().sum() == 0:
-            return
+            return None
         
         # Cambiar índices a etiquetas legibles
         tabla.index = [labels_map.get(g, g.upper()) for g in tabla.index]
@@ -1065,98 +4270,750 @@ class GeneradorGraficosFAC:
                 columnas_ordenadas.append(col)
         
         tabla = tabla[columnas_ordenadas]
-        
-        # --- CORRECCIÓN: crear fig/ax y pasar ax=ax al plot para evitar figuras en blanco ---
-        fig, ax = plt.subplots(figsize=(12, max(6, 0.4 * len(tabla))))
-        ax = tabla.plot(kind='barh', stacked=False, width=0.8, 
-                        color=['steelblue', 'pink'][:len(tabla.columns)], ax=ax)
-        # ------------------------------------------------------------------------------------
-        
-        # Agregar valores a las barras
-        for container in ax.containers:
-            ax.bar_label(container, fmt='%d', label_type='edge', padding=3)
-        
-        plt.title(f'Distribución por Grado y Sexo ({titulo_cat})', fontsize=16, fontweight='bold')
-        plt.xlabel('Cantidad')
-        plt.ylabel(f'Grado ({titulo_cat})')
-        plt.legend(title='Sexo', bbox_to_anchor=(1.05, 1), loc='upper left')
-        
-        plt.tight_layout()
-        plt.savefig(f'10_{categoria}_distribucion_grado_sexo.png', dpi=300, bbox_inches='tight')
-        self.figuras_creadas.append(f'10_{categoria}_distribucion_grado_sexo.png')
-        
+        return (f'10_{categoria}_distribucion_grado_sexo.png', _dibujar_grado_sexo,
+                {'tabla': tabla, 'titulo_cat': titulo_cat})
     
-    def _tiene_datos_jerarquicos(self, categoria, grados_orden):
-        """Verifica si hay datos suficientes para análisis jerárquico"""
-        if not {'CATEGORIA_UP', 'GRADO_LOW'}.issubset(self.df.columns):
-            return False
-            
-        df_filtrado = self.df[(self.df['CATEGORIA_UP'] == categoria) & 
-                             (self.df['GRADO_LOW'].isin(grados_orden))]
-        return not df_filtrado.empty
+    def _conteos_jerarquicos(self, categoria_up, grados_orden):
+        """Conteos GRADO_LOW × SEXO_UP de una categoría, limitados a sus grados conocidos"""
+        tabla = self.datos.tablas.get('jerarquia')
+        if tabla is None or categoria_up not in tabla.index.get_level_values('CATEGORIA_UP'):
+            return None
+        conteos = tabla.xs(categoria_up, level='CATEGORIA_UP')
+        return conteos[conteos.index.get_level_values('GRADO_LOW').isin(grados_orden)]
     
-    def _construir_orden_jerarquico(self, df_sub, orden_conocido):
-        """Construye orden jerárquico basado en los datos presentes"""
-        presentes = df_sub['GRADO_LOW'].dropna().unique().tolist()
+    def _construir_orden_jerarquico(self, conteos, orden_conocido):
+        """Construye orden jerárquico basado en los grados presentes"""
+        frecuencias = conteos.groupby(level='GRADO_LOW', sort=False).sum()
+        presentes = frecuencias.index.tolist()
         ordenado = [g for g in orden_conocido if g in presentes]
         
         # Agregar otros grados por frecuencia
         restantes = [g for g in presentes if g not in ordenado]
         if restantes:
-            freq = df_sub['GRADO_LOW'].value_counts().index.tolist()
+            freq = frecuencias.sort_values(ascending=False, kind='stable').index.tolist()
             ordenado += [g for g in freq if g in restantes]
             
         return ordenado
+
+# --------------------------------------------------------------
+# Funciones de dibujo (reciben solo tablas agregadas; el guardado
+# lo hace el planificador según el perfil de salida)
+# --------------------------------------------------------------
+
+def _agregar_valores_barras(ax, orientacion="vertical"):
+    """Agrega valores numéricos a las barras"""
+    if orientacion == "vertical":
+        for p in ax.patches:
+            height = p.get_height()
+            if np.isfinite(height):
+                ax.annotate(f'{int(height)}', 
+                           (p.get_x() + p.get_width()/2., height),
+                           ha='center', va='bottom', fontsize=9)
+    else:  # horizontal
+        for p in ax.patches:
+            width = p.get_width()
+            if np.isfinite(width):
+                ax.annotate(f'{int(width)}', 
+                           (width, p.get_y() + p.get_height()/2.),
+                           ha='left', va='center', fontsize=9)
+
+
+def _dibujar_edad_distribucion(datos: dict):
+    """Histograma de edad con KDE a partir de (edad, frecuencia)"""
+    plt.figure(figsize=(12, 6))
+    n = datos['pesos'].sum()
     
-    def _agregar_valores_barras(self, ax, orientacion="vertical"):
-        """Agrega valores numéricos a las barras"""
-        if orientacion == "vertical":
-            for p in ax.patches:
-                height = p.get_height()
-                if np.isfinite(height):
-                    ax.annotate(f'{int(height)}', 
-                               (p.get_x() + p.get_width()/2., height),
-                               ha='center', va='bottom', fontsize=9)
-        else:  # horizontal
-            for p in ax.patches:
-                width = p.get_width()
-                if np.isfinite(width):
-                    ax.annotate(f'{int(width)}', 
-                               (width, p.get_y() + p.get_height()/2.),
-                               ha='left', va='center', fontsize=9)
+    # Histograma y KDE ponderados por frecuencia; el ancho de banda usa el factor
+    # de Scott con el n real (con pesos seaborn usaría el n efectivo)
+    sns.histplot(x=datos['edades'], weights=datos['pesos'], bins=25, kde=True, alpha=0.7,
+                 kde_kws={'bw_method': n ** (-1 / 5)})
+    plt.title('Distribución de Edad del Personal FAC', fontsize=16, fontweight='bold')
+    plt.xlabel('Edad (años)')
+    plt.ylabel('Frecuencia')
+    
+    # Agregar estadísticas
+    media, mediana = datos['media'], datos['mediana']
+    plt.axvline(media, color='red', linestyle='--', alpha=0.7, label=f'Media: {media:.1f}')
+    plt.axvline(mediana, color='orange', linestyle='--', alpha=0.7, label=f'Mediana: {mediana:.1f}')
+    plt.legend()
+    
+    plt.tight_layout()
+
+
+def _dibujar_barras_conteo(datos: dict):
+    """Barras horizontales de conteos ya ordenados (equivalente a countplot)"""
+    conteos = datos['conteos']
+    plt.figure(figsize=datos['figsize'])
+    
+    ax = sns.barplot(x=conteos.values, y=conteos.index.astype(str), order=conteos.index.astype(str),
+                     color=datos['color'], orient='h')
+    _agregar_valores_barras(ax, orientacion="horizontal")
+    
+    plt.title(datos['titulo'])
+    plt.xlabel('Cantidad')
+    plt.ylabel(datos['ylabel'])
+    
+    plt.tight_layout()
+
+
+def _dibujar_piramide_etaria(datos: dict):
+    """Pirámide etaria a partir de porcentajes por grupo etario y sexo"""
+    plt.figure(figsize=(12, 8))
+    hombres, mujeres = datos['hombres'], datos['mujeres']
+    
+    # Crear pirámide
+    y_pos = np.arange(len(GRUPOS_ETARIOS))
+    plt.barh(y_pos, -hombres.values, align='center', alpha=0.8, label='Hombres', color='steelblue')
+    plt.barh(y_pos, mujeres.values, align='center', alpha=0.8, label='Mujeres', color='pink')
+    
+    plt.yticks(y_pos, GRUPOS_ETARIOS)
+    plt.xlabel('Porcentaje de población (%)')
+    plt.ylabel('Grupos etarios')
+    plt.title('Pirámide Etaria del Personal FAC 2024', fontsize=16, fontweight='bold')
+    plt.legend()
+    plt.axvline(0, color='black', linewidth=0.8)
+    
+    # Convertir etiquetas negativas a positivas para mejor lectura
+    ax = plt.gca()
+    ticks = ax.get_xticks()
+    ax.set_xticks(ticks)
+    ax.set_xticklabels([f'{abs(x):.1f}' for x in ticks])
+    
+    plt.tight_layout()
+
+
+def _dibujar_edad_categoria(cajas: list):
+    """Boxplot de edad por categoría a partir de estadísticas de caja precalculadas"""
+    fig, ax = plt.subplots(figsize=(10, 7))
+    ax.bxp(cajas, showfliers=False, patch_artist=True,
+           boxprops={'facecolor': 'lightblue'}, medianprops={'color': 'black'})
+    plt.title('Distribución de Edad por Categoría Militar', fontsize=16, fontweight='bold')
+    plt.xlabel('Categoría')
+    plt.ylabel('Edad (años)')
+    plt.xticks(rotation=45)
+    
+    plt.tight_layout()
+
+
+def _dibujar_heatmap_categoria(datos: dict):
+    """Heatmap de porcentajes dentro de cada categoría"""
+    plt.figure(figsize=datos['figsize'])
+    sns.heatmap(datos['tabla_pct'].round(1), annot=True, fmt='.1f', cmap=datos['cmap'],
+               linewidths=0.5, cbar_kws={'label': '% dentro de categoría'})
+    plt.title(datos['titulo'], fontsize=16, fontweight='bold')
+    plt.xlabel('Categoría')
+    plt.ylabel(datos['ylabel'])
+    if datos['rotar_x']:
+        plt.xticks(rotation=45)
+        plt.yticks(rotation=0)
+    
+    plt.tight_layout()
+
+
+def _dibujar_grado_sexo(datos: dict):
+    """Barras horizontales por grado y sexo"""
+    tabla, titulo_cat = datos['tabla'], datos['titulo_cat']
+    
+    # --- CORRECCIÓN: crear fig/ax y pasar ax=ax al plot para evitar figuras en blanco ---
+    fig, ax = plt.subplots(figsize=(12, max(6, 0.4 * len(tabla))))
+    ax = tabla.plot(kind='barh', stacked=False, width=0.8, 
+                    color=['steelblue', 'pink'][:len(tabla.columns)], ax=ax)
+    # ------------------------------------------------------------------------------------
+    
+    # Agregar valores a las barras
+    for container in ax.containers:
+        ax.bar_label(container, fmt='%d', label_type='edge', padding=3)
+    
+    plt.title(f'Distribución por Grado y Sexo ({titulo_cat})', fontsize=16, fontweight='bold')
+    plt.xlabel('Cantidad')
+    plt.ylabel(f'Grado ({titulo_cat})')
+    plt.legend(title='Sexo', bbox_to_anchor=(1.05, 1), loc='upper left')
+    
+    plt.tight_layout()
+
+# ==============================================================
+# MÓDULO: GRÁFICOS POR UNIDAD (SMALL MULTIPLES)
+# ==============================================================
+
+def _nombre_seguro(valor) -> str:
+    """Convierte un valor (p. ej. una unidad) en un nombre de archivo ASCII"""
+    texto = unicodedata.normalize('NFKD', str(valor)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^A-Za-z0-9]+', '_', texto).strip('_') or 'SIN_NOMBRE'
+
+
+def _nombres_seguros(valores) -> dict:
+    """
+    {valor: nombre de archivo ASCII} sin colisiones: los valores que darían el mismo
+    nombre (p. ej. 'CACOM-1' y 'CACOM 1', o que solo difieren en mayúsculas) reciben
+    un sufijo con un hash corto del valor original
+    """
+    nombres = {valor: _nombre_seguro(valor) for valor in valores}
+    usos = pd.Series([nombre.lower() for nombre in nombres.values()], dtype=object).value_counts()
+    return {valor: nombre if usos[nombre.lower()] == 1
+            else f"{nombre}_{hashlib.sha1(str(valor).encode('utf-8')).hexdigest()[:6]}"
+            for valor, nombre in nombres.items()}
+
+
+def _panel_piramide(ax, datos: dict):
+    """Pirámide etaria en un panel"""
+    y_pos = np.arange(len(GRUPOS_ETARIOS))
+    ax.barh(y_pos, -datos['hombres'].values, alpha=0.8, label='Hombres', color='steelblue')
+    ax.barh(y_pos, datos['mujeres'].values, alpha=0.8, label='Mujeres', color='pink')
+    ax.set_yticks(y_pos, GRUPOS_ETARIOS)
+    ax.axvline(0, color='black', linewidth=0.8)
+    ticks = ax.get_xticks()
+    ax.set_xticks(ticks)
+    ax.set_xticklabels([f'{abs(x):.0f}' for x in ticks])
+
+
+def _panel_grado_sexo(ax, datos: dict):
+    """Barras por grado y sexo en un panel"""
+    tabla = datos['tabla']
+    tabla.plot(kind='barh', width=0.8, color=['steelblue', 'pink'][:len(tabla.columns)], ax=ax, legend=False)
+
+
+def _panel_heatmap(ax, datos: dict):
+    """Heatmap de porcentajes en un panel"""
+    sns.heatmap(datos['tabla_pct'].round(0), annot=True, fmt='.0f', cmap=datos['cmap'],
+                linewidths=0.5, cbar=False, annot_kws={'fontsize': 7}, ax=ax)
+    ax.tick_params(axis='x', rotation=45)
+
+
+def _dibujar_con_faceta(datos: dict):
+    """Dibuja un gráfico de la población para un valor de la faceta y lo indica en el título"""
+    datos['funcion'](datos['datos'])
+    ax = plt.gca()
+    ax.set_title(f"{ax.get_title()}\n{datos['etiqueta']}")
+
+
+def _dibujar_grilla(datos: dict):
+    """Small multiples: un panel por valor de la faceta con la misma función de panel"""
+    paneles = datos['paneles']
+    columnas = min(datos['columnas'], len(paneles))
+    filas = int(np.ceil(len(paneles) / columnas))
+    fig, ejes = plt.subplots(filas, columnas, figsize=(4.5 * columnas, 3.8 * filas), squeeze=False)
+    for ax, (etiqueta, datos_panel) in zip(ejes.flat, paneles):
+        datos['panel'](ax, datos_panel)
+        ax.set_title(str(etiqueta), fontsize=11)
+        ax.set_xlabel('')
+        ax.set_ylabel('')
+    for ax in ejes.flat[len(paneles):]:
+        ax.set_visible(False)
+    manejadores, etiquetas = ejes.flat[0].get_legend_handles_labels()
+    if manejadores:
+        fig.legend(manejadores, etiquetas, loc='upper right')
+    fig.suptitle(datos['titulo'], fontsize=16, fontweight='bold')
+    plt.tight_layout()
+
+
+class GraficosPorUnidad(GeneradorGraficosFAC):
+    """
+    Gráficos por valor de una faceta (por defecto UNIDAD).
+
+    Todas las tablas por unidad salen de la misma pasada agrupada de
+    DatosGraficosFAC; cada unidad reutiliza los constructores de trabajos del
+    generador sobre su vista, y los trabajos se dibujan en paralelo como
+    archivos por unidad o como grillas de small multiples. La caché de gráficos
+    funciona por unidad: solo se redibujan las unidades cuyos datos cambiaron.
+    """
+
+    # Gráfico -> (método constructor del trabajo, función de panel, título de la grilla)
+    GRAFICOS = {
+        'piramide': ('_grafico_piramide_etaria', _panel_piramide, 'Pirámide etaria (%)'),
+        'oficiales': ('_graficos_oficiales', _panel_grado_sexo, 'Distribución por grado y sexo (Oficiales)'),
+        'suboficiales': ('_graficos_suboficiales', _panel_grado_sexo,
+                         'Distribución por grado y sexo (Suboficiales)'),
+        'educacion_categoria': ('_grafico_educacion_categoria', _panel_heatmap,
+                                'Nivel educativo por categoría (%)'),
+    }
+
+    def __init__(self, datos, faceta: str = 'UNIDAD', directorio: str = 'graficos_unidades',
+                 n_min: int = 30, graficos=None, **kwargs):
+        """
+        Args:
+            datos: DatosGraficosFAC calculados con `faceta`, o un DataFrame
+            faceta (str): Columna cuyos valores definen los paneles/archivos
+            directorio (str): Subcarpeta de salida (dentro de `salida`)
+            n_min (int): Registros mínimos para incluir una unidad
+            graficos: Subconjunto de GRAFICOS a generar (None = todos)
+            **kwargs: Parámetros de GeneradorGraficosFAC (perfil, paralelo, usar_cache...)
+        """
+        if isinstance(datos, pd.DataFrame):
+            datos = DatosGraficosFAC.desde_df(datos, faceta=faceta)
+        if datos.faceta is None:
+            raise ValueError(f"Los datos no incluyen la faceta {faceta}")
+        super().__init__(datos, **kwargs)
+        self.directorio = directorio
+        self.graficos = [g for g in (graficos or self.GRAFICOS) if g in self.GRAFICOS]
+        self.unidades = datos.valores_faceta(n_min)
+        self.carpetas = _nombres_seguros(self.unidades)
+        self._vistas = {}
+
+    def _vista(self, unidad) -> GeneradorGraficosFAC:
+        """Generador (solo como constructor de trabajos) sobre la vista de una unidad"""
+        if unidad not in self._vistas:
+            self._vistas[unidad] = GeneradorGraficosFAC(self.datos.vista(unidad), paralelo=False,
+                                                        usar_cache=False)
+        return self._vistas[unidad]
+
+    def _trabajos_unidad(self, unidad, grafico):
+        metodo = self.GRAFICOS[grafico][0]
+        return getattr(self._vista(unidad), metodo)()
+
+    def generar_por_unidad(self):
+        """Un archivo por unidad y gráfico: {directorio}/{unidad}/{archivo}"""
+        print(f"\nGENERANDO GRÁFICOS POR {self.datos.faceta} ({len(self.unidades)} unidades)...")
+        trabajos = []
+        for unidad in self.unidades:
+            carpeta = os.path.join(self.directorio, self.carpetas[unidad])
+            for grafico in self.graficos:
+                trabajo = self._trabajos_unidad(unidad, grafico)
+                if trabajo is None:
+                    continue
+                os.makedirs(os.path.join(self.salida, carpeta), exist_ok=True)
+                archivo, funcion, datos = trabajo
+                trabajos.append((os.path.join(carpeta, archivo), _dibujar_con_faceta,
+                                 {'funcion': funcion, 'datos': datos, 'etiqueta': str(unidad)}))
+        self._ejecutar(trabajos)
+        print(f"{len(trabajos)} gráficos por unidad generados")
+
+    def generar_grillas(self, por_pagina: int = 12, columnas: int = 4):
+        """
+        Small multiples: una figura por gráfico con un panel por unidad
+
+        Args:
+            por_pagina (int): Paneles por figura (las unidades restantes van en otra página)
+            columnas (int): Paneles por fila
+        """
+        print(f"\nGENERANDO GRILLAS POR {self.datos.faceta}...")
+        os.makedirs(os.path.join(self.salida, self.directorio), exist_ok=True)
+        trabajos = []
+        for grafico in self.graficos:
+            _, panel, titulo = self.GRAFICOS[grafico]
+            titulo = f"{titulo} por {self.datos.faceta.lower()}"
+            paneles = []
+            for unidad in self.unidades:
+                trabajo = self._trabajos_unidad(unidad, grafico)
+                if trabajo is not None:
+                    paneles.append((unidad, trabajo[2]))
+            paginas = [paneles[i:i + por_pagina] for i in range(0, len(paneles), por_pagina)]
+            for numero, pagina in enumerate(paginas, start=1):
+                sufijo = f"_p{numero}" if len(paginas) > 1 else ""
+                archivo = os.path.join(self.directorio, f"grilla_{grafico}{sufijo}.png")
+                trabajos.append((archivo, _dibujar_grilla, {'paneles': pagina, 'panel': panel,
+                                                             'columnas': columnas, 'titulo': titulo}))
+        self._ejecutar(trabajos)
+        print(f"{len(trabajos)} grillas generadas")
 
 # ==============================================================
 # MÓDULO: GENERADOR DE REPORTES
 # ==============================================================
 
+VERSION_REPORTE = 1
+
+# Secciones del reporte: clave, título y partes de ResultadosFAC de las que dependen
+SECCIONES_REPORTE = (
+    ('poblacion', 'Perfil poblacional', ('poblacion',)),
+    ('estructura', 'Estructura demográfica', ('poblacion', 'indices')),
+    ('hallazgos', 'Hallazgos estadísticos clave',
+     ('estructura_etaria', 'asociaciones', 'diferencias', 'pruebas', 'correccion')),
+    ('recomendaciones', 'Recomendaciones estratégicas', ('estructura_etaria', 'poblacion')),
+    ('respuestas', 'Respuestas a preguntas clave', ('poblacion',)),
+    ('jerarquia', 'Distribución jerárquica por grado y sexo', ()),
+)
+
+# Gráficos del manifiesto que acompañan a cada sección (nombre sin extensión; '_' final = prefijo)
+GRAFICOS_POR_SECCION = {
+    'poblacion': ('01_distribucion_edad', '06_piramide_etaria'),
+    'estructura': ('02_distribucion_categoria', '03_distribucion_grado',
+                   '04_distribucion_estado_civil', '05_distribucion_nivel_educativo'),
+    'hallazgos': ('07_edad_por_categoria', '08_sexo_por_categoria', '09_educacion_por_categoria'),
+    'jerarquia': ('10_',),
+}
+
+PLANTILLA_MARKDOWN = Template("""# $titulo
+
+$secciones
+""")
+
+PLANTILLA_HTML = Template("""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>$titulo</title>
+<style>
+body { font-family: sans-serif; max-width: 60em; margin: 2em auto; line-height: 1.5; }
+table { border-collapse: collapse; margin: 1em 0; }
+th, td { border: 1px solid #ccc; padding: 0.3em 0.6em; text-align: left; }
+figure { margin: 1em 0; }
+img { max-width: 100%; }
+</style>
+</head>
+<body>
+<h1>$titulo</h1>
+$secciones
+</body>
+</html>
+""")
+
+
+def _formatear(valor, decimales: int = 1, default: str = "N/A") -> str:
+    """Formatea números de forma segura"""
+    try:
+        if valor is None or (isinstance(valor, (float, int)) and not np.isfinite(valor)):
+            return default
+        return f"{float(valor):.{decimales}f}"
+    except (TypeError, ValueError):
+        return default
+
+
+def _como_datos(valor):
+    """Dataclasses (o listas de ellas) como dicts, para calcular huellas"""
+    if is_dataclass(valor):
+        return asdict(valor)
+    if isinstance(valor, list):
+        return [_como_datos(v) for v in valor]
+    return valor
+
+
+def _bloques_a_markdown(titulo: str, bloques: list) -> str:
+    partes = [f"## {titulo}"]
+    for bloque in bloques:
+        tipo = bloque[0]
+        if tipo == 'parrafo':
+            partes.append(bloque[1])
+        elif tipo == 'lista':
+            partes.append("\n".join(f"- {item}" for item in bloque[1]))
+        elif tipo == 'tabla':
+            _, encabezados, filas = bloque
+            lineas = ["| " + " | ".join(encabezados) + " |", "|" + "---|" * len(encabezados)]
+            lineas += ["| " + " | ".join(str(c) for c in fila) + " |" for fila in filas]
+            partes.append("\n".join(lineas))
+        elif tipo == 'imagen':
+            _, ruta, leyenda = bloque
+            partes.append(f"[{leyenda}]({ruta})" if ruta.endswith('.pdf') else f"![{leyenda}]({ruta})")
+    return "\n\n".join(partes) + "\n"
+
+
+def _bloques_a_html(titulo: str, bloques: list) -> str:
+    e = html.escape
+    partes = [f"<section>\n<h2>{e(titulo)}</h2>"]
+    for bloque in bloques:
+        tipo = bloque[0]
+        if tipo == 'parrafo':
+            partes.append(f"<p>{e(bloque[1])}</p>")
+        elif tipo == 'lista':
+            partes.append("<ul>\n" + "\n".join(f"<li>{e(item)}</li>" for item in bloque[1]) + "\n</ul>")
+        elif tipo == 'tabla':
+            _, encabezados, filas = bloque
+            cabecera = "".join(f"<th>{e(str(c))}</th>" for c in encabezados)
+            cuerpo = "\n".join("<tr>" + "".join(f"<td>{e(str(c))}</td>" for c in fila) + "</tr>"
+                               for fila in filas)
+            partes.append(f"<table>\n<tr>{cabecera}</tr>\n{cuerpo}\n</table>")
+        elif tipo == 'imagen':
+            _, ruta, leyenda = bloque
+            if ruta.endswith('.pdf'):
+                partes.append(f'<p><a href="{e(ruta)}">{e(leyenda)}</a></p>')
+            else:
+                partes.append(f'<figure><img src="{e(ruta)}" alt="{e(leyenda)}">'
+                              f'<figcaption>{e(leyenda)}</figcaption></figure>')
+    return "\n".join(partes) + "\n</section>\n"
+
+
+def _bloques_a_texto(titulo: str, bloques: list) -> str:
+    """Versión para consola (las imágenes se omiten)"""
+    lineas = [f"\n{titulo.upper()}:"]
+    for bloque in bloques:
+        tipo = bloque[0]
+        if tipo == 'parrafo':
+            lineas.append(f"   {bloque[1]}")
+        elif tipo == 'lista':
+            lineas.extend(f"   - {item}" for item in bloque[1])
+        elif tipo == 'tabla':
+            _, encabezados, filas = bloque
+            lineas.append("   " + " | ".join(encabezados))
+            lineas.extend("   " + " | ".join(str(c) for c in fila) for fila in filas)
+    return "\n".join(lineas)
+
+
+class ReporteFAC:
+    """
+    Reporte Markdown/HTML construido solo desde los resultados precalculados.
+
+    No recorre el DataFrame: cada sección sale de ResultadosFAC y las
+    referencias a gráficos se resuelven con el manifiesto de CacheGraficos.
+    Cada sección se guarda renderizada junto con la huella de sus entradas
+    (partes del modelo y gráficos referenciados); al regenerar el reporte solo
+    se vuelven a renderizar las secciones cuya huella cambió.
+    """
+
+    ARCHIVO_CACHE = '.cache_reporte.json'
+
+    def __init__(self, resultados: ResultadosFAC, manifiesto_graficos: str = None, directorio: str = 'reporte',
+                 titulo: str = "Análisis demográfico FAC 2024"):
+        """
+        Args:
+            resultados (ResultadosFAC): Resultados del análisis estadístico
+            manifiesto_graficos (str): Manifiesto JSON de CacheGraficos (opcional)
+            directorio (str): Carpeta del reporte
+            titulo (str): Título del documento
+        """
+        self.resultados = resultados
+        self.directorio = directorio
+        self.titulo = titulo
+        self.graficos = self._resolver_graficos(manifiesto_graficos)
+        self.secciones_regeneradas = []
+        self.secciones_reutilizadas = []
+        self.cache = {}
+        ruta_cache = os.path.join(directorio, self.ARCHIVO_CACHE)
+        if os.path.exists(ruta_cache):
+            try:
+                with open(ruta_cache, encoding='utf-8') as f:
+                    self.cache = json.load(f)
+            except (OSError, ValueError):
+                self.cache = {}
+
+    def _resolver_graficos(self, manifiesto: str) -> dict:
+        """Asigna los gráficos vigentes del manifiesto a sus secciones (rutas relativas al reporte)"""
+        if not manifiesto or not os.path.exists(manifiesto):
+            return {}
+        with open(manifiesto, encoding='utf-8') as f:
+            claves = json.load(f)
+        existentes = sorted((os.path.splitext(os.path.basename(archivo))[0], archivo, clave)
+                            for archivo, clave in claves.items() if os.path.exists(archivo))
+        graficos = {}
+        for seccion, patrones in GRAFICOS_POR_SECCION.items():
+            for patron in patrones:
+                for nombre, archivo, clave in existentes:
+                    if nombre == patron or (patron.endswith('_') and nombre.startswith(patron)):
+                        ruta = os.path.relpath(archivo, self.directorio or '.').replace(os.sep, '/')
+                        graficos.setdefault(seccion, []).append((ruta, nombre, clave))
+        return graficos
+
+    def clave(self, seccion: str) -> str:
+        """Huella de las entradas de una sección"""
+        entradas = next(e for s, _, e in SECCIONES_REPORTE if s == seccion)
+        h = hashlib.sha256()
+        _actualizar_huella(h, (VERSION_REPORTE, seccion))
+        _actualizar_huella(h, {nombre: _como_datos(getattr(self.resultados, nombre)) for nombre in entradas})
+        _actualizar_huella(h, self.graficos.get(seccion, []))
+        return h.hexdigest()
+
+    def bloques(self, seccion: str) -> list:
+        """Contenido de una sección como bloques (parrafo, lista, tabla, imagen)"""
+        bloques = getattr(self, f'_seccion_{seccion}')()
+        imagenes = [('imagen', ruta, nombre) for ruta, nombre, _ in self.graficos.get(seccion, [])]
+        return bloques + imagenes if bloques or imagenes else []
+
+    def texto(self, secciones) -> str:
+        """Secciones en texto plano para la consola"""
+        titulos = {s: t for s, t, _ in SECCIONES_REPORTE}
+        return "\n".join(_bloques_a_texto(titulos[s], getattr(self, f'_seccion_{s}')()) for s in secciones)
+
+    def renderizar(self) -> dict:
+        """Fragmentos Markdown y HTML de todas las secciones, reutilizando los que no cambiaron"""
+        self.secciones_regeneradas, self.secciones_reutilizadas = [], []
+        fragmentos = {'md': [], 'html': []}
+        for seccion, titulo, _ in SECCIONES_REPORTE:
+            clave = self.clave(seccion)
+            guardada = self.cache.get(seccion)
+            if guardada is not None and guardada.get('clave') == clave:
+                self.secciones_reutilizadas.append(seccion)
+            else:
+                bloques = self.bloques(seccion)
+                guardada = {
+                    'clave': clave,
+                    'md': _bloques_a_markdown(titulo, bloques) if bloques else '',
+                    'html': _bloques_a_html(titulo, bloques) if bloques else '',
+                }
+                self.cache[seccion] = guardada
+                self.secciones_regeneradas.append(seccion)
+            for formato in fragmentos:
+                if guardada[formato]:
+                    fragmentos[formato].append(guardada[formato])
+        return fragmentos
+
+    @PERFILADOR.perfilar('reporte')
+    def generar(self, formatos=('md', 'html'), nombre: str = 'reporte') -> list:
+        """
+        Escribe el reporte
+
+        Args:
+            formatos: 'md' y/o 'html'
+            nombre (str): Nombre base de los archivos
+        """
+        desconocidos = set(formatos) - {'md', 'html'}
+        if desconocidos:
+            raise ValueError(f"Formatos no soportados: {', '.join(sorted(desconocidos))}")
+        if self.directorio:
+            os.makedirs(self.directorio, exist_ok=True)
+        fragmentos = self.renderizar()
+        plantillas = {'md': (PLANTILLA_MARKDOWN, "\n"), 'html': (PLANTILLA_HTML, "")}
+        archivos = []
+        for formato in formatos:
+            plantilla, separador = plantillas[formato]
+            titulo = self.titulo if formato == 'md' else html.escape(self.titulo)
+            contenido = plantilla.substitute(titulo=titulo, secciones=separador.join(fragmentos[formato]))
+            archivo = os.path.join(self.directorio, f"{nombre}.{formato}")
+            with open(archivo, 'w', encoding='utf-8') as f:
+                f.write(contenido)
+            archivos.append(archivo)
+        with open(os.path.join(self.directorio, self.ARCHIVO_CACHE), 'w', encoding='utf-8') as f:
+            json.dump(self.cache, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"Reporte escrito en {', '.join(archivos)} "
+              f"({len(self.secciones_regeneradas)} secciones regeneradas, "
+              f"{len(self.secciones_reutilizadas)} reutilizadas)")
+        return archivos
+
+    # ---------------- Secciones ----------------
+
+    def _seccion_poblacion(self) -> list:
+        poblacion = self.resultados.poblacion
+        if poblacion is None:
+            return []
+        lista = [f"Total de efectivos: {poblacion.total:,}"]
+        if poblacion.edad_media is not None:
+            lista += [f"Edad promedio: {poblacion.edad_media:.1f} años",
+                      f"Edad mediana: {poblacion.edad_mediana:.1f} años",
+                      f"Rango etario: {poblacion.edad_minima:.0f} - {poblacion.edad_maxima:.0f} años"]
+        return [('lista', lista)]
+
+    def _seccion_estructura(self) -> list:
+        bloques = []
+        poblacion = self.resultados.poblacion
+        if poblacion is not None and poblacion.categorias:
+            bloques.append(('tabla', ['Categoría', 'Efectivos', '%'],
+                            [[categoria, f"{cantidad:,}", f"{cantidad / poblacion.total * 100:.1f}"]
+                             for categoria, cantidad in poblacion.categorias.items()]))
+        indices = self.resultados.indices
+        if indices is not None:
+            bloques.append(('lista', [
+                f"Índice de Masculinidad: {_formatear(indices.indice_masculinidad)}",
+                f"Índice de Dependencia: {_formatear(indices.indice_dependencia)}%",
+                f"Coeficiente de Variación Etaria: {_formatear(indices.cv_edad)}%",
+            ]))
+        return bloques
+
+    def _seccion_hallazgos(self) -> list:
+        resultados = self.resultados
+        lista = []
+        etaria = resultados.estructura_etaria
+        if etaria is not None and etaria.grupo_modal is not None:
+            lista.append(f"Grupo etario predominante: {etaria.grupo_modal}")
+
+        # Significancia tras la corrección global (modelos anteriores a la versión 3: p sin ajustar)
+        significativas = [a for a in resultados.asociaciones
+                          if next((p for p in (a.q_val, a.p_val) if p is not None), 1.0) < 0.05]
+        for asociacion in significativas[:3]:  # Top 3
+            lista.append(f"Asociación significativa {asociacion.var1} × {asociacion.var2}: "
+                         f"V de Cramér = {asociacion.cramer_v:.3f}")
+
+        dif_sexo = next((d for d in resultados.diferencias
+                         if d.variable == 'EDAD2' and d.grupo == 'SEXO_UP'), None)
+        if dif_sexo and {'HOMBRE', 'MUJER'}.issubset(dif_sexo.medias):
+            diferencia_media = dif_sexo.medias['HOMBRE'] - dif_sexo.medias['MUJER']
+            lista.append(f"Diferencia de edad H-M: {diferencia_media:.1f} años "
+                         f"({dif_sexo.prueba}, {dif_sexo.significancia})")
+
+        if resultados.pruebas:
+            nombres = {'bh': 'Benjamini–Hochberg', 'holm': 'Holm', 'bonferroni': 'Bonferroni'}
+            lista.append(f"Valores q por {nombres.get(resultados.correccion, resultados.correccion)} "
+                         f"sobre las {len(resultados.pruebas)} pruebas de la corrida; "
+                         f"{sum(1 for r in resultados.pruebas if r.q_val is not None and r.q_val < 0.05)} "
+                         f"siguen siendo significativas")
+
+        bloques = [('lista', lista)] if lista else []
+        if resultados.asociaciones:
+            bloques.append(('tabla', ['Variables', 'Chi²', 'p', 'q', 'V de Cramér', 'Significancia'],
+                            [[f"{a.var1} × {a.var2}", _formatear(a.chi2, 2), _formatear(a.p_val, 4),
+                              _formatear(a.q_val, 4), _formatear(a.cramer_v, 3), a.significancia]
+                             for a in resultados.asociaciones]))
+        if resultados.diferencias:
+            bloques.append(('tabla', ['Variable', 'Grupo', 'Prueba', 'Estadístico', 'p', 'q', 'Significancia'],
+                            [[d.variable, d.grupo, d.prueba, _formatear(d.estadistico, 3), _formatear(d.p_val, 4),
+                              _formatear(d.q_val, 4), d.significancia] for d in resultados.diferencias]))
+        return bloques
+
+    def _seccion_recomendaciones(self) -> list:
+        lista = []
+        etaria = self.resultados.estructura_etaria
+        grupo_modal = etaria.grupo_modal if etaria is not None else None
+        if grupo_modal in ['46-55', '56+']:
+            lista += ["Considerar programas de rejuvenecimiento institucional",
+                      "Planificar sucesión de liderazgo para los próximos años"]
+        elif grupo_modal in ['26-35', '36-45']:
+            lista += ["Aprovechar el bono demográfico actual",
+                      "Implementar programas de desarrollo profesional"]
+
+        poblacion = self.resultados.poblacion
+        if poblacion is not None and poblacion.sexo:
+            total_sexo = sum(poblacion.sexo.values())
+            if 'MUJER' in poblacion.sexo and poblacion.sexo['MUJER'] / total_sexo < 0.3:
+                lista += ["Fortalecer políticas de equidad de género",
+                          "Revisar barreras para la participación femenina"]
+        return [('lista', lista)] if lista else []
+
+    def _seccion_respuestas(self) -> list:
+        poblacion = self.resultados.poblacion or PerfilPoblacional()
+        lista = [f"Pregunta 1 - Rango de edad más común: {poblacion.rango_edad_modal or 'No disponible'}"]
+
+        if poblacion.sexo:
+            distribucion = ", ".join(f"{genero}: {cantidad:,} ({cantidad / poblacion.total * 100:.1f}%)"
+                                     for genero, cantidad in poblacion.sexo.items())
+            lista.append(f"Pregunta 2 - Distribución por género: {distribucion}")
+        else:
+            lista.append("Pregunta 2 - Distribución por género: No disponible")
+
+        if poblacion.grado_frecuente is not None:
+            lista.append(f"Pregunta 3 - Grado más frecuente: {poblacion.grado_frecuente} "
+                         f"({poblacion.grado_frecuente_n:,} efectivos)")
+        else:
+            lista.append("Pregunta 3 - Grado más frecuente: No disponible")
+
+        if poblacion.categorias:
+            categoria, cantidad = next(iter(poblacion.categorias.items()))
+            lista.append(f"Pregunta 4 - Categoría predominante: {categoria} "
+                         f"({cantidad:,} efectivos, {cantidad / poblacion.total * 100:.1f}%)")
+        else:
+            lista.append("Pregunta 4 - Categoría predominante: No disponible")
+        return [('lista', lista)]
+
+    def _seccion_jerarquia(self) -> list:
+        # Solo gráficos: se agregan en bloques() desde el manifiesto
+        return []
+
+
 class GeneradorReportes:
     """
     Módulo para generar reportes de análisis demográfico
+
+    Las secciones salen de ReporteFAC, es decir, de los resultados
+    precalculados: no se vuelve a recorrer el DataFrame.
     """
     
-    def __init__(self, analizador, estadistico):
+    def __init__(self, analizador, estadistico, resultados: ResultadosFAC = None,
+                 manifiesto_graficos: str = None):
+        """
+        Args:
+            analizador (AnalizadorDemograficoFAC): Datos cargados
+            estadistico (AnalisisEstadisticoFAC): Análisis ya ejecutado
+            resultados (ResultadosFAC): Resultados ya construidos (opcional)
+            manifiesto_graficos (str): Manifiesto de CacheGraficos para referenciar gráficos
+        """
         self.analizador = analizador
         self.estadistico = estadistico
-        self.df = analizador.df
+        self.resultados = resultados if resultados is not None else ResultadosFAC.desde_analisis(estadistico)
+        self.manifiesto_graficos = manifiesto_graficos
+    
+    def reporte(self, directorio: str = 'reporte') -> ReporteFAC:
+        return ReporteFAC(self.resultados, self.manifiesto_graficos, directorio)
     
     def generar_resumen_ejecutivo(self):
         """Genera resumen ejecutivo de hallazgos"""
         print("\n" + "="*70)
         print("RESUMEN EJECUTIVO - ANÁLISIS DEMOGRÁFICO FAC 2024")
         print("="*70)
-        
-        # Datos básicos de población
-        self._seccion_poblacion_general()
-        
-        # Estructura demográfica
-        self._seccion_estructura_demografica()
-        
-        # Hallazgos estadísticos clave
-        self._seccion_hallazgos_estadisticos()
-        
-        # Recomendaciones
-        self._seccion_recomendaciones()
-        
+        print(self.reporte().texto(('poblacion', 'estructura', 'hallazgos', 'recomendaciones')))
         print("="*70)
     
     def generar_respuestas_clave(self):
@@ -1164,208 +5021,131 @@ class GeneradorReportes:
         print("\n" + "="*50)
         print("RESPUESTAS A PREGUNTAS CLAVE")
         print("="*50)
-        
-        # Pregunta 1: Rango de edad más común
-        self._respuesta_rango_edad()
-        
-        # Pregunta 2: Distribución por género
-        self._respuesta_distribucion_genero()
-        
-        # Pregunta 3: Grado más frecuente
-        self._respuesta_grado_frecuente()
-        
-        # Pregunta 4: Categoría predominante
-        self._respuesta_categoria_predominante()
-    
-    def _seccion_poblacion_general(self):
-        """Información general de la población"""
-        total = len(self.df)
-        
-        # Edad promedio y mediana
-        edad_stats = self.df['EDAD2'].describe() if 'EDAD2' in self.df.columns else None
-        
-        print(f"\nPERFIL POBLACIONAL:")
-        print(f"   - Total de efectivos: {total:,}")
-        
-        if edad_stats is not None:
-            print(f"   - Edad promedio: {edad_stats['mean']:.1f} años")
-            print(f"   - Edad mediana: {edad_stats['50%']:.1f} años")
-            print(f"   - Rango etario: {edad_stats['min']:.0f} - {edad_stats['max']:.0f} años")
-    
-    def _seccion_estructura_demografica(self):
-        """Estructura demográfica de la institución"""
-        print(f"\nESTRUCTURA DEMOGRÁFICA:")
-        
-        # Distribución por categoría
-        if 'CATEGORIA_UP' in self.df.columns:
-            cat_dist = self.df['CATEGORIA_UP'].value_counts()
-            for categoria, cantidad in cat_dist.items():
-                porcentaje = (cantidad / len(self.df)) * 100
-                print(f"   - {categoria}: {cantidad:,} efectivos ({porcentaje:.1f}%)")
-        
-        # Índices demográficos si están calculados
-        if hasattr(self.estadistico, 'resultados') and 'indices' in self.estadistico.resultados:
-            indices = self.estadistico.resultados['indices']
-            print(f"\nÍNDICES DEMOGRÁFICOS:")
-            print(f"   - Índice de Masculinidad: {self._format_safe(indices['indice_masculinidad'])}")
-            print(f"   - Índice de Dependencia: {self._format_safe(indices['indice_dependencia'])}%")
-    
-    def _seccion_hallazgos_estadisticos(self):
-        """Hallazgos estadísticos más relevantes"""
-        print(f"\nHALLAZGOS ESTADÍSTICOS CLAVE:")
-        
-        if hasattr(self.estadistico, 'resultados'):
-            # Grupo etario modal
-            if 'estructura_etaria' in self.estadistico.resultados:
-                grupo_modal = self.estadistico.resultados['estructura_etaria'].get('grupo_modal')
-                if pd.notna(grupo_modal):
-                    print(f"   - Grupo etario predominante: {grupo_modal}")
-            
-            # Asociaciones significativas
-            if 'asociaciones' in self.estadistico.resultados:
-                asociaciones = self.estadistico.resultados['asociaciones']
-                asociaciones_significativas = [
-                    (nombre, datos) for nombre, datos in asociaciones.items() 
-                    if datos['p_val'] < 0.05
-                ]
-                
-                if asociaciones_significativas:
-                    print(f"   - Asociaciones significativas encontradas:")
-                    for nombre, datos in asociaciones_significativas[:3]:  # Top 3
-                        print(f"     - {nombre}: V de Cramér = {datos['cramer_v']:.3f}")
-            
-            # Diferencias por subgrupos
-            if 'diferencias_subgrupos' in self.estadistico.resultados:
-                diferencias = self.estadistico.resultados['diferencias_subgrupos']
-                if 'test_t_sexo' in diferencias and diferencias['test_t_sexo']:
-                    test_t = diferencias['test_t_sexo']
-                    print(f"   - Diferencia de edad H-M: {test_t['diferencia_media']:.1f} años ({test_t['significancia']})")
-    
-    def _seccion_recomendaciones(self):
-        """Recomendaciones basadas en los hallazgos"""
-        print(f"\nRECOMENDACIONES ESTRATÉGICAS:")
-        
-        # Recomendaciones basadas en estructura etaria
-        if hasattr(self.estadistico, 'resultados') and 'estructura_etaria' in self.estadistico.resultados:
-            grupo_modal = self.estadistico.resultados['estructura_etaria'].get('grupo_modal')
-            if grupo_modal in ['46-55', '56+']:
-                print("   - Considerar programas de rejuvenecimiento institucional")
-                print("   - Planificar sucesión de liderazgo para los próximos años")
-            elif grupo_modal in ['26-35', '36-45']:
-                print("   - Aprovechar el bono demográfico actual")
-                print("   - Implementar programas de desarrollo profesional")
-        
-        # Recomendaciones de género
-        if 'SEXO_UP' in self.df.columns:
-            dist_genero = self.df['SEXO_UP'].value_counts(normalize=True)
-            if 'MUJER' in dist_genero and dist_genero['MUJER'] < 0.3:
-                print("   - Fortalecer políticas de equidad de género")
-                print("   - Revisar barreras para la participación femenina")
-    
-    def _respuesta_rango_edad(self):
-        """Responde sobre el rango de edad más común"""
-        if 'EDAD2' not in self.df.columns:
-            print("Pregunta 1 - Rango de edad más común: No disponible")
-            return
-            
-        # Crear rangos de 5 años para análisis más granular
-        rangos_edad = pd.cut(self.df['EDAD2'].dropna(), bins=range(18, 70, 5))
-        rango_modal = rangos_edad.value_counts().idxmax()
-        
-        print(f"Pregunta 1 - Rango de edad más común: {rango_modal}")
-    
-    def _respuesta_distribucion_genero(self):
-        """Responde sobre la distribución por género"""
-        if 'SEXO_UP' not in self.df.columns:
-            print("Pregunta 2 - Distribución por género: No disponible")
-            return
-            
-        dist_genero = self.df['SEXO_UP'].value_counts()
-        print("Pregunta 2 - Distribución por género:")
-        for genero, cantidad in dist_genero.items():
-            porcentaje = (cantidad / len(self.df)) * 100
-            print(f"   - {genero}: {cantidad:,} ({porcentaje:.1f}%)")
-    
-    def _respuesta_grado_frecuente(self):
-        """Responde sobre el grado más frecuente"""
-        if 'GRADO' not in self.df.columns:
-            print("Pregunta 3 - Grado más frecuente: No disponible")
-            return
-            
-        # Excluir 'no responde' si existe
-        df_grados = self.df.copy()
-        if 'GRADO_LOW' in df_grados.columns:
-            df_grados = df_grados[df_grados['GRADO_LOW'] != 'no responde']
-        
-        if not df_grados.empty:
-            grado_frecuente = df_grados['GRADO'].mode().iloc[0]
-            cantidad = (df_grados['GRADO'] == grado_frecuente).sum()
-            print(f"Pregunta 3 - Grado más frecuente: {grado_frecuente} ({cantidad:,} efectivos)")
-        else:
-            print("Pregunta 3 - Grado más frecuente: No disponible")
+        print(self.reporte().texto(('respuestas',)))
     
-    def _respuesta_categoria_predominante(self):
-        """Responde sobre la categoría predominante"""
-        if 'CATEGORIA_UP' not in self.df.columns:
-            print("Pregunta 4 - Categoría predominante: No disponible")
-            return
-            
-        categoria_pred = self.df['CATEGORIA_UP'].mode().iloc[0]
-        cantidad = (self.df['CATEGORIA_UP'] == categoria_pred).sum()
-        porcentaje = (cantidad / len(self.df)) * 100
-        
-        print(f"Pregunta 4 - Categoría predominante: {categoria_pred} ({cantidad:,} efectivos, {porcentaje:.1f}%)")
-    
-    def _format_safe(self, valor, decimales=1, default="N/A"):
-        """Formatea valores de forma segura"""
-        try:
-            if valor is None or (isinstance(valor, (float, int)) and not np.isfinite(valor)):
-                return default
-            return f"{float(valor):.{decimales}f}"
-        except:
-            return default
+    def generar_documento(self, directorio: str = 'reporte', formatos=('md', 'html')) -> list:
+        """Escribe el reporte en Markdown/HTML (solo se regeneran las secciones que cambiaron)"""
+        return self.reporte(directorio).generar(formatos)
 
 # ==============================================================
 # FUNCIÓN PRINCIPAL DE EJECUCIÓN
 # ==============================================================
 
-def ejecutar_analisis_completo(archivo_path: str = ARCHIVO_DATOS):
+def ejecutar_carga(archivo_path: str = ARCHIVO_DATOS, columnas=COLUMNAS_DEMOGRAFICAS) -> AnalizadorDemograficoFAC:
+    """
+    Etapa de carga: lee y preprocesa los datos (solo pandas/numpy)
+    
+    Args:
+        archivo_path (str): Ruta al archivo de datos (Excel, CSV o Parquet)
+        columnas: Columnas a leer (None = todas)
+    """
+    analizador = AnalizadorDemograficoFAC(archivo_path, columnas)
+    analizador.cargar_datos()
+    analizador.mostrar_info_general()
+    return analizador
+
+
+def ejecutar_estadisticas(analizador: AnalizadorDemograficoFAC, exportar: str = None,
+                          formatos=('json', 'parquet'), registro: RegistroPruebas = None) -> AnalisisEstadisticoFAC:
+    """
+    Etapa de estadísticas: índices, estructura etaria, asociaciones y diferencias (carga scipy)
+    
+    Args:
+        analizador (AnalizadorDemograficoFAC): Datos ya cargados
+        exportar (str): Carpeta donde exportar los resultados (None = no exportar)
+        formatos: Formatos de exportación (ver ResultadosFAC.exportar)
+        registro (RegistroPruebas): Registro de valores p de la corrida (None = uno nuevo)
+    """
+    # Reutiliza los estadísticos del preprocesamiento; estadistico.actualizar() los modifica
+    estadistico = AnalisisEstadisticoFAC(analizador.df, analizador.suficientes, registro=registro)
+    estadistico.calcular_indices_demograficos()
+    estadistico.analizar_estructura_etaria()
+    estadistico.analizar_asociaciones_demograficas()
+    estadistico.analizar_diferencias_subgrupos()
+    estadistico.registro.imprimir()
+    if exportar:
+        estadistico.exportar_resultados(exportar, formatos)
+    return estadistico
+
+
+def ejecutar_graficos(analizador: AnalizadorDemograficoFAC, perfil_graficos: str = PERFIL_POR_DEFECTO,
+                      paquete_pdf: str = None, por_unidad: bool = False, salida: str = '') -> GeneradorGraficosFAC:
+    """
+    Etapa de gráficos (carga matplotlib y seaborn)
+    
+    Args:
+        analizador (AnalizadorDemograficoFAC): Datos ya cargados
+        perfil_graficos (str): Perfil de salida de los gráficos (ver PERFILES_SALIDA)
+        paquete_pdf (str): Si se indica, también se escriben todos los gráficos en este PDF
+        por_unidad (bool): Generar también los gráficos y grillas por UNIDAD
+        salida (str): Carpeta de salida de los gráficos ('' = directorio actual)
+    """
+    datos_graficos = DatosGraficosFAC.desde_df(analizador.df, analizador.histograma_edades,
+                                               faceta='UNIDAD' if por_unidad else None)
+    graficador = GeneradorGraficosFAC(datos_graficos, perfil=perfil_graficos, salida=salida)
+    graficador.generar_todos()
+    if paquete_pdf:
+        graficador.generar_paquete_pdf(paquete_pdf)
+    if por_unidad and datos_graficos.faceta:
+        graficos_unidad = GraficosPorUnidad(datos_graficos, perfil=perfil_graficos, salida=salida)
+        graficos_unidad.generar_por_unidad()
+        graficos_unidad.generar_grillas()
+    return graficador
+
+
+def ejecutar_reportes(analizador: AnalizadorDemograficoFAC, estadistico: AnalisisEstadisticoFAC,
+                      directorio: str = None, manifiesto_graficos: str = None,
+                      formatos=('md', 'html')) -> GeneradorReportes:
+    """
+    Etapa de reportes: resumen ejecutivo y respuestas clave
+    
+    Args:
+        analizador (AnalizadorDemograficoFAC): Datos ya cargados
+        estadistico (AnalisisEstadisticoFAC): Análisis ya ejecutado
+        directorio (str): Carpeta del reporte Markdown/HTML (None = solo consola)
+        manifiesto_graficos (str): Manifiesto de CacheGraficos para referenciar los gráficos
+        formatos: Formatos del reporte (ver ReporteFAC.generar)
+    """
+    reporteador = GeneradorReportes(analizador, estadistico, manifiesto_graficos=manifiesto_graficos)
+    reporteador.generar_resumen_ejecutivo()
+    reporteador.generar_respuestas_clave()
+    if directorio:
+        reporteador.generar_documento(directorio, formatos)
+    return reporteador
+
+
+def ejecutar_analisis_completo(archivo_path: str = ARCHIVO_DATOS, perfil_graficos: str = PERFIL_POR_DEFECTO,
+                               paquete_pdf: str = None, por_unidad: bool = False, salida: str = ''):
     """
     Ejecuta el análisis demográfico completo
     
     Args:
         archivo_path (str): Ruta al archivo de datos Excel
+        perfil_graficos (str): Perfil de salida de los gráficos (ver PERFILES_SALIDA)
+        paquete_pdf (str): Si se indica, también se escriben todos los gráficos en este PDF
+        por_unidad (bool): Generar también los gráficos y grillas por UNIDAD
+        salida (str): Carpeta de salida de gráficos y reporte ('' = directorio actual)
     """
     print("INICIANDO ANÁLISIS DEMOGRÁFICO FAC 2024")
     print("="*60)
     
     try:
         # 1. Inicializar y cargar datos
-        analizador = AnalizadorDemograficoFAC(archivo_path)
-        analizador.cargar_datos()
-        analizador.mostrar_info_general()
+        analizador = ejecutar_carga(archivo_path)
         
         # 2. Análisis estadístico
-        estadistico = AnalisisEstadisticoFAC(analizador.df)
-        estadistico.calcular_indices_demograficos()
-        estadistico.analizar_estructura_etaria()
-        estadistico.analizar_asociaciones_demograficas()
-        estadistico.analizar_diferencias_subgrupos()
+        estadistico = ejecutar_estadisticas(analizador)
         
         # 3. Generación de gráficos
-        graficador = GeneradorGraficosFAC(analizador.df)
-        graficador.generar_graficos_univariados()
-        graficador.generar_graficos_bivariados()
-        graficador.generar_graficos_jerarquicos()
+        graficador = ejecutar_graficos(analizador, perfil_graficos, paquete_pdf, por_unidad, salida)
         
-        # 4. Generación de reportes
-        reporteador = GeneradorReportes(analizador, estadistico)
-        reporteador.generar_resumen_ejecutivo()
-        reporteador.generar_respuestas_clave()
+        # 4. Generación de reportes (mismo directorio y manifiesto que la etapa 'report' del pipeline)
+        reporteador = ejecutar_reportes(analizador, estadistico, directorio=os.path.join(salida, 'reporte'),
+                                        manifiesto_graficos=os.path.join(salida, '.cache_graficos.json'))
         
         print(f"\nANÁLISIS COMPLETADO EXITOSAMENTE")
         print(f"Gráficos generados: {len(graficador.figuras_creadas)}")
-        print(f"Archivos creados en el directorio actual")
+        print(f"Archivos creados en {salida or 'el directorio actual'}")
         
         return analizador, estadistico, graficador, reporteador
         
@@ -1373,576 +5153,1323 @@ def ejecutar_analisis_completo(archivo_path: str = ARCHIVO_DATOS):
         print(f"ERROR EN EL ANÁLISIS: {e}")
         raise
 
-# ==============================================================
-# PUNTO DE ENTRADA PRINCIPAL
-# ==============================================================
-
-if __name__ == "__main__":
-    # Ejecutar análisis completo
-    analizador, estadistico, graficador, reporteador = ejecutar_analisis_completo()
-    
-    print("\nPara ejecutar componentes individuales:")
-    print("   - analizador.mostrar_info_general()")
-    print("   - estadistico.calcular_indices_demograficos()")
-    print("   - graficador.generar_graficos_univariados()")
-    print("   - reporteador.generar_resumen_ejecutivo()")
-
 # ==============================================================
 # ANALISIS FAMILIAR
 # ==============================================================
 
-# -*- coding: utf-8 -*-
-"""Análisis de Datos FAC familiar
-
-Automatically generated by Colab.
-
-Original file is located at
-    https://colab.research.google.com/drive/1pBDJJeWRsua4-iPxqszbNrs_tH_lNb0Q
-"""
-
-# analisis_familiar.py
-import pandas as pd #Pandas sirve para leer, limpiar y analizar datos en tablas (DataFrames)
-import matplotlib.pyplot as plt # Se usa para hacer gráficas
-# Leer los datos
-df = pd.read_excel("/content/JEFAB_2024_corregido.xlsx")
-
-print(df.columns.tolist()) # para ver las columnas
-# Unificar categorías
-df["ESTADO_CIVIL"] = df["ESTADO_CIVIL"].replace({
-    "divorciado": "divorciado/separado",
-    "separado": "divorciado/separado"
-})
-
-# Verificar cambios
-print(df["ESTADO_CIVIL"].value_counts())
+def ejecutar_analisis_familiar(archivo_path: str = ARCHIVO_CORREGIDO, directorio_graficos: str = None,
+                               registro: RegistroPruebas = None, secciones=None):
+    """
+    Análisis de estructura familiar (antes un script de Colab; ver AnalisisFamiliarFAC)
 
-"""Analisis estado civil"""
+    Args:
+        archivo_path (str): Ruta al dataset corregido
+        directorio_graficos (str): Carpeta donde guardar los gráficos (None = mostrarlos)
+        registro (RegistroPruebas): Registro de valores p de la corrida (None = uno nuevo)
+        secciones: Secciones a ejecutar (None = las de por defecto, sin el cribado de
+            factores de riesgo); solo se leen sus columnas
+    """
+    familiar = AnalisisFamiliarFAC.desde_archivo(archivo_path, secciones=secciones,
+                                                 directorio_graficos=directorio_graficos, registro=registro)
+    print(familiar.df.columns.tolist()) # para ver las columnas
+    return familiar.ejecutar(secciones)
 
-# Análisis de estado civil
-print("=== ANÁLISIS ESTADO CIVIL ===")
-print(df['ESTADO_CIVIL'].value_counts()) # cuenta cuántas veces aparece cada categoría en esa columna.
+# ==============================================================
+# ANALISIS DEMOGRAFICO
+# ==============================================================
 
-# Gráfico de estado civil
-plt.figure(figsize=(10, 6)) # define el tamaño en pulgadas (ancho=10, alto=6).
-df['ESTADO_CIVIL'].value_counts().plot(kind='bar') # selecciona la columna de estado civil,cuenta cuántas veces aparece cada categoría.
-plt.title('Distribución del Estado Civil')
-plt.xlabel('Estado Civil')
-plt.ylabel('Cantidad')
-plt.xticks(rotation=45) # Rota las etiquetas del eje X 45 grados.
-plt.tight_layout() # Ajusta automáticamente márgenes y espaciado.
-plt.show() # Muestra el grafico
+def ejecutar_analisis_demografico_basico(archivo_path: str = ARCHIVO_CORREGIDO):
+    """
+    Análisis demográfico básico (script procedimental original)
 
-# Porcentaje para estado civil
-porcentajes = df['ESTADO_CIVIL'].value_counts(normalize=True) * 100
-print(porcentajes)
+    Args:
+        archivo_path (str): Ruta al dataset corregido
+    """
+    # ==============================================================
+    # PASO 1: IMPORTAR LIBRERÍAS
+    # ==============================================================
 
-"""Anaisis de Hijos
+    # pd, plt, sns y stats ya están definidos arriba (matplotlib, seaborn y scipy se cargan
+    # de forma diferida la primera vez que se usan)
 
-"""
+    # ==============================================================
+    # PASO 2: CARGAR EL ARCHIVO DE DATOS
+    # ==============================================================
 
-# Análisis de hijos
-print("\n=== ANÁLISIS DE HIJOS ===")
-print(f"Personal con hijos: {df['HIJOS'].value_counts()}")
+    df = leer_columnas(archivo_path, COLUMNAS_DEMOGRAFICAS)
 
-"""Analisis de convivencia familiar"""
+    print("El archivo se cargó con éxito. Primeras 5 filas:")
+    print(df.head())
+    print("\nInformación general del DataFrame:")
+    df.info()
 
-# Análisis de convivencia familiar
-print("\n=== ANÁLISIS DE CONVIVENCIA ===")
-print(f"Habita con familia: {df['HABITA_VIVIENDA_FAMILIAR'].value_counts()}")
 
-# Cruce entre tener hijos y habitar con familia
-print("\n=== CRUCE HIJOS Y CONVIVENCIA ===")
-cruce = pd.crosstab(df['HIJOS'], df['HABITA_VIVIENDA_FAMILIAR'])
-print(cruce)
+    # ==============================================================
+    # PASO 3: EXPLORACIÓN INICIAL DE LOS DATOS
+    # ==============================================================
 
-# ================================
-# HIJOS vs CONVIVENCIA FAMILIAR
-# ================================
-print("\n=== HIJOS vs CONVIVENCIA FAMILIAR ===")
-tabla = pd.crosstab(df['HIJOS'], df['HABITA_VIVIENDA_FAMILIAR'])
-print(tabla)
+    print("\nDimensiones del DataFrame (filas, columnas):")
+    print(df.shape)
 
-# Chi-cuadrado
-chi2, p, dof, expected = chi2_contingency(tabla)
-print("\nChi-cuadrado Hijos vs Convivencia: chi2 =", round(chi2,2), "p =", round(p,4))
-if p < 0.05:
-    print(" Existe asociación significativa entre Hijos y Convivencia Familiar")
-else:
-    print("No se encontró asociación significativa")
+    print("\nEstadísticas descriptivas de las columnas numéricas:")
+    print(df.describe())
 
-"""Analisis de Vivienda propia"""
+    print("\nConteo de valores nulos por columna:")
+    print(df.isnull().sum())
 
-import matplotlib.pyplot as plt
-import pandas as pd
+    print("=== INFORMACIÓN GENERAL ===")
+    print(f"Total de registros: {len(df)}")
+    print(f"Total de columnas: {len(df.columns)}")
 
-# Tabla de contingencia
-tabla_hijos_vivienda = pd.crosstab(df['HIJOS'], df['VIVIENDA_PROPIA'])
+    # ==============================================================
+    # PASO 4: CONFIGURACIÓN PARA VISUALIZACIONES
+    # ==============================================================
 
-print("=== TABLA HIJOS vs VIVIENDA PROPIA ===")
-print(tabla_hijos_vivienda)
+    sns.set_theme(style="whitegrid")
 
-# Normalizada por fila (porcentaje)
-tabla_hijos_vivienda_pct = pd.crosstab(df['HIJOS'], df['VIVIENDA_PROPIA'], normalize='index') * 100
-print("\n=== TABLA PORCENTUAL HIJOS vs VIVIENDA PROPIA ===")
-print(tabla_hijos_vivienda_pct.round(2))
+    # Cada gráfico se guarda y se cierra de inmediato (resolución por defecto de la figura)
+    figuras_demograficas = GestorFiguras(dpi=100, verbose=True)
 
-# ================================
-# HIJOS vs VIVIENDA PROPIA
-# ================================
-print("\n=== HIJOS vs VIVIENDA PROPIA ===")
-tabla = pd.crosstab(df['HIJOS'], df['VIVIENDA_PROPIA'])
-print(tabla)
 
-# Chi-cuadrado
-chi2, p, dof, expected = chi2_contingency(tabla)
-print("\nChi-cuadrado Hijos vs Vivienda Propia: chi2 =", round(chi2,2), "p =", round(p,4))
-if p < 0.05:
-    print("👉 Existe asociación significativa entre Hijos y Vivienda Propia")
-else:
-    print("👉 No se encontró asociación significativa")
+    # ==============================================================
+    # FUNCIONES AUXILIARES
+    # ==============================================================
 
-tabla_hijos_vivienda = pd.crosstab(df['HIJOS'], df['VIVIENDA_PROPIA'], normalize='index') * 100
+    # Función para agregar etiquetas numéricas a las barras
+    def agregar_valores(ax, orient="v"):
+        if orient == "v":  # barras verticales
+            for p in ax.patches:
+                ax.annotate(f'{int(p.get_height())}',
+                            (p.get_x() + p.get_width() / 2., p.get_height()),
+                            ha='center', va='bottom', fontsize=9)
+        else:  # barras horizontales
+            for p in ax.patches:
+                ax.annotate(f'{int(p.get_width())}',
+                            (p.get_width(), p.get_y() + p.get_height() / 2.),
+                            ha='left', va='center', fontsize=9)
+
+
+    # ==============================================================
+    # GRÁFICOS UNIVARIADOS
+    # ==============================================================
+
+    # Gráfico 1: Distribución de Edad
+    plt.figure(figsize=(10, 6))
+    sns.histplot(df['EDAD2'], bins=20, kde=True, color='dodgerblue')
+    plt.title('Distribución de la Edad del Personal', fontsize=16, fontweight='bold')
+    plt.xlabel('Edad (años)')
+    plt.ylabel('Frecuencia')
+    figuras_demograficas.guardar('grafico_distribucion_edad.png')
+
+    # Análisis de edad
+    print("\n=== ANÁLISIS DE EDAD ===")
+    print(f"Edad promedio: {df['EDAD2'].mean():.1f} años")
+    print(f"Edad mínima: {df['EDAD2'].min()} años")
+    print(f"Edad máxima: {df['EDAD2'].max()} años")
+
+    # Gráfico 2: Distribución de Género
+    plt.figure(figsize=(8, 6))
+    ax = sns.countplot(x='SEXO', data=df, order=df['SEXO'].value_counts().index, palette='viridis')
+    plt.title('Distribución por Género', fontsize=16, fontweight='bold')
+    plt.xlabel('Género')
+    plt.ylabel('Cantidad')
+    agregar_valores(ax, orient="v")
+    figuras_demograficas.guardar('grafico_distribucion_genero.png')
+
+    # Análisis de género
+    print("\n=== ANÁLISIS DE GÉNERO ===")
+    print(df['GENERO'].value_counts())
+
+
+    # Gráfico 3: Distribución por Categoría Militar
+    plt.figure(figsize=(12, 7))
+    ax = sns.countplot(y='CATEGORIA', data=df, order=df['CATEGORIA'].value_counts().index, palette='plasma')
+    plt.title('Distribución por Categoría Militar', fontsize=16, fontweight='bold')
+    plt.xlabel('Cantidad')
+    plt.ylabel('Categoría')
+    agregar_valores(ax, orient="h")
+    figuras_demograficas.guardar('grafico_distribucion_categoria.png')
+
+    # Gráfico 4: Distribución por Grado Militar (sin "No responde")
+    df_grado = df[df['GRADO'].str.lower() != "no responde"]
+    plt.figure(figsize=(12, 10))
+    ax = sns.countplot(y='GRADO', data=df_grado, order=df_grado['GRADO'].value_counts().index, palette='magma')
+    plt.title('Distribución por Grado Específico', fontsize=16, fontweight='bold')
+    plt.xlabel('Cantidad')
+    plt.ylabel('Grado')
+    agregar_valores(ax, orient="h")
+    plt.tight_layout()
+    figuras_demograficas.guardar('grafico_distribucion_grado.png')
+
+    # Gráfico 5: Distribución por Estado Civil
+    plt.figure(figsize=(12, 7))
+    ax = sns.countplot(y='ESTADO_CIVIL', data=df, order=df['ESTADO_CIVIL'].value_counts().index, palette='cividis')
+    plt.title('Distribución por Estado Civil', fontsize=16, fontweight='bold')
+    plt.xlabel('Cantidad')
+    plt.ylabel('Estado Civil')
+    agregar_valores(ax, orient="h")
+    figuras_demograficas.guardar('grafico_distribucion_estado_civil.png')
+
+    # Gráfico 6: Distribución por Nivel Educativo
+    plt.figure(figsize=(12, 8))
+    ax = sns.countplot(y='NIVEL_EDUCATIVO', data=df,
+                       order=df['NIVEL_EDUCATIVO'].value_counts().index, palette='inferno')
+    plt.title('Distribución por Nivel Educativo', fontsize=16, fontweight='bold')
+    plt.xlabel('Cantidad')
+    plt.ylabel('Nivel Educativo')
+    agregar_valores(ax, orient="h")
+    plt.tight_layout()
+    figuras_demograficas.guardar('grafico_distribucion_nivel_educativo.png')
+
+
+    # ==============================================================
+    # GRÁFICOS BIVARIADOS
+    # ==============================================================
+
+    # Gráfico 7: Edad por Categoría Militar
+    plt.figure(figsize=(10, 7))
+    sns.boxplot(x='CATEGORIA', y='EDAD2', data=df, palette='muted')
+    plt.title('Distribución de Edad por Categoría Militar', fontsize=16, fontweight='bold')
+    plt.xlabel('Categoría')
+    plt.ylabel('Edad (años)')
+    figuras_demograficas.guardar('grafico_edad_por_categoria.png')
+
+    # Gráfico 8: Estado Civil por Género
+    plt.figure(figsize=(12, 8))
+    ax = sns.countplot(y='ESTADO_CIVIL', hue='SEXO', data=df,
+                       order=df['ESTADO_CIVIL'].value_counts().index, palette='coolwarm')
+    plt.title('Distribución de Estado Civil por Género', fontsize=16, fontweight='bold')
+    plt.xlabel('Cantidad')
+    plt.ylabel('Estado Civil')
+    plt.legend(title='Género')
+    for container in ax.containers:
+        ax.bar_label(container, fmt='%d', label_type='edge', fontsize=8)
+    figuras_demograficas.guardar('grafico_estado_civil_por_genero.png')
+
+    # Gráfico 9: Grado Militar por Género (sin "No responde")
+    plt.figure(figsize=(12, 8))
+    ax = sns.countplot(y='GRADO', hue='SEXO', data=df_grado,
+                       order=df_grado['GRADO'].value_counts().index, palette='coolwarm')
+    plt.title('Distribución de Grado Militar por Género', fontsize=16, fontweight='bold')
+    plt.xlabel('Cantidad')
+    plt.ylabel('Grado')
+    plt.legend(title='Género')
+    for container in ax.containers:
+        ax.bar_label(container, fmt='%d', label_type='edge', fontsize=8)
+    plt.tight_layout()
+    figuras_demograficas.guardar('grafico_grado_por_genero.png')
+
+    # Gráfico 10: Relación entre Nivel Educativo y Grado Militar (sin "No responde")
+
+    # Filtrar datos quitando "No responde" en GRADO y NIVEL_EDUCATIVO
+    df_rel = df[
+        (df['GRADO'].str.lower() != "no responde") &
+        (df['NIVEL_EDUCATIVO'].str.lower() != "no responde")
+    ]
+
+    plt.figure(figsize=(14, 10))
+    ax = sns.countplot(
+        y='GRADO', hue='NIVEL_EDUCATIVO',
+        data=df_rel,
+        order=df_rel['GRADO'].value_counts().index,
+        palette='Spectral'
+    )
 
-tabla_hijos_vivienda.plot(kind='bar', figsize=(8,6))
+    plt.title('Relación entre Nivel Educativo y Grado Militar', fontsize=16, fontweight='bold')
+    plt.xlabel('Cantidad')
+    plt.ylabel('Grado Militar')
+    plt.legend(title='Nivel Educativo', bbox_to_anchor=(1.05, 1), loc='upper left')
+    plt.tight_layout()
+    figuras_demograficas.guardar('grafico_nivel_educativo_por_grado.png')
 
-plt.title("Relación entre Hijos y Vivienda Propia")
-plt.ylabel("Porcentaje (%)")
-plt.xlabel("Tiene Hijos")
-plt.xticks(rotation=0)
-plt.legend(title="Vivienda Propia", bbox_to_anchor=(1.05, 1), loc='upper left')
-plt.tight_layout()
-plt.show()
+    # ==============================================================
+    # RESPUESTAS A LAS 3 PREGUNTAS 
+    # ==============================================================
 
-"""Analisis de categoria"""
+    # Pregunta 1: Rango de edad más común
+    rango_edad = pd.cut(df['EDAD2'], bins=10).value_counts().idxmax()
+    print("\nPregunta 1 - Rango de edad más común:", rango_edad)
 
-# Cruce de Estado Civil y Categoría
-print("\n=== CRUCE ESTADO CIVIL vs CATEGORIA ===")
+    # Pregunta 2: Diferencias por género
+    conteo_genero = df['SEXO'].value_counts()
+    print("\nPregunta 2 - Distribución por género:")
+    print(conteo_genero)
 
-tabla_cat = pd.crosstab(df['ESTADO_CIVIL'], df['CATEGORIA'])
-print("\nFrecuencias absolutas:")
-print(tabla_cat)
+    # Pregunta 3: Grado militar más frecuente (sin 'No responde')
+    grado_mas_frecuente = df_grado['GRADO'].mode()[0]
+    print("\nPregunta 3 - Grado militar más frecuente:", grado_mas_frecuente)
 
-tabla_cat_pct = pd.crosstab(df['ESTADO_CIVIL'], df['CATEGORIA'], normalize='index') * 100
-print("\nPorcentajes (% por fila):")
-print(tabla_cat_pct.round(2))
 
-tabla_estado_categoria = pd.crosstab(df['ESTADO_CIVIL'], df['CATEGORIA'], normalize='index') * 100
+    # Cerrar las figuras restantes y mostrar el resumen de memoria
+    figuras_demograficas.cerrar()
 
-tabla_estado_categoria.plot(kind='bar', figsize=(10,6))
 
-plt.title("Distribución de Categoría por Estado Civil")
-plt.ylabel("Porcentaje (%)")
-plt.xlabel("Estado Civil")
-plt.xticks(rotation=45)
-plt.legend(title="Categoría", bbox_to_anchor=(1.05, 1), loc='upper left')
-plt.tight_layout()
-plt.show()
+# ==============================================================
+# MÓDULO: ALMACÉN PARQUET PARTICIONADO
+# ==============================================================
 
-import pandas as pd
-from scipy.stats import chi2_contingency, fisher_exact, f_oneway, kruskal
+# Directorios de partición (estilo Hive: ANIO=2024/CATEGORIA=oficial/) y orden de las filas en cada
+# archivo; al estar ordenadas, las estadísticas mín/máx de GRADO y UNIDAD de cada grupo de filas son estrechas
+PARTICIONES_ALMACEN = ('ANIO', 'CATEGORIA')
+ORDEN_ALMACEN = ('GRADO', 'UNIDAD')
 
 
-# ================================
-# ESTADO CIVIL vs CATEGORIA
-# ================================
-print("\n=== ESTADO CIVIL vs CATEGORIA ===")
-tabla = pd.crosstab(df['ESTADO_CIVIL'], df['CATEGORIA'])
-print(tabla)
+def _texto_homogeneo(df: pd.DataFrame) -> pd.DataFrame:
+    """Columnas de texto con valores de varios tipos (p. ej. 0 y '26-35' tras la imputación) pasan a texto"""
+    for col in df.select_dtypes(include=['object']).columns:
+        if not df[col].dropna().map(type).eq(str).all():
+            df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+    return df
 
-# Chi-cuadrado
-chi2, p, dof, expected = chi2_contingency(tabla)
-print("\nChi-cuadrado Estado Civil vs Categoría: chi2 =", round(chi2,2), "p =", round(p,4))
-if p < 0.05:
-    print(" Existe asociación significativa entre Estado Civil y Categoría")
-else:
-    print(" No se encontró asociación significativa")
 
-"""Relacion entre estado civil y edad"""
+def _expresion_filtro(filtros: dict, esquema=None):
+    """
+    {columna: valor o lista de valores} -> expresión de pyarrow (igualdad o pertenencia, unidas con y)
 
-print(df.groupby("ESTADO_CIVIL")["EDAD2"].mean())
+    Con `esquema`, los valores dados como texto (p. ej. desde la línea de comandos)
+    se convierten al tipo de su columna. El texto del almacén viene de limpiar_datos
+    (sin acentos, en minúsculas y con categorías canónicas), así que los valores de
+    texto se normalizan igual: 'Suboficial' y 'T1' encuentran 'suboficial' y 't1'.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    def convertir(columna, valor):
+        if not isinstance(valor, str):
+            return valor
+        tipo = esquema.field(columna).type if esquema is not None and columna in esquema.names else None
+        if tipo is not None and pa.types.is_integer(tipo):
+            return int(valor)
+        if tipo is not None and pa.types.is_floating(tipo):
+            return float(valor)
+        return canonizar_valor(normalizar_texto(valor))
+
+    expresion = None
+    for columna, valor in (filtros or {}).items():
+        campo = ds.field(columna)
+        if isinstance(valor, (list, tuple, set)):
+            condicion = campo.isin([convertir(columna, v) for v in valor])
+        else:
+            condicion = campo == convertir(columna, valor)
+        expresion = condicion if expresion is None else expresion & condicion
+    return expresion
 
-# ================================
-# ESTADO CIVIL vs EDAD
-# ================================
-print("\n=== ESTADO CIVIL vs EDAD ===")
-print(df.groupby("ESTADO_CIVIL")["EDAD2"].mean())
 
-from scipy.stats import shapiro
+class AlmacenParquetFAC:
+    """
+    Datasets corregidos de todos los años en un árbol Parquet particionado por
+    año y CATEGORIA.
+
+    Una consulta ("suboficiales mujeres en T1", "oficiales por UNIDAD") lee
+    solo los directorios de las particiones que cumplen el filtro y, dentro de
+    cada archivo, solo los grupos de filas cuyas estadísticas de GRADO y UNIDAD
+    pueden cumplirlo; el resto del filtro se aplica al leer. Cada libro de
+    origen escribe sus propios archivos, así que varios libros de un mismo año
+    conviven y reescribir uno reemplaza solo los suyos.
+    """
 
-print("\n=== PRUEBA DE NORMALIDAD (Shapiro-Wilk) ===")
+    def __init__(self, raiz: str, particiones=PARTICIONES_ALMACEN, orden=ORDEN_ALMACEN,
+                 filas_por_grupo: int = 1_000):
+        """
+        Args:
+            raiz (str): Carpeta raíz del almacén
+            particiones: Columnas de partición (la primera es el año)
+            orden: Columnas por las que se ordenan las filas dentro de cada archivo
+            filas_por_grupo (int): Máximo de filas por grupo de filas (unidad mínima de lectura)
+        """
+        self.raiz = raiz
+        self.particiones = list(particiones)
+        self.orden = list(orden)
+        self.filas_por_grupo = filas_por_grupo
+
+    def _archivos_origen(self, origen: str) -> list:
+        """Archivos escritos por `origen` (exactamente '<origen>-<i>.parquet', no los de 'origen-otro')"""
+        propio = re.compile(re.escape(origen) + r'-\d+\.parquet')
+        candidatos = glob.glob(os.path.join(glob.escape(self.raiz), '**', f"{glob.escape(origen)}-*.parquet"),
+                               recursive=True)
+        return [archivo for archivo in candidatos if propio.fullmatch(os.path.basename(archivo))]
+
+    def al_dia(self, origen: str, fuente: str) -> bool:
+        """True si el almacén tiene archivos de `origen` y ninguno es más antiguo que `fuente`"""
+        archivos = self._archivos_origen(origen)
+        return bool(archivos) and min(map(os.path.getmtime, archivos)) >= os.path.getmtime(fuente)
+
+    @PERFILADOR.perfilar('almacen_escritura')
+    def escribir(self, df: pd.DataFrame, anio: int, origen: str = 'datos') -> list:
+        """
+        Escribe (o reemplaza) las filas de un libro en sus particiones
 
-for estado, grupo in df.groupby("ESTADO_CIVIL"):
-    datos = grupo["EDAD2"].dropna()
-    stat, p = shapiro(datos)
-    print(f"{estado}: p = {round(p,4)}")
-    if p < 0.05:
-        print(" No hay normalidad")
-    else:
-        print("Normalidad aceptada")
+        Args:
+            df (pd.DataFrame): Dataset corregido del libro
+            anio (int): Año del libro
+            origen (str): Identificador único del libro (ver ProcesadorLotesFAC.origen);
+                prefijo de sus archivos en cada partición
 
+        Returns:
+            list: Archivos escritos
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        columna_anio, *otras = self.particiones
+        faltantes = [c for c in otras if c not in df.columns]
+        if faltantes:
+            raise ValueError(f"Faltan las columnas de partición {faltantes}")
+
+        df = _texto_homogeneo(df.copy())
+        df[columna_anio] = int(anio)
+        orden = [c for c in self.particiones + self.orden if c in df.columns]
+        df = df.sort_values(orden, kind='mergesort', na_position='last')
+
+        for archivo in self._archivos_origen(origen):
+            os.remove(archivo)
+        escritos = []
+        ds.write_dataset(pa.Table.from_pandas(df, preserve_index=False), self.raiz, format='parquet',
+                         partitioning=self.particiones, partitioning_flavor='hive',
+                         basename_template=f"{origen}-{{i}}.parquet", existing_data_behavior='overwrite_or_ignore',
+                         max_rows_per_group=self.filas_por_grupo, min_rows_per_group=self.filas_por_grupo,
+                         file_visitor=lambda archivo: escritos.append(archivo.path))
+        print(f">>> {len(df):,} filas de '{origen}' ({anio}) escritas en {len(escritos)} particiones de '{self.raiz}'")
+        return escritos
+
+    def dataset(self):
+        """Dataset de pyarrow sobre todo el almacén (solo lee metadatos)"""
+        import pyarrow.dataset as ds
+        return ds.dataset(self.raiz, format='parquet', partitioning='hive')
+
+    def plan(self, filtros: dict = None) -> dict:
+        """
+        Qué leería una consulta: archivos y grupos de filas que pasan la poda
 
-# Agrupar por estado civil
-grupos = [grupo["EDAD2"].dropna().values for _, grupo in df.groupby("ESTADO_CIVIL")]
+        Args:
+            filtros (dict): {columna: valor o lista de valores}
+        """
+        dataset = self.dataset()
+        expresion = _expresion_filtro(filtros, dataset.schema)
+        todos = list(dataset.get_fragments())
+        elegidos = list(dataset.get_fragments(filter=expresion)) if expresion is not None else todos
+        grupos = sum(len(f.split_by_row_group(expresion, schema=dataset.schema)) for f in elegidos)
+        return {'archivos': len(elegidos), 'archivos_total': len(todos), 'grupos_filas': grupos,
+                'grupos_filas_total': sum(f.num_row_groups for f in todos)}
+
+    @PERFILADOR.perfilar('almacen_consulta')
+    def consultar(self, filtros: dict = None, columnas=None) -> pd.DataFrame:
+        """
+        Filas que cumplen `filtros`, leyendo solo las particiones y grupos de filas necesarios
 
+        Args:
+            filtros (dict): {columna: valor o lista de valores}, p. ej.
+                {'CATEGORIA': 'suboficial', 'SEXO': 'mujer', 'GRADO': 't1'}; el texto se
+                normaliza como en limpiar_datos, así que 'Suboficial' o 'T1' también sirven
+            columnas: Columnas a devolver (None = todas)
+        """
+        columnas = None if columnas is None else list(dict.fromkeys(columnas))
+        dataset = self.dataset()
+        return dataset.to_table(columns=columnas, filter=_expresion_filtro(filtros, dataset.schema)).to_pandas()
 
 
-# Kruskal-Wallis
-kruskal_test = kruskal(*grupos)
-print("Kruskal-Wallis H =", round(kruskal_test.statistic,2), "p =", round(kruskal_test.pvalue,4))
+def ejecutar_consulta(raiz: str, filtros: dict = None, columnas=None, agrupar=None) -> pd.DataFrame:
+    """
+    Consulta el almacén e imprime el plan de lectura y el resultado (o sus conteos)
 
-#!pip install scikit-posthocs
-# Prueba de Dunn
-import scikit_posthocs as sp
+    Args:
+        raiz (str): Carpeta raíz del almacén
+        filtros (dict): {columna: valor o lista de valores}
+        columnas: Columnas a devolver (None = todas; se ignora si se agrupa)
+        agrupar: Columnas por las que contar las filas del resultado (None = mostrar las filas)
+    """
+    almacen = AlmacenParquetFAC(raiz)
+    plan = almacen.plan(filtros)
+    print(f"Lectura: {plan['archivos']} de {plan['archivos_total']} archivos, "
+          f"{plan['grupos_filas']} de {plan['grupos_filas_total']} grupos de filas")
+    agrupar = list(agrupar) if agrupar else None
+    resultado = almacen.consultar(filtros, agrupar or columnas)
+    print(f"Filas: {len(resultado):,}")
+    if agrupar:
+        resultado = resultado.value_counts(agrupar, dropna=False).rename('n').reset_index()
+    print(resultado.to_string(max_rows=40, index=False))
+    return resultado
 
-posthoc = sp.posthoc_dunn(df, val_col="EDAD2", group_col="ESTADO_CIVIL", p_adjust="bonferroni")
-print(posthoc)
+# ==============================================================
+# MÓDULO: PROCESAMIENTO POR LOTES (VARIOS LIBROS JEFAB)
+# ==============================================================
 
-df.groupby("ESTADO_CIVIL")["EDAD2"].mean().plot(kind="bar")
-plt.show()
+# Libros de origen: uno por año y por fuerza (JEFAB_2024.xlsx, JEFAB_2025_ARC.xlsx...)
+PATRON_LOTE = 'JEFAB_*.xlsx'
 
-plt.figure(figsize=(10,6))
-df.boxplot(column="EDAD2", by="ESTADO_CIVIL", grid=False)
-plt.title("Distribución de la edad según Estado Civil")
-plt.suptitle("")  # elimina título extra de pandas
-plt.xlabel("Estado Civil")
-plt.ylabel("Edad")
-plt.xticks(rotation=45)
-plt.show()
+# Sufijos de los archivos que escribe el propio pipeline (no son libros de origen)
+SUFIJOS_DERIVADOS = ('_limpio', '_corregido')
 
-#Hace un boxplot de la columna EDAD2 (edad).
 
-#Separa los datos por cada categoría de ESTADO_CIVIL.
+def descubrir_archivos(directorio: str = 'datos', patron: str = PATRON_LOTE) -> list:
+    """
+    Libros de origen bajo `directorio` (también en subcarpetas), en orden alfabético
 
-# grid=False quita las líneas de la cuadrícula de fondo.
+    Args:
+        directorio (str): Carpeta donde buscar
+        patron (str): Patrón glob del nombre de archivo
+    """
+    archivos = []
+    for ruta in sorted(glob.glob(os.path.join(directorio, '**', patron), recursive=True)):
+        nombre = os.path.basename(ruta)
+        base = os.path.splitext(nombre)[0]
+        # Se descartan los temporales de Excel y las salidas de corridas anteriores
+        if nombre.startswith('~$') or base.endswith(SUFIJOS_DERIVADOS):
+            continue
+        archivos.append(ruta)
+    return archivos
+
+
+def _procesar_archivo_lote(entrada: str, corregido: str, bitacora: str, forzar: bool = False,
+                           almacen: str = None, origen: str = None, columnas=COLUMNAS_DEMOGRAFICAS):
+    """
+    Limpia e imputa un libro, escribe su dataset corregido y devuelve sus estadísticos suficientes
 
-"""Analisis de maltrato intrafamiliar"""
+    La salida de consola de las etapas se escribe en `bitacora`. Un error en un
+    archivo se devuelve en el resultado en lugar de detener el lote. Si se indica
+    `almacen`, el corregido también se escribe en ese AlmacenParquetFAC con el
+    identificador `origen` (None = nombre del libro sin extensión).
 
-# Tabla de contingencia
-cruce = pd.crosstab(df['HABITA_VIVIENDA_FAMILIAR'], df['MALTRATO_INTRAFAMILIAR'], margins=True)
-print("\n=== Cruce HABITA_VIVIENDA_FAMILIAR vs MALTRATO_INTRAFAMILIAR ===")
-print(cruce)
+    Returns:
+        tuple: (resultado, etapas perfiladas en este proceso)
+    """
+    inicio = time.perf_counter()
+    n_etapas = len(PERFILADOR.etapas)
+    resultado = {'entrada': entrada, 'corregido': corregido, 'bitacora': bitacora, 'filas': 0,
+                 'reutilizado': False, 'suficientes': None, 'error': None}
+    for ruta in (corregido, bitacora):
+        if os.path.dirname(ruta):
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+
+    with open(bitacora, 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log), \
+            PERFILADOR.etapa(f"lote {os.path.basename(entrada)}") as etapa:
+        try:
+            # Como en PipelineFAC, un corregido más reciente que su libro se reutiliza
+            completo = None
+            if not forzar and archivo_al_dia(corregido, entrada):
+                print(f"Usando dataset corregido existente: {corregido}")
+                df = leer_columnas(corregido, columnas)
+                resultado['reutilizado'] = True
+            else:
+                completo = df = imputar_datos(limpiar_datos(leer_columnas(entrada)))
+                guardar_datos_corregidos(df, corregido)
+                if columnas is not None:
+                    df = df[[c for c in dict.fromkeys(columnas) if c in df.columns]]
+            etapa['salida'] = df
+
+            if almacen is not None:
+                destino = AlmacenParquetFAC(almacen)
+                origen = origen or os.path.splitext(os.path.basename(entrada))[0]
+                if completo is not None or not destino.al_dia(origen, corregido):
+                    completo = leer_columnas(corregido) if completo is None else completo
+                    destino.escribir(completo, anio_de_archivo(entrada), origen)
+
+            demografico = AnalizadorDemograficoFAC(corregido, columnas).preparar_lote(df)
+            resultado['suficientes'] = EstadisticosSuficientes.desde_df(demografico)
+            resultado['filas'] = len(df)
+        except Exception as e:
+            traceback.print_exc(file=log)
+            resultado['error'] = f"{type(e).__name__}: {e}"
 
-import matplotlib.pyplot as plt
+    resultado['segundos'] = time.perf_counter() - inicio
+    return resultado, PERFILADOR.etapas[n_etapas:]
 
-# Gráfico de barras agrupadas
-cruce_graf = pd.crosstab(df['HABITA_VIVIENDA_FAMILIAR'], df['MALTRATO_INTRAFAMILIAR'])
-cruce_graf.plot(kind="bar", figsize=(8,5))
 
-plt.title("Relación entre Habitar Vivienda Familiar y Maltrato Intrafamiliar")
-plt.xlabel("Habita Vivienda Familiar")
-plt.ylabel("Número de Personas")
-plt.xticks(rotation=0)
-plt.legend(title="Maltrato Intrafamiliar")
-plt.show()
+class ProcesadorLotesFAC:
+    """
+    Limpia e imputa muchos libros JEFAB en un ProcessPoolExecutor y consolida
+    sus índices demográficos.
+
+    Cada proceso escribe el dataset corregido de su libro y devuelve solo sus
+    estadísticos suficientes (conteos, tablas de contingencia e histogramas de
+    edad). El proceso principal los fusiona, de modo que las filas de todos los
+    libros nunca se juntan en memoria: los índices, la estructura etaria, las
+    asociaciones y las diferencias consolidadas se calculan desde esos conteos.
+    """
 
-"""Analisis de relacion estable"""
+    def __init__(self, directorio: str = 'datos', patron: str = PATRON_LOTE, salida: str = None,
+                 paralelo: bool = True, max_workers: int = None, forzar: bool = False, correccion: str = 'bh',
+                 almacen: str = None):
+        """
+        Args:
+            directorio (str): Carpeta con los libros de origen
+            patron (str): Patrón glob de los libros (ver descubrir_archivos)
+            salida (str): Carpeta de los corregidos y bitácoras, con la misma estructura de
+                subcarpetas que `directorio` (None = junto a cada libro)
+            paralelo (bool): Si es False, los libros se procesan en este proceso
+            max_workers (int): Número de procesos (None = núcleos disponibles)
+            forzar (bool): Reprocesar los libros aunque su corregido esté al día
+            correccion (str): Corrección global de los valores p consolidados (ver RegistroPruebas)
+            almacen (str): Raíz de un AlmacenParquetFAC donde escribir también cada corregido
+                (el año se toma del nombre del libro; None = no escribir)
+        """
+        self.directorio = directorio
+        self.patron = patron
+        self.salida = salida
+        self.paralelo = paralelo
+        self.max_workers = max_workers
+        self.forzar = forzar
+        self.almacen = almacen
+        self.registro = RegistroPruebas(correccion)
+        self.resultados = []
+        self.suficientes = None
+
+    def rutas_salida(self, entrada: str):
+        """(dataset corregido, bitácora) de un libro, con la convención de ARCHIVO_CORREGIDO"""
+        carpeta, nombre = os.path.split(entrada)
+        if self.salida is not None:
+            carpeta = os.path.normpath(os.path.join(self.salida, os.path.relpath(carpeta, self.directorio)))
+        base = os.path.splitext(nombre)[0]
+        return (os.path.join(carpeta, f"{base}_corregido.xlsx"),
+                os.path.join(carpeta, f"{base}_corregido.log"))
+
+    def origen(self, entrada: str) -> str:
+        """
+        Identificador del libro en el almacén: su ruta relativa a `directorio`, sin extensión
+        y con '__' como separador, para que FAC/JEFAB_2024.xlsx y ARC/JEFAB_2024.xlsx no
+        compartan (ni se borren mutuamente) los archivos de sus particiones
+        """
+        relativa = os.path.splitext(os.path.relpath(entrada, self.directorio))[0]
+        return '__'.join(parte for parte in re.split(r'[\\/]', relativa) if parte)
 
-# Tabla de contingencia
-cruce_hijos_pareja = pd.crosstab(df['HIJOS'], df['RELACION_PAREJA_ESTABLE'], margins=True)
-print("\n=== Cruce HIJOS vs RELACION_PAREJA_ESTABLE ===")
-print(cruce_hijos_pareja)
+    @PERFILADOR.perfilar('lote')
+    def ejecutar(self) -> list:
+        """
+        Procesa todos los libros descubiertos y fusiona sus estadísticos
 
-# ================================
-# HIJOS vs RELACION PAREJA ESTABLE
-# ================================
-print("\n=== HIJOS vs RELACION PAREJA ESTABLE ===")
-tabla = pd.crosstab(df['HIJOS'], df['RELACION_PAREJA_ESTABLE'])
-print(tabla)
+        Returns:
+            list: Un resultado por libro, en orden alfabético (ver _procesar_archivo_lote)
+        """
+        archivos = descubrir_archivos(self.directorio, self.patron)
+        if not archivos:
+            raise FileNotFoundError(f"No hay libros '{self.patron}' en '{self.directorio}'")
+        trabajos = [(entrada, *self.rutas_salida(entrada), self.forzar, self.almacen, self.origen(entrada))
+                    for entrada in archivos]
+        print(f"\nPROCESAMIENTO POR LOTES: {len(trabajos)} libros en '{self.directorio}'")
+
+        if not self.paralelo or len(trabajos) == 1:
+            # En este proceso las etapas ya quedan registradas en PERFILADOR
+            resultados = [_procesar_archivo_lote(*trabajo)[0] for trabajo in trabajos]
+        else:
+            resultados = []
+            for resultado, etapas in ejecutar_en_procesos(_procesar_archivo_lote, trabajos, self.max_workers):
+                for etapa in etapas:
+                    PERFILADOR.incorporar(etapa)
+                resultados.append(resultado)
+
+        # Fusión: solo viajan y se acumulan los estadísticos suficientes de cada libro
+        self.suficientes = EstadisticosSuficientes()
+        for resultado in resultados:
+            if resultado['suficientes'] is not None:
+                self.suficientes.fusionar(resultado['suficientes'])
+        self.resultados = resultados
+        self.imprimir()
+        return resultados
 
-# Fisher Exacto (para tablas 2x2)
-oddsratio, p = fisher_exact(tabla)
-print("Test exacto de Fisher p =", round(p,4))
-if p < 0.05:
-    print(" Existe asociación significativa entre Hijos y Relación de Pareja Estable")
-else:
-    print(" No se encontró asociación significativa")
+    def tabla(self) -> pd.DataFrame:
+        """Resumen por libro: filas, corregido escrito o reutilizado, tiempo y error"""
+        columnas = ['entrada', 'corregido', 'filas', 'reutilizado', 'segundos', 'error']
+        return pd.DataFrame([{c: r[c] for c in columnas} for r in self.resultados], columns=columnas)
+
+    def imprimir(self):
+        """Una línea por libro y el total consolidado"""
+        for r in self.resultados:
+            if r['error']:
+                print(f"   - {r['entrada']}: ERROR {r['error']} (ver {r['bitacora']})")
+            else:
+                estado = 'reutilizado' if r['reutilizado'] else 'corregido'
+                print(f"   - {r['entrada']}: {r['filas']:,} filas, {estado} en {r['segundos']:.1f} s → {r['corregido']}")
+        fallidos = sum(1 for r in self.resultados if r['error'])
+        print(f"Total consolidado: {self.suficientes.n_filas:,} registros de "
+              f"{len(self.resultados) - fallidos} libros" + (f" ({fallidos} con error)" if fallidos else ""))
+
+    def consolidar(self, exportar: str = None, formatos=('json', 'parquet')) -> AnalisisEstadisticoFAC:
+        """
+        Índices, estructura etaria, asociaciones y diferencias de todos los libros juntos
 
-# Gráfico de barras agrupadas
-cruce_hijos_pareja_graf = pd.crosstab(df['HIJOS'], df['RELACION_PAREJA_ESTABLE'])
-cruce_hijos_pareja_graf.plot(kind="bar", figsize=(8,5))
+        Args:
+            exportar (str): Carpeta donde exportar los resultados consolidados (None = no exportar)
+            formatos: Formatos de exportación (ver ResultadosFAC.exportar)
+        """
+        if self.suficientes is None:
+            self.ejecutar()
+        print(f"\n{'=' * 60}\nRESULTADOS CONSOLIDADOS ({self.suficientes.n_filas:,} registros)\n{'=' * 60}")
+        estadistico = AnalisisEstadisticoFAC(None, self.suficientes, self.registro)
+        estadistico.calcular_indices_demograficos()
+        estadistico.analizar_estructura_etaria()
+        estadistico.analizar_asociaciones_demograficas()
+        estadistico.analizar_diferencias_subgrupos()
+        estadistico.registro.imprimir()
+        if exportar:
+            estadistico.exportar_resultados(exportar, formatos)
+        return estadistico
 
-plt.title("Relación entre Hijos y Tener Pareja Estable")
-plt.xlabel("¿Tiene Hijos?")
-plt.ylabel("Número de Personas")
-plt.xticks(rotation=0)
-plt.legend(title="Pareja Estable")
-plt.show()
 
-"""Analisis fallecimiento padres"""
+def ejecutar_lote(directorio: str = 'datos', patron: str = PATRON_LOTE, salida: str = None,
+                  paralelo: bool = True, max_workers: int = None, forzar: bool = False, correccion: str = 'bh',
+                  formatos=('json', 'parquet'), almacen: str = None) -> ProcesadorLotesFAC:
+    """
+    Limpia e imputa todos los libros de `directorio` y exporta los resultados consolidados
 
-# Hijos con Madre Vive
-cruce_hijos_madre = pd.crosstab(df['HIJOS'], df['MADRE_VIVE'], margins=True)
-print("\n=== Cruce HIJOS vs MADRE_VIVE ===")
-print(cruce_hijos_madre)
+    Args:
+        directorio (str): Carpeta con los libros de origen
+        patron (str): Patrón glob de los libros
+        salida (str): Carpeta de los corregidos (None = junto a cada libro); los resultados
+            consolidados van a su subcarpeta 'resultados_consolidados'
+        paralelo (bool): Procesar los libros en un pool de procesos
+        max_workers (int): Número de procesos (None = núcleos disponibles)
+        forzar (bool): Reprocesar los libros aunque su corregido esté al día
+        correccion (str): Corrección global de los valores p consolidados
+        formatos: Formatos de los resultados consolidados
+        almacen (str): Raíz de un AlmacenParquetFAC donde escribir también los corregidos (opcional)
+    """
+    procesador = ProcesadorLotesFAC(directorio, patron, salida, paralelo, max_workers, forzar, correccion, almacen)
+    procesador.ejecutar()
+    procesador.consolidar(os.path.join(salida if salida is not None else directorio, 'resultados_consolidados'),
+                          formatos)
+    return procesador
 
-# Hijos con Padre Vive
-cruce_hijos_padre = pd.crosstab(df['HIJOS'], df['PADRE_VIVE'], margins=True)
-print("\n=== Cruce HIJOS vs PADRE_VIVE ===")
-print(cruce_hijos_padre)
+# ==============================================================
+# MÓDULO: COMPARACIÓN INTERANUAL
+# ==============================================================
 
-import matplotlib.pyplot as plt
+# Nombre canónico -> nombres con que la columna aparece en otros años. Se comparan
+# sin tildes, sin mayúsculas y con el mojibake deshecho ('CATEGORÃ\x8dA' = 'CATEGORÍA')
+ALIAS_COLUMNAS = {
+    'SEXO': ('SEXO_BIOLOGICO',),
+    'GENERO': ('IDENTIDAD_DE_GENERO',),
+    'CATEGORIA': ('CATEGORIA_PERSONAL', 'TIPO_DE_PERSONAL'),
+    'GRADO': ('GRADO_MILITAR', 'RANGO'),
+    'ESTADO_CIVIL': ('ESTADO_CIVIL_ACTUAL',),
+    'NIVEL_EDUCATIVO': ('NIVEL_DE_EDUCACION', 'NIVEL_EDUCACION', 'ESCOLARIDAD'),
+    'UNIDAD': ('UNIDAD_MILITAR', 'UNIDAD_DE_TRABAJO'),
+    'EDAD2': ('EDAD', 'EDAD_ACTUAL'),
+}
 
-# Cruces
-madre = pd.crosstab(df['HIJOS'], df['MADRE_VIVE'])
-padre = pd.crosstab(df['HIJOS'], df['PADRE_VIVE'])
+# Pares de contingencia que se acumulan por año (los del análisis más grado × sexo)
+PARES_INTERANUALES = PARES_ASOCIACION + [('GRADO_LOW', 'SEXO_UP')]
 
-# Unimos los dataframes para graficar juntos
-cruce = pd.concat({"Madre Vive": madre, "Padre Vive": padre}, axis=1)
-
-# Gráfico de barras apiladas
-cruce.plot(kind="bar", figsize=(9,6))
-plt.title("Relación entre Hijos y si Madre o Padre Vive")
-plt.xlabel("¿Tiene Hijos?")
-plt.ylabel("Número de Personas")
-plt.xticks(rotation=0)
-plt.show()
-
-"""Relacion entre categoria y maltrato intrafamiliar"""
-
-import matplotlib.pyplot as plt
-import pandas as pd
+# Índices cuyo cambio entre años se prueba (como cambio de la proporción que los define)
+INDICES_CON_PRUEBA = ('indice_masculinidad', 'indice_dependencia')
 
-# Gráfico de barras agrupadas por CATEGORIA
-cruce_graf = pd.crosstab(df['CATEGORIA'], df['MALTRATO_INTRAFAMILIAR'])
-cruce_graf.plot(kind="bar", figsize=(8,5))
 
-plt.title("Relación entre Categoría y Maltrato Intrafamiliar")
-plt.xlabel("Categoría")
-plt.ylabel("Número de Personas")
-plt.xticks(rotation=0)
-plt.legend(title="Maltrato Intrafamiliar")
-plt.show()
+def _clave_columna(nombre) -> str:
+    """Nombre de columna comparable: mojibake deshecho, sin tildes, en mayúsculas y con '_'"""
+    texto = str(nombre).strip()
+    for codificacion in ('cp1252', 'latin-1'):
+        try:
+            texto = texto.encode(codificacion).decode('utf-8')
+            break
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            continue
+    texto = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^0-9A-Z]+', '_', texto.upper()).strip('_')
 
-import pandas as pd
 
-# Tabla de contingencia
-cruce_graf = pd.crosstab(df['CATEGORIA'], df['MALTRATO_INTRAFAMILIAR'])
+def alinear_esquema(columnas, alias: dict = ALIAS_COLUMNAS) -> dict:
+    """
+    Columnas de un archivo que corresponden a columnas canónicas
 
-# Calcular porcentajes por fila
-cruce_pct = cruce_graf.div(cruce_graf.sum(axis=1), axis=0) * 100
+    Una coincidencia con el nombre canónico tiene prioridad sobre un alias (si
+    un año trae EDAD y EDAD2, se usa EDAD2).
 
-# Mostrar tabla de porcentajes
-print("Porcentajes por categoría:")
-print(cruce_pct.round(1))  # redondea a 1 decimal
+    Args:
+        columnas: Nombres de columna tal como están en el archivo
+        alias (dict): Nombre canónico -> variantes (ver ALIAS_COLUMNAS)
 
-# ==============================================================
-# ANALISIS DEMOGRAFICO
-# ==============================================================
+    Returns:
+        dict: {columna del archivo: nombre canónico}
+    """
+    indice = {}
+    for canonica in alias:
+        indice[_clave_columna(canonica)] = (0, canonica)
+    for canonica, variantes in alias.items():
+        for variante in variantes:
+            indice.setdefault(_clave_columna(variante), (1, canonica))
+
+    candidatas = sorted((indice[_clave_columna(c)] + (posicion, c)) for posicion, c in enumerate(columnas)
+                        if _clave_columna(c) in indice)
+    mapeo = {}
+    for _, canonica, _, columna in candidatas:
+        if canonica not in mapeo.values():
+            mapeo[columna] = canonica
+    return mapeo
+
+
+def leer_encabezado(archivo: str) -> list:
+    """Nombres de columna de un archivo Parquet, CSV o Excel sin leer sus filas"""
+    extension = archivo.lower().rsplit('.', 1)[-1]
+    if extension == 'parquet':
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(archivo).names)
+    if extension == 'csv':
+        return pd.read_csv(archivo, nrows=0).columns.tolist()
+    return pd.read_excel(archivo, nrows=0).columns.tolist()
+
+
+def anio_de_archivo(archivo: str) -> int:
+    """Año en el nombre del archivo (JEFAB_2025_corregido.xlsx -> 2025)"""
+    coincidencia = re.search(r'(?<!\d)(19|20)\d{2}(?!\d)', os.path.basename(archivo))
+    if coincidencia is None:
+        raise ValueError(f"No se encontró el año en el nombre '{archivo}'; indique {{año: archivos}}")
+    return int(coincidencia.group(0))
+
+
+def _agregar_archivo_interanual(archivo: str, alias: dict = ALIAS_COLUMNAS):
+    """
+    Estadísticos suficientes de un archivo con el esquema alineado
 
-# ==============================================================
-# PASO 1: IMPORTAR LIBRERÍAS
-# ==============================================================
+    Returns:
+        tuple: (archivo, EstadisticosSuficientes, {'renombradas': {...}, 'faltantes': [...]})
+    """
+    mapeo = alinear_esquema(leer_encabezado(archivo), alias)
+    df = leer_columnas(archivo, list(mapeo)).rename(columns=mapeo)
+    df = AnalizadorDemograficoFAC(archivo, None).preparar_lote(df)
+    esquema = {'renombradas': {origen: destino for origen, destino in mapeo.items() if origen != destino},
+               'faltantes': [c for c in alias if c not in mapeo.values()]}
+    return archivo, EstadisticosSuficientes.desde_df(df, pares=PARES_INTERANUALES), esquema
 
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 
+def _prueba_homogeneidad(tabla: np.ndarray) -> tuple:
+    """
+    Compara dos distribuciones (filas = años): Fisher en 2×2 con esperados < 5, Chi-cuadrado si no
 
-# ==============================================================
-# PASO 2: CARGAR EL ARCHIVO DE DATOS
-# ==============================================================
+    Returns:
+        tuple: (prueba, estadístico, valor p); valor p NaN si no hay nada que comparar
+    """
+    tabla = np.asarray(tabla, dtype=float)
+    tabla = tabla[:, tabla.sum(axis=0) > 0]
+    if tabla.shape[1] < 2 or (tabla.sum(axis=1) == 0).any():
+        return None, np.nan, np.nan
+    esperados = tabla.sum(axis=1, keepdims=True) * tabla.sum(axis=0, keepdims=True) / tabla.sum()
+    if tabla.shape[1] == 2 and esperados.min() < 5:
+        odds_ratio, p_val = stats.fisher_exact(tabla.astype(np.int64))
+        return 'Fisher', odds_ratio, p_val
+    chi2, p_val, _, _ = stats.chi2_contingency(tabla)
+    return 'Chi-cuadrado', chi2, p_val
+
+
+class ComparacionInteranualFAC:
+    """
+    Cambios entre años de los índices demográficos, la pirámide etaria y la
+    distribución grado × sexo.
+
+    Cada archivo se lee solo con sus columnas demográficas, renombradas a los
+    nombres canónicos con ALIAS_COLUMNAS, y se reduce en un pool de procesos a
+    sus estadísticos suficientes; los archivos de un mismo año (p. ej. uno por
+    fuerza) se fusionan. Las tablas de cambios comparan cada año con el
+    anterior, y los valores p de sus pruebas se corrigen en el registro.
+    """
 
-archivo = '../JEFAB_2024_corregido.xlsx'
-df = pd.read_excel(archivo)
+    def __init__(self, archivos, alias: dict = ALIAS_COLUMNAS, paralelo: bool = True, max_workers: int = None,
+                 correccion: str = 'bh', alpha: float = 0.05):
+        """
+        Args:
+            archivos: Datasets corregidos, como lista (el año se toma del nombre) o {año: ruta o rutas}
+            alias (dict): Variantes de nombre de columna por nombre canónico
+            paralelo (bool): Si es False, los archivos se leen en este proceso
+            max_workers (int): Número de procesos (None = núcleos disponibles)
+            correccion (str): Corrección de los valores p de los cambios (ver RegistroPruebas)
+            alpha (float): Nivel de significancia
+        """
+        if not isinstance(archivos, dict):
+            agrupados = {}
+            for archivo in archivos:
+                agrupados.setdefault(anio_de_archivo(archivo), []).append(archivo)
+            archivos = agrupados
+        self.archivos = {int(anio): [rutas] if isinstance(rutas, str) else list(rutas)
+                         for anio, rutas in sorted(archivos.items())}
+        if len(self.archivos) < 2:
+            raise ValueError("Se necesitan al menos dos años para comparar")
+        self.alias = alias
+        self.paralelo = paralelo
+        self.max_workers = max_workers
+        self.alpha = alpha
+        self.registro = RegistroPruebas(correccion, alpha)
+        self.suficientes = {}
+        self.esquemas = {}
+        self.resultados = {}
 
-print("El archivo se cargó con éxito. Primeras 5 filas:")
-print(df.head())
-print("\nInformación general del DataFrame:")
-df.info()
+    @property
+    def anios(self) -> list:
+        return list(self.archivos)
 
+    def _pares_anios(self) -> list:
+        return list(zip(self.anios[:-1], self.anios[1:]))
 
-# ==============================================================
-# PASO 3: EXPLORACIÓN INICIAL DE LOS DATOS
-# ==============================================================
+    @PERFILADOR.perfilar('interanual_agregados')
+    def agregar(self) -> dict:
+        """Estadísticos suficientes por año (un trabajo por archivo)"""
+        trabajos = [archivo for rutas in self.archivos.values() for archivo in rutas]
+        if not self.paralelo or len(trabajos) == 1:
+            resultados = [_agregar_archivo_interanual(archivo, self.alias) for archivo in trabajos]
+        else:
+            resultados = ejecutar_en_procesos(_agregar_archivo_interanual,
+                                              [(archivo, self.alias) for archivo in trabajos], self.max_workers)
+
+        por_archivo = {archivo: (suficientes, esquema) for archivo, suficientes, esquema in resultados}
+        for anio, rutas in self.archivos.items():
+            acumulado = EstadisticosSuficientes(pares=PARES_INTERANUALES)
+            for archivo in rutas:
+                suficientes, self.esquemas[archivo] = por_archivo[archivo]
+                acumulado.fusionar(suficientes)
+            self.suficientes[anio] = acumulado
+        return self.suficientes
+
+    def ejecutar(self) -> dict:
+        """Agregados por año, tablas de cambios y pruebas"""
+        if not self.suficientes:
+            self.agregar()
+        self.comparar_indices()
+        self.comparar_piramide()
+        self.comparar_grado_sexo()
+        self.imprimir()
+        return self.resultados
+
+    # ---------------- Tablas de cambios ----------------
+
+    def _agregar_deltas(self, tabla: pd.DataFrame, prefijo: str = 'Δ') -> pd.DataFrame:
+        """Agrega una columna de cambio por cada par de años consecutivos"""
+        for anterior, actual in self._pares_anios():
+            tabla[f"{prefijo} {anterior}→{actual}"] = tabla[str(actual)] - tabla[str(anterior)]
+        return tabla
+
+    def _registrar(self, etiqueta: str, prueba: str, estadistico: float, p_val: float):
+        if prueba is not None:
+            self.registro.registrar('interanual', etiqueta, p_val, prueba, estadistico)
+
+    @PERFILADOR.perfilar('interanual_indices')
+    def comparar_indices(self) -> pd.DataFrame:
+        """
+        Índices demográficos por año y su cambio. El cambio del índice de
+        masculinidad (proporción de hombres) y del de dependencia (proporción de
+        menores de 30 y mayores de 50) se prueba con Chi-cuadrado 2×2.
+        """
+        indices, proporciones = {}, {}
+        for anio, suficientes in self.suficientes.items():
+            print(f"\n--- AÑO {anio} ---")
+            indices[str(anio)] = AnalisisEstadisticoFAC(None, suficientes).calcular_indices_demograficos()
+
+            sexo = suficientes.conteos.get('SEXO_UP', pd.Series(dtype=np.int64))
+            histograma = suficientes.histogramas.get('EDAD2')
+            histograma = histograma.total() if histograma is not None else None
+            dependientes = histograma.contar(hasta=30) + histograma.contar(desde=50) if histograma is not None else 0
+            activos = histograma.contar(desde=30, hasta=50) if histograma is not None else 0
+            proporciones[anio] = {'indice_masculinidad': (sexo.get('HOMBRE', 0), sexo.get('MUJER', 0)),
+                                  'indice_dependencia': (dependientes, activos)}
+
+        tabla = self._agregar_deltas(pd.DataFrame(indices))
+        for anterior, actual in self._pares_anios():
+            columna = f"p {anterior}→{actual}"
+            tabla[columna] = np.nan
+            for indice in INDICES_CON_PRUEBA:
+                prueba, estadistico, p_val = _prueba_homogeneidad([proporciones[anterior][indice],
+                                                                   proporciones[actual][indice]])
+                tabla.loc[indice, columna] = p_val
+                self._registrar(f"{indice} {anterior}→{actual}", prueba, estadistico, p_val)
+        tabla.index.name = 'indice'
+        self.resultados['indices'] = tabla
+        return tabla
+
+    @PERFILADOR.perfilar('interanual_piramide')
+    def comparar_piramide(self) -> pd.DataFrame:
+        """
+        Pirámide etaria (% del total de cada año por sexo y grupo etario) y su
+        cambio en puntos porcentuales. Por cada par de años se prueba el cambio de
+        la distribución conjunta (Chi-cuadrado) y de la edad (motor de diferencias).
+        """
+        conteos = {}
+        por_anio = {}
+        for anio, suficientes in self.suficientes.items():
+            histograma = suficientes.histogramas.get('EDAD2')
+            if histograma is None or 'SEXO_UP' not in histograma.estratos.names:
+                continue
+            piramide = histograma.marginal('SEXO_UP').agrupar(BINS_ETARIOS, GRUPOS_ETARIOS)
+            piramide = piramide.reindex(['HOMBRE', 'MUJER'], fill_value=0)
+            conteos[anio] = piramide.stack()
+            por_anio[anio] = histograma.total().conteos
+
+        if len(conteos) < 2:
+            print("No se puede comparar la pirámide etaria - EDAD2 o SEXO no disponibles")
+            return None
+        conteos = pd.DataFrame(conteos).fillna(0)
+        tabla = self._agregar_deltas((conteos / conteos.sum() * 100).rename(columns=str))
+        tabla.index.names = ['SEXO_UP', 'GRUPO_ETARIO']
+
+        motor = MotorDiferenciasSubgrupos(alpha=self.alpha)
+        for anterior, actual in self._pares_anios():
+            if anterior not in conteos or actual not in conteos:
+                continue
+            prueba, estadistico, p_val = _prueba_homogeneidad(conteos[[anterior, actual]].to_numpy().T)
+            self._registrar(f"piramide {anterior}→{actual}", prueba, estadistico, p_val)
+
+            # Edad: mismo motor que las diferencias por subgrupo, con el año como grupo
+            ancho = max(len(por_anio[anterior]), len(por_anio[actual]))
+            edades = HistogramaEdades(np.vstack([np.pad(por_anio[a], (0, ancho - len(por_anio[a])))
+                                                 for a in (anterior, actual)]),
+                                      pd.Index([anterior, actual], name='AÑO'))
+            resultado = motor.evaluar_grilla(['EDAD2'], ['AÑO'], {'EDAD2': edades}).get('EDAD2×AÑO')
+            if resultado:
+                self._registrar(f"EDAD2 {anterior}→{actual}", resultado['prueba'], resultado['estadistico'],
+                                resultado['p_val'])
+        self.resultados['piramide'] = tabla
+        return tabla
 
-print("\nDimensiones del DataFrame (filas, columnas):")
-print(df.shape)
+    @PERFILADOR.perfilar('interanual_grado_sexo')
+    def comparar_grado_sexo(self) -> pd.DataFrame:
+        """
+        Distribución de grados (% de cada año), porcentaje de mujeres por grado y
+        sus cambios. Por cada par de años se prueba la distribución de grados y,
+        en cada grado, la proporción de mujeres.
+        """
+        tablas = {anio: suficientes.tablas.get(('GRADO_LOW', 'SEXO_UP'))
+                  for anio, suficientes in self.suficientes.items()}
+        tablas = {anio: t.reindex(columns=['HOMBRE', 'MUJER'], fill_value=0) for anio, t in tablas.items()
+                  if t is not None}
+        if len(tablas) < 2:
+            print("No se puede comparar grado × sexo - GRADO o SEXO no disponibles")
+            return None
 
-print("\nEstadísticas descriptivas de las columnas numéricas:")
-print(df.describe())
+        grados = pd.Index(sorted(set().union(*(t.index for t in tablas.values()))), name='GRADO_LOW')
+        orden = OFICIALES_ORDER_LOW + SUBOF_ORDER_LOW
+        grados = grados[np.argsort([orden.index(g) if g in orden else len(orden) for g in grados], kind='stable')]
+        tablas = {anio: t.reindex(grados, fill_value=0) for anio, t in tablas.items()}
+        totales = pd.DataFrame({anio: t.sum(axis=1) for anio, t in tablas.items()})
+
+        distribucion = self._agregar_deltas((totales / totales.sum() * 100).rename(columns=str))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mujeres = pd.DataFrame({anio: t['MUJER'] / t.sum(axis=1) * 100 for anio, t in tablas.items()})
+        mujeres = self._agregar_deltas(mujeres.rename(columns=str), prefijo='Δ % mujeres')
+        tabla = distribucion.join(mujeres, rsuffix=' % mujeres')
+
+        for anterior, actual in self._pares_anios():
+            if anterior not in tablas or actual not in tablas:
+                continue
+            prueba, estadistico, p_val = _prueba_homogeneidad(totales[[anterior, actual]].to_numpy().T)
+            self._registrar(f"distribucion_grado {anterior}→{actual}", prueba, estadistico, p_val)
+            columna = f"p % mujeres {anterior}→{actual}"
+            tabla[columna] = np.nan
+            for grado in grados:
+                prueba, estadistico, p_val = _prueba_homogeneidad([tablas[anterior].loc[grado],
+                                                                   tablas[actual].loc[grado]])
+                tabla.loc[grado, columna] = p_val
+                self._registrar(f"mujeres {grado} {anterior}→{actual}", prueba, estadistico, p_val)
+        self.resultados['grado_sexo'] = tabla
+        return tabla
+
+    # ---------------- Salidas ----------------
+
+    def pruebas(self) -> pd.DataFrame:
+        """Pruebas de los cambios con p, q-valor y significancia ajustada"""
+        return self.registro.tabla()
+
+    def imprimir(self):
+        """Alineación de esquemas, tablas de cambios y pruebas significativas tras la corrección"""
+        print(f"\n{'=' * 60}\nCOMPARACIÓN INTERANUAL ({', '.join(map(str, self.anios))})\n{'=' * 60}")
+        for archivo, esquema in self.esquemas.items():
+            if esquema['renombradas'] or esquema['faltantes']:
+                renombradas = ', '.join(f"{o!r} → {d}" for o, d in esquema['renombradas'].items())
+                print(f"   - {archivo}: renombradas [{renombradas}] faltantes {esquema['faltantes']}")
+        titulos = {'indices': 'ÍNDICES DEMOGRÁFICOS', 'piramide': 'PIRÁMIDE ETARIA (% del total)',
+                   'grado_sexo': 'GRADO × SEXO (% del total y % de mujeres por grado)'}
+        with pd.option_context('display.width', 160, 'display.max_columns', None,
+                               'display.float_format', '{:.2f}'.format):
+            for clave, titulo in titulos.items():
+                if self.resultados.get(clave) is not None:
+                    print(f"\n{titulo}:")
+                    print(self.resultados[clave])
+        self.registro.imprimir()
+
+    def exportar(self, directorio: str) -> list:
+        """
+        Escribe las tablas de cambios y las pruebas en Parquet, y la alineación de esquemas en JSON
 
-print("\nConteo de valores nulos por columna:")
-print(df.isnull().sum())
+        Args:
+            directorio (str): Carpeta de salida
+        """
+        os.makedirs(directorio, exist_ok=True)
+        archivos = []
+        tablas = {clave: tabla.reset_index() for clave, tabla in self.resultados.items() if tabla is not None}
+        tablas['pruebas'] = self.pruebas()
+        for clave, tabla in tablas.items():
+            ruta = os.path.join(directorio, f"{clave}.parquet")
+            tabla.to_parquet(ruta, index=False)
+            archivos.append(ruta)
+        ruta = os.path.join(directorio, 'esquemas.json')
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(self.esquemas, f, ensure_ascii=False, indent=2)
+        archivos.append(ruta)
+        print(f"\nComparación interanual exportada en '{directorio}' ({len(archivos)} archivos)")
+        return archivos
+
+
+def ejecutar_comparacion_interanual(archivos, salida: str = 'interanual', paralelo: bool = True,
+                                   max_workers: int = None, correccion: str = 'bh') -> ComparacionInteranualFAC:
+    """
+    Compara los datasets corregidos de varios años y exporta las tablas de cambios
 
-print("=== INFORMACIÓN GENERAL ===")
-print(f"Total de registros: {len(df)}")
-print(f"Total de columnas: {len(df.columns)}")
+    Args:
+        archivos: Datasets corregidos (lista, con el año en el nombre, o {año: rutas})
+        salida (str): Carpeta de salida (None = no exportar)
+        paralelo (bool): Leer los archivos en un pool de procesos
+        max_workers (int): Número de procesos (None = núcleos disponibles)
+        correccion (str): Corrección de los valores p de los cambios
+    """
+    comparacion = ComparacionInteranualFAC(archivos, paralelo=paralelo, max_workers=max_workers,
+                                           correccion=correccion)
+    comparacion.ejecutar()
+    if salida:
+        comparacion.exportar(salida)
+    return comparacion
 
 # ==============================================================
-# PASO 4: CONFIGURACIÓN PARA VISUALIZACIONES
+# MÓDULO: LÍNEA DE COMANDOS Y SELECCIÓN DE ETAPAS
 # ==============================================================
 
-sns.set_theme(style="whitegrid")
+# Etapa -> (descripción, etapas previas requeridas)
+ETAPAS = {
+    'clean': ('Limpieza de encoding, texto y variantes', ()),
+    'impute': ('Imputación lógica y MICE; escribe el dataset corregido', ('clean',)),
+    'stats': ('Índices, estructura etaria, asociaciones y diferencias', ('impute',)),
+    'plots': ('Gráficos demográficos', ('impute',)),
+    'report': ('Resumen ejecutivo y respuestas clave', ('stats',)),
+}
 
 
-# ==============================================================
-# FUNCIONES AUXILIARES
-# ==============================================================
+class PipelineFAC:
+    """
+    Ejecuta las etapas pedidas y solo las etapas previas que hacen falta.
 
-# Función para agregar etiquetas numéricas a las barras
-def agregar_valores(ax, orient="v"):
-    if orient == "v":  # barras verticales
-        for p in ax.patches:
-            ax.annotate(f'{int(p.get_height())}',
-                        (p.get_x() + p.get_width() / 2., p.get_height()),
-                        ha='center', va='bottom', fontsize=9)
-    else:  # barras horizontales
-        for p in ax.patches:
-            ax.annotate(f'{int(p.get_width())}',
-                        (p.get_width(), p.get_y() + p.get_height() / 2.),
-                        ha='left', va='center', fontsize=9)
-
-
-# ==============================================================
-# GRÁFICOS UNIVARIADOS
-# ==============================================================
-
-# Gráfico 1: Distribución de Edad
-plt.figure(figsize=(10, 6))
-sns.histplot(df['EDAD2'], bins=20, kde=True, color='dodgerblue')
-plt.title('Distribución de la Edad del Personal', fontsize=16, fontweight='bold')
-plt.xlabel('Edad (años)')
-plt.ylabel('Frecuencia')
-plt.savefig('grafico_distribucion_edad.png')
-
-# Análisis de edad
-print("\n=== ANÁLISIS DE EDAD ===")
-print(f"Edad promedio: {df['EDAD2'].mean():.1f} años")
-print(f"Edad mínima: {df['EDAD2'].min()} años")
-print(f"Edad máxima: {df['EDAD2'].max()} años")
-
-# Gráfico 2: Distribución de Género
-plt.figure(figsize=(8, 6))
-ax = sns.countplot(x='SEXO', data=df, order=df['SEXO'].value_counts().index, palette='viridis')
-plt.title('Distribución por Género', fontsize=16, fontweight='bold')
-plt.xlabel('Género')
-plt.ylabel('Cantidad')
-agregar_valores(ax, orient="v")
-plt.savefig('grafico_distribucion_genero.png')
-
-# Análisis de género
-print("\n=== ANÁLISIS DE GÉNERO ===")
-print(df['GENERO'].value_counts())
-
-
-# Gráfico 3: Distribución por Categoría Militar
-plt.figure(figsize=(12, 7))
-ax = sns.countplot(y='CATEGORIA', data=df, order=df['CATEGORIA'].value_counts().index, palette='plasma')
-plt.title('Distribución por Categoría Militar', fontsize=16, fontweight='bold')
-plt.xlabel('Cantidad')
-plt.ylabel('Categoría')
-agregar_valores(ax, orient="h")
-plt.savefig('grafico_distribucion_categoria.png')
-
-# Gráfico 4: Distribución por Grado Militar (sin "No responde")
-df_grado = df[df['GRADO'].str.lower() != "no responde"]
-plt.figure(figsize=(12, 10))
-ax = sns.countplot(y='GRADO', data=df_grado, order=df_grado['GRADO'].value_counts().index, palette='magma')
-plt.title('Distribución por Grado Específico', fontsize=16, fontweight='bold')
-plt.xlabel('Cantidad')
-plt.ylabel('Grado')
-agregar_valores(ax, orient="h")
-plt.tight_layout()
-plt.savefig('grafico_distribucion_grado.png')
-
-# Gráfico 5: Distribución por Estado Civil
-plt.figure(figsize=(12, 7))
-ax = sns.countplot(y='ESTADO_CIVIL', data=df, order=df['ESTADO_CIVIL'].value_counts().index, palette='cividis')
-plt.title('Distribución por Estado Civil', fontsize=16, fontweight='bold')
-plt.xlabel('Cantidad')
-plt.ylabel('Estado Civil')
-agregar_valores(ax, orient="h")
-plt.savefig('grafico_distribucion_estado_civil.png')
-
-# Gráfico 6: Distribución por Nivel Educativo
-plt.figure(figsize=(12, 8))
-ax = sns.countplot(y='NIVEL_EDUCATIVO', data=df,
-                   order=df['NIVEL_EDUCATIVO'].value_counts().index, palette='inferno')
-plt.title('Distribución por Nivel Educativo', fontsize=16, fontweight='bold')
-plt.xlabel('Cantidad')
-plt.ylabel('Nivel Educativo')
-agregar_valores(ax, orient="h")
-plt.tight_layout()
-plt.savefig('grafico_distribucion_nivel_educativo.png')
-
-
-# ==============================================================
-# GRÁFICOS BIVARIADOS
-# ==============================================================
-
-# Gráfico 7: Edad por Categoría Militar
-plt.figure(figsize=(10, 7))
-sns.boxplot(x='CATEGORIA', y='EDAD2', data=df, palette='muted')
-plt.title('Distribución de Edad por Categoría Militar', fontsize=16, fontweight='bold')
-plt.xlabel('Categoría')
-plt.ylabel('Edad (años)')
-plt.savefig('grafico_edad_por_categoria.png')
-
-# Gráfico 8: Estado Civil por Género
-plt.figure(figsize=(12, 8))
-ax = sns.countplot(y='ESTADO_CIVIL', hue='SEXO', data=df,
-                   order=df['ESTADO_CIVIL'].value_counts().index, palette='coolwarm')
-plt.title('Distribución de Estado Civil por Género', fontsize=16, fontweight='bold')
-plt.xlabel('Cantidad')
-plt.ylabel('Estado Civil')
-plt.legend(title='Género')
-for container in ax.containers:
-    ax.bar_label(container, fmt='%d', label_type='edge', fontsize=8)
-plt.savefig('grafico_estado_civil_por_genero.png')
-
-# Gráfico 9: Grado Militar por Género (sin "No responde")
-plt.figure(figsize=(12, 8))
-ax = sns.countplot(y='GRADO', hue='SEXO', data=df_grado,
-                   order=df_grado['GRADO'].value_counts().index, palette='coolwarm')
-plt.title('Distribución de Grado Militar por Género', fontsize=16, fontweight='bold')
-plt.xlabel('Cantidad')
-plt.ylabel('Grado')
-plt.legend(title='Género')
-for container in ax.containers:
-    ax.bar_label(container, fmt='%d', label_type='edge', fontsize=8)
-plt.tight_layout()
-plt.savefig('grafico_grado_por_genero.png')
-
-# Gráfico 10: Relación entre Nivel Educativo y Grado Militar (sin "No responde")
-
-# Filtrar datos quitando "No responde" en GRADO y NIVEL_EDUCATIVO
-df_rel = df[
-    (df['GRADO'].str.lower() != "no responde") &
-    (df['NIVEL_EDUCATIVO'].str.lower() != "no responde")
-]
+    Como en make, una etapa previa con archivo de salida (clean, impute) se
+    reutiliza si ese archivo existe y es más reciente que su entrada; así un
+    trabajo que solo necesita las estadísticas no vuelve a limpiar ni imputar.
+    Las etapas pedidas explícitamente siempre se ejecutan.
+    """
 
-plt.figure(figsize=(14, 10))
-ax = sns.countplot(
-    y='GRADO', hue='NIVEL_EDUCATIVO',
-    data=df_rel,
-    order=df_rel['GRADO'].value_counts().index,
-    palette='Spectral'
-)
+    def __init__(self, entrada: str = ARCHIVO_CRUDO, limpio: str = ARCHIVO_LIMPIO,
+                 corregido: str = ARCHIVO_CORREGIDO, salida: str = '', perfil_graficos: str = PERFIL_POR_DEFECTO,
+                 paquete_pdf: str = None, por_unidad: bool = False, forzar: bool = False,
+                 formatos_resultados=('json', 'parquet'), correccion: str = 'bh'):
+        """
+        Args:
+            entrada (str): Base de datos original (Excel)
+            limpio (str): Dataset limpio intermedio (salida de clean)
+            corregido (str): Dataset corregido (salida de impute, entrada del análisis)
+            salida (str): Carpeta para gráficos, resultados y reporte ('' = directorio actual)
+            perfil_graficos (str): Perfil de salida de los gráficos
+            paquete_pdf (str): PDF con todos los gráficos (opcional)
+            por_unidad (bool): Generar también los gráficos por UNIDAD
+            forzar (bool): Reejecutar las etapas previas aunque sus archivos estén al día
+            formatos_resultados: Formatos de los resultados exportados por stats
+            correccion (str): Corrección global de los valores p ('bh' u 'holm', ver RegistroPruebas)
+        """
+        self.entrada = entrada
+        self.limpio = limpio
+        self.corregido = corregido
+        self.salida = salida
+        self.perfil_graficos = perfil_graficos
+        self.paquete_pdf = paquete_pdf
+        self.por_unidad = por_unidad
+        self.forzar = forzar
+        self.formatos_resultados = formatos_resultados
+        self.registro = RegistroPruebas(correccion)
+        self.resultados = {}
+        self.ejecutadas = []
+
+    def ejecutar(self, etapas) -> dict:
+        """Ejecuta las etapas pedidas (en orden) y devuelve sus resultados"""
+        for etapa in etapas:
+            self._resolver(etapa, pedida=True)
+        return self.resultados
+
+    # ---------------- Resolución de dependencias ----------------
+
+    def _al_dia(self, archivo: str, *fuentes) -> bool:
+        """True si `archivo` existe y no es más antiguo que ninguna de sus fuentes"""
+        return not self.forzar and archivo_al_dia(archivo, *fuentes)
+
+    def _resolver(self, etapa: str, pedida: bool = False):
+        if etapa not in ETAPAS:
+            raise ValueError(f"Etapa desconocida: {etapa} (opciones: {', '.join(ETAPAS)})")
+        if etapa in self.resultados:
+            return self.resultados[etapa]
+        with PERFILADOR.etapa(f"etapa {etapa}"):
+            self.resultados[etapa] = getattr(self, f'_etapa_{etapa}')(pedida)
+        return self.resultados[etapa]
+
+    def _anunciar(self, etapa: str):
+        self.ejecutadas.append(etapa)
+        print(f"\n{'=' * 60}\nETAPA {etapa.upper()}: {ETAPAS[etapa][0]}\n{'=' * 60}")
+
+    # ---------------- Etapas ----------------
+
+    def _etapa_clean(self, pedida: bool) -> pd.DataFrame:
+        if not pedida and self._al_dia(self.limpio, self.entrada):
+            print(f"Usando dataset limpio existente: {self.limpio}")
+            return pd.read_excel(self.limpio)
+        self._anunciar('clean')
+        df_limpio = limpiar_datos(cargar_datos_crudos(self.entrada))
+        if pedida:
+            # Solo se escribe el intermedio cuando la limpieza es el objetivo
+            guardar_datos_corregidos(df_limpio, self.limpio)
+        return df_limpio
+
+    def _etapa_impute(self, pedida: bool) -> str:
+        # Transitivo: el corregido vale si es posterior al limpio y al crudo, y el limpio (si existe)
+        # es posterior al crudo; si no, un crudo actualizado dejaría pasar datos viejos
+        limpio_al_dia = not os.path.exists(self.limpio) or self._al_dia(self.limpio, self.entrada)
+        if not pedida and limpio_al_dia and self._al_dia(self.corregido, self.limpio, self.entrada):
+            print(f"Usando dataset corregido existente: {self.corregido}")
+            return self.corregido
+        df_limpio = self._resolver('clean')
+        self._anunciar('impute')
+        guardar_datos_corregidos(imputar_datos(df_limpio), self.corregido)
+        return self.corregido
+
+    def _analizador(self) -> AnalizadorDemograficoFAC:
+        """Carga del dataset corregido, compartida por stats y plots"""
+        if 'carga' not in self.resultados:
+            self.resultados['carga'] = ejecutar_carga(self._resolver('impute'))
+        return self.resultados['carga']
+
+    def _etapa_stats(self, pedida: bool) -> AnalisisEstadisticoFAC:
+        analizador = self._analizador()
+        self._anunciar('stats')
+        return ejecutar_estadisticas(analizador, exportar=os.path.join(self.salida, 'resultados'),
+                                     formatos=self.formatos_resultados, registro=self.registro)
+
+    def _etapa_plots(self, pedida: bool) -> GeneradorGraficosFAC:
+        analizador = self._analizador()
+        self._anunciar('plots')
+        return ejecutar_graficos(analizador, self.perfil_graficos, self.paquete_pdf, self.por_unidad,
+                                 salida=self.salida)
+
+    def _etapa_report(self, pedida: bool) -> GeneradorReportes:
+        estadistico = self._resolver('stats')
+        self._anunciar('report')
+        return ejecutar_reportes(self._analizador(), estadistico, directorio=os.path.join(self.salida, 'reporte'),
+                                 manifiesto_graficos=os.path.join(self.salida, '.cache_graficos.json'))
+
+
+def construir_parser():
+    """Parser de la línea de comandos: una suborden por etapa más 'all'"""
+    parser = argparse.ArgumentParser(
+        description="Análisis demográfico y familiar FAC 2024 por etapas")
+    subparsers = parser.add_subparsers(dest='orden', required=True)
+    for nombre, (descripcion, previas) in list(ETAPAS.items()) + [('all', ('Todas las etapas', ()))]:
+        ayuda = descripcion + (f" (requiere: {', '.join(previas)})" if previas else "")
+        sub = subparsers.add_parser(nombre, help=ayuda, description=ayuda)
+        sub.add_argument('-i', '--entrada', default=ARCHIVO_CRUDO, help="Base de datos original (Excel)")
+        sub.add_argument('--limpio', default=ARCHIVO_LIMPIO, help="Dataset limpio intermedio")
+        sub.add_argument('-c', '--corregido', default=ARCHIVO_CORREGIDO,
+                         help="Dataset corregido (salida de impute y entrada del análisis)")
+        sub.add_argument('-o', '--salida', default='', help="Carpeta de salida de gráficos, resultados y reporte")
+        sub.add_argument('--formatos', nargs='+', default=['json', 'parquet'], choices=['json', 'parquet'],
+                         help="Formatos de los resultados exportados por stats")
+        sub.add_argument('--correccion', default='bh', choices=list(METODOS_CORRECCION),
+                         help="Corrección global de los valores p de todas las pruebas")
+        sub.add_argument('--perfil', default=PERFIL_POR_DEFECTO, choices=list(PERFILES_SALIDA),
+                         help="Perfil de salida de los gráficos")
+        sub.add_argument('--paquete-pdf', default=None, help="Escribir también todos los gráficos en este PDF")
+        sub.add_argument('--por-unidad', action='store_true', help="Generar también los gráficos por UNIDAD")
+        sub.add_argument('-f', '--forzar', action='store_true',
+                         help="Reejecutar las etapas previas aunque sus archivos estén al día")
+        _argumentos_perfil(sub)
+
+    ayuda = "Limpieza e imputación de todos los libros JEFAB de una carpeta y resultados consolidados"
+    sub = subparsers.add_parser('lote', help=ayuda, description=ayuda)
+    sub.add_argument('-d', '--directorio', default='datos', help="Carpeta con los libros de origen")
+    sub.add_argument('--patron', default=PATRON_LOTE, help="Patrón de los libros de origen (glob)")
+    sub.add_argument('-o', '--salida', default=None,
+                     help="Carpeta de los datasets corregidos y resultados consolidados (por defecto, junto a los libros)")
+    sub.add_argument('-j', '--max-workers', type=int, default=None, help="Número de procesos (por defecto, núcleos)")
+    sub.add_argument('--secuencial', action='store_true', help="Procesar los libros uno por uno en este proceso")
+    sub.add_argument('--formatos', nargs='+', default=['json', 'parquet'], choices=['json', 'parquet'],
+                     help="Formatos de los resultados consolidados")
+    sub.add_argument('--correccion', default='bh', choices=list(METODOS_CORRECCION),
+                     help="Corrección global de los valores p consolidados")
+    sub.add_argument('-f', '--forzar', action='store_true',
+                     help="Reprocesar los libros aunque su dataset corregido esté al día")
+    sub.add_argument('--almacen', default=None,
+                     help="Escribir también los corregidos en este almacén Parquet particionado (año/CATEGORIA)")
+    _argumentos_perfil(sub)
+
+    ayuda = "Comparación entre años de índices, pirámide etaria y grado × sexo"
+    sub = subparsers.add_parser('interanual', help=ayuda, description=ayuda)
+    sub.add_argument('archivos', nargs='+', help="Datasets corregidos de cada año (el año se toma del nombre)")
+    sub.add_argument('-o', '--salida', default='interanual', help="Carpeta de las tablas de cambios y pruebas")
+    sub.add_argument('-j', '--max-workers', type=int, default=None, help="Número de procesos (por defecto, núcleos)")
+    sub.add_argument('--secuencial', action='store_true', help="Leer los archivos uno por uno en este proceso")
+    sub.add_argument('--correccion', default='bh', choices=list(METODOS_CORRECCION),
+                     help="Corrección de los valores p de los cambios")
+    _argumentos_perfil(sub)
+
+    ayuda = "Consulta al almacén Parquet particionado (lee solo las particiones y grupos de filas necesarios)"
+    sub = subparsers.add_parser('consulta', help=ayuda, description=ayuda)
+    sub.add_argument('almacen', help="Carpeta raíz del almacén")
+    sub.add_argument('-w', '--filtro', action='append', default=[], metavar='COLUMNA=VALOR[,VALOR...]',
+                     help="Condición de igualdad o pertenencia; se puede repetir (-w ANIO=2024 -w GRADO=t1,t2). "
+                          "El texto se compara sin distinguir mayúsculas ni acentos")
+    sub.add_argument('--columnas', nargs='+', default=None, help="Columnas a mostrar (por defecto, todas)")
+    sub.add_argument('--agrupar', nargs='+', default=None, help="Contar las filas por estas columnas")
+    _argumentos_perfil(sub)
+    return parser
+
+
+def _interpretar_filtros(condiciones) -> dict:
+    """['CATEGORIA=suboficial', 'GRADO=t1,t2', 'ANIO=2024'] -> {columna: valor o lista}"""
+    filtros = {}
+    for condicion in condiciones:
+        columna, separador, valores = condicion.partition('=')
+        if not separador:
+            raise ValueError(f"Filtro inválido: {condicion!r} (se espera COLUMNA=VALOR)")
+        valores = [v.strip() for v in valores.split(',')]
+        filtros[columna.strip()] = valores[0] if len(valores) == 1 else valores
+    return filtros
+
+
+def _argumentos_perfil(sub):
+    """Opciones de perfilado comunes a todas las subórdenes"""
+    sub.add_argument('--traza', default=None,
+                     help="Escribir en este JSON el perfil de cada etapa (tiempo, CPU, memoria, formas)")
+    sub.add_argument('--cprofile', default=None, help="Volcar las estadísticas de cProfile a este archivo .prof")
+    sub.add_argument('--sin-memoria', action='store_true',
+                     help="No medir picos de memoria en la traza (tracemalloc hace más lenta la corrida)")
+
+
+def main(argv=None):
+    """Punto de entrada de la línea de comandos"""
+    args = construir_parser().parse_args(argv)
+    if args.traza or args.cprofile:
+        PERFILADOR.activar(memoria=not args.sin_memoria, cprofile=bool(args.cprofile))
+    try:
+        if args.orden == 'lote':
+            return ejecutar_lote(args.directorio, args.patron, args.salida, paralelo=not args.secuencial,
+                                 max_workers=args.max_workers, forzar=args.forzar, correccion=args.correccion,
+                                 formatos=tuple(args.formatos), almacen=args.almacen)
+        if args.orden == 'interanual':
+            return ejecutar_comparacion_interanual(args.archivos, args.salida, paralelo=not args.secuencial,
+                                                   max_workers=args.max_workers, correccion=args.correccion)
+        if args.orden == 'consulta':
+            return ejecutar_consulta(args.almacen, _interpretar_filtros(args.filtro), args.columnas, args.agrupar)
+        pipeline = PipelineFAC(entrada=args.entrada, limpio=args.limpio, corregido=args.corregido,
+                               salida=args.salida, perfil_graficos=args.perfil, paquete_pdf=args.paquete_pdf,
+                               por_unidad=args.por_unidad, forzar=args.forzar,
+                               formatos_resultados=tuple(args.formatos), correccion=args.correccion)
+        pipeline.ejecutar(list(ETAPAS) if args.orden == 'all' else [args.orden])
+    finally:
+        if PERFILADOR.activo:
+            PERFILADOR.desactivar()
+            PERFILADOR.imprimir()
+            for archivo in PERFILADOR.guardar(args.traza, args.cprofile):
+                print(f"Perfil guardado en '{archivo}'")
+    print(f"\nEtapas ejecutadas: {', '.join(pipeline.ejecutadas) or 'ninguna'}")
+    return pipeline
 
-plt.title('Relación entre Nivel Educativo y Grado Militar', fontsize=16, fontweight='bold')
-plt.xlabel('Cantidad')
-plt.ylabel('Grado Militar')
-plt.legend(title='Nivel Educativo', bbox_to_anchor=(1.05, 1), loc='upper left')
-plt.tight_layout()
-plt.savefig('grafico_nivel_educativo_por_grado.png')
 
 # ==============================================================
-# RESPUESTAS A LAS 3 PREGUNTAS 
+# PUNTO DE ENTRADA PRINCIPAL
 # ==============================================================
 
-# Pregunta 1: Rango de edad más común
-rango_edad = pd.cut(df['EDAD2'], bins=10).value_counts().idxmax()
-print("\nPregunta 1 - Rango de edad más común:", rango_edad)
-
-# Pregunta 2: Diferencias por género
-conteo_genero = df['SEXO'].value_counts()
-print("\nPregunta 2 - Distribución por género:")
-print(conteo_genero)
-
-# Pregunta 3: Grado militar más frecuente (sin 'No responde')
-grado_mas_frecuente = df_grado['GRADO'].mode()[0]
-print("\nPregunta 3 - Grado militar más frecuente:", grado_mas_frecuente)
-
-
-# Mostrar todos los gráficos
-plt.show()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Los gráficos de las pruebas se dibujan sin pantalla
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
@@ -0,0 +1,85 @@
+"""Actualización incremental de AnalisisEstadisticoFAC frente a recalcular desde cero."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import Código_Conjunto as cc
+
+
+def _crudos(n, semilla):
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        'EDAD2': rng.integers(18, 60, n),
+        'SEXO': rng.choice(['Hombre', 'Mujer'], n),
+        'CATEGORIA': rng.choice(['Oficial', 'Suboficial'], n),
+    })
+
+
+def _preparar(df):
+    return cc.AnalizadorDemograficoFAC(None).preparar_lote(df)
+
+
+def _datos(n, semilla):
+    return _preparar(_crudos(n, semilla))
+
+
+def _comparar(analisis, df_esperado):
+    esperado = cc.EstadisticosSuficientes.desde_df(df_esperado)
+    assert analisis.suficientes.n_filas == len(df_esperado)
+    pd.testing.assert_series_equal(analisis.suficientes.conteos['SEXO_UP'].sort_index(),
+                                   esperado.conteos['SEXO_UP'].sort_index(), check_names=False)
+    np.testing.assert_array_equal(analisis.suficientes.histogramas['EDAD2'].total().conteos,
+                                  esperado.histogramas['EDAD2'].total().conteos)
+    pd.testing.assert_frame_equal(analisis.df.sort_index(), df_esperado.sort_index(), check_dtype=False)
+
+
+def test_agregar_lote_con_indice_desde_cero_no_pisa_filas():
+    base, lote = _datos(50, 1), _datos(20, 2)
+    analisis = cc.AnalisisEstadisticoFAC(base)
+    analisis.actualizar(agregar=lote)
+    analisis.actualizar(agregar=lote)
+
+    assert len(analisis.df) == 90
+    assert analisis.df.index.is_unique
+    _comparar(analisis, pd.concat([base, lote, lote], ignore_index=True))
+    assert len(base) == 50   # el DataFrame del llamador no se modifica
+
+
+def test_editar_y_eliminar_coinciden_con_recalcular():
+    base = _datos(60, 3)
+    analisis = cc.AnalisisEstadisticoFAC(base)
+    analisis.actualizar(agregar=_crudos(10, 4))
+    # Solo columnas de origen: SEXO_UP y GRUPO_ETARIO se recalculan
+    cambios = pd.DataFrame({'EDAD2': [99, 18], 'SEXO': ['Mujer', 'Mujer']}, index=[5, 65])
+    analisis.actualizar(editar=cambios, eliminar=[0, 61])
+
+    esperado = pd.concat([_crudos(60, 3), _crudos(10, 4)], ignore_index=True)
+    esperado.loc[cambios.index, cambios.columns] = cambios
+    esperado = _preparar(esperado).drop(index=[0, 61])
+    _comparar(analisis, esperado)
+    assert analisis.df.loc[5, 'SEXO_UP'] == 'MUJER' and analisis.df.loc[65, 'GRUPO_ETARIO'] == '18-25'
+    assert analisis.suficientes.tablas[('GRUPO_ETARIO', 'CATEGORIA_UP')].to_numpy().sum() == len(esperado)
+
+
+def test_etiquetas_desconocidas_lanzan_keyerror_sin_modificar():
+    analisis = cc.AnalisisEstadisticoFAC(_datos(10, 5))
+    with pytest.raises(KeyError):
+        analisis.actualizar(eliminar=[3, 100])
+    with pytest.raises(KeyError):
+        analisis.actualizar(editar=pd.DataFrame({'EDAD2': [30]}, index=[100]))
+    analisis.actualizar(eliminar=[3])
+    with pytest.raises(KeyError):
+        analisis.actualizar(eliminar=[3])
+    assert analisis.suficientes.n_filas == 9
+
+
+def test_analisis_reutiliza_los_estadisticos_del_analizador():
+    analizador = cc.AnalizadorDemograficoFAC(None)
+    analizador.df = pd.DataFrame({'EDAD2': [25, 40, 33], 'SEXO': ['Hombre', 'Mujer', 'Mujer'],
+                                  'CATEGORIA': ['Oficial', 'Suboficial', 'Suboficial']})
+    analizador._preprocesar_datos()
+    estadistico = cc.ejecutar_estadisticas(analizador)
+
+    assert estadistico.suficientes is analizador.suficientes
+    assert analizador.histograma_edades is analizador.suficientes.histogramas['EDAD2']
+    assert analizador.histograma_edades.total().n == 3
@@ -0,0 +1,53 @@
+"""Consultas al almacén Parquet particionado."""
+import os
+
+import pandas as pd
+import pytest
+
+import Código_Conjunto as cc
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def almacen(tmp_path):
+    # Valores como los deja limpiar_datos: sin acentos y en minúsculas
+    df = pd.DataFrame({'CATEGORIA': ['suboficial', 'suboficial', 'oficial', 'suboficial'],
+                       'GRADO': ['t1', 't2', 'capitan', 't1'],
+                       'SEXO': ['mujer', 'hombre', 'mujer', 'hombre'],
+                       'UNIDAD': ['cacom 1', 'cacom 2', 'cacom 1', 'esufa']})
+    almacen = cc.AlmacenParquetFAC(str(tmp_path / 'almacen'))
+    almacen.escribir(df, 2024, 'JEFAB_2024')
+    return almacen
+
+
+@pytest.mark.parametrize('filtros, filas', [
+    ({'CATEGORIA': 'Suboficial', 'SEXO': 'Mujer', 'GRADO': 'T1'}, 1),
+    ({'GRADO': ['T1', 'T2']}, 3),
+    ({'CATEGORIA': 'SUBOFICIAL', 'ANIO': '2024'}, 3),
+    ({'UNIDAD': 'Cacom 1'}, 2),
+])
+def test_filtros_de_texto_se_normalizan_como_los_datos(almacen, filtros, filas):
+    assert len(almacen.consultar(filtros)) == filas
+    assert almacen.plan(filtros)['archivos'] >= 1
+
+
+def test_filtros_de_linea_de_comandos(almacen):
+    filtros = cc._interpretar_filtros(['CATEGORIA=Suboficial', 'GRADO=T1,T2'])
+    assert sorted(almacen.consultar(filtros)['GRADO']) == ['t1', 't1', 't2']
+
+
+def test_reescribir_un_origen_no_borra_otro_con_el_mismo_prefijo(almacen):
+    df = pd.DataFrame({'CATEGORIA': ['oficial'], 'GRADO': ['t1'], 'SEXO': ['mujer'], 'UNIDAD': ['esufa']})
+    almacen.escribir(df, 2024, 'JEFAB_2024-ARC')
+    almacen.escribir(df, 2024, 'JEFAB_2024')   # antes también borraba los de 'JEFAB_2024-ARC'
+    assert len(almacen.consultar({'ANIO': 2024})) == 2
+    assert all(os.path.basename(a).startswith('JEFAB_2024-ARC-') for a in almacen._archivos_origen('JEFAB_2024-ARC'))
+
+
+def test_origen_distingue_libros_homonimos_en_subcarpetas(tmp_path):
+    procesador = cc.ProcesadorLotesFAC(str(tmp_path))
+    fac = procesador.origen(os.path.join(str(tmp_path), 'FAC', 'JEFAB_2024.xlsx'))
+    arc = procesador.origen(os.path.join(str(tmp_path), 'ARC', 'JEFAB_2024.xlsx'))
+    assert (fac, arc) == ('FAC__JEFAB_2024', 'ARC__JEFAB_2024')
+    assert procesador.origen(os.path.join(str(tmp_path), 'JEFAB_2025.xlsx')) == 'JEFAB_2025'
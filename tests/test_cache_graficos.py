@@ -0,0 +1,56 @@
+"""Caché de gráficos: solo se redibuja lo que cambió."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import Código_Conjunto as cc
+
+
+@pytest.fixture
+def poblacion():
+    rng = np.random.default_rng(5)
+    n = 600
+    crudos = pd.DataFrame({
+        'EDAD2': rng.integers(18, 62, n),
+        'SEXO': rng.choice(['Hombre', 'Mujer'], n),
+        'CATEGORIA': rng.choice(['Oficial', 'Suboficial'], n),
+        'GRADO': rng.choice(['T1', 'T2', 'CT'], n),
+        'ESTADO_CIVIL': rng.choice(['Soltero', 'Casado'], n),
+        'NIVEL_EDUCATIVO': rng.choice(['Técnico', 'Profesional'], n),
+    })
+    return cc.AnalizadorDemograficoFAC(None).preparar_lote(crudos)
+
+
+def test_clave_depende_de_datos_parametros_y_estilo():
+    datos = {'conteos': pd.Series([3, 2], index=['a', 'b'])}
+    clave = cc.CacheGraficos.clave(cc._dibujar_barras_conteo, datos, {'dpi': 100}, {'estilo': '1'})
+    assert clave == cc.CacheGraficos.clave(cc._dibujar_barras_conteo, {'conteos': datos['conteos'].copy()},
+                                           {'dpi': 100}, {'estilo': '1'})
+    otros = [
+        cc.CacheGraficos.clave(cc._dibujar_barras_conteo, {'conteos': pd.Series([3, 1], index=['a', 'b'])},
+                               {'dpi': 100}, {'estilo': '1'}),
+        cc.CacheGraficos.clave(cc._dibujar_barras_conteo, datos, {'dpi': 300}, {'estilo': '1'}),
+        cc.CacheGraficos.clave(cc._dibujar_barras_conteo, datos, {'dpi': 100}, {'estilo': '2'}),
+        cc.CacheGraficos.clave(cc._dibujar_piramide_etaria, datos, {'dpi': 100}, {'estilo': '1'}),
+    ]
+    assert clave not in otros and len(set(otros)) == len(otros)
+
+
+def test_segunda_corrida_reutiliza_y_un_cambio_solo_redibuja_su_grafico(tmp_path, monkeypatch, poblacion):
+    monkeypatch.chdir(tmp_path)
+    primera = cc.GeneradorGraficosFAC(poblacion, paralelo=False)
+    primera.generar_graficos_univariados()
+    assert primera.figuras_creadas and not primera.figuras_reutilizadas
+
+    segunda = cc.GeneradorGraficosFAC(poblacion, paralelo=False)
+    segunda.generar_graficos_univariados()
+    assert segunda.figuras_reutilizadas == primera.figuras_creadas
+
+    cambiada = poblacion.copy()
+    cambiada.loc[0, 'CATEGORIA'] = 'Civil'
+    tercera = cc.GeneradorGraficosFAC(cambiada, paralelo=False)
+    tercera.generar_graficos_univariados()
+    redibujados = set(tercera.figuras_creadas) - set(tercera.figuras_reutilizadas)
+    assert [os.path.basename(a) for a in redibujados] == ['02_distribucion_categoria.png']
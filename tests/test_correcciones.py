@@ -0,0 +1,28 @@
+"""Corrección por comparaciones múltiples frente a statsmodels."""
+import numpy as np
+import pytest
+from statsmodels.stats.multitest import multipletests
+
+import Código_Conjunto as cc
+
+METODOS_STATSMODELS = {'bonferroni': 'bonferroni', 'holm': 'holm', 'bh': 'fdr_bh'}
+
+
+@pytest.fixture
+def p_valores():
+    rng = np.random.default_rng(7)
+    p = np.concatenate([rng.uniform(0, 0.01, 5), rng.uniform(0, 1, 40), [0.03, 0.03, 1.0]])
+    return rng.permutation(p)
+
+
+@pytest.mark.parametrize('metodo', cc.METODOS_CORRECCION)
+def test_ajustar_p_valores_igual_a_statsmodels(p_valores, metodo):
+    esperado = multipletests(p_valores, method=METODOS_STATSMODELS[metodo])[1]
+    np.testing.assert_allclose(cc.ajustar_p_valores(p_valores, metodo), esperado, rtol=1e-12)
+
+
+def test_ajustar_p_valores_conserva_nan(p_valores):
+    con_nan = np.insert(p_valores, 3, np.nan)
+    ajustados = cc.ajustar_p_valores(con_nan, 'bh')
+    assert np.isnan(ajustados[3])
+    np.testing.assert_allclose(np.delete(ajustados, 3), multipletests(p_valores, method='fdr_bh')[1])
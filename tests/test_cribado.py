@@ -0,0 +1,78 @@
+"""Cribado de factores de riesgo: OR univariados frente a statsmodels y ruta L1."""
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.stats.contingency_tables import Table2x2
+
+import Código_Conjunto as cc
+
+
+@pytest.fixture(scope='module')
+def datos():
+    rng = np.random.default_rng(44)
+    n = 1500
+    consumo = rng.choice(['si', 'no'], n, p=[0.2, 0.8])
+    riesgo = np.where(consumo == 'si', 0.45, 0.08)
+    df = pd.DataFrame({
+        'MALTRATO_INTRAFAMILIAR': np.where(rng.random(n) < riesgo, 'si', 'no'),
+        'CONSUMO': consumo,
+        'ESTRATO': rng.choice(['1', '2', '3', '4'], n),
+        'INGRESO': rng.normal(3e6, 8e5, n),
+        'RUIDO': rng.choice(['a', 'b'], n),
+        'ID': [f"id{i}" for i in range(n)],   # demasiados niveles: no es candidata
+    })
+    df.loc[rng.choice(n, 40, replace=False), 'MALTRATO_INTRAFAMILIAR'] = np.nan
+    df.loc[rng.choice(n, 30, replace=False), 'CONSUMO'] = np.nan
+    return df
+
+
+def test_or_de_wald_igual_a_statsmodels(datos):
+    cribado = cc.CribadoFactoresRiesgo(datos, paralelo=False)
+    fila = cribado.cribar().set_index(['columna', 'nivel']).loc[('CONSUMO', 'si')]
+
+    informados = datos.dropna(subset=['MALTRATO_INTRAFAMILIAR', 'CONSUMO'])
+    tabla = pd.crosstab(informados['CONSUMO'], informados['MALTRATO_INTRAFAMILIAR'])
+    referencia = Table2x2(tabla.loc[['si', 'no'], ['si', 'no']].to_numpy())
+    assert fila['or'] == pytest.approx(referencia.oddsratio, rel=1e-9)
+    assert (fila['ic_inf'], fila['ic_sup']) == pytest.approx(referencia.oddsratio_confint(), rel=1e-9)
+    assert fila['p_val'] == pytest.approx(referencia.oddsratio_pvalue(), rel=1e-9)
+    assert fila['n'] == len(informados)
+
+
+def test_bloques_en_paralelo_igual_que_secuencial(datos):
+    secuencial = cc.CribadoFactoresRiesgo(datos, tamano_bloque=2, paralelo=False).cribar()
+    paralelo = cc.CribadoFactoresRiesgo(datos, tamano_bloque=2, paralelo=True, max_workers=2).cribar()
+    pd.testing.assert_frame_equal(secuencial, paralelo)
+    assert 'ID' not in set(secuencial['columna'])
+    assert secuencial['columna'].value_counts()['INGRESO'] == 5   # numérica por quintiles
+
+
+def test_ranking_pone_primero_el_factor_real(datos):
+    pytest.importorskip('sklearn')
+    cribado = cc.CribadoFactoresRiesgo(datos, paralelo=False)
+    ruta = cribado.ruta_penalizada(n_valores=8)
+    assert (ruta.iloc[0] == 0).all()   # el primer C deja todos los coeficientes en cero
+    ranking = cribado.ranking()
+    assert ranking.index[0] == 'CONSUMO'
+    assert ranking.loc['CONSUMO', 'c_entrada'] == ranking['c_entrada'].min()
+    assert list(cribado.ranking(penalizada=False, top=2).index)[0] == 'CONSUMO'
+
+
+def test_ranking_penalizado_sigue_el_orden_de_entrada(datos):
+    pytest.importorskip('sklearn')
+    ranking = cc.CribadoFactoresRiesgo(datos, paralelo=False).ranking()
+    entrada = ranking['c_entrada']
+    assert entrada.dropna().is_monotonic_increasing
+    assert entrada.isna().sum() == 0 or entrada.iloc[-1:].isna().all()   # las que nunca entran, al final
+
+
+def test_ruta_registra_convergencia_por_c(datos):
+    pytest.importorskip('sklearn')
+    from sklearn.exceptions import ConvergenceWarning
+
+    cribado = cc.CribadoFactoresRiesgo(datos, paralelo=False)
+    with pytest.warns(ConvergenceWarning, match='no convergió') as avisos:
+        ruta = cribado.ruta_penalizada(n_valores=6, max_iter=1)
+    assert len([a for a in avisos if issubclass(a.category, ConvergenceWarning)]) == 1
+    assert list(cribado.convergencia.index) == list(ruta.index)
+    assert not cribado.convergencia.all()
@@ -0,0 +1,45 @@
+"""Tablas agregadas de los gráficos frente a pandas."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import Código_Conjunto as cc
+
+
+@pytest.fixture
+def poblacion():
+    rng = np.random.default_rng(11)
+    n = 1_500
+    crudos = pd.DataFrame({
+        'EDAD2': rng.integers(18, 62, n),
+        'SEXO': rng.choice(['Hombre', 'Mujer'], n, p=[0.75, 0.25]),
+        'CATEGORIA': rng.choice(['Oficial', 'Suboficial', 'Civil'], n),
+        'GRADO': rng.choice(['T1', 'T2', 'CT', 'MY'], n),
+        'ESTADO_CIVIL': rng.choice(['Soltero', 'Casado', 'Unión libre'], n),
+        'NIVEL_EDUCATIVO': rng.choice(['Técnico', 'Profesional'], n),
+    })
+    return cc.AnalizadorDemograficoFAC(None).preparar_lote(crudos)
+
+
+def test_conteos_y_tablas_cruzadas_como_pandas(poblacion):
+    datos = cc.DatosGraficosFAC.desde_df(poblacion)
+
+    assert datos.n_filas == len(poblacion)
+    pd.testing.assert_series_equal(datos.conteos('categoria'), poblacion['CATEGORIA'].value_counts(),
+                                   check_names=False)
+    esperado = pd.crosstab(poblacion['SEXO_UP'], poblacion['CATEGORIA_UP'])
+    np.testing.assert_array_equal(datos.tabla_cruzada('sexo_categoria').to_numpy(), esperado.to_numpy())
+    jerarquia = poblacion.value_counts(['CATEGORIA_UP', 'GRADO_LOW', 'SEXO_UP'])
+    assert datos.tablas['jerarquia'].sort_index().tolist() == jerarquia.sort_index().tolist()
+
+
+def test_edades_por_sexo_y_cajas_por_categoria(poblacion):
+    datos = cc.DatosGraficosFAC.desde_df(poblacion)
+
+    por_sexo = dict(zip(datos.histograma_edades.estratos, datos.histograma_edades.n))
+    assert por_sexo == poblacion['SEXO_UP'].value_counts().to_dict()
+    cajas = {c['label']: c for c in datos.estadisticas_caja()}
+    for categoria, edades in poblacion.groupby('CATEGORIA')['EDAD2']:
+        assert cajas[categoria]['med'] == edades.median()
+        assert cajas[categoria]['q1'] == pytest.approx(edades.quantile(0.25))
+        assert cajas[categoria]['mean'] == pytest.approx(edades.mean())
@@ -0,0 +1,97 @@
+"""Motor de diferencias entre subgrupos frente a scipy.stats."""
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+import Código_Conjunto as cc
+
+
+def _grupos(tamanos, generador, semilla):
+    rng = np.random.default_rng(semilla)
+    valores = [generador(rng, n) for n in tamanos]
+    df = pd.DataFrame({'X': np.concatenate(valores),
+                       'G': np.repeat([f"g{i}" for i in range(len(tamanos))], tamanos)})
+    return df, valores
+
+
+def _normal(rng, n):
+    return rng.normal(35, 6, n)
+
+
+def _asimetrica(rng, n):
+    return np.round(rng.lognormal(2, 1.2, n))   # asimétrica y con empates
+
+
+def test_welch_igual_a_ttest_ind():
+    df, (a, b) = _grupos([50, 60], _normal, 1)
+    r = cc.MotorDiferenciasSubgrupos(df).evaluar('X', 'G')
+    esperado = stats.ttest_ind(a, b, equal_var=False)
+    assert r['prueba'] == 't de Welch'
+    assert r['estadistico'] == pytest.approx(esperado.statistic, rel=1e-9)
+    assert r['p_val'] == pytest.approx(esperado.pvalue, rel=1e-9)
+
+
+def test_anova_igual_a_f_oneway():
+    df, valores = _grupos([40, 55, 70], _normal, 2)
+    r = cc.MotorDiferenciasSubgrupos(df).evaluar('X', 'G')
+    esperado = stats.f_oneway(*valores)
+    assert r['prueba'] == 'ANOVA'
+    assert r['estadistico'] == pytest.approx(esperado.statistic, rel=1e-9)
+    assert r['p_val'] == pytest.approx(esperado.pvalue, rel=1e-9)
+
+
+def test_mann_whitney_igual_a_scipy():
+    df, (a, b) = _grupos([20, 25], _asimetrica, 3)
+    r = cc.MotorDiferenciasSubgrupos(df).evaluar('X', 'G')
+    esperado = stats.mannwhitneyu(a, b, alternative='two-sided', method='asymptotic', use_continuity=True)
+    assert r['prueba'] == 'Mann-Whitney U'
+    assert r['estadistico'] == pytest.approx(esperado.statistic)
+    assert r['p_val'] == pytest.approx(esperado.pvalue, rel=1e-9)
+
+
+def test_kruskal_igual_a_scipy():
+    df, valores = _grupos([15, 20, 25, 18], _asimetrica, 4)
+    r = cc.MotorDiferenciasSubgrupos(df).evaluar('X', 'G')
+    esperado = stats.kruskal(*valores)
+    assert r['prueba'] == 'Kruskal-Wallis'
+    assert r['estadistico'] == pytest.approx(esperado.statistic, rel=1e-9)
+    assert r['p_val'] == pytest.approx(esperado.pvalue, rel=1e-9)
+
+
+def test_grupos_pequenos_se_excluyen():
+    df, _ = _grupos([30, 1], _normal, 5)
+    assert cc.MotorDiferenciasSubgrupos(df).evaluar('X', 'G') is None
+
+
+def test_correccion_propia_solo_si_se_pide():
+    df, _ = _grupos([40, 55, 70], _normal, 2)
+    df['H'] = np.tile(['a', 'b'], len(df) // 2 + 1)[:len(df)]
+    sin_correccion = cc.MotorDiferenciasSubgrupos(df).evaluar_grilla(['X'], ['G', 'H'])
+    assert all('p_ajustado' not in r for r in sin_correccion.values())
+
+    holm = cc.MotorDiferenciasSubgrupos(df, metodo_correccion='holm').evaluar_grilla(['X'], ['G', 'H'])
+    p = [holm[k]['p_val'] for k in ('X×G', 'X×H')]
+    np.testing.assert_allclose([holm[k]['p_ajustado'] for k in ('X×G', 'X×H')],
+                               cc.ajustar_p_valores(p, 'holm'))
+
+
+@pytest.mark.parametrize('tamanos', [[50, 60], [40, 55, 70]])
+def test_media_grande_no_pierde_precision(tamanos):
+    # Con Σx² - n·x̄² la t de Welch salía -0.94 frente a -1.96 de scipy
+    df, valores = _grupos(tamanos, lambda rng, n: rng.normal(35, 6, n) + 1e8, 1)
+    r = cc.MotorDiferenciasSubgrupos(df).evaluar('X', 'G')
+    if len(tamanos) == 2:
+        esperado = stats.ttest_ind(*valores, equal_var=False)
+    else:
+        esperado = stats.f_oneway(*valores)
+    assert r['estadistico'] == pytest.approx(esperado.statistic, rel=1e-6)
+    assert r['p_val'] == pytest.approx(esperado.pvalue, rel=1e-6)
+
+
+def test_atajo_clt_solo_si_se_pide():
+    df, _ = _grupos([200, 150], _asimetrica, 6)
+    assert cc.MotorDiferenciasSubgrupos(df).evaluar('X', 'G')['prueba'] == 'Mann-Whitney U'
+    r = cc.MotorDiferenciasSubgrupos(df, n_clt=30).evaluar('X', 'G')
+    assert r['prueba'] == 't de Welch'
+    assert set(r['normalidad'].values()) == {None}
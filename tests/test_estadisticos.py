@@ -0,0 +1,29 @@
+"""Histograma de valores enteros frente a numpy."""
+import numpy as np
+import pytest
+
+import Código_Conjunto as cc
+
+
+def test_histograma_por_bloques_y_fusion():
+    rng = np.random.default_rng(1)
+    datos = rng.integers(18, 65, 10_001).astype(float)
+    datos[::97] = np.nan
+    izquierdo, derecho = cc.HistogramaEnteros(), cc.HistogramaEnteros()
+    for bloque in np.array_split(datos[:6000], 7):
+        izquierdo.actualizar(bloque)
+    for bloque in np.array_split(datos[6000:], 3):
+        derecho.actualizar(bloque)
+    total = izquierdo.fusionar(derecho)
+
+    validos = datos[np.isfinite(datos)]
+    assert total.n == validos.size
+    assert total.media() == pytest.approx(validos.mean(), rel=1e-12)
+    assert total.varianza() == pytest.approx(validos.var(ddof=1), rel=1e-10)
+    np.testing.assert_allclose(total.cuantil([0.1, 0.25, 0.5, 0.9]), np.quantile(validos, [0.1, 0.25, 0.5, 0.9]))
+    assert (total.minimo(), total.maximo()) == (validos.min(), validos.max())
+
+
+def test_histograma_rechaza_negativos():
+    with pytest.raises(ValueError):
+        cc.HistogramaEnteros().actualizar([3, -1])
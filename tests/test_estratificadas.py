@@ -0,0 +1,103 @@
+"""CMH, Breslow–Day e IPF frente a statsmodels y a soluciones cerradas."""
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+from statsmodels.stats.contingency_tables import StratifiedTable
+
+import Código_Conjunto as cc
+
+
+@pytest.fixture
+def tablas_2x2():
+    # Forma (2, 2, K): cuatro estratos con OR distintas
+    return np.array([[[20, 15, 8, 30], [10, 12, 9, 14]],
+                     [[12, 18, 11, 9], [25, 20, 7, 16]]], dtype=float)
+
+
+@pytest.mark.parametrize('correccion', [True, False])
+def test_cmh_2x2_igual_a_statsmodels(tablas_2x2, correccion):
+    esperado = StratifiedTable(tablas_2x2).test_null_odds(correction=correccion)
+    resultado = cc.prueba_cmh(tablas_2x2, correccion=correccion)
+    assert resultado['gl'] == 1
+    assert resultado['estadistico'] == pytest.approx(esperado.statistic, rel=1e-10)
+    assert resultado['p_val'] == pytest.approx(esperado.pvalue, rel=1e-10)
+
+
+def test_or_mantel_haenszel_y_breslow_day_igual_a_statsmodels(tablas_2x2):
+    referencia = StratifiedTable(tablas_2x2)
+    homogeneidad = referencia.test_equal_odds()
+    resultado = cc.odds_ratios_estratificados(tablas_2x2)
+    assert resultado['or_mh'] == pytest.approx(referencia.oddsratio_pooled, rel=1e-10)
+    assert resultado['breslow_day'] == pytest.approx(homogeneidad.statistic, rel=1e-8)
+    assert resultado['p_bd'] == pytest.approx(homogeneidad.pvalue, rel=1e-8)
+    assert resultado['gl_bd'] == tablas_2x2.shape[2] - 1
+
+
+def test_cmh_rxc_un_estrato_es_pearson_escalado():
+    # Con un solo estrato, el estadístico general de asociación es (n-1)/n · X² de Pearson
+    tabla = np.array([[30, 12, 8], [10, 25, 15], [5, 9, 22]], dtype=float)
+    chi2 = stats.chi2_contingency(tabla, correction=False)[0]
+    n = tabla.sum()
+    resultado = cc.prueba_cmh(tabla[:, :, None])
+    assert resultado['gl'] == 4
+    assert resultado['estadistico'] == pytest.approx(chi2 * (n - 1) / n, rel=1e-10)
+
+
+def test_ipf_independencia_condicional_forma_cerrada():
+    # [XS][YS] tiene solución cerrada: m_xys = n_xs · n_ys / n_s
+    rng = np.random.default_rng(5)
+    observada = rng.integers(1, 40, size=(3, 4, 2)).astype(float)
+    ajustada, _ = cc.ajustar_ipf(observada, [(0, 2), (1, 2)])
+    cerrada = (observada.sum(axis=1, keepdims=True) * observada.sum(axis=0, keepdims=True)
+               / observada.sum(axis=(0, 1), keepdims=True))
+    np.testing.assert_allclose(ajustada, cerrada, rtol=1e-8)
+
+
+def test_ipf_asociacion_homogenea_reproduce_margenes():
+    rng = np.random.default_rng(6)
+    observada = rng.integers(1, 40, size=(2, 3, 4)).astype(float)
+    margenes = [(0, 1), (0, 2), (1, 2)]
+    ajustada, iteraciones = cc.ajustar_ipf(observada, margenes, tol=1e-10, max_iter=1000)
+    assert iteraciones < 1000
+    for eje in range(3):
+        np.testing.assert_allclose(ajustada.sum(axis=eje), observada.sum(axis=eje), atol=1e-8)
+
+
+def test_ipf_en_lote_igual_a_tabla_por_tabla():
+    rng = np.random.default_rng(8)
+    lote = rng.integers(1, 30, size=(5, 2, 2, 3)).astype(float)
+    margenes = [(0, 2), (1, 2)]
+    conjunto, _ = cc.ajustar_ipf(lote, margenes, lote=1)
+    for i in range(len(lote)):
+        np.testing.assert_allclose(conjunto[i], cc.ajustar_ipf(lote[i], margenes)[0], rtol=1e-8)
+
+
+def _df_estratificado(semilla, n=600):
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({'X': rng.choice(['si', 'no'], n), 'Y': rng.choice(['a', 'b', 'c'], n),
+                         'A': rng.choice(['o', 'p', 'q'], n), 'B': rng.choice(['h', 'm'], n)})
+
+
+def test_loglineales_de_cuatro_vias():
+    df = _df_estratificado(9)
+    r = cc.PruebasEstratificadas(df).evaluar('X', 'Y', ('A', 'B'))
+    # [XY][XS][YS] con S = A×B coincide con el modelo sobre la tabla plegada
+    plegada = cc.PruebasEstratificadas(df.assign(S=df['A'] + df['B'])).evaluar('X', 'Y', ('S',))
+    for modelo in ('ind_cond', 'homogenea'):
+        assert r[f'g2_{modelo}'] == pytest.approx(plegada[f'g2_{modelo}'], rel=1e-6)
+        assert r[f'gl_{modelo}'] == plegada[f'gl_{modelo}']
+    # [XYA][XS][YS] anida al homogéneo: menos gl y menor devianza
+    assert r['gl_homogenea'] - r['gl_xy_A'] == (2 - 1) * (3 - 1) * (3 - 1)
+    assert r['gl_homogenea'] - r['gl_xy_B'] == (2 - 1) * (3 - 1) * (2 - 1)
+    assert r['g2_xy_A'] <= r['g2_homogenea'] + 1e-8
+    assert 'g2_xy_S' not in plegada
+
+
+def test_combinaciones_de_estratos_vacias_no_suman_gl():
+    df = _df_estratificado(10)
+    df = df[~((df['A'] == 'q') & (df['B'] == 'm'))]
+    r = cc.PruebasEstratificadas(df).evaluar('X', 'Y', ('A', 'B'))
+    assert r['k_estratos'] == 5
+    assert r['gl_ind_cond'] == 5 * (2 - 1) * (3 - 1)
+    assert r['gl_homogenea'] == 4 * (2 - 1) * (3 - 1)
@@ -0,0 +1,16 @@
+"""Análisis familiar con grupos insuficientes."""
+import pandas as pd
+
+import Código_Conjunto as cc
+
+
+def test_edad_por_estado_civil_no_evaluable(tmp_path, capsys):
+    df = pd.DataFrame({'ESTADO_CIVIL': ['soltero'] * 5 + ['casado'], 'EDAD2': [25, 30, 28, 35, 22, 40]})
+    familiar = cc.AnalisisFamiliarFAC(df, directorio_graficos=str(tmp_path))
+
+    assert familiar.diferencias_edad() is None
+    assert familiar.diferencias_edad() is None   # memoizado, sin registrar pruebas
+    assert familiar.registro.tabla().empty
+
+    familiar.analizar_edad_estado_civil()
+    assert 'no evaluable' in capsys.readouterr().out
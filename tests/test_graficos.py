@@ -0,0 +1,23 @@
+"""Nombres de carpeta de los gráficos por unidad."""
+import Código_Conjunto as cc
+
+
+def test_unidades_con_el_mismo_nombre_seguro_no_comparten_carpeta():
+    carpetas = cc._nombres_seguros(['CACOM-1', 'CACOM 1', 'cacom_1', 'ESUFA', 'Añil'])
+
+    assert len(set(n.lower() for n in carpetas.values())) == 5
+    assert carpetas['ESUFA'] == 'ESUFA' and carpetas['Añil'] == 'Anil'   # sin colisión, sin sufijo
+    assert carpetas['CACOM-1'].startswith('CACOM_1_')
+    assert cc._nombres_seguros(['CACOM 1', 'CACOM-1']) == {k: carpetas[k] for k in ('CACOM 1', 'CACOM-1')}
+
+
+def test_medir_no_cambia_la_figura_actual():
+    import matplotlib.pyplot as plt
+
+    with cc.GestorFiguras() as gestor:
+        primera, ultima = plt.figure(), plt.figure()
+        plt.figure(primera.number)
+        gestor.medir()
+        assert plt.gcf() is primera
+        assert gestor.pico_abiertas >= 2 and gestor.pico_memoria > 0
+    assert not plt.fignum_exists(ultima.number)
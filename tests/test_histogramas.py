@@ -0,0 +1,30 @@
+"""Histogramas de edad por estrato frente a pandas."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import Código_Conjunto as cc
+
+
+@pytest.fixture
+def poblacion():
+    rng = np.random.default_rng(3)
+    n = 2_000
+    return pd.DataFrame({'EDAD2': rng.integers(18, 60, n).astype(float),
+                         'SEXO_UP': rng.choice(['HOMBRE', 'MUJER'], n, p=[0.8, 0.2]),
+                         'CATEGORIA_UP': rng.choice(['OFICIAL', 'SUBOFICIAL', 'CIVIL'], n)})
+
+
+def test_histograma_cuantiles_y_medias_como_pandas(poblacion):
+    histograma = cc.HistogramaEdades.desde_df(poblacion, 'EDAD2', ['CATEGORIA_UP'])
+    q = [0.1, 0.25, 0.5, 0.9]
+    esperado = poblacion.groupby('CATEGORIA_UP')['EDAD2'].quantile(q).unstack()
+    np.testing.assert_allclose(histograma.cuantiles(q).to_numpy(), esperado.to_numpy())
+    np.testing.assert_allclose(histograma.medias(), poblacion.groupby('CATEGORIA_UP')['EDAD2'].mean())
+
+
+def test_histograma_agrupar_como_pd_cut(poblacion):
+    histograma = cc.HistogramaEdades.desde_df(poblacion, 'EDAD2')
+    esperado = pd.cut(poblacion['EDAD2'], cc.BINS_ETARIOS, labels=cc.GRUPOS_ETARIOS,
+                      include_lowest=True).value_counts().reindex(cc.GRUPOS_ETARIOS)
+    np.testing.assert_array_equal(histograma.agrupar(cc.BINS_ETARIOS, cc.GRUPOS_ETARIOS).sum(), esperado)
@@ -0,0 +1,37 @@
+"""Presupuesto de importación: la línea de comandos no debe cargar librerías pesadas al arrancar."""
+import json
+import subprocess
+import sys
+
+from conftest import RAIZ
+
+PESADAS = ('matplotlib', 'seaborn', 'scipy', 'sklearn', 'statsmodels')
+
+# Segundos que puede tardar el módulo, sin contar pandas y numpy (≈0.1 s medidos)
+PRESUPUESTO_S = 1.0
+
+SONDA = """
+import json, sys, time
+import numpy, pandas
+inicio = time.perf_counter()
+import Código_Conjunto as cc
+cc.construir_parser()
+segundos = time.perf_counter() - inicio
+print(json.dumps({'segundos': segundos, 'cargadas': [m for m in %r if m in sys.modules]}))
+""" % (PESADAS,)
+
+
+def _sondear():
+    salida = subprocess.run([sys.executable, '-c', SONDA], cwd=RAIZ, capture_output=True, text=True,
+                            check=True, env={'PYTHONDONTWRITEBYTECODE': '1', 'MPLBACKEND': 'Agg'})
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def test_importar_no_carga_librerias_pesadas():
+    assert _sondear()['cargadas'] == []
+
+
+def test_importar_dentro_del_presupuesto():
+    # Se toma el mejor de tres para no depender de la carga de la máquina
+    segundos = min(_sondear()['segundos'] for _ in range(3))
+    assert segundos < PRESUPUESTO_S, f"importar el módulo tardó {segundos:.2f} s"
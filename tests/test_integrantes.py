@@ -0,0 +1,59 @@
+"""MatrizIntegrantes frente a separar y contar cada respuesta directamente."""
+import numpy as np
+import pandas as pd
+
+import Código_Conjunto as cc
+
+RESPUESTAS = pd.Series(['Mamá;papá', 'madre ; PADRE', np.nan, 'hermano;hermano', 'tío',
+                        'mama;papa;abuela', 'tío', np.nan, 'esposa'],
+                       index=range(10, 19), name='VIVE_CON')
+
+
+def _esperado(serie):
+    filas = []
+    for respuesta in serie:
+        tokens = [] if pd.isna(respuesta) else [cc.normalizar_texto(t) for t in respuesta.split(';')]
+        filas.append({cc.canon_map.get(t, t): 1 for t in tokens if t})
+    return pd.DataFrame(filas, index=serie.index).fillna(0).astype(int)
+
+
+def test_matriz_coincide_con_separar_fila_por_fila():
+    matriz = cc.MatrizIntegrantes.desde_serie(RESPUESTAS)
+    esperado = _esperado(RESPUESTAS)
+
+    assert matriz.integrantes[:3] == ['Madre', 'Padre', 'Tio']   # orden de map_categorias primero
+    assert set(matriz.integrantes) == set(esperado.columns)
+    densa = pd.DataFrame(matriz.matriz.toarray(), index=RESPUESTAS.index, columns=matriz.integrantes)
+    pd.testing.assert_frame_equal(densa, esperado[matriz.integrantes], check_dtype=False)
+
+    indicadoras = matriz.a_dataframe().sparse.to_dense()
+    assert list(indicadoras.columns) == [f"VIVE_CON_{c}" for c in matriz.integrantes]
+    np.testing.assert_array_equal(indicadoras.to_numpy(), densa.to_numpy())
+
+
+def test_frecuencias_coocurrencia_y_tamanos():
+    matriz = cc.MatrizIntegrantes.desde_serie(RESPUESTAS)
+    densa = _esperado(RESPUESTAS)[matriz.integrantes].to_numpy()
+
+    frecuencias = matriz.frecuencias()
+    assert frecuencias['Madre'] == 3 and frecuencias['Tio'] == 2 and frecuencias['hermano'] == 1
+    assert frecuencias.is_monotonic_decreasing
+    np.testing.assert_array_equal(matriz.coocurrencia().to_numpy(), densa.T @ densa)
+
+    tamanos = matriz.tamanos()
+    assert tamanos.isna().sum() == 2
+    np.testing.assert_array_equal(tamanos.dropna().to_numpy(), densa.sum(axis=1)[tamanos.notna().to_numpy()])
+
+
+def test_columnas_lista_detectadas():
+    df = pd.DataFrame({'VIVE_CON': RESPUESTAS, 'SEXO': ['hombre'] * 9})
+    assert cc.detectar_columnas_lista(df) == ['VIVE_CON']
+
+
+def test_limpieza_conserva_las_listas_y_la_matriz_las_canoniza():
+    corregido = cc.limpiar_datos(pd.DataFrame({'VIVE_CON': RESPUESTAS}))['VIVE_CON']
+    # Como en la limpieza original: solo se canoniza la celda completa
+    assert corregido.loc[11] == 'madre;padre'
+    assert corregido.loc[14] == 'Tio'
+    pd.testing.assert_series_equal(cc.MatrizIntegrantes.desde_serie(corregido).frecuencias(),
+                                   cc.MatrizIntegrantes.desde_serie(RESPUESTAS).frecuencias())
@@ -0,0 +1,87 @@
+"""Comparación interanual: alineación de esquemas, fusión por año y pruebas de cambio."""
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+import Código_Conjunto as cc
+
+pytest.importorskip('pyarrow')
+
+
+def test_alinear_esquema_alias_mojibake_y_prioridad():
+    columnas = ['EDAD', 'Edad2', 'Sexo Biológico', 'CATEGORÃ\x8dA', 'Nivel de Educación', 'OTRA']
+    assert cc.alinear_esquema(columnas) == {
+        'Edad2': 'EDAD2', 'Sexo Biológico': 'SEXO', 'CATEGORÃ\x8dA': 'CATEGORIA',
+        'Nivel de Educación': 'NIVEL_EDUCATIVO'}
+
+
+def _anio(n, p_mujer, semilla, esquema):
+    rng = np.random.default_rng(semilla)
+    df = pd.DataFrame({
+        'EDAD2': rng.integers(18, 62, n),
+        'SEXO': rng.choice(['Hombre', 'Mujer'], n, p=[1 - p_mujer, p_mujer]),
+        'CATEGORIA': rng.choice(['Oficial', 'Suboficial'], n),
+        'GRADO': rng.choice(['T1', 'T2', 'CT', 'MY'], n),
+    })
+    return df.rename(columns=esquema)
+
+
+@pytest.fixture
+def archivos(tmp_path):
+    antiguo = _anio(600, 0.15, 1, {'EDAD2': 'EDAD', 'SEXO': 'Sexo_Biologico', 'GRADO': 'RANGO'})
+    nuevo = _anio(700, 0.30, 2, {})
+    rutas = {}
+    for nombre, df in (('JEFAB_2023_corregido.csv', antiguo), ('JEFAB_2024_corregido.parquet', nuevo)):
+        rutas[nombre] = str(tmp_path / nombre)
+        if nombre.endswith('.csv'):
+            df.to_csv(rutas[nombre], index=False)
+        else:
+            df.to_parquet(rutas[nombre], index=False)
+    return rutas, antiguo, nuevo
+
+
+def test_indices_y_prueba_de_masculinidad(archivos):
+    rutas, antiguo, nuevo = archivos
+    comparacion = cc.ComparacionInteranualFAC(list(rutas.values()), paralelo=False)
+    comparacion.ejecutar()
+
+    assert comparacion.anios == [2023, 2024]
+    renombradas = comparacion.esquemas[rutas['JEFAB_2023_corregido.csv']]['renombradas']
+    assert renombradas == {'EDAD': 'EDAD2', 'Sexo_Biologico': 'SEXO', 'RANGO': 'GRADO'}
+
+    sexos = [antiguo['Sexo_Biologico'].value_counts(), nuevo['SEXO'].value_counts()]
+    indices = comparacion.resultados['indices']
+    for anio, conteo in zip(('2023', '2024'), sexos):
+        assert indices.loc['indice_masculinidad', anio] == pytest.approx(conteo['Hombre'] / conteo['Mujer'] * 100)
+    assert indices.loc['indice_masculinidad', 'Δ 2023→2024'] == pytest.approx(
+        indices.loc['indice_masculinidad', '2024'] - indices.loc['indice_masculinidad', '2023'])
+    esperado = stats.chi2_contingency([[s['Hombre'], s['Mujer']] for s in sexos])[1]
+    assert indices.loc['indice_masculinidad', 'p 2023→2024'] == pytest.approx(esperado)
+
+    piramide = comparacion.resultados['piramide']
+    assert piramide[['2023', '2024']].sum().to_numpy() == pytest.approx([100, 100])
+    pruebas = comparacion.pruebas()
+    assert 'q_val' in pruebas.columns and len(pruebas) >= 5
+
+
+def test_archivos_del_mismo_anio_se_fusionan(archivos, tmp_path):
+    rutas, _, nuevo = archivos
+    mitades = []
+    for i, parte in enumerate((nuevo.iloc[:300], nuevo.iloc[300:])):
+        mitades.append(str(tmp_path / f"fuerza{i}.parquet"))
+        parte.to_parquet(mitades[-1], index=False)
+
+    unico = cc.ComparacionInteranualFAC(list(rutas.values()), paralelo=False).agregar()
+    partido = cc.ComparacionInteranualFAC({2023: rutas['JEFAB_2023_corregido.csv'], 2024: mitades},
+                                          paralelo=True, max_workers=2).agregar()
+    assert partido[2024].n_filas == unico[2024].n_filas == 700
+    pd.testing.assert_frame_equal(partido[2024].tablas[('GRADO_LOW', 'SEXO_UP')],
+                                  unico[2024].tablas[('GRADO_LOW', 'SEXO_UP')], check_like=True)
+
+
+def test_un_solo_anio_y_nombre_sin_anio():
+    with pytest.raises(ValueError):
+        cc.ComparacionInteranualFAC(['JEFAB_2024_a.csv', 'JEFAB_2024_b.csv'])
+    with pytest.raises(ValueError):
+        cc.anio_de_archivo('datos_corregidos.csv')
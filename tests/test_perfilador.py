@@ -0,0 +1,73 @@
+"""PerfiladorEtapas: etapas anidadas, picos de memoria y traza JSON."""
+import json
+import pstats
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import Código_Conjunto as cc
+
+
+def test_inactivo_no_registra():
+    perfilador = cc.PerfiladorEtapas()
+
+    @perfilador.perfilar()
+    def duplicar(df):
+        return df * 2
+
+    assert duplicar(pd.DataFrame({'a': [1]}))['a'].iloc[0] == 2
+    with perfilador.etapa('bloque') as registro:
+        assert registro == {}
+    assert perfilador.etapas == []
+
+
+def test_etapas_anidadas_formas_y_picos():
+    perfilador = cc.PerfiladorEtapas().activar(memoria=True)
+
+    @perfilador.perfilar('suma {eje}')
+    def sumar(df, eje=0):
+        return df.sum(axis=eje)
+
+    try:
+        with perfilador.etapa('externa', np.zeros((10, 3))) as externa:
+            with perfilador.etapa('interna'):
+                bloque = np.ones(2 ** 20)   # 8 MB
+                del bloque
+            externa['salida'] = sumar(pd.DataFrame(np.ones((4, 2))), eje=1)
+    finally:
+        perfilador.desactivar()
+
+    tabla = perfilador.tabla().set_index('etapa')
+    assert list(tabla.index) == ['externa', 'interna', 'suma 1']
+    assert tabla.loc['interna', 'padre'] == 'externa' and tabla.loc['suma 1', 'nivel'] == 1
+    assert tabla.loc['externa', 'entrada'] == [10, 3]
+    assert tabla.loc['suma 1', 'entrada'] == [4, 2] and tabla.loc['suma 1', 'salida'] == [4]
+    # El pico de la etapa interna se propaga a la externa aunque ya se liberó
+    assert tabla.loc['interna', 'pico_memoria_mb'] >= 7.5
+    assert tabla.loc['externa', 'pico_memoria_mb'] >= tabla.loc['interna', 'pico_memoria_mb']
+    assert (tabla['tiempo_s'] >= 0).all() and (tabla['cpu_s'] >= 0).all()
+
+
+def test_error_queda_registrado():
+    perfilador = cc.PerfiladorEtapas().activar(memoria=False)
+    with pytest.raises(ZeroDivisionError):
+        with perfilador.etapa('falla'):
+            1 / 0
+    assert perfilador.etapas[0]['error'].startswith('ZeroDivisionError')
+    assert 'pico_memoria_mb' not in perfilador.etapas[0]
+
+
+def test_traza_json_y_cprofile(tmp_path):
+    perfilador = cc.PerfiladorEtapas().activar(memoria=False, cprofile=True)
+    with perfilador.etapa('ordenar', list(range(5))):
+        sorted(range(1000), reverse=True)
+    perfilador.desactivar()
+
+    traza, volcado = str(tmp_path / 'traza.json'), str(tmp_path / 'perfil.prof')
+    assert perfilador.guardar(traza=traza, cprofile=volcado) == [traza, volcado]
+    with open(traza, encoding='utf-8') as f:
+        contenido = json.load(f)
+    assert [e['etapa'] for e in contenido['etapas']] == ['ordenar']
+    assert contenido['etapas'][0]['entrada'] == [5]
+    assert pstats.Stats(volcado).total_calls > 0
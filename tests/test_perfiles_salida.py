@@ -0,0 +1,69 @@
+"""Perfiles de salida de los gráficos y paquete PDF."""
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import Código_Conjunto as cc
+
+
+@pytest.fixture
+def poblacion():
+    rng = np.random.default_rng(8)
+    n = 400
+    crudos = pd.DataFrame({
+        'EDAD2': rng.integers(18, 62, n),
+        'SEXO': rng.choice(['Hombre', 'Mujer'], n),
+        'CATEGORIA': rng.choice(['Oficial', 'Suboficial'], n),
+        'GRADO': rng.choice(['T1', 'CT'], n),
+    })
+    return cc.AnalizadorDemograficoFAC(None).preparar_lote(crudos)
+
+
+def test_perfil_desconocido():
+    with pytest.raises(ValueError):
+        cc.obtener_perfil('jpg')
+    perfil = cc.obtener_perfil('publicacion')
+    perfil['dpi'] = 1
+    assert cc.PERFILES_SALIDA['publicacion']['dpi'] == 300   # se devuelve una copia
+
+
+@pytest.mark.parametrize('perfil, cabecera', [('vectorial', b'<?xml'), ('vectorial_pdf', b'%PDF'),
+                                              ('borrador', b'\x89PNG')])
+def test_formato_del_archivo_segun_perfil(tmp_path, monkeypatch, poblacion, perfil, cabecera):
+    monkeypatch.chdir(tmp_path)
+    generador = cc.GeneradorGraficosFAC(poblacion, paralelo=False, usar_cache=False, perfil=perfil)
+    generador.generar_graficos_univariados()
+
+    extension = cc.PERFILES_SALIDA[perfil]['formato']
+    assert generador.figuras_creadas
+    for archivo in generador.figuras_creadas:
+        assert archivo.endswith(f".{extension}")
+        with open(archivo, 'rb') as f:
+            assert f.read(len(cabecera)) == cabecera
+
+
+def test_borrador_y_publicacion_difieren_en_resolucion(tmp_path, monkeypatch, poblacion):
+    from PIL import Image
+
+    monkeypatch.chdir(tmp_path)
+    tamanos = {}
+    for perfil in ('borrador', 'publicacion'):
+        os.makedirs(perfil)
+        monkeypatch.chdir(tmp_path / perfil)
+        generador = cc.GeneradorGraficosFAC(poblacion, paralelo=False, usar_cache=False, perfil=perfil)
+        generador.generar_graficos_univariados()
+        tamanos[perfil] = Image.open(generador.figuras_creadas[0]).size
+        monkeypatch.chdir(tmp_path)
+    assert tamanos['publicacion'][0] > 2.5 * tamanos['borrador'][0]
+
+
+def test_paquete_pdf_una_pagina_por_grafico(tmp_path, monkeypatch, poblacion):
+    monkeypatch.chdir(tmp_path)
+    generador = cc.GeneradorGraficosFAC(poblacion, paralelo=False)
+    archivo = generador.generar_paquete_pdf('paquete.pdf')
+    with open(archivo, 'rb') as f:
+        paginas = len(re.findall(rb'/Type\s*/Page[^s]', f.read()))
+    assert paginas == len([t for t in generador._trabajos_todos() if t is not None])
@@ -0,0 +1,72 @@
+"""Reutilización de los archivos intermedios del pipeline (como en make)."""
+import os
+
+import pytest
+
+import Código_Conjunto as cc
+
+
+@pytest.fixture
+def archivos(tmp_path):
+    rutas = {nombre: str(tmp_path / f"{nombre}.xlsx") for nombre in ('crudo', 'limpio', 'corregido')}
+    for ruta in rutas.values():
+        open(ruta, 'w').close()
+    return rutas
+
+
+def _fechar(rutas, **segundos):
+    for nombre, t in segundos.items():
+        os.utime(rutas[nombre], (t, t))
+
+
+@pytest.fixture
+def pipeline(archivos, monkeypatch):
+    """Pipeline cuya limpieza e imputación solo registran que se ejecutaron"""
+    pipeline = cc.PipelineFAC(archivos['crudo'], archivos['limpio'], archivos['corregido'])
+    pipeline.resultados['clean'] = 'limpio en memoria'
+    monkeypatch.setattr(cc, 'imputar_datos', lambda df: df)
+    monkeypatch.setattr(cc, 'guardar_datos_corregidos', lambda df, ruta: pipeline.ejecutadas.append('guardado'))
+    return pipeline
+
+
+@pytest.mark.parametrize('fechas, reutiliza', [
+    ({'crudo': 100, 'limpio': 200, 'corregido': 300}, True),
+    ({'limpio': 100, 'corregido': 200, 'crudo': 300}, False),   # crudo actualizado tras el corregido
+    ({'crudo': 100, 'corregido': 200, 'limpio': 300}, False),   # limpio posterior al corregido
+    ({'limpio': 100, 'crudo': 200, 'corregido': 300}, False),   # limpio desactualizado respecto del crudo
+])
+def test_impute_reutiliza_solo_si_toda_la_cadena_esta_al_dia(pipeline, archivos, fechas, reutiliza):
+    _fechar(archivos, **fechas)
+    pipeline._etapa_impute(pedida=False)
+    assert ('impute' not in pipeline.ejecutadas) == reutiliza
+
+
+def test_impute_sin_limpio_compara_con_el_crudo(pipeline, archivos):
+    os.remove(archivos['limpio'])
+    _fechar(archivos, crudo=100, corregido=200)
+    pipeline._etapa_impute(pedida=False)
+    assert pipeline.ejecutadas == []
+    _fechar(archivos, corregido=50)
+    pipeline._etapa_impute(pedida=False)
+    assert pipeline.ejecutadas == ['impute', 'guardado']
+
+
+def test_archivo_al_dia(archivos):
+    _fechar(archivos, crudo=100, limpio=200, corregido=300)
+    assert cc.archivo_al_dia(archivos['corregido'], archivos['limpio'], archivos['crudo'])
+    assert not cc.archivo_al_dia(archivos['limpio'], archivos['corregido'])
+    assert cc.archivo_al_dia(archivos['limpio'], archivos['crudo'] + '.no_existe')
+    assert not cc.archivo_al_dia(archivos['corregido'] + '.no_existe', archivos['crudo'])
+
+
+def test_analisis_completo_escribe_el_reporte_como_el_pipeline(monkeypatch, tmp_path):
+    llamadas = {}
+    monkeypatch.setattr(cc, 'ejecutar_carga', lambda archivo: 'analizador')
+    monkeypatch.setattr(cc, 'ejecutar_estadisticas', lambda analizador: 'estadistico')
+    monkeypatch.setattr(cc, 'ejecutar_graficos', lambda *args: type('G', (), {'figuras_creadas': []})())
+    monkeypatch.setattr(cc, 'ejecutar_reportes', lambda *args, **kwargs: llamadas.update(kwargs))
+
+    salida = str(tmp_path)
+    cc.ejecutar_analisis_completo('datos.xlsx', salida=salida)
+    assert llamadas == {'directorio': os.path.join(salida, 'reporte'),
+                        'manifiesto_graficos': os.path.join(salida, '.cache_graficos.json')}
@@ -0,0 +1,32 @@
+"""Dibujo de gráficos en un pool de procesos."""
+import os
+
+import pandas as pd
+
+import Código_Conjunto as cc
+
+
+def _trabajo(archivo, n):
+    conteos = pd.Series(range(n, 0, -1), index=[f"nivel {i}" for i in range(n)])
+    return (archivo, cc._dibujar_barras_conteo,
+            {'conteos': conteos, 'figsize': (4, 3), 'color': 'steelblue', 'titulo': archivo, 'ylabel': 'Nivel'})
+
+
+def test_paralelo_y_secuencial_crean_los_mismos_archivos_en_orden(tmp_path):
+    nombres = ['c.png', 'a.png', 'b.png']
+    (tmp_path / 'p').mkdir()
+    (tmp_path / 's').mkdir()
+    paralelo = cc.PlanificadorGraficos(paralelo=True, max_workers=2).ejecutar(
+        [_trabajo(str(tmp_path / 'p' / n), i + 2) for i, n in enumerate(nombres)] + [None])
+    secuencial = cc.PlanificadorGraficos(paralelo=False).ejecutar(
+        [_trabajo(str(tmp_path / 's' / n), i + 2) for i, n in enumerate(nombres)])
+
+    assert [os.path.basename(p) for p in paralelo] == nombres
+    assert [os.path.basename(s) for s in secuencial] == nombres
+    for archivo in paralelo + secuencial:
+        with open(archivo, 'rb') as f:
+            assert f.read(8) == b'\x89PNG\r\n\x1a\n'
+
+
+def test_sin_trabajos():
+    assert cc.PlanificadorGraficos().ejecutar([None]) == []
@@ -0,0 +1,40 @@
+"""Dunn, Conover y Games-Howell frente a scikit-posthocs (al que reemplazan)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import Código_Conjunto as cc
+
+sp = pytest.importorskip('scikit_posthocs')
+
+
+@pytest.fixture
+def datos():
+    rng = np.random.default_rng(11)
+    grupos = {'casado': (38, 6, 120), 'soltero': (29, 5, 90), 'union libre': (33, 9, 45), 'viudo': (50, 4, 12)}
+    partes = [pd.DataFrame({'EDAD2': np.round(rng.normal(m, s, n)), 'ESTADO_CIVIL': g})
+              for g, (m, s, n) in grupos.items()]
+    return pd.concat(partes, ignore_index=True)
+
+
+@pytest.mark.parametrize('metodo, referencia', [('dunn', 'posthoc_dunn'), ('conover', 'posthoc_conover')])
+@pytest.mark.parametrize('p_adjust', [None, 'holm', 'fdr_bh'])
+def test_pruebas_de_rangos_igual_a_scikit_posthocs(datos, metodo, referencia, p_adjust):
+    esperado = getattr(sp, referencia)(datos, val_col='EDAD2', group_col='ESTADO_CIVIL', p_adjust=p_adjust)
+    resultado = getattr(cc.PruebasPostHoc(datos, 'EDAD2', 'ESTADO_CIVIL'), metodo)(p_adjust)
+    np.testing.assert_allclose(resultado.to_numpy(), esperado.loc[resultado.index, resultado.columns].to_numpy(),
+                               rtol=1e-8, atol=1e-12)
+
+
+def test_games_howell_igual_a_scikit_posthocs(datos):
+    esperado = sp.posthoc_games_howell(datos, val_col='EDAD2', group_col='ESTADO_CIVIL')
+    resultado = cc.PruebasPostHoc(datos, 'EDAD2', 'ESTADO_CIVIL').games_howell()
+    np.testing.assert_allclose(resultado.to_numpy(), esperado.loc[resultado.index, resultado.columns].to_numpy(),
+                               rtol=1e-6, atol=1e-10)
+
+
+def test_games_howell_invariante_a_desplazamientos(datos):
+    desplazados = datos.assign(EDAD2=datos['EDAD2'] + 1e8)
+    base = cc.PruebasPostHoc(datos, 'EDAD2', 'ESTADO_CIVIL').games_howell()
+    resultado = cc.PruebasPostHoc(desplazados, 'EDAD2', 'ESTADO_CIVIL').games_howell()
+    np.testing.assert_allclose(resultado.to_numpy(), base.to_numpy(), rtol=1e-6, atol=1e-10)
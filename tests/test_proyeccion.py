@@ -0,0 +1,64 @@
+"""Proyección de columnas al leer: solo se cargan las columnas que usa cada etapa."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import Código_Conjunto as cc
+
+
+@pytest.fixture
+def ancho():
+    rng = np.random.default_rng(47)
+    n = 40
+    df = pd.DataFrame({f"P{i:03d}": rng.integers(0, 5, n) for i in range(60)})
+    df['EDAD2'] = rng.integers(18, 60, n)
+    df['SEXO'] = rng.choice(['Hombre', 'Mujer'], n)
+    df['CATEGORIA'] = rng.choice(['Oficial', 'Suboficial'], n)
+    df['ESTADO_CIVIL'] = rng.choice(['soltero', 'casado', 'divorciado'], n)
+    return df
+
+
+def _escribir(df, tmp_path, extension):
+    if extension == 'parquet':
+        pytest.importorskip('pyarrow')
+    archivo = str(tmp_path / f"ancho.{extension}")
+    getattr(df, {'xlsx': 'to_excel', 'csv': 'to_csv', 'parquet': 'to_parquet'}[extension])(archivo, index=False)
+    return archivo
+
+
+@pytest.mark.parametrize('extension', ['xlsx', 'csv', 'parquet'])
+def test_leer_columnas_proyecta_y_omite_faltantes(ancho, tmp_path, extension):
+    archivo = _escribir(ancho, tmp_path, extension)
+
+    leido = cc.leer_columnas(archivo, ['SEXO', 'NO_EXISTE', 'EDAD2', 'SEXO'])
+    assert sorted(leido.columns) == ['EDAD2', 'SEXO']
+    pd.testing.assert_frame_equal(leido[['SEXO', 'EDAD2']], ancho[['SEXO', 'EDAD2']], check_dtype=False)
+    assert cc.leer_columnas(archivo).shape == ancho.shape
+
+
+def test_analizador_carga_solo_columnas_demograficas(ancho, tmp_path):
+    analizador = cc.AnalizadorDemograficoFAC(_escribir(ancho, tmp_path, 'csv'))
+    analizador.cargar_datos()
+    assert not any(c.startswith('P0') for c in analizador.df.columns)
+    assert {'EDAD2', 'SEXO_UP', 'CATEGORIA_UP'} <= set(analizador.df.columns)
+
+
+def test_familiar_lee_solo_las_secciones_pedidas(ancho, tmp_path):
+    archivo = _escribir(ancho, tmp_path, 'csv')
+    secciones = ('estado_civil', 'edad_estado_civil')
+    assert cc.AnalisisFamiliarFAC.columnas_requeridas(secciones) == ['ESTADO_CIVIL', 'EDAD2']
+
+    familiar = cc.AnalisisFamiliarFAC.desde_archivo(archivo, secciones)
+    assert list(familiar.df.columns) == ['EDAD2', 'ESTADO_CIVIL']
+    assert set(familiar.df['ESTADO_CIVIL']) <= {'soltero', 'casado', 'divorciado/separado'}
+    with pytest.raises(ValueError):
+        cc.AnalisisFamiliarFAC.columnas_requeridas(['no_existe'])
+
+
+def test_secciones_por_defecto_no_leen_todo_el_cuestionario():
+    columnas = cc.AnalisisFamiliarFAC.columnas_requeridas()
+    assert columnas is not None
+    assert set(cc.COLUMNAS_INTEGRANTES) <= set(columnas)
+    assert 'factores_riesgo' not in cc.AnalisisFamiliarFAC._secciones()
+    # El cribado sigue disponible si se pide, y entonces se lee el archivo completo
+    assert cc.AnalisisFamiliarFAC.columnas_requeridas(['estado_civil', 'factores_riesgo']) is None
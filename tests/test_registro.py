@@ -0,0 +1,72 @@
+"""Registro global de pruebas: q-valores sobre todas las familias frente a statsmodels."""
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.stats.multitest import multipletests
+
+import Código_Conjunto as cc
+
+
+@pytest.fixture
+def p_valores():
+    rng = np.random.default_rng(7)
+    p = np.concatenate([rng.uniform(0, 0.01, 5), rng.uniform(0, 1, 40), [0.03, 0.03, 1.0]])
+    return rng.permutation(p)
+
+
+def test_registro_q_valores_globales(p_valores):
+    registro = cc.RegistroPruebas('bh')
+    mitad = len(p_valores) // 2
+    registro.registrar_lote('a', [f"a{i}" for i in range(mitad)], p_valores[:mitad])
+    registro.registrar_lote('b', [f"b{i}" for i in range(len(p_valores) - mitad)], p_valores[mitad:])
+    np.testing.assert_allclose(registro.tabla()['q_val'], multipletests(p_valores, method='fdr_bh')[1])
+
+
+def test_registro_reemplaza_la_misma_clave():
+    registro = cc.RegistroPruebas('holm')
+    registro.registrar('f', 'x', 0.01)
+    registro.registrar('f', 'y', 0.04)
+    registro.registrar('f', 'x', 0.02)
+    assert len(registro) == 2
+    assert registro.q_valor('f', 'x') == pytest.approx(0.04)
+
+
+def _poblacion(n=400, semilla=3):
+    rng = np.random.default_rng(semilla)
+    edades = rng.integers(18, 60, n)
+    sexo = np.where(rng.random(n) < 0.3, 'Mujer', 'Hombre')
+    edades = np.where(sexo == 'Mujer', edades - 3, edades)
+    crudos = pd.DataFrame({'EDAD2': edades, 'SEXO': sexo,
+                           'CATEGORIA': rng.choice(['Oficial', 'Suboficial', 'Civil'], n)})
+    return cc.AnalizadorDemograficoFAC(None).preparar_lote(crudos)
+
+
+def test_diferencias_solo_informan_p_y_q_del_registro(capsys):
+    registro = cc.RegistroPruebas('bh')
+    registro.registrar_lote('previas', [f"x{i}" for i in range(30)], np.linspace(0.2, 1, 30))
+    analisis = cc.AnalisisEstadisticoFAC(_poblacion(), registro=registro)
+    resultados = analisis.analizar_diferencias_subgrupos()
+
+    salida = capsys.readouterr().out
+    assert 'p ajustado' not in salida
+    for clave, resultado in resultados.items():
+        assert 'p_ajustado' not in resultado and 'significancia' not in resultado
+        assert f"q = {registro.q_valor('diferencias', clave):.4f}" in salida
+    modelo = cc.ResultadosFAC.desde_analisis(analisis)
+    assert all(d.q_val == pytest.approx(registro.q_valor('diferencias', f"{d.variable}×{d.grupo}"))
+               for d in modelo.diferencias)
+
+
+def test_familiar_decide_la_asociacion_con_el_valor_q(tmp_path, capsys):
+    df = pd.DataFrame({'HIJOS': ['si'] * 30 + ['no'] * 30,
+                       'VIVIENDA_PROPIA': ['si'] * 20 + ['no'] * 10 + ['si'] * 11 + ['no'] * 19})
+    registro = cc.RegistroPruebas('bonferroni')
+    registro.registrar_lote('previas', [f"x{i}" for i in range(9)], [0.5] * 9)
+    familiar = cc.AnalisisFamiliarFAC(df, directorio_graficos=str(tmp_path), registro=registro)
+    familiar.analizar_vivienda_propia()
+
+    p_val = familiar.chi_cuadrado('HIJOS', 'VIVIENDA_PROPIA')['p_val']
+    assert p_val < 0.05 <= registro.q_valor('familiar', 'HIJOS×VIVIENDA_PROPIA')
+    salida = capsys.readouterr().out
+    assert 'No se encontró asociación significativa' in salida
+    assert 'Existe asociación' not in salida
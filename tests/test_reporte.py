@@ -0,0 +1,64 @@
+"""Reporte incremental: solo se re-renderizan las secciones cuyas entradas cambiaron."""
+import dataclasses
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import Código_Conjunto as cc
+
+
+@pytest.fixture(scope='module')
+def resultados():
+    rng = np.random.default_rng(8)
+    n = 500
+    crudos = pd.DataFrame({
+        'EDAD2': rng.integers(18, 62, n),
+        'SEXO': rng.choice(['Hombre', 'Mujer'], n, p=[0.7, 0.3]),
+        'CATEGORIA': rng.choice(['Oficial', 'Suboficial', 'Civil'], n),
+        'GRADO': rng.choice(['T1', 'T2', 'CT'], n),
+    })
+    estadistico = cc.AnalisisEstadisticoFAC(cc.AnalizadorDemograficoFAC(None).preparar_lote(crudos))
+    estadistico.calcular_indices_demograficos()
+    estadistico.analizar_estructura_etaria()
+    return cc.ResultadosFAC.desde_analisis(estadistico)
+
+
+def _leer(archivos):
+    contenido = {}
+    for archivo in archivos:
+        with open(archivo, encoding='utf-8') as f:
+            contenido[os.path.basename(archivo)] = f.read()
+    return contenido
+
+
+def test_regenerar_sin_cambios_reutiliza_todo(resultados, tmp_path):
+    directorio = str(tmp_path / 'reporte')
+    primero = cc.ReporteFAC(resultados, directorio=directorio)
+    archivos = primero.generar()
+    assert not primero.secciones_reutilizadas
+    assert os.path.exists(os.path.join(directorio, cc.ReporteFAC.ARCHIVO_CACHE))
+
+    segundo = cc.ReporteFAC(resultados, directorio=directorio)
+    contenido = _leer(archivos)
+    assert _leer(segundo.generar()) == contenido
+    assert not segundo.secciones_regeneradas
+    assert set(segundo.secciones_reutilizadas) == {s for s, _, _ in cc.SECCIONES_REPORTE}
+    assert "Total de efectivos: 500" in contenido['reporte.md']
+
+
+def test_solo_cambia_la_seccion_de_los_indices(resultados, tmp_path):
+    directorio = str(tmp_path / 'reporte')
+    cc.ReporteFAC(resultados, directorio=directorio).generar()
+
+    indices = dataclasses.replace(resultados.indices, indice_masculinidad=123.4)
+    reporte = cc.ReporteFAC(dataclasses.replace(resultados, indices=indices), directorio=directorio)
+    archivos = reporte.generar(formatos=('md',))
+    assert reporte.secciones_regeneradas == ['estructura']
+    assert "123.4" in _leer(archivos)['reporte.md']
+
+
+def test_formato_no_soportado(resultados, tmp_path):
+    with pytest.raises(ValueError):
+        cc.ReporteFAC(resultados, directorio=str(tmp_path)).generar(formatos=('pdf',))
@@ -0,0 +1,59 @@
+"""Modelo de resultados: exportar a JSON/Parquet y volver a cargar sin pérdidas."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import Código_Conjunto as cc
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture(scope='module')
+def modelo():
+    rng = np.random.default_rng(21)
+    n = 800
+    crudos = pd.DataFrame({
+        'EDAD2': rng.integers(18, 62, n),
+        'SEXO': rng.choice(['Hombre', 'Mujer'], n, p=[0.7, 0.3]),
+        'CATEGORIA': rng.choice(['Oficial', 'Suboficial', 'Civil'], n),
+        'GRADO': rng.choice(['T1', 'T2', 'CT'], n),
+        'ESTADO_CIVIL': rng.choice(['Soltero', 'Casado'], n),
+        'NIVEL_EDUCATIVO': rng.choice(['Técnico', 'Profesional'], n),
+    })
+    estadistico = cc.AnalisisEstadisticoFAC(cc.AnalizadorDemograficoFAC(None).preparar_lote(crudos))
+    estadistico.calcular_indices_demograficos()
+    estadistico.analizar_estructura_etaria()
+    estadistico.analizar_asociaciones_demograficas()
+    estadistico.analizar_diferencias_subgrupos()
+    return cc.ResultadosFAC.desde_analisis(estadistico)
+
+
+def test_modelo_completo(modelo):
+    assert modelo.n_filas == 800
+    assert modelo.indices is not None and modelo.estructura_etaria is not None
+    assert len(modelo.asociaciones) >= 3 and len(modelo.diferencias) == 2
+    assert sum(modelo.estructura_etaria.distribucion.values()) == 800
+
+
+def test_ida_y_vuelta_json_y_parquet(modelo, tmp_path):
+    modelo.exportar(str(tmp_path), ('json', 'parquet'))
+
+    assert cc.ResultadosFAC.cargar_json(str(tmp_path / cc.ResultadosFAC.ARCHIVO_JSON)) == modelo
+    leidas = cc.ResultadosFAC.leer_tablas_parquet(str(tmp_path))
+    esperadas = modelo.tablas()
+    assert set(leidas) == set(esperadas)
+    for nombre, tabla in esperadas.items():
+        pd.testing.assert_frame_equal(leidas[nombre], tabla, check_dtype=False)
+
+
+def test_formato_desconocido(modelo, tmp_path):
+    with pytest.raises(ValueError):
+        modelo.exportar(str(tmp_path), ('xml',))
+
+
+def test_modelo_version_3_con_p_ajustado_se_carga(modelo):
+    datos = modelo.a_dict()
+    for diferencia in datos['diferencias']:
+        diferencia['p_ajustado'] = diferencia['p_val']
+    datos['version'] = 3
+    assert cc.ResultadosFAC.desde_dict(datos).diferencias == modelo.diferencias